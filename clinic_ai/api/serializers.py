@@ -5,7 +5,7 @@ from clinic_ai.core.models import (
     Patient, Message, Appointment, StaffResponse, SystemMetrics,
     TranslationHistory, MedicalTerminology, Doctor, DoctorAvailability,
     ProcedureType, AppointmentWaitlist, SchedulingOptimization,
-    AppointmentReminder
+    AppointmentReminder, ClinicResource, AvailabilityException
 )
 
 
@@ -43,10 +43,13 @@ class AppointmentSerializer(serializers.ModelSerializer):
         model = Appointment
         fields = [
             'id', 'patient', 'patient_name', 'patient_phone', 'doctor', 
-            'procedure', 'scheduled_at', 'status', 'notes', 
+            'assigned_doctor', 'procedure', 'scheduled_at', 'status',
+            'checked_in_at', 'seen_at', 'notes', 
             'approved_by', 'approved_by_name', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        # Either the doctor name or the doctor record is enough; the other is filled on save
+        extra_kwargs = {'doctor': {'required': False}}
 
 
 class StaffResponseSerializer(serializers.ModelSerializer):
@@ -169,6 +172,26 @@ class DoctorAvailabilitySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
+class AvailabilityExceptionSerializer(serializers.ModelSerializer):
+    """Serializer for Availability Exception."""
+    doctor_name = serializers.CharField(source='doctor.name', read_only=True, default=None)
+
+    class Meta:
+        model = AvailabilityException
+        fields = [
+            'id', 'doctor', 'doctor_name', 'exception_type', 'start_at', 'end_at',
+            'reason', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate(self, data):
+        start_at = data.get('start_at', getattr(self.instance, 'start_at', None))
+        end_at = data.get('end_at', getattr(self.instance, 'end_at', None))
+        if start_at and end_at and end_at <= start_at:
+            raise serializers.ValidationError('end_at must be after start_at')
+        return data
+
+
 class ProcedureTypeSerializer(serializers.ModelSerializer):
     """Serializer for Procedure Type."""
     
@@ -177,7 +200,19 @@ class ProcedureTypeSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'name_ko', 'name_zh', 'name_ja',
             'description', 'estimated_duration', 'requires_equipment',
-            'preparation_time', 'recovery_time',
+            'preparation_time', 'recovery_time', 'resources',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class ClinicResourceSerializer(serializers.ModelSerializer):
+    """Serializer for Clinic Resource."""
+    
+    class Meta:
+        model = ClinicResource
+        fields = [
+            'id', 'name', 'resource_type', 'capacity', 'is_active',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -207,8 +242,8 @@ class SchedulingOptimizationSerializer(serializers.ModelSerializer):
     class Meta:
         model = SchedulingOptimization
         fields = [
-            'id', 'appointment', 'original_scheduled_at', 'optimized_scheduled_at',
-            'optimization_score', 'wait_time_reduction_minutes',
+            'id', 'appointment', 'doctor', 'original_scheduled_at', 'optimized_scheduled_at',
+            'optimization_score', 'wait_time_reduction_minutes', 'expected_wait_minutes',
             'patient_accepted', 'optimization_reason',
             'created_at', 'updated_at'
         ]
@@ -238,6 +273,68 @@ class AvailableSlotsRequestSerializer(serializers.Serializer):
         default='any',
         required=False
     )
+    procedure_type_id = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=500, required=False)
+    cursor = serializers.DateTimeField(required=False, help_text="next_cursor of the previous page")
+
+
+class EarliestSlotsRequestSerializer(serializers.Serializer):
+    """Serializer for cross-doctor earliest slots request."""
+    procedure_type_id = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=100, required=False)
+    preferred_time = serializers.ChoiceField(
+        choices=['morning', 'afternoon', 'evening', 'any'],
+        default='any',
+        required=False
+    )
+
+
+class NextSlotsRequestSerializer(serializers.Serializer):
+    """Serializer for next available slots query."""
+    doctor_id = serializers.IntegerField()
+    procedure_type_id = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=50, required=False)
+
+
+class SlotHoldRequestSerializer(serializers.Serializer):
+    """Serializer for slot hold request."""
+    patient_id = serializers.IntegerField()
+    doctor_id = serializers.IntegerField()
+    scheduled_at = serializers.DateTimeField()
+    procedure_type_id = serializers.IntegerField(required=False)
+
+
+class BulkRescheduleRequestSerializer(serializers.Serializer):
+    """Serializer for bulk rescheduling request."""
+    doctor_id = serializers.IntegerField()
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    include_other_doctors = serializers.BooleanField(default=True)
+    run_async = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['end'] <= data['start']:
+            raise serializers.ValidationError('end must be after start')
+        return data
+
+
+class GroupBookingRequestSerializer(serializers.Serializer):
+    """Serializer for group booking request."""
+    patient_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=50)
+    doctor_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1)
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField()
+    procedure_type_id = serializers.IntegerField(required=False)
+    max_span_minutes = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        if data['end_date'] <= data['start_date']:
+            raise serializers.ValidationError('end_date must be after start_date')
+        if len(set(data['patient_ids'])) != len(data['patient_ids']):
+            raise serializers.ValidationError('patient_ids must be unique')
+        return data
 
 
 class AppointmentOptimizationRequestSerializer(serializers.Serializer):
@@ -247,6 +344,9 @@ class AppointmentOptimizationRequestSerializer(serializers.Serializer):
     procedure_type_id = serializers.IntegerField()
     requested_time = serializers.DateTimeField()
     preferences = serializers.JSONField(required=False)
+    appointment_id = serializers.IntegerField(
+        required=False, help_text="Existing booking being re-optimized; its result is stored and reused"
+    )
 
 
 class WaitlistRequestSerializer(serializers.Serializer):
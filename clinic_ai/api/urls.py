@@ -9,9 +9,12 @@ from .views import (
 )
 from .views_phase2 import (
     TranslationViewSet, MedicalTerminologyViewSet,
-    DoctorViewSet, DoctorAvailabilityViewSet, ProcedureTypeViewSet,
-    AppointmentWaitlistViewSet, AppointmentReminderViewSet,
-    SchedulingOptimizationView, AvailableSlotsView
+    DoctorViewSet, DoctorAvailabilityViewSet, AvailabilityExceptionViewSet,
+    ProcedureTypeViewSet, ClinicResourceViewSet,
+    AppointmentWaitlistViewSet, AppointmentReminderViewSet, SchedulingOptimizationViewSet,
+    SchedulingOptimizationView, AvailableSlotsView, EarliestSlotsView,
+    SlotHoldView, SlotHoldDetailView, SlotHoldConfirmView, BulkRescheduleView,
+    GroupBookingView, NextSlotsView
 )
 
 # Create router and register viewsets
@@ -29,9 +32,12 @@ router.register(r'translations', TranslationViewSet, basename='translation')
 router.register(r'medical-terms', MedicalTerminologyViewSet)
 router.register(r'doctors', DoctorViewSet)
 router.register(r'doctor-availability', DoctorAvailabilityViewSet)
+router.register(r'availability-exceptions', AvailabilityExceptionViewSet)
 router.register(r'procedure-types', ProcedureTypeViewSet)
+router.register(r'clinic-resources', ClinicResourceViewSet)
 router.register(r'waitlist', AppointmentWaitlistViewSet)
 router.register(r'reminders', AppointmentReminderViewSet)
+router.register(r'scheduling-optimizations', SchedulingOptimizationViewSet)
 
 urlpatterns = [
     # API routes
@@ -44,6 +50,13 @@ urlpatterns = [
     # Phase 2 custom endpoints
     path('scheduling/optimize/', SchedulingOptimizationView.as_view(), name='scheduling_optimize'),
     path('scheduling/available-slots/', AvailableSlotsView.as_view(), name='available_slots'),
+    path('scheduling/earliest-slots/', EarliestSlotsView.as_view(), name='earliest_slots'),
+    path('scheduling/next-slots/', NextSlotsView.as_view(), name='next_slots'),
+    path('scheduling/group-bookings/', GroupBookingView.as_view(), name='group_bookings'),
+    path('scheduling/bulk-reschedule/', BulkRescheduleView.as_view(), name='bulk_reschedule'),
+    path('scheduling/holds/', SlotHoldView.as_view(), name='slot_holds'),
+    path('scheduling/holds/<str:token>/', SlotHoldDetailView.as_view(), name='slot_hold_detail'),
+    path('scheduling/holds/<str:token>/confirm/', SlotHoldConfirmView.as_view(), name='slot_hold_confirm'),
     
     # Message channel webhooks
     path('webhooks/kakao/', MessageProcessorView.as_view(), name='kakao_webhook'),
@@ -9,8 +9,10 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Avg, Count, Q
 from datetime import datetime, timedelta
+from itertools import islice
 import logging
 
 from .serializers import (
@@ -19,12 +21,14 @@ from .serializers import (
     ProcedureTypeSerializer, AppointmentWaitlistSerializer,
     SchedulingOptimizationSerializer, AppointmentReminderSerializer,
     AvailableSlotsRequestSerializer, AppointmentOptimizationRequestSerializer,
-    WaitlistRequestSerializer
+    WaitlistRequestSerializer, EarliestSlotsRequestSerializer,
+    ClinicResourceSerializer, SlotHoldRequestSerializer, BulkRescheduleRequestSerializer,
+    AvailabilityExceptionSerializer, GroupBookingRequestSerializer, NextSlotsRequestSerializer
 )
 from clinic_ai.core.models import (
     TranslationHistory, MedicalTerminology, Doctor, DoctorAvailability,
     ProcedureType, AppointmentWaitlist, SchedulingOptimization,
-    AppointmentReminder, Appointment, Patient
+    AppointmentReminder, Appointment, Patient, ClinicResource, AvailabilityException
 )
 
 logger = logging.getLogger(__name__)
@@ -105,6 +109,7 @@ class TranslationViewSet(viewsets.ReadOnlyModelViewSet):
         try:
             from clinic_ai.messaging.translation_enhanced import EnhancedTranslationService
             from clinic_ai.messaging.translation import SimpleLanguageDetector
+            from clinic_ai.messaging.translation_cache import TranslationCache
             
             # Create minimal service for stats
             class DummyTranslator:
@@ -115,6 +120,7 @@ class TranslationViewSet(viewsets.ReadOnlyModelViewSet):
             
             service = EnhancedTranslationService(DummyTranslator(), SimpleLanguageDetector())
             stats = service.get_translation_stats(days=days)
+            stats['cache'] = TranslationCache.stats()
             
             return Response(stats)
         
@@ -224,32 +230,50 @@ class DoctorViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def workload(self, request, pk=None):
         """Get doctor's current workload statistics."""
+        from clinic_ai.messaging.workload import get_workload_service
+
         doctor = self.get_object()
-        
-        # Get appointments for next 7 days
-        today = timezone.now().date()
-        next_week = today + timedelta(days=7)
-        
-        appointments = Appointment.objects.filter(
-            doctor=doctor.name,
-            scheduled_at__date__gte=today,
-            scheduled_at__date__lte=next_week,
-            status__in=['pending', 'confirmed']
-        )
-        
-        daily_counts = {}
-        for appt in appointments:
-            date_str = appt.scheduled_at.date().isoformat()
-            daily_counts[date_str] = daily_counts.get(date_str, 0) + 1
-        
+
+        # Today plus the next 7 days
+        today = timezone.localdate()
+        counts = get_workload_service().daily_counts(doctor, today, today + timedelta(days=7))
+
         return Response({
             'doctor_id': doctor.id,
             'doctor_name': doctor.name,
             'max_daily_appointments': doctor.max_daily_appointments,
-            'upcoming_appointments': appointments.count(),
-            'daily_breakdown': daily_counts
+            'upcoming_appointments': sum(counts.values()),
+            'daily_breakdown': {
+                day.isoformat(): count for day, count in counts.items() if count
+            }
         })
 
+    @action(detail=False, methods=['get'], url_path='clinic-workload')
+    def clinic_workload(self, request):
+        """
+        Get the whole clinic's workload for the capacity dashboard.
+
+        GET /api/doctors/clinic-workload/?start_date=2025-11-17&days=7
+        """
+        from clinic_ai.messaging.workload import get_workload_service
+
+        try:
+            start_date = request.query_params.get('start_date')
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response(
+                {'error': 'start_date must be YYYY-MM-DD and days an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= days <= 62:
+            return Response(
+                {'error': 'days must be between 1 and 62'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(get_workload_service().clinic_week(start_date, days))
+
 
 class DoctorAvailabilityViewSet(viewsets.ModelViewSet):
     """API endpoint for doctor availability management."""
@@ -258,6 +282,75 @@ class DoctorAvailabilityViewSet(viewsets.ModelViewSet):
     permission_classes = []
 
 
+class AvailabilityExceptionViewSet(viewsets.ModelViewSet):
+    """API endpoint for holidays, leave and blocked time."""
+    queryset = AvailabilityException.objects.all()
+    serializer_class = AvailabilityExceptionSerializer
+    permission_classes = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('doctor')
+        doctor_id = self.request.query_params.get('doctor')
+        if doctor_id:
+            # A doctor's closures include the clinic-wide ones
+            queryset = queryset.filter(Q(doctor_id=doctor_id) | Q(doctor__isnull=True))
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def reschedule(self, request, pk=None):
+        """
+        Move the bookings this closure covers.
+
+        POST /api/availability-exceptions/{id}/reschedule/
+        A clinic-wide closure reschedules every active doctor.
+
+        Each doctor is moved in its own transaction, so one doctor failing
+        does not undo the others. The response lists the outcome per doctor
+        (moved, unplaced, error) and is 207 when only some doctors failed;
+        retrying only needs the doctors in `failed`.
+        """
+        from clinic_ai.messaging.bulk_rescheduler import BulkRescheduler
+
+        exception = self.get_object()
+        if exception.doctor_id:
+            doctors = [exception.doctor]
+        else:
+            doctors = list(Doctor.objects.filter(is_active=True).order_by('id'))
+
+        rescheduler = BulkRescheduler()
+        per_doctor, moved, unplaced, failed = [], [], [], []
+        for doctor in doctors:
+            result = rescheduler.reschedule(doctor, exception.start_at, exception.end_at)
+            outcome = {
+                'doctor_id': doctor.id,
+                'doctor_name': doctor.name,
+                'success': result['success'],
+                'moved': result.get('moved', []),
+                'unplaced': result.get('unplaced', []),
+            }
+            if not result['success']:
+                outcome['error'] = result.get('message')
+                failed.append(doctor.id)
+            per_doctor.append(outcome)
+            moved.extend(outcome['moved'])
+            unplaced.extend(outcome['unplaced'])
+
+        if not failed:
+            response_status = status.HTTP_200_OK
+        elif len(failed) < len(doctors):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return Response({
+            'success': not failed,
+            'affected': len(moved) + len(unplaced),
+            'moved': moved,
+            'unplaced': unplaced,
+            'failed': failed,
+            'doctors': per_doctor
+        }, status=response_status)
+
+
 class ProcedureTypeViewSet(viewsets.ModelViewSet):
     """API endpoint for procedure type management."""
     queryset = ProcedureType.objects.all()
@@ -299,8 +392,12 @@ class SchedulingOptimizationView(APIView):
             "doctor_id": 2,
             "procedure_type_id": 3,
             "requested_time": "2025-11-15T10:00:00Z",
-            "preferences": {"preferred_time": "morning"}
+            "preferences": {"preferred_time": "morning"},
+            "appointment_id": 42
         }
+
+        With `appointment_id` the result is stored for that booking and
+        reused until one of the doctor-days it was computed from changes.
         """
         serializer = AppointmentOptimizationRequestSerializer(data=request.data)
         if not serializer.is_valid():
@@ -321,7 +418,8 @@ class SchedulingOptimizationView(APIView):
                 'patient_id': data['patient_id'],
                 'doctor': str(doctor.id),  # Pass doctor ID as string
                 'procedure': str(data['procedure_type_id']),  # Pass procedure ID as string
-                'requested_time': data['requested_time']
+                'requested_time': data['requested_time'],
+                'appointment_id': data.get('appointment_id')
             }])
             
             if optimal_result:
@@ -361,8 +459,16 @@ class AvailableSlotsView(APIView):
             "doctor_id": 1,
             "start_date": "2025-11-15",
             "end_date": "2025-11-22",
-            "preferred_time": "morning"
+            "preferred_time": "morning",
+            "procedure_type_id": 3,
+            "limit": 20,
+            "cursor": "2025-11-16T10:30:00-07:00"
         }
+
+        With `limit`, one page is returned along with `next_cursor` (null on
+        the last page); only the days needed for the page are loaded.
+        With `procedure_type_id`, slots are sized by the procedure and only
+        offered while its equipment and rooms have spare capacity.
         """
         serializer = AvailableSlotsRequestSerializer(data=request.data)
         if not serializer.is_valid():
@@ -389,19 +495,47 @@ class AvailableSlotsView(APIView):
             preferences = {}
             if 'preferred_time' in data and data['preferred_time'] != 'any':
                 preferences['preferred_time'] = data['preferred_time']
+
+            procedure_type = None
+            if data.get('procedure_type_id'):
+                procedure_type = ProcedureType.objects.get(id=data['procedure_type_id'])
             
-            # Find available slots
-            slots = optimizer.find_available_slots(
-                doctor=str(doctor.id),  # Pass doctor ID as string
-                date_range=(start_datetime, end_datetime),
-                preferences=preferences
+            limit = data.get('limit')
+            if limit is None:
+                # Find available slots
+                slots = optimizer.find_available_slots(
+                    doctor=doctor,
+                    date_range=(start_datetime, end_datetime),
+                    preferences=preferences,
+                    procedure_type=procedure_type
+                )
+
+                return Response({
+                    'doctor_id': doctor.id,
+                    'doctor_name': doctor.name,
+                    'available_slots': [slot.isoformat() for slot in slots],
+                    'total_slots': len(slots)
+                })
+
+            # Paginated: fetch one extra slot to know whether a next page exists
+            cursor = data.get('cursor')
+            stream = optimizer.iter_available_slots(
+                doctor,
+                (max(start_datetime, cursor) if cursor else start_datetime, end_datetime),
+                preferences=preferences,
+                after=cursor,
+                procedure_type=procedure_type
             )
-            
+            slots = list(islice(stream, limit + 1))
+            has_more = len(slots) > limit
+            slots = slots[:limit]
+
             return Response({
                 'doctor_id': doctor.id,
                 'doctor_name': doctor.name,
                 'available_slots': [slot.isoformat() for slot in slots],
-                'total_slots': len(slots)
+                'total_slots': len(slots),
+                'next_cursor': slots[-1].isoformat() if has_more else None
             })
 
         except Doctor.DoesNotExist:
@@ -409,6 +543,11 @@ class AvailableSlotsView(APIView):
                 {'error': 'Doctor not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except ProcedureType.DoesNotExist:
+            return Response(
+                {'error': 'Procedure type not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             logger.error(f"Error finding slots: {e}")
             return Response(
@@ -417,6 +556,356 @@ class AvailableSlotsView(APIView):
             )
 
 
+class EarliestSlotsView(APIView):
+    """API endpoint for the earliest free slots across all doctors."""
+    permission_classes = []
+
+    def post(self, request):
+        """
+        Find the earliest slots for a procedure across active doctors.
+
+        POST /api/scheduling/earliest-slots/
+        {
+            "procedure_type_id": 3,
+            "start_date": "2025-11-15",
+            "end_date": "2025-11-22",
+            "limit": 10,
+            "preferred_time": "morning"
+        }
+        """
+        serializer = EarliestSlotsRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+
+            optimizer = AdvancedSchedulingOptimizer()
+            data = serializer.validated_data
+
+            procedure_type = ProcedureType.objects.get(id=data['procedure_type_id'])
+
+            start_datetime = timezone.make_aware(
+                datetime.combine(data['start_date'], datetime.min.time())
+            )
+            end_datetime = timezone.make_aware(
+                datetime.combine(data['end_date'], datetime.max.time())
+            )
+
+            preferences = {}
+            if data.get('preferred_time', 'any') != 'any':
+                preferences['preferred_time'] = data['preferred_time']
+
+            slots = optimizer.find_earliest_slots(
+                procedure_type,
+                (start_datetime, end_datetime),
+                limit=data.get('limit', 10),
+                preferences=preferences
+            )
+
+            return Response({
+                'procedure_type_id': procedure_type.id,
+                'slots': [
+                    {
+                        'doctor_id': slot['doctor_id'],
+                        'doctor_name': slot['doctor_name'],
+                        'scheduled_at': slot['scheduled_at'].isoformat()
+                    }
+                    for slot in slots
+                ],
+                'total_slots': len(slots)
+            })
+
+        except ProcedureType.DoesNotExist:
+            return Response(
+                {'error': 'Procedure type not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Error finding earliest slots: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class NextSlotsView(APIView):
+    """API endpoint for a doctor's next free slots, served from the cache."""
+    permission_classes = []
+
+    def get(self, request):
+        """
+        Get the next free slots for a doctor and procedure type.
+
+        GET /api/scheduling/next-slots/?doctor_id=1&procedure_type_id=3&limit=5
+
+        Lists are materialized per doctor and procedure type and only the
+        doctor-days touched by a booking change are recomputed.
+        """
+        serializer = NextSlotsRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            from clinic_ai.messaging.next_slots import get_next_slot_cache
+
+            data = serializer.validated_data
+            doctor = Doctor.objects.get(id=data['doctor_id'], is_active=True)
+            procedure_type = None
+            if data.get('procedure_type_id'):
+                procedure_type = ProcedureType.objects.get(id=data['procedure_type_id'])
+
+            slots = get_next_slot_cache().next_slots(doctor, procedure_type, data.get('limit'))
+
+            return Response({
+                'doctor_id': doctor.id,
+                'doctor_name': doctor.name,
+                'procedure_type_id': procedure_type.id if procedure_type else None,
+                'slots': [slot.isoformat() for slot in slots],
+                'total_slots': len(slots)
+            })
+
+        except Doctor.DoesNotExist:
+            return Response(
+                {'error': 'Doctor not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except ProcedureType.DoesNotExist:
+            return Response(
+                {'error': 'Procedure type not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Error getting next slots: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SlotHoldView(APIView):
+    """API endpoint for holding a slot while the patient confirms."""
+    permission_classes = []
+
+    def post(self, request):
+        """
+        Hold a slot.
+
+        POST /api/scheduling/holds/
+        {
+            "patient_id": 1,
+            "doctor_id": 1,
+            "scheduled_at": "2025-11-15T10:00:00-07:00",
+            "procedure_type_id": 3
+        }
+
+        Returns a hold token to confirm with before `expires_at`, or the
+        nearest alternative slot when the slot is taken or held.
+        """
+        serializer = SlotHoldRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+
+            data = serializer.validated_data
+            result = AdvancedSchedulingOptimizer().hold_slot(
+                data['patient_id'], data['doctor_id'],
+                str(data['procedure_type_id']) if data.get('procedure_type_id') else '',
+                data['scheduled_at']
+            )
+            return Response(
+                result,
+                status=status.HTTP_201_CREATED if result['success'] else status.HTTP_409_CONFLICT
+            )
+
+        except Exception as e:
+            logger.error(f"Error holding slot: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SlotHoldConfirmView(APIView):
+    """API endpoint for booking a held slot."""
+    permission_classes = []
+
+    def post(self, request, token):
+        """
+        Confirm a hold and book the appointment.
+
+        POST /api/scheduling/holds/<token>/confirm/
+        """
+        try:
+            from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+
+            result = AdvancedSchedulingOptimizer().confirm_hold(token)
+            return Response(
+                result,
+                status=status.HTTP_201_CREATED if result['success'] else status.HTTP_409_CONFLICT
+            )
+
+        except Exception as e:
+            logger.error(f"Error confirming slot hold: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SlotHoldDetailView(APIView):
+    """API endpoint for releasing a slot hold."""
+    permission_classes = []
+
+    def delete(self, request, token):
+        """
+        Release a hold before it expires.
+
+        DELETE /api/scheduling/holds/<token>/
+        """
+        from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+
+        if AdvancedSchedulingOptimizer().release_hold(token):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(
+            {'error': 'Slot hold not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+
+class GroupBookingView(APIView):
+    """API endpoint for booking a group of patients in one block."""
+    permission_classes = []
+
+    def post(self, request):
+        """
+        Book every patient of a group into the earliest block that fits.
+
+        POST /api/scheduling/group-bookings/
+        {
+            "patient_ids": [1, 2, 3],
+            "doctor_ids": [1, 2],
+            "start_date": "2025-11-15T09:00:00-07:00",
+            "end_date": "2025-11-22T18:00:00-07:00",
+            "procedure_type_id": 3,
+            "max_span_minutes": 90
+        }
+
+        Returns 201 with the appointments, or 409 when no block fits.
+        """
+        serializer = GroupBookingRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        doctors = list(Doctor.objects.filter(id__in=data['doctor_ids'], is_active=True).order_by('id'))
+        if len(doctors) != len(set(data['doctor_ids'])):
+            return Response(
+                {'error': 'Doctor not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        procedure_type = None
+        if data.get('procedure_type_id'):
+            try:
+                procedure_type = ProcedureType.objects.get(id=data['procedure_type_id'])
+            except ProcedureType.DoesNotExist:
+                return Response(
+                    {'error': 'Procedure type not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+        try:
+            from clinic_ai.messaging.group_booking import GroupBookingAllocator
+
+            max_span = data.get('max_span_minutes')
+            result = GroupBookingAllocator().book(
+                data['patient_ids'], doctors, (data['start_date'], data['end_date']),
+                procedure_type, timedelta(minutes=max_span) if max_span else None
+            )
+            return Response(
+                result,
+                status=status.HTTP_201_CREATED if result['success'] else status.HTTP_409_CONFLICT
+            )
+
+        except Exception as e:
+            logger.error(f"Error booking group: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class BulkRescheduleView(APIView):
+    """API endpoint for moving a doctor's bookings out of a blocked interval."""
+    permission_classes = []
+
+    def post(self, request):
+        """
+        Close a doctor's absence and reschedule every booking it touches.
+
+        POST /api/scheduling/bulk-reschedule/
+        {
+            "doctor_id": 1,
+            "start": "2025-11-17T08:00:00-07:00",
+            "end": "2025-11-17T18:00:00-07:00",
+            "include_other_doctors": true,
+            "run_async": false
+        }
+
+        The interval is saved as a 'blocked' availability exception unless
+        one already covers it. With run_async the work is queued and 202 is
+        returned with the task ID.
+        """
+        serializer = BulkRescheduleRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            doctor = Doctor.objects.get(id=data['doctor_id'])
+        except Doctor.DoesNotExist:
+            return Response(
+                {'error': 'Doctor not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            if data['run_async']:
+                from clinic_ai.messaging.tasks import bulk_reschedule
+
+                task = bulk_reschedule.delay(
+                    doctor.id, data['start'].isoformat(), data['end'].isoformat(),
+                    data['include_other_doctors']
+                )
+                return Response({'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
+
+            from clinic_ai.messaging.bulk_rescheduler import BulkRescheduler
+
+            result = BulkRescheduler().reschedule(
+                doctor, data['start'], data['end'], data['include_other_doctors']
+            )
+            return Response(
+                result,
+                status=status.HTTP_200_OK if result['success'] else status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        except Exception as e:
+            logger.error(f"Error rescheduling appointments: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ClinicResourceViewSet(viewsets.ModelViewSet):
+    """API endpoint for equipment and room management."""
+    queryset = ClinicResource.objects.all()
+    serializer_class = ClinicResourceSerializer
+    permission_classes = []
+
+
 class AppointmentWaitlistViewSet(viewsets.ModelViewSet):
     """API endpoint for appointment waitlist management."""
     queryset = AppointmentWaitlist.objects.all()
@@ -489,6 +978,68 @@ class AppointmentWaitlistViewSet(viewsets.ModelViewSet):
             )
 
 
+class SchedulingOptimizationViewSet(viewsets.ReadOnlyModelViewSet):
+    """API endpoint for stored scheduling optimization results."""
+    queryset = SchedulingOptimization.objects.all()
+    serializer_class = SchedulingOptimizationSerializer
+    permission_classes = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        doctor_id = self.request.query_params.get('doctor_id')
+        if doctor_id:
+            queryset = queryset.filter(doctor_id=doctor_id)
+        return queryset.order_by('-created_at')
+
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        """
+        Record that the patient accepted the optimized time.
+
+        POST /api/scheduling-optimizations/{id}/accept/
+        """
+        with transaction.atomic():
+            # Waits for a concurrent result write, so the accepted slot is the one returned
+            optimization = SchedulingOptimization.objects.select_for_update().get(pk=self.get_object().pk)
+            optimization.patient_accepted = True
+            optimization.save(update_fields=['patient_accepted', 'updated_at'])
+        return Response(self.get_serializer(optimization).data)
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Acceptance rate and wait-time reduction of optimizations.
+
+        GET /api/scheduling-optimizations/analytics/?start_date=2025-11-01&end_date=2025-11-30&doctor_id=1
+
+        Served from the daily rollups (see rollup_optimizations).
+        """
+        from clinic_ai.messaging.optimization_analytics import optimization_analytics
+
+        try:
+            today = timezone.localdate()
+            start_date = request.query_params.get('start_date')
+            end_date = request.query_params.get('end_date')
+            start_date = (
+                datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else today - timedelta(days=30)
+            )
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+            doctor_id = request.query_params.get('doctor_id')
+            doctor_id = int(doctor_id) if doctor_id else None
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be YYYY-MM-DD and doctor_id an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_date < start_date:
+            return Response(
+                {'error': 'end_date must not be before start_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(optimization_analytics(start_date, end_date, doctor_id))
+
+
 class AppointmentReminderViewSet(viewsets.ModelViewSet):
     """API endpoint for appointment reminder management."""
     queryset = AppointmentReminder.objects.all()
@@ -27,7 +27,7 @@ class AppointmentAdmin(admin.ModelAdmin):
     list_filter = ('status', 'scheduled_at', 'created_at')
     search_fields = ('patient__phone', 'patient__name', 'doctor', 'procedure')
     readonly_fields = ('created_at', 'updated_at')
-    fields = ('patient', 'doctor', 'procedure', 'scheduled_at', 'status', 'notes', 'approved_by')
+    fields = ('patient', 'doctor', 'assigned_doctor', 'procedure', 'scheduled_at', 'status', 'notes', 'approved_by')
 
 
 @admin.register(StaffResponse)
@@ -0,0 +1,52 @@
+"""
+Data backfills shared by migrations and management commands.
+Functions take model classes as arguments so migrations can pass their
+historical models.
+"""
+
+import logging
+from django.db import transaction
+from django.db.models import Max, Min, OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_appointment_doctors(appointment_model, doctor_model, chunk_size: int = 5000) -> int:
+    """
+    Populate Appointment.assigned_doctor from the free-text doctor name.
+
+    Walks the table in primary-key ranges so each UPDATE touches at most
+    `chunk_size` rows and commits on its own, keeping locks short on large
+    tables. Rows whose name matches no doctor are left unassigned.
+
+    Args:
+        appointment_model: Appointment model class
+        doctor_model: Doctor model class
+        chunk_size: Width of each primary-key range
+
+    Returns:
+        Number of appointments updated
+    """
+    bounds = appointment_model.objects.filter(
+        assigned_doctor__isnull=True
+    ).aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+
+    doctor_id = Subquery(
+        doctor_model.objects.filter(name=OuterRef('doctor')).order_by('pk').values('pk')[:1]
+    )
+    updated = 0
+    lower = bounds['first']
+    while lower <= bounds['last']:
+        with transaction.atomic():
+            updated += appointment_model.objects.filter(
+                pk__gte=lower,
+                pk__lt=lower + chunk_size,
+                assigned_doctor__isnull=True,
+                doctor__in=doctor_model.objects.values('name')
+            ).update(assigned_doctor_id=doctor_id)
+        lower += chunk_size
+
+    logger.info(f"Backfilled doctor foreign key on {updated} appointments")
+    return updated
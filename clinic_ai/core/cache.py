@@ -3,10 +3,21 @@ Cache service implementation for CareBridge AI.
 Provides caching functionality for performance optimization.
 """
 
-from typing import Any, Optional
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from django.conf import settings
 from django.core.cache import cache
 from ..core.interfaces import CacheService
 
+logger = logging.getLogger(__name__)
+
+# Stored in the local tier for keys known to be missing from the shared tier
+MISSING = object()
+
 
 class DjangoCacheService(CacheService):
     """
@@ -70,6 +81,35 @@ class DjangoCacheService(CacheService):
             logger = logging.getLogger(__name__)
             logger.warning(f"Cache delete error for key {key}: {e}")
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Retrieve several values in one round trip.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of the keys found
+        """
+        try:
+            return cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Cache get_many error for {len(keys)} keys: {e}")
+            return {}
+
+    def set_many(self, values: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Store several values in one round trip (a pipeline on Redis).
+
+        Args:
+            values: Dict of keys to values
+            ttl: Time to live in seconds (None for default)
+        """
+        try:
+            cache.set_many(values, timeout=ttl or 3600)
+        except Exception as e:
+            logger.warning(f"Cache set_many error for {len(values)} keys: {e}")
+
 
 class SimpleCache:
     """
@@ -115,6 +155,223 @@ class SimpleCache:
         self._cache.clear()
 
 
+class LocalLRU:
+    """
+    Per-process LRU bounded by entry count, total bytes and TTL.
+    Sizes are the pickled size of each value, so the byte bound matches
+    what the entries would cost in Redis.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Value for a key, MISSING for a negative entry, None when absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float, size: Optional[int] = None) -> None:
+        if size is None:
+            size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) if value is not MISSING else 0
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TwoTierCacheService(CacheService):
+    """
+    Bounded in-process LRU in front of the Django cache (Redis).
+
+    Hot keys are served from process memory without a network round trip.
+    Misses in the shared tier are remembered locally for a short time
+    (negative caching). Every service of a namespace in a process shares
+    one local tier; broadcast_invalidation() clears that tier in every
+    process, which notices within CHECK_INTERVAL seconds through a shared
+    generation counter.
+
+    Settings (CLINIC_AI['LOCAL_CACHE']): max_entries, max_bytes, ttl
+    (local seconds), negative_ttl and check_interval.
+    """
+
+    _tiers: Dict[str, LocalLRU] = {}
+    _generations: Dict[str, Any] = {}
+    _checked_at: Dict[str, float] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, namespace: str = 'default', shared: Optional[CacheService] = None):
+        """
+        Initialize service.
+
+        Args:
+            namespace: Name of the local tier (and its invalidation channel)
+            shared: Second tier (defaults to DjangoCacheService)
+        """
+        options = settings.CLINIC_AI.get('LOCAL_CACHE', {})
+        self.namespace = namespace
+        self.shared = shared or DjangoCacheService()
+        self.local_ttl = options.get('ttl', 300)
+        self.negative_ttl = options.get('negative_ttl', 30)
+        self.check_interval = options.get('check_interval', 5)
+        with self._registry_lock:
+            if namespace not in self._tiers:
+                self._tiers[namespace] = LocalLRU(
+                    options.get('max_entries', 2048), options.get('max_bytes', 8 * 1024 * 1024)
+                )
+                self._generations[namespace] = None
+                self._checked_at[namespace] = 0.0
+        self.local = self._tiers[namespace]
+        self.hits = {'local': 0, 'shared': 0, 'negative': 0, 'miss': 0}
+
+    @property
+    def generation_key(self) -> str:
+        return f'two_tier:{self.namespace}:generation'
+
+    def _sync(self) -> None:
+        """Drop the local tier if another process broadcast an invalidation."""
+        now = time.monotonic()
+        if now - self._checked_at[self.namespace] < self.check_interval:
+            return
+        self._checked_at[self.namespace] = now
+        try:
+            generation = cache.get(self.generation_key, 0)
+        except Exception as e:
+            logger.warning(f"Cache generation lookup failed for {self.namespace}: {e}")
+            return
+        if generation != self._generations[self.namespace]:
+            if self._generations[self.namespace] is not None:
+                self.local.clear()
+            self._generations[self.namespace] = generation
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retrieve value from the local tier, then the shared tier.
+
+        Returns:
+            Cached value or None if not found
+        """
+        self._sync()
+        value = self.local.get(key)
+        if value is MISSING:
+            self.hits['negative'] += 1
+            return None
+        if value is not None:
+            self.hits['local'] += 1
+            return value
+
+        value = self.shared.get(key)
+        if value is None:
+            self.hits['miss'] += 1
+            self.local.set(key, MISSING, self.negative_ttl)
+            return None
+        self.hits['shared'] += 1
+        self.local.set(key, value, self.local_ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store value in both tiers (the local copy never outlives the shared one)."""
+        self.shared.set(key, value, ttl)
+        self.local.set(key, value, min(self.local_ttl, ttl or 3600))
+
+    def delete(self, key: str) -> None:
+        """Remove value from both tiers of this process."""
+        self.shared.delete(key)
+        self.local.delete(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Retrieve several values, asking the shared tier only for local misses."""
+        self._sync()
+        found = {}
+        remote = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is MISSING:
+                self.hits['negative'] += 1
+            elif value is not None:
+                self.hits['local'] += 1
+                found[key] = value
+            else:
+                remote.append(key)
+        if not remote:
+            return found
+
+        shared = self.shared.get_many(remote)
+        for key in remote:
+            if key in shared:
+                self.hits['shared'] += 1
+                found[key] = shared[key]
+                self.local.set(key, shared[key], self.local_ttl)
+            else:
+                self.hits['miss'] += 1
+                self.local.set(key, MISSING, self.negative_ttl)
+        return found
+
+    def set_many(self, values: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store several values in both tiers."""
+        self.shared.set_many(values, ttl)
+        for key, value in values.items():
+            self.local.set(key, value, min(self.local_ttl, ttl or 3600))
+
+    def broadcast_invalidation(self) -> None:
+        """Clear the local tier of this namespace in every process."""
+        try:
+            cache.add(self.generation_key, 0, timeout=None)
+            cache.incr(self.generation_key)
+        except Exception as e:
+            logger.warning(f"Cache invalidation broadcast failed for {self.namespace}: {e}")
+        self.local.clear()
+        self._checked_at[self.namespace] = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Local tier size and this instance's hit counts."""
+        return {
+            'entries': len(self.local),
+            'bytes': self.local.bytes,
+            'evictions': self.local.evictions,
+            'local_hits': self.hits['local'],
+            'shared_hits': self.hits['shared'],
+            'negative_hits': self.hits['negative'],
+            'misses': self.hits['miss'],
+        }
+
+
 # Factory function to create appropriate cache service
 def create_cache_service(use_simple: bool = False) -> CacheService:
     """
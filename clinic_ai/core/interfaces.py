@@ -184,6 +184,16 @@ class CacheService(ABC):
         """Remove value from cache"""
         pass
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Retrieve several values; missing keys are left out"""
+        values = {key: self.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def set_many(self, values: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store several values with the same TTL"""
+        for key, value in values.items():
+            self.set(key, value, ttl)
+
 
 class ConfigurationService(ABC):
     """
@@ -0,0 +1,32 @@
+"""
+Management command to link appointments to Doctor records.
+Re-runs the doctor foreign key backfill for rows created from names that
+did not match a doctor at migration time.
+"""
+
+from django.core.management.base import BaseCommand
+from clinic_ai.core.backfill import backfill_appointment_doctors
+from clinic_ai.core.models import Appointment, Doctor
+
+
+class Command(BaseCommand):
+    help = 'Backfill Appointment.assigned_doctor from doctor names'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Primary-key range updated per transaction',
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_appointment_doctors(
+            Appointment, Doctor, chunk_size=options['chunk_size']
+        )
+        remaining = Appointment.objects.filter(assigned_doctor__isnull=True).count()
+        self.stdout.write(self.style.SUCCESS(f'Linked {updated} appointments to doctors'))
+        if remaining:
+            self.stdout.write(
+                self.style.WARNING(f'{remaining} appointments have no matching doctor')
+            )
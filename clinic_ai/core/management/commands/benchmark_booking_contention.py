@@ -0,0 +1,98 @@
+"""
+Management command to benchmark concurrent booking.
+Runs many workers booking a small pool of slots for one doctor at the same
+time and reports bookings per second and any double bookings. Start several
+copies against the same database and cache to exercise cross-process holds.
+Meant for PostgreSQL; SQLite has no row locks and reports "database is
+locked" errors for concurrent writers instead.
+"""
+
+import random
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from clinic_ai.core.models import Appointment, Doctor, DoctorAvailability, Patient
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent bookings against slot holds and the booking lock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent booking threads')
+        parser.add_argument('--attempts', type=int, default=500, help='Booking attempts in total')
+        parser.add_argument('--slots', type=int, default=20, help='Distinct 30 minute slots contended for')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark doctor and bookings')
+
+    def handle(self, *args, **options):
+        from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+
+        doctor, patient = self._fixtures()
+        day = timezone.localdate() + timedelta(days=365)
+        slots = [
+            timezone.make_aware(datetime.combine(day, time(8, 0))) + timedelta(minutes=30 * n)
+            for n in range(options['slots'])
+        ]
+        outcomes = {'booked': 0, 'rejected': 0, 'errors': 0}
+
+        def book(_):
+            try:
+                result = AdvancedSchedulingOptimizer().create_appointment(
+                    patient.id, doctor, '', random.choice(slots)
+                )
+                return 'booked' if result['success'] else 'rejected'
+            except Exception as e:
+                self.stderr.write(f'Booking failed: {e}')
+                return 'errors'
+            finally:
+                connection.close()
+
+        started = timer.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for outcome in pool.map(book, range(options['attempts'])):
+                outcomes[outcome] += 1
+        elapsed = timer.perf_counter() - started
+
+        double_booked = Appointment.objects.filter(
+            assigned_doctor=doctor, status__in=['pending', 'confirmed']
+        ).order_by().values('scheduled_at').annotate(n=Count('id')).filter(n__gt=1).count()
+
+        self.stdout.write(
+            f"{options['attempts']} attempts by {options['workers']} workers in {elapsed:.2f}s "
+            f"({options['attempts'] / elapsed:.1f} attempts/s, {outcomes['booked'] / elapsed:.1f} bookings/s)"
+        )
+        self.stdout.write(
+            f"booked={outcomes['booked']} rejected={outcomes['rejected']} errors={outcomes['errors']}"
+        )
+        if double_booked:
+            self.stdout.write(self.style.ERROR(f'{double_booked} slots were double booked'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No double bookings'))
+
+        if not options['keep']:
+            Appointment.objects.filter(assigned_doctor=doctor).delete()
+            doctor.delete()
+            patient.delete()
+
+    def _fixtures(self):
+        """Doctor available every day from 8:00 to 18:00, and one patient."""
+        doctor, _ = Doctor.objects.get_or_create(
+            name='Dr. Benchmark',
+            defaults={
+                'specialization': 'Benchmark',
+                'average_appointment_duration': timedelta(minutes=30),
+            }
+        )
+        for weekday in range(7):
+            DoctorAvailability.objects.get_or_create(
+                doctor=doctor, weekday=weekday,
+                defaults={'start_time': time(8, 0), 'end_time': time(18, 0)}
+            )
+        patient, _ = Patient.objects.get_or_create(
+            phone='+00-benchmark', defaults={'name': 'Benchmark Patient'}
+        )
+        return doctor, patient
@@ -0,0 +1,247 @@
+"""
+Management command to benchmark the scheduler against the current database.
+Times find_available_slots, optimize_schedule, add_to_waitlist,
+process_waitlist_notifications and the scheduling API views, recording wall
+time, query count and peak Python memory for each. Results can be written as
+JSON and compared with an earlier run (e.g. from the previous commit) to
+catch scaling regressions. Run generate_synthetic_clinic first for a
+realistically sized clinic; every case runs in a rolled-back transaction.
+"""
+
+import json
+import statistics
+import subprocess
+import time as timer
+import tracemalloc
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from clinic_ai.core.models import Appointment, AppointmentWaitlist, Doctor, Patient, ProcedureType
+
+RESULTS_FORMAT = 1
+
+
+def git_commit() -> str:
+    """Current commit hash, or '' outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+class Command(BaseCommand):
+    help = 'Benchmark scheduling operations and API views (wall time, queries, peak memory)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+        parser.add_argument('--days', type=int, default=7, help='Days searched for slots')
+        parser.add_argument('--batch', type=int, default=20, help='Requests per optimize_schedule batch')
+        parser.add_argument('--case', action='append', default=[], help='Only run cases with this prefix')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Compare against results JSON from an earlier run')
+        parser.add_argument(
+            '--threshold', type=float, default=1.25,
+            help='Ratio of time or queries to the baseline reported as a regression'
+        )
+
+    def handle(self, *args, **options):
+        from rest_framework.test import APIRequestFactory
+        from clinic_ai.api.views_phase2 import (
+            AvailableSlotsView, DoctorViewSet, EarliestSlotsView, NextSlotsView,
+            SchedulingOptimizationView
+        )
+        from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        doctor = self._busiest_doctor()
+        procedure_type = ProcedureType.objects.order_by('id').first()
+        patient = Patient.objects.order_by('id').first()
+        if not (doctor and procedure_type and patient):
+            raise CommandError('Needs an active doctor, procedure type and patient; run generate_synthetic_clinic')
+
+        first_day = timezone.localdate() + timedelta(days=1)
+        last_day = first_day + timedelta(days=options['days'] - 1)
+        date_range = (
+            timezone.make_aware(datetime.combine(first_day, time.min)),
+            timezone.make_aware(datetime.combine(last_day, time.max)),
+        )
+        requested_time = timezone.make_aware(datetime.combine(first_day, time(10, 0)))
+        patient_ids = list(Patient.objects.order_by('id').values_list('id', flat=True)[:options['batch']])
+        batch = [
+            {
+                'patient_id': patient_ids[n % len(patient_ids)],
+                'doctor': str(doctor.id),
+                'procedure': str(procedure_type.id),
+                'requested_time': requested_time + timedelta(hours=n % 6),
+            }
+            for n in range(options['batch'])
+        ]
+        factory = APIRequestFactory()
+        period = {'start_date': first_day.isoformat(), 'end_date': last_day.isoformat()}
+
+        cases = {
+            'optimizer.find_available_slots': lambda: AdvancedSchedulingOptimizer().find_available_slots(
+                doctor, date_range
+            ),
+            'optimizer.find_available_slots.procedure': lambda: AdvancedSchedulingOptimizer().find_available_slots(
+                doctor, date_range, procedure_type=procedure_type
+            ),
+            'optimizer.optimize_schedule': lambda: AdvancedSchedulingOptimizer().optimize_schedule(batch),
+            'optimizer.add_to_waitlist': lambda: AdvancedSchedulingOptimizer().add_to_waitlist(
+                patient.id, doctor.id, procedure_type.id, {'preferred_date': first_day}
+            ),
+            'optimizer.process_waitlist_notifications': lambda: (
+                AdvancedSchedulingOptimizer().process_waitlist_notifications()
+            ),
+            'api.available_slots': lambda: AvailableSlotsView.as_view()(factory.post(
+                '/api/scheduling/available-slots/', {'doctor_id': doctor.id, **period}, format='json'
+            )),
+            'api.scheduling_optimize': lambda: SchedulingOptimizationView.as_view()(factory.post(
+                '/api/scheduling/optimize/', {
+                    'patient_id': patient.id, 'doctor_id': doctor.id,
+                    'procedure_type_id': procedure_type.id, 'requested_time': requested_time.isoformat(),
+                }, format='json'
+            )),
+            'api.earliest_slots': lambda: EarliestSlotsView.as_view()(factory.post(
+                '/api/scheduling/earliest-slots/', {'procedure_type_id': procedure_type.id, **period},
+                format='json'
+            )),
+            'api.next_slots': lambda: NextSlotsView.as_view()(factory.get(
+                '/api/scheduling/next-slots/', {'doctor_id': doctor.id, 'procedure_type_id': procedure_type.id}
+            )),
+            'api.doctor_workload': lambda: DoctorViewSet.as_view({'get': 'workload'})(
+                factory.get(f'/api/doctors/{doctor.id}/workload/'), pk=doctor.id
+            ),
+            'api.clinic_workload': lambda: DoctorViewSet.as_view({'get': 'clinic_workload'})(
+                factory.get('/api/doctors/clinic-workload/', {'start_date': first_day.isoformat()})
+            ),
+        }
+        if options['case']:
+            cases = {
+                name: run for name, run in cases.items()
+                if any(name.startswith(prefix) for prefix in options['case'])
+            }
+
+        self.stdout.write(f'Benchmarking against {doctor.name} ({self._dataset()["appointments"]} appointments)')
+        results = {}
+        for name, run in cases.items():
+            results[name] = self._measure(run, options['repeat'])
+            result = results[name]
+            self.stdout.write(
+                f"  {name:<45} {result['median_ms']:9.2f} ms median {result['best_ms']:9.2f} ms best "
+                f"{result['queries']:5d} queries {result['peak_memory_kb']:9.1f} KiB peak"
+            )
+
+        report = {
+            'format': RESULTS_FORMAT,
+            'commit': git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': self._dataset(),
+            'parameters': {name: options[name] for name in ('repeat', 'days', 'batch')},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            self._compare(report, options['compare'], options['threshold'])
+
+    def _busiest_doctor(self):
+        """Active doctor with the most appointments, so lookups see real contention."""
+        from django.db.models import Count
+
+        return Doctor.objects.filter(is_active=True).annotate(
+            booked=Count('appointments')
+        ).order_by('-booked', 'id').first()
+
+    def _dataset(self):
+        return {
+            'doctors': Doctor.objects.filter(is_active=True).count(),
+            'patients': Patient.objects.count(),
+            'appointments': Appointment.objects.count(),
+            'waitlist': AppointmentWaitlist.objects.filter(status='waiting').count(),
+        }
+
+    def _measure(self, run, repeat):
+        """
+        Run a case `repeat` times after one untimed warm-up.
+
+        Each run is rolled back, so cases that write (waitlist entries,
+        notifications) see the same data every time. Queries and peak
+        memory come from a separate run so their bookkeeping does not
+        inflate the timings.
+        """
+        def once(capture=None):
+            with transaction.atomic():
+                if capture is None:
+                    run()
+                else:
+                    with capture:
+                        run()
+                transaction.set_rollback(True)
+
+        once()
+        timings = []
+        for _ in range(repeat):
+            started = timer.perf_counter()
+            once()
+            timings.append(timer.perf_counter() - started)
+
+        queries = CaptureQueriesContext(connection)
+        tracemalloc.start()
+        try:
+            once(queries)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'median_ms': round(statistics.median(timings) * 1000, 3),
+            'best_ms': round(min(timings) * 1000, 3),
+            'queries': len(queries.captured_queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def _compare(self, report, path, threshold):
+        """Print per-case ratios against a baseline and fail on regressions."""
+        try:
+            with open(path) as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline {path}: {e}')
+
+        if baseline.get('dataset') != report['dataset']:
+            self.stdout.write(self.style.WARNING('Baseline was measured on a different dataset'))
+
+        regressions = []
+        self.stdout.write(f"Compared with {baseline.get('commit') or path}:")
+        for name, result in report['results'].items():
+            previous = baseline.get('results', {}).get(name)
+            if not previous:
+                self.stdout.write(f'  {name:<45} new')
+                continue
+            # Best-of-N is far less noisy than the median for short cases
+            time_ratio = result['best_ms'] / previous['best_ms'] if previous['best_ms'] else 1.0
+            regressed = time_ratio > threshold or (
+                result['queries'] > max(previous['queries'], previous['queries'] * threshold)
+            )
+            line = f'  {name:<45} time x{time_ratio:5.2f}  queries {previous["queries"]} -> {result["queries"]}'
+            if regressed:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"Regressions beyond x{threshold}: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,83 @@
+"""
+Management command to benchmark slot scoring.
+Compares scoring candidates one at a time (_score_slot) with the batched
+SlotScorer pass on the same synthetic candidate set. Fixtures are created
+inside a transaction that is rolled back.
+"""
+
+import time as timer
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from clinic_ai.core.models import Doctor
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-slot against batched slot scoring'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=20000, help='Candidate slots to score')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation (best is reported)')
+
+    def handle(self, *args, **options):
+        from clinic_ai.messaging.booking_index import MINUTES_PER_DAY, slot_datetime
+        from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+        from clinic_ai.messaging.slot_scoring import day_minute
+
+        with transaction.atomic():
+            doctor = Doctor.objects.create(
+                name='Dr. Scoring Benchmark',
+                specialization='Benchmark',
+                average_appointment_duration=timedelta(minutes=5)
+            )
+            optimizer = AdvancedSchedulingOptimizer()
+
+            # Every 5 minutes from 8:00 to 18:00 on consecutive days
+            first_day = timezone.localdate() + timedelta(days=1)
+            per_day = (18 - 8) * 12
+            days = -(-options['candidates'] // per_day)
+            candidates = [
+                day_minute(first_day + timedelta(days=n // per_day), 8 * 60 + (n % per_day) * 5)
+                for n in range(options['candidates'])
+            ]
+            last_day = first_day + timedelta(days=days - 1)
+            requested_time = timezone.make_aware(
+                datetime.combine(first_day + timedelta(days=days // 2), time(13, 0))
+            )
+            slots = [
+                slot_datetime(date.fromordinal(minute // MINUTES_PER_DAY), minute % MINUTES_PER_DAY)
+                for minute in candidates
+            ]
+            optimizer.booking_index.prime(doctor, first_day, last_day)
+
+            def per_slot():
+                return max(
+                    slots, key=lambda slot: optimizer._score_slot(doctor, slot, requested_time, '')
+                )
+
+            def batched():
+                return optimizer._rank_slots(
+                    doctor, candidates, first_day, last_day, requested_time
+                )[0][1]
+
+            results = {}
+            for name, run in (('per-slot', per_slot), ('batched', batched)):
+                best = None
+                for _ in range(options['repeat']):
+                    started = timer.perf_counter()
+                    chosen = run()
+                    elapsed = timer.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                results[name] = (best, chosen)
+                self.stdout.write(
+                    f'{name:>9}: {best * 1000:8.1f} ms for {len(candidates)} candidates, best slot {chosen}'
+                )
+
+            transaction.set_rollback(True)
+
+        speedup = results['per-slot'][0] / results['batched'][0]
+        self.stdout.write(self.style.SUCCESS(f'Batched scoring is {speedup:.1f}x faster'))
+        if results['per-slot'][1] != results['batched'][1]:
+            self.stdout.write(self.style.WARNING('Implementations picked different slots'))
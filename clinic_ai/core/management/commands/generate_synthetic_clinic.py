@@ -0,0 +1,269 @@
+"""
+Management command to generate a synthetic clinic for benchmarking.
+Creates doctors with weekly availability, patients, procedure types,
+appointments and waitlist entries with bulk_create in fixed-size batches,
+so clinics of up to 1,000 doctors and millions of appointments are built
+with memory bounded by the batch size. All rows are tagged (doctor names,
+patient phones) so --purge can remove them again.
+"""
+
+import random
+import time as timer
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from clinic_ai.core.models import (
+    Appointment, AppointmentReminder, AppointmentWaitlist, Doctor, DoctorAvailability, Patient,
+    ProcedureType, SchedulingOptimization
+)
+
+DOCTOR_PREFIX = 'Synthetic Doctor '
+PATIENT_PHONE_PREFIX = '+00-syn-'
+PROCEDURE_PREFIX = 'Synthetic '
+MAX_DOCTORS = 1000
+
+SPECIALIZATIONS = ['Plastic Surgery', 'Dermatology', 'Cosmetic Surgery', 'Ophthalmology']
+SLOT_LENGTHS = [15, 20, 30, 30, 45]
+PROCEDURES = [('consultation', 30), ('laser treatment', 45), ('follow-up', 15)]
+# Minutes of day; most doctors also take an afternoon block
+MORNING, AFTERNOON = (9 * 60, 12 * 60), (13 * 60, 18 * 60)
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic clinic (doctors, patients, appointments, waitlist) for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=50, help=f'Doctors (at most {MAX_DOCTORS})')
+        parser.add_argument('--patients', type=int, default=10000, help='Patients')
+        parser.add_argument('--appointments', type=int, default=100000, help='Appointments in total')
+        parser.add_argument('--waitlist', type=int, default=5000, help='Waiting waitlist entries')
+        parser.add_argument('--days-back', type=int, default=180, help='Days of history')
+        parser.add_argument('--days-ahead', type=int, default=60, help='Days of future bookings')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--purge', action='store_true', help='Delete a previous synthetic clinic first')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['doctors'] <= MAX_DOCTORS:
+            raise CommandError(f'--doctors must be between 1 and {MAX_DOCTORS}')
+        if options['patients'] < 1:
+            raise CommandError('--patients must be at least 1')
+
+        if options['purge']:
+            self._purge()
+        elif Doctor.objects.filter(name__startswith=DOCTOR_PREFIX).exists():
+            raise CommandError('A synthetic clinic already exists; pass --purge to replace it')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = timer.perf_counter()
+
+        with transaction.atomic():
+            doctors = self._create_doctors(options['doctors'])
+            procedure_types = self._create_procedure_types()
+            patient_ids = self._create_patients(options['patients'])
+            appointments = self._create_appointments(
+                doctors, patient_ids, procedure_types, options['appointments'],
+                options['days_back'], options['days_ahead']
+            )
+            waitlist = self._create_waitlist(
+                doctors, patient_ids, procedure_types, options['waitlist'], options['days_ahead']
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(doctors)} doctors, {len(patient_ids)} patients, {appointments} appointments "
+            f"and {waitlist} waitlist entries in {timer.perf_counter() - started:.1f}s"
+        ))
+
+    def _purge(self):
+        """Remove every row created by an earlier run."""
+        started = timer.perf_counter()
+        with transaction.atomic():
+            appointments = Appointment.objects.filter(patient__phone__startswith=PATIENT_PHONE_PREFIX)
+            AppointmentReminder.objects.filter(appointment__in=appointments).delete()
+            SchedulingOptimization.objects.filter(appointment__in=appointments).delete()
+            # Skips the per-row delete signals, which would otherwise re-match
+            # the waitlist for every booking; the bookings only belong to
+            # synthetic doctors, which are deleted too, so no cached index
+            # entry of a remaining doctor goes stale.
+            appointments._raw_delete(appointments.db)
+            AppointmentWaitlist.objects.filter(doctor__name__startswith=DOCTOR_PREFIX).delete()
+            Doctor.objects.filter(name__startswith=DOCTOR_PREFIX).delete()
+            Patient.objects.filter(phone__startswith=PATIENT_PHONE_PREFIX).delete()
+            ProcedureType.objects.filter(name__startswith=PROCEDURE_PREFIX).delete()
+        self.stdout.write(f'Purged previous synthetic clinic in {timer.perf_counter() - started:.1f}s')
+
+    def _create_doctors(self, count):
+        doctors = Doctor.objects.bulk_create([
+            Doctor(
+                name=f'{DOCTOR_PREFIX}{number:04d}',
+                specialization=self.rng.choice(SPECIALIZATIONS),
+                average_appointment_duration=timedelta(minutes=self.rng.choice(SLOT_LENGTHS)),
+                max_daily_appointments=self.rng.randint(12, 30)
+            )
+            for number in range(1, count + 1)
+        ], batch_size=self.batch_size)
+        # PKs are not returned by every backend
+        doctors = list(Doctor.objects.filter(name__startswith=DOCTOR_PREFIX).order_by('id'))
+
+        availability = []
+        self.windows = {}
+        for doctor in doctors:
+            weekdays = [0, 1, 2, 3, 4] + ([5] if self.rng.random() < 0.3 else [])
+            blocks = [MORNING] + ([AFTERNOON] if self.rng.random() < 0.8 else [])
+            self.windows[doctor.id] = (set(weekdays), blocks)
+            availability.extend(
+                DoctorAvailability(
+                    doctor=doctor, weekday=weekday,
+                    start_time=time(start // 60, start % 60), end_time=time(end // 60, end % 60)
+                )
+                for weekday in weekdays for start, end in blocks
+            )
+        DoctorAvailability.objects.bulk_create(availability, batch_size=self.batch_size)
+        self.stdout.write(f'  {len(doctors)} doctors, {len(availability)} availability windows')
+        return doctors
+
+    def _create_procedure_types(self):
+        procedure_types = []
+        for name, minutes in PROCEDURES:
+            procedure_type, _ = ProcedureType.objects.get_or_create(
+                name=f'{PROCEDURE_PREFIX}{name}',
+                defaults={'estimated_duration': timedelta(minutes=minutes)}
+            )
+            procedure_types.append(procedure_type)
+        return procedure_types
+
+    def _create_patients(self, count):
+        languages = ['ko', 'en', 'zh', 'ja']
+        for batch in batched(range(1, count + 1), self.batch_size):
+            Patient.objects.bulk_create([
+                Patient(
+                    phone=f'{PATIENT_PHONE_PREFIX}{number:07d}',
+                    name=f'Synthetic Patient {number}',
+                    preferred_language=self.rng.choice(languages)
+                )
+                for number in batch
+            ])
+        patient_ids = list(Patient.objects.filter(
+            phone__startswith=PATIENT_PHONE_PREFIX
+        ).values_list('id', flat=True))
+        self.stdout.write(f'  {len(patient_ids)} patients')
+        return patient_ids
+
+    def _slot_capacity(self, doctors, first_day, last_day):
+        """Slots in every doctor's windows over the date range."""
+        total = 0
+        day = first_day
+        while day <= last_day:
+            for doctor in doctors:
+                weekdays, blocks = self.windows[doctor.id]
+                if day.weekday() in weekdays:
+                    slot = int(doctor.average_appointment_duration.total_seconds() // 60)
+                    total += sum((end - start) // slot for start, end in blocks)
+            day += timedelta(days=1)
+        return total
+
+    def _create_appointments(self, doctors, patient_ids, procedure_types, count,
+                             days_back, days_ahead):
+        """
+        Fill each doctor's slot grid at random up to `count` bookings, so
+        no doctor is double booked. Past bookings get check-in and seen
+        times, which feed the wait-time rollup.
+        """
+        today = timezone.localdate()
+        first_day, last_day = today - timedelta(days=days_back), today + timedelta(days=days_ahead)
+        capacity = self._slot_capacity(doctors, first_day, last_day)
+        if count > capacity:
+            self.stdout.write(self.style.WARNING(
+                f'  Only {capacity} slots in range; creating that many appointments'
+            ))
+        fill = min(1.0, count / capacity) if capacity else 0.0
+        rng = self.rng
+
+        def rows():
+            created = 0
+            day = first_day
+            while day <= last_day and created < count:
+                for doctor in doctors:
+                    weekdays, blocks = self.windows[doctor.id]
+                    if day.weekday() not in weekdays:
+                        continue
+                    slot = doctor.average_appointment_duration
+                    slot_minutes = int(slot.total_seconds() // 60)
+                    for start, end in blocks:
+                        for minute in range(start, end - slot_minutes + 1, slot_minutes):
+                            if rng.random() >= fill or created >= count:
+                                continue
+                            scheduled_at = timezone.make_aware(
+                                datetime.combine(day, time(minute // 60, minute % 60))
+                            )
+                            procedure_type = rng.choice(procedure_types)
+                            appointment = Appointment(
+                                patient_id=rng.choice(patient_ids),
+                                doctor=doctor.name,
+                                assigned_doctor=doctor,
+                                procedure=procedure_type.name,
+                                procedure_type=procedure_type,
+                                duration=slot,
+                                scheduled_at=scheduled_at,
+                            )
+                            if day < today:
+                                roll = rng.random()
+                                appointment.status = (
+                                    'completed' if roll < 0.85 else 'cancelled' if roll < 0.95 else 'no_show'
+                                )
+                                if appointment.status == 'completed':
+                                    appointment.checked_in_at = scheduled_at - timedelta(minutes=rng.randint(0, 15))
+                                    appointment.seen_at = scheduled_at + timedelta(
+                                        minutes=max(0, int(rng.gauss(12, 8)))
+                                    )
+                            else:
+                                appointment.status = 'confirmed' if rng.random() < 0.8 else 'pending'
+                            created += 1
+                            yield appointment
+                day += timedelta(days=1)
+
+        total = 0
+        for batch in batched(rows(), self.batch_size):
+            Appointment.objects.bulk_create(batch)
+            total += len(batch)
+            if total % (self.batch_size * 20) < self.batch_size:
+                self.stdout.write(f'  {total} appointments...')
+        self.stdout.write(f'  {total} appointments')
+        return total
+
+    def _create_waitlist(self, doctors, patient_ids, procedure_types, count, days_ahead):
+        today = timezone.localdate()
+        rng = self.rng
+        total = 0
+        for batch in batched(range(count), self.batch_size):
+            entries = []
+            for _ in batch:
+                start_hour = rng.randint(9, 15)
+                entries.append(AppointmentWaitlist(
+                    patient_id=rng.choice(patient_ids),
+                    doctor=rng.choice(doctors),
+                    procedure_type=rng.choice(procedure_types),
+                    preferred_date=today + timedelta(days=rng.randint(1, max(1, days_ahead))),
+                    preferred_time_start=time(start_hour, 0),
+                    preferred_time_end=time(min(start_hour + rng.randint(1, 4), 18), 0),
+                    priority_score=rng.randint(50, 100),
+                    status='waiting'
+                ))
+            AppointmentWaitlist.objects.bulk_create(entries)
+            total += len(entries)
+        self.stdout.write(f'  {total} waitlist entries')
+        return total
@@ -0,0 +1,23 @@
+"""
+Management command to roll up historical wait times.
+Folds visits saved since the last run into the per-doctor weekday x hour
+tables used for slot scoring.
+"""
+
+from django.core.management.base import BaseCommand
+from clinic_ai.messaging.wait_times import rollup_wait_times
+
+
+class Command(BaseCommand):
+    help = 'Aggregate appointment wait times for scheduling'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild from the whole history instead of the visits changed since the last run',
+        )
+
+    def handle(self, *args, **options):
+        aggregated = rollup_wait_times(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Folded {aggregated} visits'))
@@ -0,0 +1,71 @@
+"""
+Management command to simulate the clinic for capacity planning.
+Runs the discrete-event simulation once, or a parameter sweep across worker
+processes, and prints utilization, wait-time and waitlist metrics. Nothing
+is written to the database.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_value(raw: str):
+    """Sweep values are JSON where possible (numbers, lists), strings otherwise."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+class Command(BaseCommand):
+    help = 'Simulate scheduling policies on a synthetic clinic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=30, help='Doctors in the clinic')
+        parser.add_argument('--days', type=int, default=365, help='Days measured')
+        parser.add_argument('--start-date', help='First measured day (YYYY-MM-DD)')
+        parser.add_argument('--load', type=float, default=0.9, help='Requests as a share of slot capacity')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument(
+            '--set', action='append', default=[], metavar='NAME=VALUE',
+            help='Override any simulation setting, e.g. --set slot_minutes=20'
+        )
+        parser.add_argument(
+            '--sweep', action='append', default=[], metavar='NAME=V1,V2',
+            help='Try several values of a setting, e.g. --sweep optimization_weight=0.3,0.7'
+        )
+        parser.add_argument('--processes', type=int, help='Worker processes for sweeps')
+
+    def handle(self, *args, **options):
+        from clinic_ai.messaging.simulation import DEFAULT_SIMULATION_CONFIG, run_sweep
+
+        config = {
+            'doctors': options['doctors'],
+            'days': options['days'],
+            'start_date': options['start_date'],
+            'load': options['load'],
+            'seed': options['seed'],
+        }
+        grid = {}
+        for option, target in (('set', config), ('sweep', grid)):
+            for item in options[option]:
+                name, _, raw = item.partition('=')
+                if name not in DEFAULT_SIMULATION_CONFIG or not raw:
+                    raise CommandError(f'Invalid --{option} value: {item}')
+                target[name] = parse_value(raw) if option == 'set' else [
+                    parse_value(value) for value in raw.split(',')
+                ]
+
+        try:
+            results = run_sweep(grid, config, options['processes'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for result in results:
+            if result['params']:
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    ', '.join(f'{name}={value}' for name, value in result['params'].items())
+                ))
+            for name, value in result['metrics'].items():
+                self.stdout.write(f'  {name:>30}: {value}')
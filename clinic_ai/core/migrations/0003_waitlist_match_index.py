@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_doctor_proceduretype_appointmentreminder_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentwaitlist',
+            index=models.Index(fields=['doctor', 'preferred_date', 'status', '-priority_score'], name='core_waitlist_match_idx'),
+        ),
+    ]
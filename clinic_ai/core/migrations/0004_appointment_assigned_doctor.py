@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from clinic_ai.core.backfill import backfill_appointment_doctors
+
+
+def backfill_doctors(apps, schema_editor):
+    backfill_appointment_doctors(apps.get_model('core', 'Appointment'), apps.get_model('core', 'Doctor'))
+
+
+class Migration(migrations.Migration):
+
+    # Let each backfill chunk commit on its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_waitlist_match_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='assigned_doctor',
+            field=models.ForeignKey(blank=True, help_text='Doctor record, resolved from the name when not set', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='core.doctor'),
+        ),
+        migrations.RunPython(backfill_doctors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['assigned_doctor', 'scheduled_at', 'status'], name='core_appt_doctor_sched_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient', 'status'], name='core_appt_patient_status_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_appointment_assigned_doctor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='duration',
+            field=models.DurationField(blank=True, help_text="Time blocked from scheduled_at; defaults to the doctor's slot length", null=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='procedure_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='core.proceduretype'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+
+def resources_from_equipment_text(apps, schema_editor):
+    """Create one single-capacity equipment resource per name in requires_equipment."""
+    ClinicResource = apps.get_model('core', 'ClinicResource')
+    ProcedureType = apps.get_model('core', 'ProcedureType')
+
+    for procedure_type in ProcedureType.objects.exclude(requires_equipment=''):
+        for name in procedure_type.requires_equipment.split(','):
+            name = name.strip()
+            if not name:
+                continue
+            resource, _ = ClinicResource.objects.get_or_create(
+                name=name, defaults={'resource_type': 'equipment', 'capacity': 1}
+            )
+            procedure_type.resources.add(resource)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_appointment_procedure_footprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClinicResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(help_text='Resource name', max_length=200, unique=True)),
+                ('resource_type', models.CharField(choices=[('equipment', 'Equipment'), ('room', 'Room')], default='equipment', max_length=20)),
+                ('capacity', models.PositiveIntegerField(default=1, help_text='Concurrent procedures supported')),
+                ('is_active', models.BooleanField(default=True, help_text='Currently in service')),
+            ],
+            options={
+                'verbose_name': 'Clinic Resource',
+                'verbose_name_plural': 'Clinic Resources',
+            },
+        ),
+        migrations.AddField(
+            model_name='proceduretype',
+            name='resources',
+            field=models.ManyToManyField(blank=True, help_text='Equipment and rooms held for the whole footprint', related_name='procedure_types', to='core.clinicresource'),
+        ),
+        migrations.RunPython(resources_from_equipment_text, migrations.RunPython.noop),
+    ]
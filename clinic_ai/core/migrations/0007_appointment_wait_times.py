@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_clinicresource'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, help_text='When the patient checked in', null=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='seen_at',
+            field=models.DateTimeField(blank=True, help_text='When the doctor saw the patient', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'seen_at'], name='core_appt_status_seen_idx'),
+        ),
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup Checkpoint',
+                'verbose_name_plural': 'Rollup Checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='WaitTimeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('wait_minutes', models.BinaryField(help_text='Packed float64 sums of wait minutes per cell')),
+                ('visit_counts', models.BinaryField(help_text='Packed uint32 visit counts per cell')),
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wait_time_rollup', to='core.doctor')),
+            ],
+            options={
+                'verbose_name': 'Wait Time Rollup',
+                'verbose_name_plural': 'Wait Time Rollups',
+            },
+        ),
+    ]
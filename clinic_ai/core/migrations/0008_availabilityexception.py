@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_appointment_wait_times'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exception_type', models.CharField(choices=[('holiday', 'Holiday'), ('leave', 'Leave'), ('conference', 'Conference'), ('blocked', 'Blocked Time')], default='blocked', max_length=20)),
+                ('start_at', models.DateTimeField(help_text='Start of the closure')),
+                ('end_at', models.DateTimeField(help_text='End of the closure (exclusive)')),
+                ('reason', models.CharField(blank=True, help_text='Shown to staff', max_length=200)),
+                ('doctor', models.ForeignKey(blank=True, help_text='Doctor affected; empty for a clinic-wide closure', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_exceptions', to='core.doctor')),
+            ],
+            options={
+                'verbose_name': 'Availability Exception',
+                'verbose_name_plural': 'Availability Exceptions',
+                'ordering': ['start_at'],
+                'indexes': [models.Index(fields=['doctor', 'start_at', 'end_at'], name='core_avail_exc_range_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_availabilityexception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptimizationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField(help_text='Local day the optimizations were made')),
+                ('offered', models.IntegerField(default=0, help_text='Optimizations offered')),
+                ('accepted', models.IntegerField(default=0, help_text='Optimizations the patient accepted')),
+                ('estimated_reduction_minutes', models.IntegerField(default=0, help_text='Estimated wait reduction summed over accepted optimizations')),
+                ('realized_visits', models.IntegerField(default=0, help_text='Accepted optimizations with a completed visit')),
+                ('expected_wait_minutes', models.FloatField(default=0.0, help_text='Expected wait at the requested times of realized visits')),
+                ('actual_wait_minutes', models.FloatField(default=0.0, help_text='Measured wait of realized visits')),
+            ],
+            options={
+                'verbose_name': 'Optimization Rollup',
+                'verbose_name_plural': 'Optimization Rollups',
+            },
+        ),
+        migrations.AddField(
+            model_name='schedulingoptimization',
+            name='doctor',
+            field=models.ForeignKey(blank=True, help_text='Doctor the slot was found for', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='optimizations', to='core.doctor'),
+        ),
+        migrations.AddField(
+            model_name='schedulingoptimization',
+            name='expected_wait_minutes',
+            field=models.FloatField(blank=True, help_text='Expected wait at the originally requested time', null=True),
+        ),
+        migrations.AddField(
+            model_name='schedulingoptimization',
+            name='version_stamp',
+            field=models.CharField(blank=True, help_text='Versions of the doctor-days the result was computed from', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='schedulingoptimization',
+            index=models.Index(fields=['updated_at'], name='core_opt_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedulingoptimization',
+            index=models.Index(fields=['created_at'], name='core_opt_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='optimizationrollup',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='optimization_rollups', to='core.doctor'),
+        ),
+        migrations.AddIndex(
+            model_name='optimizationrollup',
+            index=models.Index(fields=['day', 'doctor'], name='core_opt_rollup_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='optimizationrollup',
+            constraint=models.UniqueConstraint(fields=('doctor', 'day'), name='core_opt_rollup_doctor_day'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_optimization_results'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='core_appt_status_seen_idx',
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['updated_at'], name='core_appt_updated_idx'),
+        ),
+    ]
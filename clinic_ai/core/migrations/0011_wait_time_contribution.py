@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rebuild_wait_times_on_next_run(apps, schema_editor):
+    """Existing rollups have no per-visit contributions; the next run rebuilds them."""
+    RollupCheckpoint = apps.get_model('core', 'RollupCheckpoint')
+    RollupCheckpoint.objects.filter(name='wait_times').update(watermark=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_appointment_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitTimeContribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cell', models.PositiveSmallIntegerField(help_text='Weekday-major week hour (0-167) of the visit')),
+                ('wait_minutes', models.FloatField(help_text='Minutes from check-in to being seen')),
+                ('appointment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wait_time_contribution', to='core.appointment')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.doctor')),
+            ],
+            options={
+                'verbose_name': 'Wait Time Contribution',
+                'verbose_name_plural': 'Wait Time Contributions',
+            },
+        ),
+        migrations.RunPython(rebuild_wait_times_on_next_run, migrations.RunPython.noop),
+    ]
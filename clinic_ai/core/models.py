@@ -87,9 +87,18 @@ class Appointment(BaseEntity):
 
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='appointments')
     doctor = models.CharField(max_length=100, help_text="Doctor's name")
+    assigned_doctor = models.ForeignKey('Doctor', null=True, blank=True, on_delete=models.SET_NULL,
+                                        related_name='appointments',
+                                        help_text="Doctor record, resolved from the name when not set")
     procedure = models.CharField(max_length=200, help_text="Medical procedure type")
+    procedure_type = models.ForeignKey('ProcedureType', null=True, blank=True, on_delete=models.SET_NULL,
+                                       related_name='appointments')
+    duration = models.DurationField(null=True, blank=True,
+                                    help_text="Time blocked from scheduled_at; defaults to the doctor's slot length")
     scheduled_at = models.DateTimeField(help_text="Appointment date and time")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    checked_in_at = models.DateTimeField(null=True, blank=True, help_text="When the patient checked in")
+    seen_at = models.DateTimeField(null=True, blank=True, help_text="When the doctor saw the patient")
     notes = models.TextField(blank=True, help_text="Additional appointment notes")
     approved_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL,
                                    related_name='approved_appointments')
@@ -101,6 +110,16 @@ class Appointment(BaseEntity):
         ordering = ['scheduled_at']
         verbose_name = "Appointment"
         verbose_name_plural = "Appointments"
+        indexes = [
+            # Scheduler range scans: doctor + time window + active statuses
+            models.Index(
+                fields=['assigned_doctor', 'scheduled_at', 'status'],
+                name='core_appt_doctor_sched_idx'
+            ),
+            models.Index(fields=['patient', 'status'], name='core_appt_patient_status_idx'),
+            # Incremental rollups: appointments saved since the last run
+            models.Index(fields=['updated_at'], name='core_appt_updated_idx'),
+        ]
 
 
 class StaffResponse(BaseEntity):
@@ -254,6 +273,63 @@ class DoctorAvailability(BaseEntity):
         unique_together = ['doctor', 'weekday', 'start_time']
 
 
+class AvailabilityException(BaseEntity):
+    """
+    One-off closure overriding the weekly availability template.
+    Covers a whole day or part of one; applies to every doctor when no
+    doctor is set (clinic holidays).
+    """
+    EXCEPTION_TYPES = [
+        ('holiday', 'Holiday'),
+        ('leave', 'Leave'),
+        ('conference', 'Conference'),
+        ('blocked', 'Blocked Time'),
+    ]
+
+    doctor = models.ForeignKey(Doctor, null=True, blank=True, on_delete=models.CASCADE,
+                               related_name='availability_exceptions',
+                               help_text="Doctor affected; empty for a clinic-wide closure")
+    exception_type = models.CharField(max_length=20, choices=EXCEPTION_TYPES, default='blocked')
+    start_at = models.DateTimeField(help_text="Start of the closure")
+    end_at = models.DateTimeField(help_text="End of the closure (exclusive)")
+    reason = models.CharField(max_length=200, blank=True, help_text="Shown to staff")
+
+    def __str__(self):
+        who = self.doctor.name if self.doctor_id else 'Clinic'
+        return f"{who} - {self.get_exception_type_display()} {self.start_at}-{self.end_at}"
+
+    class Meta:
+        ordering = ['start_at']
+        verbose_name = "Availability Exception"
+        verbose_name_plural = "Availability Exceptions"
+        indexes = [
+            models.Index(fields=['doctor', 'start_at', 'end_at'], name='core_avail_exc_range_idx'),
+        ]
+
+
+class ClinicResource(BaseEntity):
+    """
+    Shared clinic resource (equipment or room) with limited capacity.
+    Procedures that require a resource cannot overlap beyond its capacity.
+    """
+    RESOURCE_TYPES = [
+        ('equipment', 'Equipment'),
+        ('room', 'Room'),
+    ]
+
+    name = models.CharField(max_length=200, unique=True, help_text="Resource name")
+    resource_type = models.CharField(max_length=20, choices=RESOURCE_TYPES, default='equipment')
+    capacity = models.PositiveIntegerField(default=1, help_text="Concurrent procedures supported")
+    is_active = models.BooleanField(default=True, help_text="Currently in service")
+
+    def __str__(self):
+        return f"{self.name} ({self.get_resource_type_display()}, {self.capacity})"
+
+    class Meta:
+        verbose_name = "Clinic Resource"
+        verbose_name_plural = "Clinic Resources"
+
+
 class ProcedureType(BaseEntity):
     """
     Medical procedure types with duration and requirements.
@@ -261,14 +337,28 @@ class ProcedureType(BaseEntity):
     """
     name = models.CharField(max_length=200, help_text="Procedure name")
     name_ko = models.CharField(max_length=200, blank=True, help_text="Korean name")
+    name_zh = models.CharField(max_length=200, blank=True, help_text="Chinese name")
+    name_ja = models.CharField(max_length=200, blank=True, help_text="Japanese name")
     description = models.TextField(blank=True, help_text="Procedure description")
     estimated_duration = models.DurationField(help_text="Estimated procedure duration")
     requires_equipment = models.TextField(blank=True, help_text="Required equipment (comma-separated)")
     preparation_time = models.DurationField(null=True, blank=True, help_text="Pre-procedure preparation time")
     recovery_time = models.DurationField(null=True, blank=True, help_text="Post-procedure recovery time")
+    resources = models.ManyToManyField(ClinicResource, blank=True, related_name='procedure_types',
+                                       help_text="Equipment and rooms held for the whole footprint")
     
     def __str__(self):
         return self.name
+
+    @property
+    def total_duration(self):
+        """Time a booking blocks the doctor: preparation + procedure + recovery."""
+        total = self.estimated_duration
+        if self.preparation_time:
+            total += self.preparation_time
+        if self.recovery_time:
+            total += self.recovery_time
+        return total
     
     class Meta:
         verbose_name = "Procedure Type"
@@ -306,6 +396,13 @@ class AppointmentWaitlist(BaseEntity):
         ordering = ['-priority_score', 'created_at']
         verbose_name = "Appointment Waitlist"
         verbose_name_plural = "Appointment Waitlists"
+        indexes = [
+            # Freed-slot matching: (doctor, date, window) ordered by priority
+            models.Index(
+                fields=['doctor', 'preferred_date', 'status', '-priority_score'],
+                name='core_waitlist_match_idx'
+            ),
+        ]
 
 
 class SchedulingOptimization(BaseEntity):
@@ -314,12 +411,18 @@ class SchedulingOptimization(BaseEntity):
     Stores optimization results and patient preferences.
     """
     appointment = models.OneToOneField(Appointment, on_delete=models.CASCADE, related_name='optimization')
+    doctor = models.ForeignKey(Doctor, null=True, blank=True, on_delete=models.SET_NULL,
+                               related_name='optimizations', help_text="Doctor the slot was found for")
     original_scheduled_at = models.DateTimeField(help_text="Original requested time")
     optimized_scheduled_at = models.DateTimeField(help_text="AI-optimized time")
     optimization_score = models.FloatField(help_text="Optimization quality score (0-1)")
     wait_time_reduction_minutes = models.IntegerField(default=0, help_text="Estimated wait time reduction")
+    expected_wait_minutes = models.FloatField(null=True, blank=True,
+                                              help_text="Expected wait at the originally requested time")
     patient_accepted = models.BooleanField(default=False, help_text="Patient accepted optimization")
     optimization_reason = models.TextField(blank=True, help_text="Reason for optimization")
+    version_stamp = models.CharField(max_length=255, blank=True,
+                                     help_text="Versions of the doctor-days the result was computed from")
     
     def __str__(self):
         return f"Optimization for {self.appointment}"
@@ -327,6 +430,11 @@ class SchedulingOptimization(BaseEntity):
     class Meta:
         verbose_name = "Scheduling Optimization"
         verbose_name_plural = "Scheduling Optimizations"
+        indexes = [
+            # Incremental analytics rollup: rows changed since the last run
+            models.Index(fields=['updated_at'], name='core_opt_updated_idx'),
+            models.Index(fields=['created_at'], name='core_opt_created_idx'),
+        ]
 
 
 class AppointmentReminder(BaseEntity):
@@ -359,4 +467,91 @@ class AppointmentReminder(BaseEntity):
     class Meta:
         ordering = ['scheduled_send_at']
         verbose_name = "Appointment Reminder"
-        verbose_name_plural = "Appointment Reminders"
\ No newline at end of file
+        verbose_name_plural = "Appointment Reminders"
+
+
+class WaitTimeRollup(BaseEntity):
+    """
+    Historical wait times per doctor, weekday and hour.
+    Sums and counts are packed arrays of 7 x 24 cells (weekday-major), so
+    one row per doctor holds the whole table.
+    """
+    doctor = models.OneToOneField(Doctor, on_delete=models.CASCADE, related_name='wait_time_rollup')
+    wait_minutes = models.BinaryField(help_text="Packed float64 sums of wait minutes per cell")
+    visit_counts = models.BinaryField(help_text="Packed uint32 visit counts per cell")
+
+    def __str__(self):
+        return f"Wait times for {self.doctor}"
+
+    class Meta:
+        verbose_name = "Wait Time Rollup"
+        verbose_name_plural = "Wait Time Rollups"
+
+
+class WaitTimeContribution(BaseEntity):
+    """
+    What one completed visit adds to its doctor's WaitTimeRollup.
+    Kept so an incremental rollup can take a visit's old wait back out when
+    the visit is edited, reassigned or no longer completed.
+    """
+    appointment = models.OneToOneField(Appointment, on_delete=models.CASCADE,
+                                       related_name='wait_time_contribution')
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='+')
+    cell = models.PositiveSmallIntegerField(help_text="Weekday-major week hour (0-167) of the visit")
+    wait_minutes = models.FloatField(help_text="Minutes from check-in to being seen")
+
+    def __str__(self):
+        return f"Wait time of {self.appointment_id}"
+
+    class Meta:
+        verbose_name = "Wait Time Contribution"
+        verbose_name_plural = "Wait Time Contributions"
+
+
+class OptimizationRollup(BaseEntity):
+    """
+    Daily scheduling optimization outcomes per doctor.
+    Rebuilt for the days whose optimizations changed since the last run,
+    so analytics read a handful of rows instead of scanning every result.
+    """
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='optimization_rollups')
+    day = models.DateField(help_text="Local day the optimizations were made")
+    offered = models.IntegerField(default=0, help_text="Optimizations offered")
+    accepted = models.IntegerField(default=0, help_text="Optimizations the patient accepted")
+    estimated_reduction_minutes = models.IntegerField(
+        default=0, help_text="Estimated wait reduction summed over accepted optimizations"
+    )
+    realized_visits = models.IntegerField(default=0, help_text="Accepted optimizations with a completed visit")
+    expected_wait_minutes = models.FloatField(
+        default=0.0, help_text="Expected wait at the requested times of realized visits"
+    )
+    actual_wait_minutes = models.FloatField(default=0.0, help_text="Measured wait of realized visits")
+
+    def __str__(self):
+        return f"Optimizations for {self.doctor} on {self.day}"
+
+    class Meta:
+        verbose_name = "Optimization Rollup"
+        verbose_name_plural = "Optimization Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'day'], name='core_opt_rollup_doctor_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'doctor'], name='core_opt_rollup_day_idx'),
+        ]
+
+
+class RollupCheckpoint(BaseEntity):
+    """
+    High-water mark of an incremental rollup job.
+    Rows at or before the watermark have already been aggregated.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
+
+    class Meta:
+        verbose_name = "Rollup Checkpoint"
+        verbose_name_plural = "Rollup Checkpoints"
@@ -1,13 +1,196 @@
 """Signals for core models."""
 
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
 from django.dispatch import receiver
 
+from .models import (
+    Appointment, AvailabilityException, ClinicResource, Doctor, DoctorAvailability, MedicalTerminology,
+    ProcedureType
+)
+
 
 @receiver(pre_save)
 def update_metrics_on_save(sender, instance, **kwargs):
     """
     Update system metrics when relevant models are saved.
-    This is a placeholder for more sophisticated metrics collection.
+    For appointments, snapshot the booking fields before the save so the
+    booking index can move the interval once the change is committed.
+    """
+    if sender is Appointment:
+        if instance.pk:
+            instance._booking_snapshot = Appointment.objects.filter(
+                pk=instance.pk
+            ).values(
+                'assigned_doctor', 'doctor', 'procedure_type', 'scheduled_at', 'duration', 'status'
+            ).first()
+        link_assigned_doctor(instance)
+
+
+def link_assigned_doctor(instance):
     """
-    pass
\ No newline at end of file
+    Keep an appointment's doctor name and doctor foreign key in sync.
+    Whichever of the two was set or changed wins; the other follows.
+    """
+    previous = getattr(instance, '_booking_snapshot', None)
+    name_changed = previous is not None and previous['doctor'] != instance.doctor
+    doctor_changed = previous is not None and previous['assigned_doctor'] != instance.assigned_doctor_id
+
+    if instance.assigned_doctor_id and (not instance.doctor or (doctor_changed and not name_changed)):
+        instance.doctor = instance.assigned_doctor.name
+    elif instance.doctor and (instance.assigned_doctor_id is None or (name_changed and not doctor_changed)):
+        instance.assigned_doctor_id = Doctor.objects.filter(
+            name=instance.doctor
+        ).values_list('id', flat=True).first()
+
+
+@receiver(post_save, sender=Appointment)
+def update_booking_index_on_save(sender, instance, **kwargs):
+    """Apply a saved appointment to the booking index after commit."""
+    from clinic_ai.messaging.booking_index import get_booking_index
+
+    previous = getattr(instance, '_booking_snapshot', None)
+    transaction.on_commit(lambda: get_booking_index().apply(instance, previous))
+
+
+@receiver(post_delete, sender=Appointment)
+def update_booking_index_on_delete(sender, instance, **kwargs):
+    """Remove a deleted appointment from the booking index after commit."""
+    from clinic_ai.messaging.booking_index import get_booking_index
+
+    transaction.on_commit(lambda: get_booking_index().discard(instance))
+
+
+@receiver(post_save, sender=Appointment)
+def match_waitlist_on_release(sender, instance, **kwargs):
+    """
+    Offer a released slot to the waitlist once the change is committed.
+    Registered after the booking index receiver so the index already
+    reflects the release when the matcher checks the slot.
+    """
+    from clinic_ai.messaging.booking_index import ACTIVE_APPOINTMENT_STATUSES
+    from clinic_ai.messaging.waitlist_matcher import WaitlistMatcher
+
+    previous = getattr(instance, '_booking_snapshot', None)
+    if not previous or previous['status'] not in ACTIVE_APPOINTMENT_STATUSES:
+        return
+
+    moved = (previous['scheduled_at'] != instance.scheduled_at
+             or previous['assigned_doctor'] != instance.assigned_doctor_id)
+    if moved or instance.status in WaitlistMatcher.RELEASED_STATUSES:
+        transaction.on_commit(
+            lambda: WaitlistMatcher().release(
+                previous['assigned_doctor'], previous['scheduled_at'], previous['duration']
+            )
+        )
+
+
+@receiver(post_delete, sender=Appointment)
+def match_waitlist_on_delete(sender, instance, **kwargs):
+    """Offer the slot of a deleted active appointment to the waitlist."""
+    from clinic_ai.messaging.booking_index import ACTIVE_APPOINTMENT_STATUSES
+    from clinic_ai.messaging.waitlist_matcher import WaitlistMatcher
+
+    if instance.status in ACTIVE_APPOINTMENT_STATUSES:
+        transaction.on_commit(
+            lambda: WaitlistMatcher().release(
+                instance.assigned_doctor_id, instance.scheduled_at, instance.duration
+            )
+        )
+
+
+@receiver(post_save, sender=Doctor)
+def refresh_booking_index_on_doctor_change(sender, instance, **kwargs):
+    """Drop cached doctor metadata when slot length or name changes."""
+    from clinic_ai.messaging.booking_index import get_booking_index
+
+    get_booking_index().forget_doctor(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def update_resource_index_on_save(sender, instance, **kwargs):
+    """Move a saved appointment's equipment/room usage after commit."""
+    from clinic_ai.messaging.resource_index import get_resource_index
+
+    previous = getattr(instance, '_booking_snapshot', None)
+    transaction.on_commit(lambda: get_resource_index().apply(instance, previous))
+
+
+@receiver(post_delete, sender=Appointment)
+def update_resource_index_on_delete(sender, instance, **kwargs):
+    """Release a deleted appointment's equipment/room usage after commit."""
+    from clinic_ai.messaging.resource_index import get_resource_index
+
+    transaction.on_commit(lambda: get_resource_index().discard(instance))
+
+
+@receiver(post_save, sender=ClinicResource)
+@receiver(post_save, sender=ProcedureType)
+@receiver(m2m_changed, sender=ProcedureType.resources.through)
+def refresh_resource_profiles(sender, **kwargs):
+    """Drop cached resource capacities and procedure requirements."""
+    from clinic_ai.messaging.resource_index import get_resource_index
+
+    transaction.on_commit(lambda: get_resource_index().forget_profiles())
+
+
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+def refresh_availability_exceptions(sender, **kwargs):
+    """Retire cached closure weeks once a holiday or blocked time changes."""
+    from clinic_ai.messaging.availability_exceptions import get_exception_index
+
+    transaction.on_commit(lambda: get_exception_index().invalidate())
+
+
+@receiver(post_save, sender=Appointment)
+def refresh_next_slots_on_save(sender, instance, **kwargs):
+    """
+    Retire the materialized next slots of the doctor-days a booking touches.
+    Registered after the index receivers so lists rebuilt right after commit
+    already see the change.
+    """
+    from clinic_ai.messaging.next_slots import get_next_slot_cache
+
+    previous = getattr(instance, '_booking_snapshot', None)
+    transaction.on_commit(lambda: get_next_slot_cache().invalidate_booking(instance, previous))
+
+
+@receiver(post_delete, sender=Appointment)
+def refresh_next_slots_on_delete(sender, instance, **kwargs):
+    """Retire the materialized next slots of a deleted booking's doctor-days."""
+    from clinic_ai.messaging.next_slots import get_next_slot_cache
+
+    transaction.on_commit(lambda: get_next_slot_cache().invalidate_booking(instance))
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=DoctorAvailability)
+@receiver(post_delete, sender=DoctorAvailability)
+def refresh_next_slots_on_schedule_change(sender, instance, **kwargs):
+    """Retire a doctor's materialized next slots when the weekly schedule changes."""
+    from clinic_ai.messaging.next_slots import get_next_slot_cache
+
+    doctor_id = instance.id if sender is Doctor else instance.doctor_id
+    transaction.on_commit(lambda: get_next_slot_cache().invalidate_doctor(doctor_id))
+
+
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+@receiver(post_save, sender=ClinicResource)
+@receiver(post_save, sender=ProcedureType)
+@receiver(m2m_changed, sender=ProcedureType.resources.through)
+def refresh_all_next_slots(sender, **kwargs):
+    """Retire every materialized next-slot list after closures or resources change."""
+    from clinic_ai.messaging.next_slots import get_next_slot_cache
+
+    transaction.on_commit(lambda: get_next_slot_cache().invalidate_all())
+
+
+@receiver(post_save, sender=MedicalTerminology)
+@receiver(post_delete, sender=MedicalTerminology)
+def refresh_translations_on_terminology_change(sender, **kwargs):
+    """Retire cached translations once a medical term changes."""
+    from clinic_ai.messaging.translation_cache import bump_terminology_version
+
+    transaction.on_commit(bump_terminology_version)
@@ -48,6 +48,11 @@ class OpenAIService(AIService):
             # Add context if available
             if context:
                 prompt += f"\nContext: {context.get('previous_intent', 'general_inquiry')}"
+                if context.get('next_slots'):
+                    openings = ', '.join(
+                        f"{slot['scheduled_at']} ({slot['doctor_name']})" for slot in context['next_slots']
+                    )
+                    prompt += f"\nNext available appointments: {openings}"
 
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
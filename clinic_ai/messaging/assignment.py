@@ -0,0 +1,88 @@
+"""
+Minimum-cost assignment solver for batch scheduling.
+Hungarian algorithm (shortest augmenting paths with potentials) on dense
+rectangular cost matrices, without external dependencies.
+"""
+
+from typing import List, Optional
+
+# Cost used for request/slot pairs that must never be matched
+UNAVAILABLE = 1e9
+
+
+def solve_assignment(cost: List[List[float]]) -> List[Optional[int]]:
+    """
+    Solve a rectangular minimum-cost assignment problem.
+
+    Every row is matched to a distinct column (or every column to a distinct
+    row when there are more rows than columns) so that the total cost is
+    minimal. Runs in O(n^2 * m) with n = min(rows, cols).
+
+    Args:
+        cost: Cost matrix as a list of equally sized rows
+
+    Returns:
+        Column index assigned to each row, or None when the row is left
+        unmatched or only matched through an UNAVAILABLE pair
+    """
+    rows = len(cost)
+    if rows == 0 or not cost[0]:
+        return [None] * rows
+    cols = len(cost[0])
+
+    transposed = rows > cols
+    matrix = [list(column) for column in zip(*cost)] if transposed else cost
+    n, m = (cols, rows) if transposed else (rows, cols)
+
+    infinity = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)  # owner[j] = row matched to column j (1-based)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_reduced = [infinity] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = matrix[i0 - 1]
+            u_i0 = u[i0]
+            delta = infinity
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - u_i0 - v[j]
+                    if reduced < min_reduced[j]:
+                        min_reduced[j] = reduced
+                        way[j] = j0
+                    if min_reduced[j] < delta:
+                        delta = min_reduced[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_reduced[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    assignment: List[Optional[int]] = [None] * rows
+    for j in range(1, m + 1):
+        i = owner[j]
+        if not i:
+            continue
+        row_index, col_index = (j - 1, i - 1) if transposed else (i - 1, j - 1)
+        if cost[row_index][col_index] < UNAVAILABLE:
+            assignment[row_index] = col_index
+
+    return assignment
@@ -0,0 +1,544 @@
+"""
+Bitmap-backed availability engine for appointment scheduling.
+Loads a doctor's availability windows, closures and bookings for a whole
+date range in bulk and computes free slots with minute-resolution bitmaps.
+"""
+
+import heapq
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from django.utils import timezone
+
+from ..core.models import Doctor, DoctorAvailability
+from .availability_exceptions import ExceptionIndex, get_exception_index, subtract_intervals
+from .booking_index import (
+    MINUTES_PER_DAY, BookingIndex, duration_minutes, get_booking_index, minute_of_day,
+    slot_datetime
+)
+from .resource_index import BUCKET_MINUTES, ResourceIndex, get_resource_index
+
+logger = logging.getLogger(__name__)
+
+# Procedure start times are aligned to this grid when packing gaps
+PACKING_GRID_MINUTES = 5
+
+# Minute-of-day ranges for the 'preferred_time' preference
+PREFERRED_TIME_MINUTES = {
+    'morning': (0, 12 * 60),
+    'afternoon': (12 * 60, 17 * 60),
+    'evening': (17 * 60, MINUTES_PER_DAY),
+}
+
+
+def interval_mask(start_minute: int, end_minute: int) -> int:
+    """Bitmap with minutes [start_minute, end_minute) set."""
+    start_minute = max(0, start_minute)
+    end_minute = min(MINUTES_PER_DAY, end_minute)
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def run_start_mask(free_mask: int, length: int) -> int:
+    """
+    Bitmap of minutes where a run of `length` free minutes starts.
+
+    Bit m of the result is set iff minutes [m, m + length) are all set in
+    `free_mask`. Uses O(log length) shift-and operations over the whole day.
+    """
+    runs = free_mask
+    covered = 1
+    while covered < length:
+        shift = min(covered, length - covered)
+        runs &= runs >> shift
+        covered += shift
+    return runs
+
+
+def preference_filter(preferences: Optional[Dict]) -> Tuple[Optional[Set[int]], Optional[int]]:
+    """
+    Translate patient preferences into a weekday set and a minute mask.
+
+    Applied to the day bitmaps before slots are generated, so filtered-out
+    days and times never produce candidate slots.
+
+    Returns:
+        (allowed weekdays or None, allowed minute-of-day mask or None)
+    """
+    if not preferences:
+        return None, None
+
+    weekdays = None
+    if 'preferred_days' in preferences:
+        weekdays = set(preferences['preferred_days'])
+
+    minute_mask = None
+    time_range = PREFERRED_TIME_MINUTES.get(preferences.get('preferred_time'))
+    if time_range:
+        minute_mask = interval_mask(*time_range)
+
+    return weekdays, minute_mask
+
+
+def round_up(minute: int, grid: int) -> int:
+    """Round a minute up to the next multiple of `grid`."""
+    return -(-minute // grid) * grid
+
+
+def iter_set_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of set bits in ascending order."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+class AvailabilityEngine:
+    """
+    Availability engine for a single doctor.
+    Each doctor-day is represented as integer bitmaps (bit n = minute n of the
+    day) so free slots are computed with a handful of bitwise operations
+    instead of per-slot database probes.
+    """
+
+    def __init__(self, doctor: Doctor, booking_index: BookingIndex = None,
+                 resource_ids: Optional[List[int]] = None,
+                 resource_index: ResourceIndex = None,
+                 exception_index: ExceptionIndex = None):
+        """
+        Initialize engine.
+
+        Args:
+            doctor: Doctor whose schedule is searched
+            booking_index: Interval index of booked appointments
+            resource_ids: Clinic resources the searched procedure needs;
+                minutes where any of them is at capacity count as busy
+            resource_index: Capacity index for those resources
+            exception_index: Holidays and blocked time cut out of the windows
+        """
+        self.doctor = doctor
+        self.booking_index = booking_index or get_booking_index()
+        self.resource_ids = resource_ids or []
+        self.resource_index = resource_index or get_resource_index()
+        self.exception_index = exception_index or get_exception_index()
+        self.slot_minutes = duration_minutes(doctor.average_appointment_duration)
+        self._windows: Dict[int, List[Tuple[int, int]]] = {}
+        self._day_windows: Dict[date, List[Tuple[int, int]]] = {}
+        self._busy: Dict[date, int] = {}
+        self._blocked: Dict[date, int] = {}
+        self._loaded_range: Tuple[date, date] = None
+
+    def load(self, start_date: date, end_date: date) -> None:
+        """
+        Load availability windows, closures and bookings for the date range.
+        Issues at most three queries regardless of the range width: one for
+        the weekly windows and one each to fill closure weeks and booking
+        index days that are not cached.
+        """
+        self._windows = {}
+        for weekday, start_time, end_time in DoctorAvailability.objects.filter(
+            doctor=self.doctor,
+            is_available=True
+        ).values_list('weekday', 'start_time', 'end_time'):
+            self._add_window(weekday, start_time, end_time)
+
+        self.load_bookings(start_date, end_date)
+
+    @classmethod
+    def load_many(cls, doctors: List[Doctor], start_date: date, end_date: date,
+                  booking_index: BookingIndex = None,
+                  resource_ids: Optional[List[int]] = None) -> Dict[int, 'AvailabilityEngine']:
+        """
+        Build loaded engines for several doctors at once.
+        Three queries at most, independent of the doctor count: all
+        availability windows, uncached closure weeks and uncached booking
+        index days.
+
+        Returns:
+            Engines keyed by doctor ID
+        """
+        booking_index = booking_index or get_booking_index()
+        engines = {doctor.id: cls(doctor, booking_index, resource_ids) for doctor in doctors}
+        for doctor_id, weekday, start_time, end_time in DoctorAvailability.objects.filter(
+            doctor_id__in=list(engines),
+            is_available=True
+        ).values_list('doctor_id', 'weekday', 'start_time', 'end_time'):
+            engines[doctor_id]._add_window(weekday, start_time, end_time)
+
+        cls.load_bookings_many(list(engines.values()), start_date, end_date)
+        return engines
+
+    @staticmethod
+    def load_bookings_many(engines: List['AvailabilityEngine'], start_date: date,
+                           end_date: date) -> None:
+        """Load bookings for several engines with one batched index prime."""
+        if not engines:
+            return
+        engines[0].booking_index.prime_many(
+            [engine.doctor for engine in engines], start_date - timedelta(days=1), end_date
+        )
+        engines[0].exception_index.prime(
+            [engine.doctor.id for engine in engines], start_date, end_date
+        )
+        if engines[0].resource_ids:
+            engines[0].resource_index.prime(engines[0].resource_ids, start_date, end_date)
+        for engine in engines:
+            engine.load_bookings(start_date, end_date, primed=True)
+
+    def _add_window(self, weekday: int, start_time, end_time) -> None:
+        self._windows.setdefault(weekday, []).append((
+            start_time.hour * 60 + start_time.minute,
+            end_time.hour * 60 + end_time.minute
+        ))
+
+    def load_bookings(self, start_date: date, end_date: date, primed: bool = False) -> None:
+        """
+        Rebuild busy bitmaps for the date range from the booking index.
+
+        Args:
+            start_date: First day to load
+            end_date: Last day to load (inclusive)
+            primed: Skip priming when the caller already primed the index
+        """
+        self._busy = {}
+        self._blocked = {}
+        self._day_windows = {}
+        self._mark_bookings(start_date, end_date, primed)
+        self._loaded_range = (start_date, end_date)
+
+    def ensure_loaded(self, start_date: date, end_date: date) -> None:
+        """
+        Extend the loaded range to cover [start_date, end_date].
+        Only the days that are not loaded yet are read from the index.
+        """
+        if self._loaded_range is None:
+            self.load(start_date, end_date)
+            return
+
+        loaded_start, loaded_end = self._loaded_range
+        if start_date < loaded_start:
+            self._mark_bookings(start_date, loaded_start - timedelta(days=1))
+        if end_date > loaded_end:
+            self._mark_bookings(loaded_end + timedelta(days=1), end_date)
+        self._loaded_range = (min(start_date, loaded_start), max(end_date, loaded_end))
+
+    def _mark_bookings(self, start_date: date, end_date: date, primed: bool = False) -> None:
+        """OR the bookings of a date range into the busy bitmaps."""
+        # Appointments starting the previous evening can spill into start_date
+        if not primed:
+            self.booking_index.prime(self.doctor, start_date - timedelta(days=1), end_date)
+            self.exception_index.prime([self.doctor.id], start_date, end_date)
+            if self.resource_ids:
+                self.resource_index.prime(self.resource_ids, start_date, end_date)
+
+        current_date = start_date - timedelta(days=1)
+        while current_date <= end_date:
+            for start_minute, end_minute in self.booking_index.busy_intervals(
+                    self.doctor, current_date):
+                self._mark_busy(current_date, start_minute, end_minute)
+            current_date += timedelta(days=1)
+
+        current_date = start_date
+        while self.resource_ids and current_date <= end_date:
+            blocked = 0
+            for lo, hi in self.resource_index.blocked_buckets(self.resource_ids, current_date):
+                blocked |= interval_mask(lo * BUCKET_MINUTES, hi * BUCKET_MINUTES)
+            self._blocked[current_date] = blocked
+            current_date += timedelta(days=1)
+
+    def _mark_busy(self, day: date, start_minute: int, end_minute: int) -> None:
+        """Mark a booking's minutes as busy, splitting across midnight."""
+        self._busy[day] = self._busy.get(day, 0) | interval_mask(start_minute, end_minute)
+        if end_minute > MINUTES_PER_DAY:
+            next_day = day + timedelta(days=1)
+            self._busy[next_day] = self._busy.get(next_day, 0) | interval_mask(
+                0, end_minute - MINUTES_PER_DAY
+            )
+
+    def reserve(self, start: datetime, end: datetime) -> None:
+        """
+        Mark [start, end) busy in the loaded bitmaps without booking it, e.g.
+        a blocked interval or slots already handed out within a batch.
+        """
+        day, minute = minute_of_day(start)
+        remaining = duration_minutes(end - start)
+        while remaining > 0:
+            length = min(remaining, MINUTES_PER_DAY - minute)
+            self._mark_busy(day, minute, minute + length)
+            remaining -= length
+            day, minute = day + timedelta(days=1), 0
+
+    def day_windows(self, day: date) -> List[Tuple[int, int]]:
+        """The weekday's availability windows minus the day's closures."""
+        windows = self._day_windows.get(day)
+        if windows is None:
+            template = self._windows.get(day.weekday(), [])
+            if template:
+                windows = subtract_intervals(
+                    template, self.exception_index.blocked_intervals(self.doctor.id, day)
+                )
+            else:
+                windows = []
+            self._day_windows[day] = windows
+        return windows
+
+    def _free_mask(self, day: date) -> int:
+        """Minutes inside an availability window, not closed, not booked and with resources to spare."""
+        window_mask = 0
+        for start_minute, end_minute in self.day_windows(day):
+            window_mask |= interval_mask(start_minute, end_minute)
+        return window_mask & ~(self._busy.get(day, 0) | self._blocked.get(day, 0))
+
+    def is_free(self, day: date, minute: int, length: int) -> bool:
+        """Check that [minute, minute + length) is inside a window and unbooked."""
+        if minute + length > MINUTES_PER_DAY:
+            return False
+        mask = interval_mask(minute, minute + length)
+        return (self._free_mask(day) & mask) == mask
+
+    def day_free_minutes(self, day: date, length: Optional[int] = None,
+                         minute_mask: Optional[int] = None) -> List[int]:
+        """
+        Return free slot start minutes for one day, in ascending order.
+
+        Without `length`, slots step by the doctor's slot length from each
+        window start. With `length` (a procedure footprint), starts are
+        packed into the free gaps instead (see day_packed_starts).
+
+        Args:
+            day: Day to inspect
+            length: Minutes the booking blocks the doctor
+            minute_mask: Allowed slot start minutes (see preference_filter)
+        """
+        if length is not None:
+            return self.day_packed_starts(day, length, minute_mask)
+
+        windows = self._windows.get(day.weekday())
+        if not windows:
+            return []
+
+        candidate_mask = 0
+        for start_minute, end_minute in windows:
+            # Slot starts step by appointment length from the window start
+            for minute in range(start_minute, end_minute - self.slot_minutes + 1,
+                                self.slot_minutes):
+                candidate_mask |= 1 << minute
+
+        open_mask = run_start_mask(self._free_mask(day), self.slot_minutes) & candidate_mask
+        if minute_mask is not None:
+            open_mask &= minute_mask
+        return list(iter_set_bits(open_mask))
+
+    def day_free_runs(self, day: date) -> List[Tuple[int, int]]:
+        """Maximal free (start, end) minute runs of a day, in order."""
+        free_mask = self._free_mask(day)
+        runs = []
+        for run_start in iter_set_bits(free_mask & ~(free_mask << 1)):
+            rest = free_mask >> run_start
+            # Lowest clear bit of `rest` = length of the free run
+            runs.append((run_start, run_start + (~rest & (rest + 1)).bit_length() - 1))
+        return runs
+
+    def day_packed_starts(self, day: date, length: int,
+                          minute_mask: Optional[int] = None) -> List[int]:
+        """
+        Start minutes for a booking of `length` minutes, packed into free gaps.
+
+        A single sweep over the day's free runs (window minus bookings): each
+        run long enough for the footprint yields back-to-back starts from its
+        beginning on a PACKING_GRID_MINUTES grid, so candidates are sized by
+        the footprint instead of probed at a fixed step.
+
+        Args:
+            day: Day to inspect
+            length: Minutes the booking blocks the doctor
+            minute_mask: Allowed slot start minutes (see preference_filter)
+        """
+        starts = []
+        for run_start, run_end in self.day_free_runs(day):
+            minute = round_up(run_start, PACKING_GRID_MINUTES)
+            while minute + length <= run_end:
+                if minute_mask is None or minute_mask >> minute & 1:
+                    starts.append(minute)
+                minute = round_up(minute + length, PACKING_GRID_MINUTES)
+        return starts
+
+    def free_slots(self, start_date: date, end_date: date) -> List[datetime]:
+        """
+        Return every free slot between start_date and end_date (inclusive).
+        Loads the range first if it is not already covered.
+        """
+        if (self._loaded_range is None or start_date < self._loaded_range[0]
+                or end_date > self._loaded_range[1]):
+            self.load(start_date, end_date)
+
+        slots = []
+        current_date = start_date
+        while current_date <= end_date:
+            slots.extend(
+                slot_datetime(current_date, minute)
+                for minute in self.day_free_minutes(current_date)
+            )
+            current_date += timedelta(days=1)
+
+        return slots
+
+    def iter_free_slots(self, start_date: date, end_date: date, length: Optional[int] = None,
+                        preferences: Optional[Dict] = None) -> Iterator[datetime]:
+        """
+        Lazily yield free slots day by day over an already loaded range.
+
+        Args:
+            start_date: First day
+            end_date: Last day (inclusive)
+            length: Procedure footprint in minutes; starts are packed into free gaps
+            preferences: Optional patient preferences (time of day, weekdays)
+        """
+        weekdays, minute_mask = preference_filter(preferences)
+        current_date = start_date
+        while current_date <= end_date:
+            if weekdays is None or current_date.weekday() in weekdays:
+                for minute in self.day_free_minutes(current_date, length, minute_mask):
+                    yield slot_datetime(current_date, minute)
+            current_date += timedelta(days=1)
+
+    def iter_slots_near(self, pivot: datetime, start_date: date, end_date: date,
+                        length: Optional[int] = None, preferences: Optional[Dict] = None,
+                        chunk_days: Optional[int] = None) -> Iterator[datetime]:
+        """
+        Lazily yield free slots in order of distance from `pivot`.
+
+        Days are visited in a ring expanding outward from the pivot day.
+        Candidate slots wait in a min-heap and are only released once no
+        unvisited day can hold a closer slot, so the output is exactly
+        distance-ordered and callers can stop after the first hits. With a
+        pivot at the start of the range this is chronological order.
+
+        Args:
+            pivot: Reference time slots are ordered around
+            start_date: First day searched
+            end_date: Last day searched (inclusive)
+            length: Procedure footprint in minutes; starts are packed into free gaps
+            preferences: Optional patient preferences (time of day, weekdays)
+            chunk_days: Days loaded per batch as the ring grows; None loads
+                the whole range up front
+        """
+        if end_date < start_date:
+            return
+        if chunk_days is None:
+            self.ensure_loaded(start_date, end_date)
+
+        weekdays, minute_mask = preference_filter(preferences)
+        pivot_day = min(max(minute_of_day(pivot)[0], start_date), end_date)
+        next_later = pivot_day
+        next_earlier = pivot_day - timedelta(days=1)
+        heap: List[Tuple[float, datetime]] = []
+
+        def day_bound(day: date) -> float:
+            """Smallest possible distance in seconds between the pivot and a slot on `day`."""
+            day_start = slot_datetime(day, 0)
+            if day_start > pivot:
+                return (day_start - pivot).total_seconds()
+            day_end = slot_datetime(day + timedelta(days=1), 0)
+            return max(0.0, (pivot - day_end).total_seconds())
+
+        while True:
+            while True:
+                candidates = [d for d in (next_later, next_earlier) if start_date <= d <= end_date]
+                if not candidates:
+                    break
+                day = min(candidates, key=day_bound)
+                if heap and heap[0][0] < day_bound(day):
+                    break
+
+                if day == next_later:
+                    next_later += timedelta(days=1)
+                else:
+                    next_earlier -= timedelta(days=1)
+                if weekdays is not None and day.weekday() not in weekdays:
+                    continue
+                if chunk_days is not None:
+                    self._ensure_chunk(day, day >= pivot_day, start_date, end_date, chunk_days)
+
+                for minute in self.day_free_minutes(day, length, minute_mask):
+                    slot = slot_datetime(day, minute)
+                    heapq.heappush(heap, (abs((slot - pivot).total_seconds()), slot))
+
+            if not heap:
+                return
+            yield heapq.heappop(heap)[1]
+
+    def _ensure_chunk(self, day: date, forward: bool, start_date: date, end_date: date,
+                      chunk_days: int) -> None:
+        """Load the next chunk of days in the ring's direction when `day` is not loaded."""
+        if self._loaded_range and self._loaded_range[0] <= day <= self._loaded_range[1]:
+            return
+        span = timedelta(days=chunk_days - 1)
+        if self._loaded_range is None:
+            self.ensure_loaded(max(start_date, day - span), min(end_date, day + span))
+        elif forward:
+            self.ensure_loaded(day, min(end_date, day + span))
+        else:
+            self.ensure_loaded(max(start_date, day - span), day)
+
+
+def _doctor_stream(engine: AvailabilityEngine, start_date: date, end_date: date,
+                   length: Optional[int], preferences: Optional[Dict]
+                   ) -> Iterator[Tuple[datetime, int, Doctor]]:
+    """Tag one engine's slots for merging; the doctor ID breaks ties."""
+    for slot in engine.iter_free_slots(start_date, end_date, length, preferences):
+        yield slot, engine.doctor.id, engine.doctor
+
+
+def iter_earliest_slots(doctors: List[Doctor], start: datetime, end: datetime,
+                        length: Optional[int] = None, booking_index: BookingIndex = None,
+                        chunk_days: int = 7, preferences: Optional[Dict] = None,
+                        resource_ids: Optional[List[int]] = None
+                        ) -> Iterator[Tuple[datetime, Doctor]]:
+    """
+    Stream free slots across doctors in chronological order.
+
+    The range is walked in chunks of `chunk_days`. Each chunk is loaded for
+    all doctors with batched queries and the per-doctor slot generators are
+    heap-merged, so a consumer that stops early never loads later chunks.
+
+    Args:
+        doctors: Doctors to search
+        start: Earliest slot start
+        end: Latest slot start
+        length: Procedure footprint in minutes; starts are packed into free gaps
+        booking_index: Interval index of booked appointments
+        chunk_days: Days loaded per batch
+        preferences: Optional patient preferences (time of day, weekdays)
+        resource_ids: Clinic resources every slot must have capacity for
+
+    Yields:
+        (slot start, doctor) tuples in ascending time order
+    """
+    if not doctors:
+        return
+
+    engines: Optional[Dict[int, AvailabilityEngine]] = None
+    chunk_start = timezone.localtime(start).date()
+    last_date = timezone.localtime(end).date()
+
+    while chunk_start <= last_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last_date)
+        if engines is None:
+            engines = AvailabilityEngine.load_many(
+                doctors, chunk_start, chunk_end, booking_index, resource_ids
+            )
+        else:
+            AvailabilityEngine.load_bookings_many(list(engines.values()), chunk_start, chunk_end)
+
+        for slot, _, doctor in heapq.merge(*(
+            _doctor_stream(engine, chunk_start, chunk_end, length, preferences)
+            for engine in engines.values()
+        )):
+            if slot > end:
+                return
+            if slot >= start:
+                yield slot, doctor
+
+        chunk_start = chunk_end + timedelta(days=1)
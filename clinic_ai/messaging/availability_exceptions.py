@@ -0,0 +1,240 @@
+"""
+Availability exceptions (holidays, leave, blocked time) for the scheduler.
+Closures are turned into sorted minute intervals per doctor-day, cached per
+doctor-week, and subtracted from the weekly availability template with a
+single sweep while free slots are generated.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from django.core.cache import cache
+from django.db.models import Q
+
+from ..core.models import AvailabilityException
+from .booking_index import MINUTES_PER_DAY, minute_of_day, slot_datetime
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[int, int]
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Sort intervals and merge the ones that overlap or touch."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(windows: List[Interval], blocks: List[Interval]) -> List[Interval]:
+    """
+    Remove blocked minutes from availability windows.
+
+    One merge-style sweep over both lists, O(w + b) once they are sorted.
+
+    Args:
+        windows: Availability windows as (start, end) minutes
+        blocks: Blocked intervals, sorted and merged (see merge_intervals)
+
+    Returns:
+        The parts of the windows not covered by any block, in order
+    """
+    if not blocks:
+        return sorted(windows)
+
+    free = []
+    position = 0
+    for start, end in sorted(windows):
+        # Blocks ending before this window cannot affect it or later ones
+        while position < len(blocks) and blocks[position][1] <= start:
+            position += 1
+        cursor = start
+        scan = position
+        while scan < len(blocks) and blocks[scan][0] < end:
+            block_start, block_end = blocks[scan]
+            if block_start > cursor:
+                free.append((cursor, block_start))
+            cursor = max(cursor, block_end)
+            scan += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def day_segments(start: datetime, end: datetime) -> Iterator[Tuple[date, int, int]]:
+    """Split [start, end) into (local day, start minute, end minute) pieces."""
+    day, minute = minute_of_day(start)
+    last_day, last_minute = minute_of_day(end)
+    while day < last_day:
+        yield day, minute, MINUTES_PER_DAY
+        day, minute = day + timedelta(days=1), 0
+    if last_minute > minute:
+        yield day, minute, last_minute
+
+
+def week_start(day: date) -> date:
+    """Monday of the week a day falls in."""
+    return day - timedelta(days=day.weekday())
+
+
+class ExceptionIndex:
+    """
+    Blocked intervals per doctor-week, shared through the Django cache.
+
+    Weeks are built with one query per batch of missing doctor-weeks and
+    clinic-wide closures are folded into every doctor's weeks. Any change to
+    an exception bumps one shared version, which retires every cached week
+    at once; closures change rarely, so that beats per-week bookkeeping.
+    """
+
+    VERSION_KEY = 'availability_exceptions:version'
+    PAYLOAD_TTL = 60 * 60 * 24
+
+    def __init__(self, max_weeks: int = 5000, max_staleness: float = 1.0):
+        """
+        Initialize index.
+
+        Args:
+            max_weeks: Doctor-weeks kept in process memory
+            max_staleness: Seconds before the shared version is checked again
+        """
+        self.max_weeks = max_weeks
+        self.max_staleness = max_staleness
+        self._weeks: 'OrderedDict[Tuple[int, date], Dict[date, List[Interval]]]' = OrderedDict()
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _payload_key(self, version: int, doctor_id: int, monday: date) -> str:
+        return f"availability_exceptions:{version}:{doctor_id}:{monday.isoformat()}"
+
+    def _check_version(self) -> int:
+        """Drop local weeks when another process changed an exception."""
+        if self._version is not None and time.monotonic() - self._checked_at < self.max_staleness:
+            return self._version
+        try:
+            version = cache.get(self.VERSION_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Availability exception version lookup failed: {e}")
+            version = self._version or 0
+        with self._lock:
+            if version != self._version:
+                self._weeks.clear()
+                self._version = version
+            self._checked_at = time.monotonic()
+        return version
+
+    def prime(self, doctor_ids: List[int], start_date: date, end_date: date) -> None:
+        """
+        Make sure every doctor-week touching the range is loaded.
+        Costs one cache round trip plus at most one database query.
+        """
+        version = self._check_version()
+        keys = []
+        monday = week_start(start_date)
+        while monday <= end_date:
+            keys.extend(
+                (doctor_id, monday) for doctor_id in doctor_ids
+                if (doctor_id, monday) not in self._weeks
+            )
+            monday += timedelta(days=7)
+        if not keys:
+            return
+
+        try:
+            payloads = cache.get_many([self._payload_key(version, *key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Availability exception payload lookup failed: {e}")
+            payloads = {}
+
+        missing = []
+        for key in keys:
+            payload = payloads.get(self._payload_key(version, *key))
+            if payload is None:
+                missing.append(key)
+            else:
+                self._store(key, {date.fromisoformat(day): blocks for day, blocks in payload.items()})
+
+        if missing:
+            self._load_from_database(version, missing)
+
+    def _load_from_database(self, version: int, missing: List[Tuple[int, date]]) -> None:
+        """Build the given doctor-weeks with a single range query."""
+        first_monday = min(monday for _, monday in missing)
+        last_monday = max(monday for _, monday in missing)
+        doctor_ids = {doctor_id for doctor_id, _ in missing}
+        weeks: Dict[Tuple[int, date], Dict[date, List[Interval]]] = {key: {} for key in missing}
+
+        for doctor_id, start_at, end_at in AvailabilityException.objects.filter(
+            Q(doctor_id__in=doctor_ids) | Q(doctor__isnull=True),
+            start_at__lt=slot_datetime(last_monday + timedelta(days=7), 0),
+            end_at__gt=slot_datetime(first_monday, 0)
+        ).values_list('doctor_id', 'start_at', 'end_at'):
+            targets = [doctor_id] if doctor_id is not None else doctor_ids
+            for day, start_minute, end_minute in day_segments(start_at, end_at):
+                for target in targets:
+                    week = weeks.get((target, week_start(day)))
+                    if week is not None:
+                        week.setdefault(day, []).append((start_minute, end_minute))
+
+        payloads = {}
+        for key, week in weeks.items():
+            for day in week:
+                week[day] = merge_intervals(week[day])
+            self._store(key, week)
+            payloads[self._payload_key(version, *key)] = {
+                day.isoformat(): blocks for day, blocks in week.items()
+            }
+
+        try:
+            cache.set_many(payloads, timeout=self.PAYLOAD_TTL)
+        except Exception as e:
+            logger.warning(f"Availability exception payload write failed: {e}")
+
+    def _store(self, key: Tuple[int, date], week: Dict[date, List[Interval]]) -> None:
+        with self._lock:
+            self._weeks[key] = week
+            self._weeks.move_to_end(key)
+            while len(self._weeks) > self.max_weeks:
+                self._weeks.popitem(last=False)
+
+    def blocked_intervals(self, doctor_id: int, day: date) -> List[Interval]:
+        """Sorted, merged blocked minute intervals of a doctor-day."""
+        key = (doctor_id, week_start(day))
+        self._check_version()
+        week = self._weeks.get(key)
+        if week is None:
+            self.prime([doctor_id], day, day)
+            week = self._weeks.get(key, {})
+        return week.get(day, [])
+
+    def invalidate(self) -> None:
+        """Retire every cached week after an exception changes."""
+        try:
+            cache.add(self.VERSION_KEY, 0, timeout=None)
+            cache.incr(self.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Availability exception version bump failed: {e}")
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all local weeks."""
+        with self._lock:
+            self._weeks.clear()
+            self._version = None
+
+
+_exception_index = ExceptionIndex()
+
+
+def get_exception_index() -> ExceptionIndex:
+    """Get the process-wide availability exception index."""
+    return _exception_index
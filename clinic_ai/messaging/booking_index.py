@@ -0,0 +1,401 @@
+"""
+In-process interval index of booked appointments.
+Keeps a sorted interval list per doctor per day so overlap checks and daily
+counts avoid database round trips. Buckets are shared between processes
+through the Django cache (Redis) and kept current from Appointment signals.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, time as dt_time
+from typing import Dict, List, Optional, Tuple
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..core.models import Appointment, Doctor
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+ACTIVE_APPOINTMENT_STATUSES = ['pending', 'confirmed']
+
+
+def duration_minutes(duration: timedelta) -> int:
+    """Convert a duration to whole minutes (rounded up, at least one)."""
+    return max(1, -(-int(duration.total_seconds()) // 60))
+
+
+def minute_of_day(moment: datetime) -> Tuple[date, int]:
+    """Return the local date and minute-of-day for a datetime."""
+    local = timezone.localtime(moment) if timezone.is_aware(moment) else moment
+    return local.date(), local.hour * 60 + local.minute
+
+
+def slot_datetime(day: date, minute: int) -> datetime:
+    """Build an aware datetime for a minute-of-day on a given date."""
+    return timezone.make_aware(
+        datetime.combine(day, dt_time(minute // 60, minute % 60))
+    )
+
+
+class DayBookings:
+    """
+    Booked intervals for one doctor-day, sorted by start minute.
+    A running maximum of end minutes makes overlap checks a single bisect.
+    """
+
+    __slots__ = ('starts', 'ends', 'ids', 'max_ends', 'version', 'checked_at')
+
+    def __init__(self, intervals: Optional[List[Tuple[int, int, int]]] = None,
+                 version: int = 0):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[int] = []
+        self.max_ends: List[int] = []
+        self.version = version
+        self.checked_at = time.monotonic()
+        for start, end, appointment_id in sorted(intervals or []):
+            self.starts.append(start)
+            self.ends.append(end)
+            self.ids.append(appointment_id)
+        self._rebuild_max_ends()
+
+    def _rebuild_max_ends(self) -> None:
+        running = 0
+        self.max_ends = []
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def add(self, appointment_id: int, start: int, end: int) -> None:
+        """Insert or move an appointment interval."""
+        self.remove(appointment_id)
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, appointment_id)
+        self._rebuild_max_ends()
+
+    def remove(self, appointment_id: int) -> bool:
+        """Remove an appointment interval if present."""
+        if appointment_id not in self.ids:
+            return False
+        position = self.ids.index(appointment_id)
+        del self.starts[position], self.ends[position], self.ids[position]
+        self._rebuild_max_ends()
+        return True
+
+    def overlaps(self, start: int, end: int, exclude_id: Optional[int] = None) -> bool:
+        """Check whether [start, end) overlaps any booked interval in O(log n)."""
+        position = bisect_left(self.starts, end)
+        if position == 0 or self.max_ends[position - 1] <= start:
+            return False
+        if exclude_id is None or exclude_id not in self.ids:
+            return True
+        # Rare path: re-check without the excluded appointment
+        return any(
+            s < end and e > start
+            for s, e, i in zip(self.starts[:position], self.ends[:position], self.ids[:position])
+            if i != exclude_id
+        )
+
+    def intervals(self) -> List[Tuple[int, int, int]]:
+        """Return (start, end, appointment_id) tuples in start order."""
+        return list(zip(self.starts, self.ends, self.ids))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class BookingIndex:
+    """
+    Per-doctor, per-day interval index of active appointments.
+    Local buckets are validated against a shared version stamp in the cache,
+    so other workers' updates are picked up from Redis instead of the database.
+    """
+
+    KEY_PREFIX = 'booking_index'
+    PAYLOAD_TTL = 24 * 3600
+
+    def __init__(self, max_buckets: int = 20000, max_staleness: float = 1.0):
+        """
+        Initialize index.
+
+        Args:
+            max_buckets: Maximum number of doctor-day buckets kept in memory
+            max_staleness: Seconds a bucket may be served before its shared
+                version is checked again
+        """
+        self.max_buckets = max_buckets
+        self.max_staleness = max_staleness
+        self._buckets: 'OrderedDict[Tuple[int, date], DayBookings]' = OrderedDict()
+        self._slot_minutes: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    def _version_key(self, doctor_id: int, day: date) -> str:
+        return f"{self.KEY_PREFIX}:v:{doctor_id}:{day.isoformat()}"
+
+    def _payload_key(self, doctor_id: int, day: date) -> str:
+        return f"{self.KEY_PREFIX}:d:{doctor_id}:{day.isoformat()}"
+
+    def _bump_version(self, doctor_id: int, day: date) -> Optional[int]:
+        """Atomically bump the shared version of a doctor-day."""
+        key = self._version_key(doctor_id, day)
+        try:
+            cache.add(key, 0, timeout=None)
+            return cache.incr(key)
+        except Exception as e:
+            logger.warning(f"Booking index version bump failed for {key}: {e}")
+            return None
+
+    def slot_minutes(self, doctor_id: int) -> Optional[int]:
+        """Return the booked interval length for a doctor, cached per process."""
+        minutes = self._slot_minutes.get(doctor_id)
+        if minutes is None:
+            duration = Doctor.objects.filter(id=doctor_id).values_list(
+                'average_appointment_duration', flat=True
+            ).first()
+            if duration is None:
+                return None
+            minutes = duration_minutes(duration)
+            self._slot_minutes[doctor_id] = minutes
+        return minutes
+
+    def forget_doctor(self, doctor: Doctor) -> None:
+        """Drop cached metadata and buckets after a doctor changes."""
+        with self._lock:
+            self._slot_minutes.pop(doctor.id, None)
+            for key in [k for k in self._buckets if k[0] == doctor.id]:
+                del self._buckets[key]
+
+    def prime(self, doctor: Doctor, start_date: date, end_date: date) -> None:
+        """
+        Make sure buckets for every day in [start_date, end_date] are current.
+        Costs one cache round trip, plus at most one database query for the
+        days that are neither fresh locally nor available in the shared cache.
+        """
+        self.prime_many([doctor], start_date, end_date)
+
+    def prime_many(self, doctors: List[Doctor], start_date: date, end_date: date) -> None:
+        """
+        Prime buckets for several doctors over the same date range.
+        Uses the same round trips as prime() regardless of the doctor count.
+        """
+        days = []
+        current_date = start_date
+        while current_date <= end_date:
+            days.append(current_date)
+            current_date += timedelta(days=1)
+        keys = [(doctor.id, day) for doctor in doctors for day in days]
+        if not keys:
+            return
+
+        try:
+            versions = cache.get_many([self._version_key(*key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Booking index version lookup failed: {e}")
+            versions = {}
+
+        stale = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                shared_version = versions.get(self._version_key(*key), 0)
+                bucket = self._buckets.get(key)
+                if bucket is None or bucket.version != shared_version:
+                    stale.append((key, shared_version))
+                else:
+                    bucket.checked_at = now
+        if not stale:
+            return
+
+        payloads = {}
+        try:
+            payloads = cache.get_many([self._payload_key(*key) for key, _ in stale])
+        except Exception as e:
+            logger.warning(f"Booking index payload lookup failed: {e}")
+
+        missing = []
+        for key, shared_version in stale:
+            payload = payloads.get(self._payload_key(*key))
+            if payload and payload['version'] == shared_version:
+                self._store(key[0], key[1], DayBookings(payload['intervals'], shared_version))
+            else:
+                missing.append((key, shared_version))
+
+        if missing:
+            self._load_from_database(doctors, missing)
+
+    def refresh(self, doctor: Doctor, start_date: date, end_date: date) -> None:
+        """
+        Rebuild a doctor's buckets for the range straight from the database.
+        Used under the booking lock, where a bucket that is still within its
+        staleness window could miss a booking committed by another worker.
+        """
+        keys = []
+        current_date = start_date
+        while current_date <= end_date:
+            keys.append((doctor.id, current_date))
+            current_date += timedelta(days=1)
+
+        try:
+            versions = cache.get_many([self._version_key(*key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Booking index version lookup failed: {e}")
+            versions = {}
+
+        self._load_from_database(
+            [doctor], [(key, versions.get(self._version_key(*key), 0)) for key in keys]
+        )
+
+    def _load_from_database(self, doctors: List[Doctor],
+                            missing: List[Tuple[Tuple[int, date], int]]) -> None:
+        """Build buckets for the given doctor-days with a single range query."""
+        first_day = min(day for (_, day), _ in missing)
+        last_day = max(day for (_, day), _ in missing)
+        slot_minutes = {
+            doctor.id: duration_minutes(doctor.average_appointment_duration)
+            for doctor in doctors
+        }
+
+        intervals: Dict[Tuple[int, date], List[Tuple[int, int, int]]] = {
+            key: [] for key, _ in missing
+        }
+        for appointment_id, doctor_id, scheduled_at, duration in Appointment.objects.filter(
+            assigned_doctor_id__in={doctor_id for (doctor_id, _), _ in missing},
+            scheduled_at__gte=slot_datetime(first_day, 0),
+            scheduled_at__lt=slot_datetime(last_day + timedelta(days=1), 0),
+            status__in=ACTIVE_APPOINTMENT_STATUSES
+        ).values_list('id', 'assigned_doctor_id', 'scheduled_at', 'duration'):
+            day, minute = minute_of_day(scheduled_at)
+            key = (doctor_id, day)
+            if key in intervals:
+                length = duration_minutes(duration) if duration else slot_minutes[doctor_id]
+                intervals[key].append((minute, minute + length, appointment_id))
+
+        payloads = {}
+        for key, shared_version in missing:
+            bucket = DayBookings(intervals[key], shared_version)
+            self._store(key[0], key[1], bucket)
+            payloads[self._payload_key(*key)] = {
+                'version': shared_version,
+                'intervals': bucket.intervals()
+            }
+
+        try:
+            cache.set_many(payloads, timeout=self.PAYLOAD_TTL)
+        except Exception as e:
+            logger.warning(f"Booking index payload write failed: {e}")
+
+    def _store(self, doctor_id: int, day: date, bucket: DayBookings) -> None:
+        with self._lock:
+            self._buckets[(doctor_id, day)] = bucket
+            self._buckets.move_to_end((doctor_id, day))
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+
+    def bucket(self, doctor: Doctor, day: date) -> DayBookings:
+        """Return the bucket for a doctor-day, revalidating it when stale."""
+        bucket = self._buckets.get((doctor.id, day))
+        if bucket is None or time.monotonic() - bucket.checked_at > self.max_staleness:
+            self.prime(doctor, day, day)
+            bucket = self._buckets.get((doctor.id, day), DayBookings())
+        return bucket
+
+    def overlaps(self, doctor: Doctor, start: datetime, end: datetime,
+                 exclude_id: Optional[int] = None) -> bool:
+        """Check whether [start, end) overlaps an active booking."""
+        day, start_minute = minute_of_day(start)
+        end_minute = start_minute + duration_minutes(end - start)
+        if self.bucket(doctor, day).overlaps(start_minute, end_minute, exclude_id):
+            return True
+        # Bookings from the previous evening may run past midnight
+        previous = self.bucket(doctor, day - timedelta(days=1))
+        if previous.overlaps(start_minute + MINUTES_PER_DAY, end_minute + MINUTES_PER_DAY, exclude_id):
+            return True
+        # A late slot may itself run into the next morning
+        if end_minute > MINUTES_PER_DAY:
+            following = self.bucket(doctor, day + timedelta(days=1))
+            return following.overlaps(0, end_minute - MINUTES_PER_DAY, exclude_id)
+        return False
+
+    def day_count(self, doctor: Doctor, day: date) -> int:
+        """Number of active bookings starting on a doctor-day."""
+        return len(self.bucket(doctor, day))
+
+    def busy_intervals(self, doctor: Doctor, day: date) -> List[Tuple[int, int]]:
+        """Busy (start, end) minute intervals for a day, in start order."""
+        return [(start, end) for start, end, _ in self.bucket(doctor, day).intervals()]
+
+    def apply(self, appointment: Appointment, previous: Optional[Dict] = None) -> None:
+        """
+        Reflect a saved appointment in the index.
+
+        Args:
+            appointment: Saved appointment instance
+            previous: Snapshot of assigned_doctor/scheduled_at/status before the save
+        """
+        if previous:
+            self._remove(previous['assigned_doctor'], previous['scheduled_at'], appointment.id)
+
+        doctor_id = appointment.assigned_doctor_id
+        if doctor_id and appointment.status in ACTIVE_APPOINTMENT_STATUSES:
+            if appointment.duration:
+                length = duration_minutes(appointment.duration)
+            else:
+                length = self.slot_minutes(doctor_id)
+            if length is None:
+                return
+            day, minute = minute_of_day(appointment.scheduled_at)
+            self._update(doctor_id, day,
+                         lambda bucket: bucket.add(appointment.id, minute, minute + length))
+
+    def discard(self, appointment: Appointment) -> None:
+        """Remove a deleted appointment from the index."""
+        self._remove(appointment.assigned_doctor_id, appointment.scheduled_at, appointment.id)
+
+    def _remove(self, doctor_id: Optional[int], scheduled_at: datetime, appointment_id: int) -> None:
+        if doctor_id is None:
+            return
+        day, _ = minute_of_day(scheduled_at)
+        self._update(doctor_id, day, lambda bucket: bucket.remove(appointment_id))
+
+    def _update(self, doctor_id: int, day: date, change) -> None:
+        """Apply a change locally and publish the new version to the cache."""
+        new_version = self._bump_version(doctor_id, day)
+        with self._lock:
+            bucket = self._buckets.get((doctor_id, day))
+            if bucket is None:
+                return
+            if new_version is None or new_version != bucket.version + 1:
+                # Another worker changed this day meanwhile; reload lazily
+                del self._buckets[(doctor_id, day)]
+                return
+            change(bucket)
+            bucket.version = new_version
+            payload = {'version': new_version, 'intervals': bucket.intervals()}
+
+        try:
+            cache.set(self._payload_key(doctor_id, day), payload, timeout=self.PAYLOAD_TTL)
+        except Exception as e:
+            logger.warning(f"Booking index payload write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all local buckets and doctor metadata."""
+        with self._lock:
+            self._buckets.clear()
+            self._slot_minutes.clear()
+
+
+_booking_index = BookingIndex()
+
+
+def get_booking_index() -> BookingIndex:
+    """
+    Get the process-wide booking index instance.
+    """
+    return _booking_index
@@ -0,0 +1,378 @@
+"""
+Bulk rescheduling for doctor unavailability.
+When a doctor drops out for an interval, every booking it touches is moved
+in one pass: the affected appointments are loaded with a single query,
+replacement slots are chosen jointly with a min-cost assignment per booking
+length over each booking's nearest free slots (the doctor's own, then
+colleagues'), and the moves are written with one bulk update in one
+transaction.
+"""
+
+import heapq
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..core.models import (
+    Appointment, AppointmentReminder, AvailabilityException, ClinicResource, Doctor
+)
+from .assignment import UNAVAILABLE, solve_assignment
+from .availability import AvailabilityEngine
+from .availability_exceptions import merge_intervals, subtract_intervals
+from .booking_index import (
+    ACTIVE_APPOINTMENT_STATUSES, MINUTES_PER_DAY, BookingIndex, duration_minutes,
+    get_booking_index, minute_of_day, slot_datetime
+)
+from .next_slots import get_next_slot_cache
+from .notification_service import SMSNotificationService
+from .resource_index import ResourceIndex, get_resource_index
+
+logger = logging.getLogger(__name__)
+
+
+class BulkRescheduler:
+    """
+    Moves all active bookings out of a doctor's blocked interval.
+
+    Replacement slots are taken from the doctor's own free time first and
+    from active doctors with the same specialization second. Within those
+    tiers, patients are kept as close to their original time as possible.
+    """
+
+    def __init__(self, booking_index: Optional[BookingIndex] = None,
+                 resource_index: Optional[ResourceIndex] = None,
+                 notifications: Optional[SMSNotificationService] = None,
+                 search_days: int = 7):
+        """
+        Initialize rescheduler.
+
+        Args:
+            booking_index: Interval index of booked appointments
+            resource_index: Equipment/room capacity index
+            notifications: Service building the patient notices
+            search_days: Days either side of the blocked interval searched
+                for replacement slots
+        """
+        self.booking_index = booking_index or get_booking_index()
+        self.resource_index = resource_index or get_resource_index()
+        self.notifications = notifications or SMSNotificationService()
+        self.search_days = search_days
+
+    def reschedule(self, doctor: Doctor, start: datetime, end: datetime,
+                   include_other_doctors: bool = True) -> Dict:
+        """
+        Close [start, end) for a doctor and move every active booking overlapping it.
+
+        The closure is saved as an AvailabilityException (unless one already
+        covers the interval) in the same transaction as the moves.
+
+        Args:
+            doctor: Doctor who is unavailable
+            start: Start of the blocked interval
+            end: End of the blocked interval
+            include_other_doctors: Fall back to doctors with the same
+                specialization when the doctor's own calendar is full
+
+        Returns:
+            Dict with the affected count, the moves made and the IDs of
+            appointments no replacement slot was found for
+        """
+        if end <= start:
+            return {'success': False, 'message': 'Blocked interval must end after it starts'}
+
+        try:
+            affected = self._affected_appointments(doctor, start, end)
+            doctors = [doctor]
+            if affected and include_other_doctors:
+                doctors.extend(Doctor.objects.filter(
+                    is_active=True, specialization=doctor.specialization
+                ).exclude(id=doctor.id).order_by('id'))
+
+            placements = self._place(doctor, doctors, affected, start, end) if affected else {}
+            moved = self._commit(doctor, start, end, affected, placements, {d.id: d for d in doctors})
+        except Exception as e:
+            logger.error(f"Bulk rescheduling failed for doctor {doctor.id}: {e}")
+            return {'success': False, 'message': str(e)}
+
+        moved_ids = {move['appointment_id'] for move in moved}
+        unplaced = [appointment.id for appointment, _ in affected if appointment.id not in moved_ids]
+        logger.info(
+            f"Rescheduled {len(moved)} of {len(affected)} appointments for doctor {doctor.id}"
+        )
+        return {
+            'success': True,
+            'affected': len(affected),
+            'moved': moved,
+            'unplaced': unplaced,
+        }
+
+    def _affected_appointments(self, doctor: Doctor, start: datetime,
+                               end: datetime) -> List[Tuple[Appointment, int]]:
+        """
+        Active bookings overlapping the interval, with their length in minutes.
+        One query; bookings starting up to a day early are checked for spill-over.
+        Bookings that have already started are left where they are.
+        """
+        slot_minutes = duration_minutes(doctor.average_appointment_duration)
+        affected = []
+        for appointment in Appointment.objects.filter(
+            assigned_doctor=doctor,
+            status__in=ACTIVE_APPOINTMENT_STATUSES,
+            scheduled_at__gte=max(start - timedelta(days=1), timezone.now()),
+            scheduled_at__lt=end
+        ).select_related('patient').order_by('scheduled_at', 'id'):
+            length = duration_minutes(appointment.duration) if appointment.duration else slot_minutes
+            if appointment.scheduled_at + timedelta(minutes=length) > start:
+                affected.append((appointment, length))
+        return affected
+
+    def _place(self, doctor: Doctor, doctors: List[Doctor],
+               affected: List[Tuple[Appointment, int]], start: datetime,
+               end: datetime) -> Dict[int, Tuple[Doctor, datetime]]:
+        """
+        Choose replacement slots for the affected bookings.
+
+        Each round solves one assignment per booking length over a short
+        candidate list per booking (see _nearest_slots), then accepts the
+        picks in cost order while they still fit; picks that collide with an
+        earlier one (different lengths can overlap) go into the next round.
+
+        Returns:
+            Mapping of appointment ID to (doctor, new start)
+        """
+        now = timezone.now()
+        first_day = max(timezone.localdate(now), minute_of_day(start)[0] - timedelta(days=self.search_days))
+        last_day = minute_of_day(end)[0] + timedelta(days=self.search_days)
+
+        engines = AvailabilityEngine.load_many(doctors, first_day, last_day, self.booking_index)
+        engines[doctor.id].reserve(start, end)
+        colleagues = [engine for doctor_id, engine in engines.items() if doctor_id != doctor.id]
+
+        # Any slot with the doctor beats any slot with a colleague
+        other_doctor_penalty = ((last_day - first_day).days + 2) * MINUTES_PER_DAY
+        batch_usage: Dict[Tuple[int, date, int], int] = {}
+        placements = {}
+        pending = list(affected)
+
+        while pending:
+            groups: Dict[int, List[int]] = {}
+            for row, (_, length) in enumerate(pending):
+                groups.setdefault(length, []).append(row)
+
+            picks = []
+            for length, rows in groups.items():
+                options = [
+                    self._nearest_slots(
+                        engines[doctor.id], colleagues, pending[row][0].scheduled_at, length,
+                        len(rows), first_day, last_day, now, other_doctor_penalty
+                    )
+                    for row in rows
+                ]
+                columns: Dict[Tuple[int, datetime], int] = {}
+                for candidates in options:
+                    for _, engine, slot in candidates:
+                        columns.setdefault((engine.doctor.id, slot), len(columns))
+                if not columns:
+                    continue
+
+                cost = []
+                for candidates in options:
+                    row_cost = [UNAVAILABLE] * len(columns)
+                    for distance, engine, slot in candidates:
+                        row_cost[columns[(engine.doctor.id, slot)]] = distance
+                    cost.append(row_cost)
+                targets = {column: key for key, column in columns.items()}
+                for position, column in enumerate(solve_assignment(cost)):
+                    if column is not None:
+                        doctor_id, slot = targets[column]
+                        picks.append((cost[position][column], rows[position], engines[doctor_id], slot))
+            if not picks:
+                break
+
+            accepted = set()
+            for _, row, engine, slot in sorted(picks, key=lambda pick: pick[:2]):
+                appointment, length = pending[row]
+                day, minute = minute_of_day(slot)
+                if not engine.is_free(day, minute, length):
+                    continue
+                slot_end = slot + timedelta(minutes=length)
+                if not self.resource_index.fits_batch(appointment.procedure_type_id, slot, slot_end, batch_usage):
+                    continue
+                engine.reserve(slot, slot_end)
+                self.resource_index.add_pending(appointment.procedure_type_id, slot, slot_end, batch_usage)
+                placements[appointment.id] = (engine.doctor, slot)
+                accepted.add(row)
+
+            if not accepted:
+                break
+            pending = [item for row, item in enumerate(pending) if row not in accepted]
+
+        return placements
+
+    def _nearest_slots(self, own: AvailabilityEngine, colleagues: List[AvailabilityEngine],
+                       pivot: datetime, length: int, count: int, first_day: date,
+                       last_day: date, now: datetime, other_doctor_penalty: float
+                       ) -> List[Tuple[float, AvailabilityEngine, datetime]]:
+        """
+        The `count` cheapest replacement slots for one booking.
+
+        Slots nearest the original time on the doctor's own calendar come
+        first, then the nearest across colleagues. With `count` the number
+        of bookings in the assignment nothing is lost: an optimal assignment
+        never needs a booking's (count + 1)-th cheapest slot.
+
+        Returns:
+            (cost in minutes, engine, slot) tuples, cheapest first
+        """
+        options = []
+        for slot in own.iter_slots_near(pivot, first_day, last_day, length):
+            if slot > now:
+                options.append((abs((slot - pivot).total_seconds()) / 60, own, slot))
+                if len(options) == count:
+                    return options
+
+        streams = [
+            (
+                (abs((slot - pivot).total_seconds()) / 60, engine.doctor.id, slot, engine)
+                for slot in engine.iter_slots_near(pivot, first_day, last_day, length)
+                if slot > now
+            )
+            for engine in colleagues
+        ]
+        for distance, _, slot, engine in heapq.merge(*streams):
+            options.append((distance + other_doctor_penalty, engine, slot))
+            if len(options) == count:
+                break
+        return options
+
+    def _block_interval(self, doctor: Doctor, start: datetime, end: datetime) -> None:
+        """
+        Persist [start, end) as closed for the doctor.
+
+        The parts no doctor or clinic-wide closure covers yet get a
+        'blocked' AvailabilityException, so later searches and the waitlist
+        matcher do not hand the interval out again.
+        """
+        covered = merge_intervals([
+            (max(exception_start, start), min(exception_end, end))
+            for exception_start, exception_end in AvailabilityException.objects.filter(
+                Q(doctor=doctor) | Q(doctor__isnull=True),
+                start_at__lt=end,
+                end_at__gt=start
+            ).values_list('start_at', 'end_at')
+        ])
+        # Saved one by one: the signals retire cached closures and slot lists
+        for gap_start, gap_end in subtract_intervals([(start, end)], covered):
+            AvailabilityException.objects.create(
+                doctor=doctor, exception_type='blocked', start_at=gap_start, end_at=gap_end,
+                reason='Bookings moved by bulk reschedule'
+            )
+
+    def _commit(self, doctor: Doctor, start: datetime, end: datetime,
+                affected: List[Tuple[Appointment, int]],
+                placements: Dict[int, Tuple[Doctor, datetime]],
+                doctors: Dict[int, Doctor]) -> List[Dict]:
+        """
+        Close the blocked interval and write the moves in one transaction.
+
+        Involved doctor and resource rows are locked in ID order, the target
+        days are re-read from the database and moves that now collide with a
+        booking committed meanwhile are dropped. The rest are saved with one
+        bulk update, their pending reminders are replaced in bulk, and the
+        indexes are updated after commit (bulk updates send no signals). The
+        vacated slots lie inside the blocked interval, so nothing is offered
+        to the waitlist.
+
+        Returns:
+            One dict per appointment actually moved
+        """
+        moves = [
+            (appointment, length) + placements[appointment.id]
+            for appointment, length in affected if appointment.id in placements
+        ]
+        moved, previous = [], {}
+
+        with transaction.atomic():
+            list(Doctor.objects.select_for_update().filter(
+                id__in={doctor.id} | {target.id for _, _, target, _ in moves}
+            ).order_by('id').values_list('id', flat=True))
+            self._block_interval(doctor, start, end)
+            if not moves:
+                return []
+
+            resource_ids = set()
+            for appointment, _, _, _ in moves:
+                resource_ids.update(
+                    self.resource_index.procedure_resources(appointment.procedure_type_id)[1]
+                )
+            list(ClinicResource.objects.select_for_update().filter(
+                id__in=resource_ids
+            ).order_by('id').values_list('id', flat=True))
+
+            first_day = min(minute_of_day(slot)[0] for _, _, _, slot in moves)
+            last_day = max(
+                minute_of_day(slot + timedelta(minutes=length))[0] for _, length, _, slot in moves
+            )
+            for doctor_id in sorted({target.id for _, _, target, _ in moves}):
+                self.booking_index.refresh(doctors[doctor_id], first_day - timedelta(days=1), last_day)
+            if resource_ids:
+                self.resource_index.refresh(sorted(resource_ids), first_day, last_day)
+
+            updated_at = timezone.now()
+            changed = []
+            for appointment, length, target, slot in moves:
+                new_end = slot + timedelta(minutes=length)
+                if self.booking_index.overlaps(target, slot, new_end, exclude_id=appointment.id):
+                    logger.warning(f"Slot for appointment {appointment.id} was taken meanwhile")
+                    continue
+                if appointment.procedure_type_id and not self.resource_index.fits(
+                        appointment.procedure_type_id, slot, new_end):
+                    logger.warning(f"Resources for appointment {appointment.id} were taken meanwhile")
+                    continue
+
+                previous[appointment.id] = {
+                    'assigned_doctor': appointment.assigned_doctor_id,
+                    'doctor': appointment.doctor,
+                    'procedure_type': appointment.procedure_type_id,
+                    'scheduled_at': appointment.scheduled_at,
+                    'duration': appointment.duration,
+                    'status': appointment.status,
+                }
+                moved.append({
+                    'appointment_id': appointment.id,
+                    'from': appointment.scheduled_at,
+                    'to': slot,
+                    'doctor_id': target.id,
+                    'doctor_name': target.name,
+                })
+                appointment.scheduled_at = slot
+                appointment.assigned_doctor = target
+                appointment.doctor = target.name
+                # Pin the length so a move to another doctor keeps it
+                appointment.duration = timedelta(minutes=length)
+                appointment.updated_at = updated_at
+                changed.append(appointment)
+
+            Appointment.objects.bulk_update(
+                changed, ['scheduled_at', 'assigned_doctor', 'doctor', 'duration', 'updated_at']
+            )
+            AppointmentReminder.objects.filter(
+                appointment__in=changed, status='pending'
+            ).update(status='cancelled')
+            AppointmentReminder.objects.bulk_create(
+                self.notifications.build_reschedule_notices(changed, previous)
+            )
+
+            def update_indexes():
+                next_slots = get_next_slot_cache()
+                for appointment in changed:
+                    self.booking_index.apply(appointment, previous[appointment.id])
+                    self.resource_index.apply(appointment, previous[appointment.id])
+                    next_slots.invalidate_booking(appointment, previous[appointment.id])
+
+            transaction.on_commit(update_indexes)
+
+        return moved
@@ -0,0 +1,335 @@
+"""
+Group booking allocation for multi-patient appointments.
+Finds the earliest block where N patients fit back to back or side by side
+across one or more doctors, by sliding a window over each doctor's sorted
+free runs, then books the whole group in one transaction.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from django.db import transaction
+from django.utils import timezone
+
+from ..core.models import Appointment, ClinicResource, Doctor, Patient, ProcedureType
+from .availability import PACKING_GRID_MINUTES, AvailabilityEngine, round_up
+from .booking_index import (
+    MINUTES_PER_DAY, BookingIndex, duration_minutes, get_booking_index, minute_of_day, slot_datetime
+)
+from .next_slots import get_next_slot_cache
+from .resource_index import ResourceIndex, get_resource_index
+from .slot_holds import SlotHoldManager
+from .slot_scoring import day_minute, ordinal_minute
+
+logger = logging.getLogger(__name__)
+
+# Free run as (start, end) ordinal minutes (see slot_scoring.ordinal_minute)
+Run = Tuple[int, int]
+
+
+def packed_count(run_start: int, run_end: int, length: int) -> int:
+    """Bookings of `length` minutes that fit in a run, packed as the engine packs them."""
+    first = round_up(run_start, PACKING_GRID_MINUTES)
+    if run_end - first < length:
+        return 0
+    return (run_end - first - length) // round_up(length, PACKING_GRID_MINUTES) + 1
+
+
+def ordinal_datetime(minute: int) -> datetime:
+    """Aware datetime of an ordinal minute."""
+    return slot_datetime(date.fromordinal(minute // MINUTES_PER_DAY), minute % MINUTES_PER_DAY)
+
+
+class GroupBookingAllocator:
+    """
+    Books a group of patients into one compact block.
+
+    The block is the earliest window of `max_span` minutes whose free time,
+    summed over the candidate doctors, holds one booking per patient. Within
+    the chosen window the earliest starts are taken, so the group runs in
+    parallel where doctors are free together and back to back otherwise.
+    """
+
+    # Windows tried before giving up when resources or holds keep failing
+    MAX_WINDOW_ATTEMPTS = 50
+
+    def __init__(self, booking_index: Optional[BookingIndex] = None,
+                 resource_index: Optional[ResourceIndex] = None,
+                 slot_holds: Optional[SlotHoldManager] = None):
+        """
+        Initialize allocator.
+
+        Args:
+            booking_index: Interval index of booked appointments
+            resource_index: Equipment/room capacity index
+            slot_holds: Slot holds of patients still confirming elsewhere
+        """
+        self.booking_index = booking_index or get_booking_index()
+        self.resource_index = resource_index or get_resource_index()
+        self.slot_holds = slot_holds or SlotHoldManager()
+
+    def find_block(self, group_size: int, doctors: List[Doctor],
+                   date_range: Tuple[datetime, datetime],
+                   procedure_type: Optional[ProcedureType] = None,
+                   max_span: Optional[timedelta] = None) -> Optional[List[Tuple[Doctor, datetime]]]:
+        """
+        Find the earliest block holding `group_size` bookings.
+
+        Args:
+            group_size: Number of patients
+            doctors: Doctors who may see the group
+            date_range: Every booking must start and end inside this range
+            procedure_type: Procedure booked for each patient (sets the
+                length and the resources needed); defaults to the longest
+                slot length among the doctors
+            max_span: Longest time from the first start to the last end;
+                defaults to the whole group seen back to back by one doctor
+
+        Returns:
+            (doctor, start) per booking in start order, or None
+        """
+        if group_size <= 0 or not doctors:
+            return None
+
+        length = self._booking_length(doctors, procedure_type)
+        span = duration_minutes(max_span) if max_span else length * group_size
+        if span < length:
+            return None
+
+        earliest = ordinal_minute(max(date_range[0], timezone.now()))
+        latest = ordinal_minute(date_range[1])
+        first_day, last_day = minute_of_day(ordinal_datetime(earliest))[0], minute_of_day(date_range[1])[0]
+        resource_ids = self.resource_index.procedure_resources(
+            procedure_type.id if procedure_type else None
+        )[1]
+        engines = AvailabilityEngine.load_many(
+            doctors, first_day, last_day, self.booking_index, resource_ids
+        )
+
+        runs: Dict[int, List[Run]] = {}
+        for doctor in doctors:
+            doctor_runs = []
+            current_date = first_day
+            while current_date <= last_day:
+                for run_start, run_end in engines[doctor.id].day_free_runs(current_date):
+                    start = max(day_minute(current_date, run_start), earliest)
+                    end = min(day_minute(current_date, run_end), latest)
+                    if packed_count(start, end, length):
+                        doctor_runs.append((start, end))
+                current_date += timedelta(days=1)
+            runs[doctor.id] = doctor_runs
+
+        # First run of each doctor still ending after the window start
+        pointers = {doctor.id: 0 for doctor in doctors}
+        attempts = 0
+        for window_start in self._window_starts(runs, length):
+            if self._window_capacity(runs, pointers, window_start, span, length) < group_size:
+                continue
+            block = self._materialize(
+                doctors, runs, pointers, window_start, span, length, group_size, procedure_type
+            )
+            if block is not None:
+                return block
+            attempts += 1
+            if attempts >= self.MAX_WINDOW_ATTEMPTS:
+                break
+        return None
+
+    def _booking_length(self, doctors: List[Doctor],
+                        procedure_type: Optional[ProcedureType]) -> int:
+        if procedure_type:
+            return duration_minutes(procedure_type.total_duration)
+        return max(duration_minutes(doctor.average_appointment_duration) for doctor in doctors)
+
+    def _window_starts(self, runs: Dict[int, List[Run]], length: int) -> List[int]:
+        """Every grid start a booking can take, ascending; the block begins at one of them."""
+        starts = set()
+        for doctor_runs in runs.values():
+            for run_start, run_end in doctor_runs:
+                minute = round_up(run_start, PACKING_GRID_MINUTES)
+                while minute + length <= run_end:
+                    starts.add(minute)
+                    minute += PACKING_GRID_MINUTES
+        return sorted(starts)
+
+    def _window_capacity(self, runs: Dict[int, List[Run]], pointers: Dict[int, int],
+                         window_start: int, span: int, length: int) -> int:
+        """
+        Bookings fitting in [window_start, window_start + span) over all doctors.
+        Window starts only move forward, so each doctor's pointer skips the
+        runs that ended before the window once and never looks at them again.
+        """
+        window_end = window_start + span
+        capacity = 0
+        for doctor_id, doctor_runs in runs.items():
+            position = pointers[doctor_id]
+            while position < len(doctor_runs) and doctor_runs[position][1] <= window_start:
+                position += 1
+            pointers[doctor_id] = position
+            while position < len(doctor_runs) and doctor_runs[position][0] < window_end:
+                run_start, run_end = doctor_runs[position]
+                position += 1
+                capacity += packed_count(
+                    max(run_start, window_start), min(run_end, window_end), length
+                )
+        return capacity
+
+    def _materialize(self, doctors: List[Doctor], runs: Dict[int, List[Run]],
+                     pointers: Dict[int, int], window_start: int, span: int,
+                     length: int, group_size: int,
+                     procedure_type: Optional[ProcedureType]) -> Optional[List[Tuple[Doctor, datetime]]]:
+        """Pick the earliest bookable starts in a window, skipping held or resource-bound ones."""
+        window_end = window_start + span
+        candidates = []
+        for doctor in doctors:
+            doctor_runs = runs[doctor.id]
+            position = pointers[doctor.id]
+            while position < len(doctor_runs) and doctor_runs[position][0] < window_end:
+                run_start, run_end = doctor_runs[position]
+                position += 1
+                minute = round_up(max(run_start, window_start), PACKING_GRID_MINUTES)
+                while minute + length <= min(run_end, window_end):
+                    candidates.append((minute, doctor.id, doctor))
+                    minute = round_up(minute + length, PACKING_GRID_MINUTES)
+        candidates.sort(key=lambda candidate: candidate[:2])
+
+        block = []
+        pending: Dict = {}
+        duration = timedelta(minutes=length)
+        procedure_type_id = procedure_type.id if procedure_type else None
+        for minute, _, doctor in candidates:
+            start = ordinal_datetime(minute)
+            if self.slot_holds.is_held(doctor.id, start, duration):
+                continue
+            if not self.resource_index.fits_batch(procedure_type_id, start, start + duration, pending):
+                continue
+            self.resource_index.add_pending(procedure_type_id, start, start + duration, pending)
+            block.append((doctor, start))
+            if len(block) == group_size:
+                return block
+        return None
+
+    def book(self, patient_ids: List[int], doctors: List[Doctor],
+             date_range: Tuple[datetime, datetime],
+             procedure_type: Optional[ProcedureType] = None,
+             max_span: Optional[timedelta] = None, status: str = 'pending') -> Dict:
+        """
+        Find a block for the group and book every patient in it.
+
+        The block is committed all or nothing: when a booking made by
+        another worker meanwhile collides with it, nothing is written and the
+        search is repeated once against the fresh state.
+
+        Args:
+            patient_ids: Patients in the group, booked in this order
+            doctors: Doctors who may see the group
+            date_range: Range every booking must fall in
+            procedure_type: Procedure booked for each patient
+            max_span: Longest time from the first start to the last end
+            status: Status of the new appointments
+
+        Returns:
+            Dict with the created appointments, or a failure message
+        """
+        try:
+            patients = Patient.objects.in_bulk(patient_ids)
+            missing = [patient_id for patient_id in patient_ids if patient_id not in patients]
+            if missing:
+                return {'success': False, 'message': f"Patients not found: {missing}"}
+
+            for _ in range(2):
+                block = self.find_block(len(patient_ids), doctors, date_range, procedure_type, max_span)
+                if block is None:
+                    return {'success': False, 'message': 'No block fits the whole group'}
+                appointments = self._commit_block(
+                    [patients[patient_id] for patient_id in patient_ids], block, procedure_type, status
+                )
+                if appointments is not None:
+                    break
+            else:
+                return {'success': False, 'message': 'Group block was taken meanwhile, please retry'}
+
+        except Exception as e:
+            logger.error(f"Error booking group: {e}")
+            return {'success': False, 'message': str(e)}
+
+        logger.info(f"Booked group of {len(appointments)} from {block[0][1]}")
+        return {
+            'success': True,
+            'block_start': appointments[0].scheduled_at,
+            'block_end': max(appointment.scheduled_at + appointment.duration for appointment in appointments),
+            'appointments': [
+                {
+                    'appointment_id': appointment.id,
+                    'patient_id': appointment.patient_id,
+                    'doctor_id': appointment.assigned_doctor_id,
+                    'doctor_name': appointment.doctor,
+                    'scheduled_at': appointment.scheduled_at,
+                }
+                for appointment in appointments
+            ],
+        }
+
+    def _commit_block(self, patients: List[Patient], block: List[Tuple[Doctor, datetime]],
+                      procedure_type: Optional[ProcedureType],
+                      status: str = 'pending') -> Optional[List[Appointment]]:
+        """
+        Insert the whole block under the doctor and resource row locks.
+
+        Returns:
+            The created appointments, or None when any slot was taken meanwhile
+        """
+        length = self._booking_length([doctor for doctor, _ in block], procedure_type)
+        duration = timedelta(minutes=length)
+        doctors = {doctor.id: doctor for doctor, _ in block}
+        first_day = minute_of_day(block[0][1])[0]
+        last_day = minute_of_day(max(start for _, start in block) + duration)[0]
+        procedure_type_id = procedure_type.id if procedure_type else None
+
+        with transaction.atomic():
+            list(Doctor.objects.select_for_update().filter(
+                id__in=doctors
+            ).order_by('id').values_list('id', flat=True))
+            resource_ids = self.resource_index.procedure_resources(procedure_type_id)[1]
+            list(ClinicResource.objects.select_for_update().filter(
+                id__in=resource_ids
+            ).order_by('id').values_list('id', flat=True))
+
+            for doctor_id in sorted(doctors):
+                self.booking_index.refresh(doctors[doctor_id], first_day - timedelta(days=1), last_day)
+            if resource_ids:
+                self.resource_index.refresh(resource_ids, first_day, last_day)
+
+            pending: Dict = {}
+            for doctor, start in block:
+                if self.booking_index.overlaps(doctor, start, start + duration):
+                    return None
+                if not self.resource_index.fits_batch(procedure_type_id, start, start + duration, pending):
+                    return None
+                self.resource_index.add_pending(procedure_type_id, start, start + duration, pending)
+
+            appointments = Appointment.objects.bulk_create([
+                Appointment(
+                    patient=patient,
+                    doctor=doctor.name,
+                    assigned_doctor=doctor,
+                    procedure=procedure_type.name if procedure_type else 'consultation',
+                    procedure_type=procedure_type,
+                    duration=duration,
+                    scheduled_at=start,
+                    status=status
+                )
+                for patient, (doctor, start) in zip(patients, block)
+            ])
+
+            def update_indexes():
+                # bulk_create sends no post_save signals
+                next_slots = get_next_slot_cache()
+                for appointment in appointments:
+                    self.booking_index.apply(appointment)
+                    self.resource_index.apply(appointment)
+                    next_slots.invalidate_booking(appointment)
+
+            transaction.on_commit(update_indexes)
+
+        return appointments
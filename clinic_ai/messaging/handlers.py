@@ -320,8 +320,10 @@ class MessageProcessor:
                 confidence_score=0.8  # Initial confidence
             )
 
-            # 5. Generate AI response
-            ai_response, confidence = self.ai.generate_response(korean_content, 'ko')
+            # 5. Generate AI response, with open slots for booking requests
+            ai_response, confidence = self.ai.generate_response(
+                korean_content, 'ko', self._booking_context(korean_content)
+            )
 
             # 6. Translate response back to patient's language if needed
             final_response = ai_response
@@ -375,6 +377,30 @@ class MessageProcessor:
             logger.error(f"Message processing error: {e}")
             return {'status': 'error', 'message': str(e)}
 
+    def _booking_context(self, content: str, limit: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Context with the next open slots when the message asks for an appointment.
+        Slots come from the merged clinic-wide next-slot list, read without
+        computing availability or rebuilding anything while the patient waits.
+        """
+        try:
+            if self.ai.classify_intent(content).get('intent') != 'appointment':
+                return None
+
+            from .next_slots import get_next_slot_cache
+
+            slots = get_next_slot_cache().clinic_next_slots(limit=limit)
+            return {
+                'previous_intent': 'appointment',
+                'next_slots': [
+                    {'doctor_name': name, 'scheduled_at': slot.isoformat()}
+                    for slot, _, name in slots
+                ]
+            }
+        except Exception as e:
+            logger.warning(f"Next slot lookup for booking request failed: {e}")
+            return None
+
     def _notify_staff(self, message: Message) -> None:
         """Notify staff about messages needing human intervention"""
         # Would integrate with notification service
@@ -0,0 +1,457 @@
+"""
+Materialized next-available slots per doctor and procedure type.
+Free slot starts are stored per doctor-day in the shared cache and the next
+N slots per (doctor, procedure type) are kept as a ready-made list, so the
+front desk reads them with two cache round trips; a merged clinic-wide list
+serves the chat in one. Generation counters retire only the doctor-days a
+booking touched; everything else is reused when the list is rebuilt.
+"""
+
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..core.models import Appointment, Doctor, ProcedureType
+from .availability import AvailabilityEngine
+from .booking_index import (
+    BookingIndex, duration_minutes, get_booking_index, minute_of_day, slot_datetime
+)
+from .resource_index import ResourceIndex, get_resource_index
+
+logger = logging.getLogger(__name__)
+
+
+class NextSlotCache:
+    """
+    Next free slots per (doctor, procedure type), materialized in the cache.
+
+    Cache layout (all counters start at 0):
+        next_slots:epoch                   closures, procedures or resources changed
+        next_slots:template:{doctor}       doctor's weekly windows or slot length changed
+        next_slots:gen:{doctor}            any booking of the doctor changed
+        next_slots:day:{doctor}:{day}      a booking on that doctor-day changed
+        next_slots:resources[:{day}]       a booking using resources changed
+        next_slots:clinic                  any of the above changed
+    Day entries and head lists are keyed by the counters they depend on, so
+    a bump makes exactly the affected entries unreachable. The clinic-wide
+    list (next_slots:clinic_head) carries the clinic counter it was built at.
+    """
+
+    KEY_PREFIX = 'next_slots'
+    ENTRY_TTL = 60 * 60 * 24
+
+    def __init__(self, booking_index: Optional[BookingIndex] = None,
+                 resource_index: Optional[ResourceIndex] = None,
+                 horizon_days: Optional[int] = None, size: Optional[int] = None):
+        """
+        Initialize cache.
+
+        Args:
+            booking_index: Interval index of booked appointments
+            resource_index: Equipment/room capacity index
+            horizon_days: Days ahead materialized (defaults to
+                CLINIC_AI['NEXT_SLOTS_HORIZON_DAYS'])
+            size: Slots kept per list (defaults to CLINIC_AI['NEXT_SLOTS_COUNT'])
+        """
+        clinic_settings = settings.CLINIC_AI
+        self.booking_index = booking_index or get_booking_index()
+        self.resource_index = resource_index or get_resource_index()
+        self.horizon_days = horizon_days or clinic_settings.get('NEXT_SLOTS_HORIZON_DAYS', 14)
+        self.size = size or clinic_settings.get('NEXT_SLOTS_COUNT', 10)
+
+    def _key(self, *parts) -> str:
+        return ':'.join([self.KEY_PREFIX] + [str(part) for part in parts])
+
+    def _procedure_profile(self, procedure_type_id: Optional[int]) -> Tuple[Optional[int], List[int]]:
+        """Booking length (None = the doctor's slot grid) and resources of a procedure."""
+        if procedure_type_id is None:
+            return None, []
+        footprint, resource_ids = self.resource_index.procedure_resources(procedure_type_id)
+        return footprint or None, resource_ids
+
+    def next_slots(self, doctor: Doctor, procedure_type: Optional[ProcedureType] = None,
+                   limit: Optional[int] = None) -> List[datetime]:
+        """
+        Next free slot starts for a doctor, soonest first.
+
+        Args:
+            doctor: Doctor to look up
+            procedure_type: Procedure to size the slots for; None uses the
+                doctor's regular slot grid
+            limit: Slots wanted (at most the configured list size)
+
+        Returns:
+            Up to `limit` future slot starts within the horizon
+        """
+        limit = min(limit or self.size, self.size)
+        procedure_type_id = procedure_type.id if procedure_type else None
+        now = timezone.now()
+        try:
+            head_key = self._head_key(doctor.id, procedure_type_id)
+            head = cache.get(head_key)
+        except Exception as e:
+            logger.warning(f"Next slot lookup failed for doctor {doctor.id}: {e}")
+            return self.live_slots(doctor, procedure_type, limit)
+
+        if head is not None:
+            slots = [slot for slot in head['slots'] if slot > now]
+            # A list that ran out of horizon stays complete until the day ends
+            exhausted = len(head['slots']) < self.size and head['built_on'] == timezone.localdate(now)
+            if len(slots) >= limit or exhausted:
+                return slots[:limit]
+
+        slots = self._rebuild(doctor, procedure_type_id, now)
+        try:
+            cache.set(head_key, {'built_on': timezone.localdate(now), 'slots': slots},
+                      timeout=self.ENTRY_TTL)
+        except Exception as e:
+            logger.warning(f"Next slot list write failed for doctor {doctor.id}: {e}")
+        return slots[:limit]
+
+    def clinic_next_slots(self, limit: Optional[int] = None) -> List[Tuple[datetime, int, str]]:
+        """
+        Next free slots across all active doctors on their regular slot grid.
+
+        Read-only and never computes availability: served from the merged
+        clinic list in one cache round trip, or, when a booking or schedule
+        change retired it, merged from the doctors' ready-made lists with
+        two more. Doctors without a current list are left out until
+        warm_clinic() (scheduled) or a doctor lookup builds it.
+
+        Args:
+            limit: Slots wanted (at most the configured list size)
+
+        Returns:
+            Up to `limit` (slot start, doctor ID, doctor name), soonest first
+        """
+        limit = min(limit or self.size, self.size)
+        now = timezone.now()
+        clinic_key, head_key = self._key('clinic'), self._key('clinic_head')
+        try:
+            found = cache.get_many([clinic_key, head_key])
+        except Exception as e:
+            logger.warning(f"Clinic next slot lookup failed: {e}")
+            return []
+
+        generation = found.get(clinic_key, 0)
+        head = found.get(head_key)
+        if head is not None and head['generation'] == generation:
+            slots = [slot for slot in head['slots'] if slot[0] > now]
+            exhausted = len(head['slots']) < self.size and head['built_on'] == timezone.localdate(now)
+            if len(slots) >= limit or exhausted:
+                return slots[:limit]
+
+        slots, complete = self._merge_doctor_heads(now)
+        if complete:
+            self._store_clinic_head(generation, slots, now)
+        return slots[:limit]
+
+    def _merge_doctor_heads(self, now: datetime) -> Tuple[List[Tuple[datetime, int, str]], bool]:
+        """
+        Merge the current ready-made lists of every active doctor.
+
+        Returns:
+            (merged slots, whether every doctor had a current list)
+        """
+        doctors = list(Doctor.objects.filter(is_active=True).values_list('id', 'name'))
+        counter_keys = [self._key('epoch')]
+        for doctor_id, _ in doctors:
+            counter_keys += [self._key('template', doctor_id), self._key('gen', doctor_id)]
+        try:
+            counters = cache.get_many(counter_keys)
+            head_keys = {
+                doctor_id: self._key(
+                    'head', doctor_id, 0, counters.get(self._key('epoch'), 0),
+                    counters.get(self._key('template', doctor_id), 0),
+                    counters.get(self._key('gen', doctor_id), 0)
+                )
+                for doctor_id, _ in doctors
+            }
+            heads = cache.get_many(list(head_keys.values()))
+        except Exception as e:
+            logger.warning(f"Next slot list lookup failed: {e}")
+            return [], False
+
+        today = timezone.localdate(now)
+        slots, complete = [], True
+        for doctor_id, name in doctors:
+            head = heads.get(head_keys[doctor_id])
+            if head is None:
+                complete = False
+                continue
+            doctor_slots = [slot for slot in head['slots'] if slot > now]
+            if len(doctor_slots) < self.size and not (
+                len(head['slots']) < self.size and head['built_on'] == today
+            ):
+                # Partly used up: what is left is correct, but later slots are missing
+                complete = False
+            slots.extend((slot, doctor_id, name) for slot in doctor_slots)
+        slots.sort()
+        return slots[:self.size], complete
+
+    def _store_clinic_head(self, generation: int, slots: List[Tuple[datetime, int, str]],
+                           now: datetime) -> None:
+        try:
+            cache.set(self._key('clinic_head'), {
+                'generation': generation, 'built_on': timezone.localdate(now), 'slots': slots
+            }, timeout=self.ENTRY_TTL)
+        except Exception as e:
+            logger.warning(f"Clinic next slot list write failed: {e}")
+
+    def warm_clinic(self) -> int:
+        """
+        Build every active doctor's list that is missing or used up, then the
+        merged clinic list (run periodically, off the request path).
+
+        Returns:
+            Number of doctors checked
+        """
+        now = timezone.now()
+        try:
+            generation = cache.get(self._key('clinic'), 0)
+        except Exception as e:
+            logger.warning(f"Clinic next slot counter lookup failed: {e}")
+            return 0
+        doctors = list(Doctor.objects.filter(is_active=True))
+        for doctor in doctors:
+            self.next_slots(doctor)
+        slots, complete = self._merge_doctor_heads(now)
+        if complete:
+            self._store_clinic_head(generation, slots, now)
+        return len(doctors)
+
+    def _head_key(self, doctor_id: int, procedure_type_id: Optional[int]) -> str:
+        """Key of the ready-made list, built from the counters it depends on."""
+        _, resource_ids = self._procedure_profile(procedure_type_id)
+        counter_keys = [
+            self._key('epoch'), self._key('template', doctor_id), self._key('gen', doctor_id)
+        ]
+        if resource_ids:
+            counter_keys.append(self._key('resources'))
+        counters = cache.get_many(counter_keys)
+        return self._key(
+            'head', doctor_id, procedure_type_id or 0,
+            *(counters.get(key, 0) for key in counter_keys)
+        )
+
+    def _rebuild(self, doctor: Doctor, procedure_type_id: Optional[int],
+                 now: datetime) -> List[datetime]:
+        """
+        Assemble the list from per-day entries, recomputing only the days
+        whose entries were retired.
+        """
+        length, resource_ids = self._procedure_profile(procedure_type_id)
+        first_day = timezone.localdate(now)
+        days = [first_day + timedelta(days=offset) for offset in range(self.horizon_days)]
+
+        counter_keys = [self._key('epoch'), self._key('template', doctor.id)]
+        counter_keys += [self._key('day', doctor.id, day.isoformat()) for day in days]
+        if resource_ids:
+            counter_keys += [self._key('resources', day.isoformat()) for day in days]
+        try:
+            counters = cache.get_many(counter_keys)
+        except Exception as e:
+            logger.warning(f"Next slot counter lookup failed for doctor {doctor.id}: {e}")
+            counters = {}
+
+        def entry_key(day: date) -> str:
+            parts = [
+                counters.get(self._key('epoch'), 0),
+                counters.get(self._key('template', doctor.id), 0),
+                counters.get(self._key('day', doctor.id, day.isoformat()), 0),
+            ]
+            if resource_ids:
+                parts.append(counters.get(self._key('resources', day.isoformat()), 0))
+            return self._key('starts', doctor.id, procedure_type_id or 0, day.isoformat(), *parts)
+
+        keys = {day: entry_key(day) for day in days}
+        try:
+            entries = cache.get_many(list(keys.values()))
+        except Exception as e:
+            logger.warning(f"Next slot entry lookup failed for doctor {doctor.id}: {e}")
+            entries = {}
+
+        day_starts: Dict[date, List[int]] = {}
+        missing = []
+        for day in days:
+            if keys[day] in entries:
+                day_starts[day] = entries[keys[day]]
+            else:
+                missing.append(day)
+
+        if missing:
+            engine = AvailabilityEngine(doctor, self.booking_index, resource_ids, self.resource_index)
+            engine.load(missing[0], missing[-1])
+            computed = {}
+            for day in missing:
+                day_starts[day] = engine.day_free_minutes(day, length)
+                computed[keys[day]] = day_starts[day]
+            try:
+                cache.set_many(computed, timeout=self.ENTRY_TTL)
+            except Exception as e:
+                logger.warning(f"Next slot entry write failed for doctor {doctor.id}: {e}")
+
+        slots = []
+        for day in days:
+            for minute in day_starts[day]:
+                slot = slot_datetime(day, minute)
+                if slot > now:
+                    slots.append(slot)
+                    if len(slots) == self.size:
+                        return slots
+        return slots
+
+    def live_slots(self, doctor: Doctor, procedure_type: Optional[ProcedureType] = None,
+                   limit: Optional[int] = None) -> List[datetime]:
+        """The same list computed straight from the availability engine."""
+        limit = min(limit or self.size, self.size)
+        length, resource_ids = self._procedure_profile(procedure_type.id if procedure_type else None)
+        now = timezone.now()
+        first_day = timezone.localdate(now)
+        last_day = first_day + timedelta(days=self.horizon_days - 1)
+        engine = AvailabilityEngine(doctor, self.booking_index, resource_ids, self.resource_index)
+        engine.load(first_day, last_day)
+
+        slots = []
+        for slot in engine.iter_free_slots(first_day, last_day, length):
+            if slot > now:
+                slots.append(slot)
+                if len(slots) == limit:
+                    break
+        return slots
+
+    def check_consistency(self, doctor: Doctor, procedure_type: Optional[ProcedureType] = None,
+                          limit: Optional[int] = None) -> Dict:
+        """
+        Compare the materialized list with a live computation.
+
+        Returns:
+            Dict with 'consistent' and both lists
+        """
+        cached = self.next_slots(doctor, procedure_type, limit)
+        live = self.live_slots(doctor, procedure_type, limit)
+        if cached != live:
+            logger.warning(
+                f"Next slot cache out of date for doctor {doctor.id}, "
+                f"procedure {procedure_type.id if procedure_type else None}"
+            )
+        return {'consistent': cached == live, 'cached': cached, 'live': live}
+
+    def window_stamps(self, windows: Dict[Any, Tuple[int, date, date]]) -> Dict[Any, str]:
+        """
+        Version stamps of doctor-day ranges, from one cache round trip.
+
+        A stamp changes whenever a booking on one of the days, the doctor's
+        weekly windows or the clinic closures change. It starts with a seed
+        drawn when the counters were created, so stamps taken before a cache
+        flush never match counters that restarted at 0.
+
+        Args:
+            windows: Mapping of caller key to (doctor ID, first day, last day)
+
+        Returns:
+            Stamp per caller key
+        """
+        seed_key = self._key('seed')
+        keys = {seed_key, self._key('epoch')}
+        for doctor_id, first_day, last_day in windows.values():
+            keys.add(self._key('template', doctor_id))
+            keys.update(
+                self._key('day', doctor_id, (first_day + timedelta(days=offset)).isoformat())
+                for offset in range((last_day - first_day).days + 1)
+            )
+        try:
+            counters = cache.get_many(sorted(keys))
+            if seed_key not in counters:
+                cache.add(seed_key, uuid.uuid4().hex[:12], timeout=None)
+                counters[seed_key] = cache.get(seed_key)
+        except Exception as e:
+            logger.warning(f"Next slot stamp lookup failed: {e}")
+            # Unique stamps are never reused
+            return {key: uuid.uuid4().hex for key in windows}
+
+        stamps = {}
+        for key, (doctor_id, first_day, last_day) in windows.items():
+            parts = [
+                counters[seed_key],
+                counters.get(self._key('epoch'), 0),
+                counters.get(self._key('template', doctor_id), 0),
+            ]
+            parts += [
+                counters.get(self._key('day', doctor_id, (first_day + timedelta(days=offset)).isoformat()), 0)
+                for offset in range((last_day - first_day).days + 1)
+            ]
+            stamps[key] = '.'.join(str(part) for part in parts)
+        return stamps
+
+    def _bump(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                cache.add(key, 0, timeout=None)
+                cache.incr(key)
+            except Exception as e:
+                logger.warning(f"Next slot counter bump failed for {key}: {e}")
+
+    def invalidate_booking(self, appointment: Appointment, previous: Optional[Dict] = None) -> None:
+        """
+        Retire the doctor-days a saved, moved or deleted appointment touches.
+
+        Args:
+            appointment: Appointment after the change
+            previous: Snapshot of assigned_doctor/procedure_type/scheduled_at/duration
+                before the change, if any
+        """
+        bookings = [{
+            'assigned_doctor': appointment.assigned_doctor_id,
+            'procedure_type': appointment.procedure_type_id,
+            'scheduled_at': appointment.scheduled_at,
+            'duration': appointment.duration,
+        }]
+        if previous:
+            bookings.append(previous)
+
+        keys = set()
+        uses_resources = False
+        for booking in bookings:
+            doctor_id = booking.get('assigned_doctor')
+            if not doctor_id or not booking.get('scheduled_at'):
+                continue
+            start = booking['scheduled_at']
+            if booking.get('duration'):
+                minutes = duration_minutes(booking['duration'])
+            else:
+                # Same fallback as the booking index: the doctor's slot length
+                minutes = self.booking_index.slot_minutes(doctor_id) or 1
+            first_day, _ = minute_of_day(start)
+            last_day, _ = minute_of_day(start + timedelta(minutes=minutes))
+            _, resource_ids = self._procedure_profile(booking.get('procedure_type'))
+            keys.add(self._key('gen', doctor_id))
+            day = first_day
+            while day <= last_day:
+                keys.add(self._key('day', doctor_id, day.isoformat()))
+                if resource_ids:
+                    keys.add(self._key('resources', day.isoformat()))
+                    uses_resources = True
+                day += timedelta(days=1)
+        if uses_resources:
+            keys.add(self._key('resources'))
+        if keys:
+            keys.add(self._key('clinic'))
+        self._bump(sorted(keys))
+
+    def invalidate_doctor(self, doctor_id: int) -> None:
+        """Retire every entry of a doctor after its windows, slot length or status change."""
+        self._bump([self._key('clinic'), self._key('template', doctor_id)])
+
+    def invalidate_all(self) -> None:
+        """Retire every entry after closures, procedures or resources change."""
+        self._bump([self._key('clinic'), self._key('epoch')])
+
+
+def get_next_slot_cache() -> NextSlotCache:
+    """Get a next-slot cache with the process-wide indexes and settings."""
+    return NextSlotCache()
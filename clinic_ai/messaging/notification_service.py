@@ -102,6 +102,32 @@ A slot has become available for your waitlisted appointment!
 
 Please confirm within 24 hours.
                 """.strip()
+            },
+            'appointment_rescheduled': {
+                'ko': """
+{patient_name}님,
+
+의사 일정 변경으로 예약이 변경되었습니다.
+
+- 의사: {doctor}
+- 시술: {procedure}
+- 기존 일시: {previous_time}
+- 변경 일시: {scheduled_at}
+
+변경된 시간이 어려우시면 연락주세요.
+                """.strip(),
+                'en': """
+{patient_name},
+
+Your appointment has been moved due to a change in the doctor's schedule.
+
+- Doctor: {doctor}
+- Procedure: {procedure}
+- Previous Date/Time: {previous_time}
+- New Date/Time: {scheduled_at}
+
+Please contact us if the new time does not work for you.
+                """.strip()
             }
         }
 
@@ -353,6 +379,72 @@ Please confirm within 24 hours.
             logger.error(f"Error scheduling reminder: {e}")
             return False
 
+    def build_reschedule_notices(self, appointments: List[Appointment],
+                                 previous: Dict[int, Dict[str, Any]],
+                                 hours_before: int = 24) -> List[AppointmentReminder]:
+        """
+        Build reminder rows for appointments moved in bulk.
+
+        Each moved appointment gets a notice sent on the next reminder run and
+        a fresh reminder before the new time. Rows are returned unsaved so the
+        caller can bulk_create them inside its own transaction.
+
+        Args:
+            appointments: Moved appointments (patient already loaded)
+            previous: Booking snapshot per appointment ID before the move
+            hours_before: Hours before the new time to send the reminder
+
+        Returns:
+            Unsaved AppointmentReminder instances
+        """
+        now = timezone.now()
+        notices = []
+        for appointment in appointments:
+            patient = appointment.patient
+            channel = self._determine_best_channel(patient)
+            scheduled_at = timezone.localtime(appointment.scheduled_at).strftime('%Y-%m-%d %H:%M')
+            previous_time = timezone.localtime(
+                previous[appointment.id]['scheduled_at']
+            ).strftime('%Y-%m-%d %H:%M')
+
+            template = self.reminder_templates['appointment_rescheduled'].get(
+                patient.preferred_language,
+                self.reminder_templates['appointment_rescheduled']['en']
+            )
+            notices.append(AppointmentReminder(
+                appointment=appointment,
+                scheduled_send_at=now,
+                channel=channel,
+                message_content=template.format(
+                    patient_name=patient.name or 'Patient',
+                    doctor=appointment.doctor,
+                    procedure=appointment.procedure,
+                    previous_time=previous_time,
+                    scheduled_at=scheduled_at
+                ),
+                status='pending'
+            ))
+
+            send_time = appointment.scheduled_at - timedelta(hours=hours_before)
+            if send_time > now:
+                template = self.reminder_templates['appointment_reminder'].get(
+                    patient.preferred_language,
+                    self.reminder_templates['appointment_reminder']['en']
+                )
+                notices.append(AppointmentReminder(
+                    appointment=appointment,
+                    scheduled_send_at=send_time,
+                    channel=channel,
+                    message_content=template.format(
+                        patient_name=patient.name or 'Patient',
+                        doctor=appointment.doctor,
+                        procedure=appointment.procedure,
+                        scheduled_at=scheduled_at
+                    ),
+                    status='pending'
+                ))
+        return notices
+
     def process_pending_reminders(self) -> int:
         """
         Process and send all pending reminders that are due.
@@ -0,0 +1,184 @@
+"""
+Acceptance and wait-time analytics for scheduling optimizations.
+An incremental rollup folds SchedulingOptimization rows into per-doctor
+daily OptimizationRollup rows; only the days whose optimizations or
+appointments changed since its last run are recomputed. Analytics sum the rollups.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Dict, Optional, Set
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..core.models import OptimizationRollup, RollupCheckpoint, SchedulingOptimization
+from .booking_index import slot_datetime
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = 'scheduling_optimizations'
+
+# Accepted optimizations whose visit has been measured
+REALIZED = Q(
+    patient_accepted=True,
+    appointment__status='completed',
+    appointment__checked_in_at__isnull=False,
+    appointment__seen_at__gte=F('appointment__checked_in_at'),
+    expected_wait_minutes__isnull=False
+)
+
+
+def _changed_days(watermark, cutoff) -> Set[date]:
+    """
+    Local days (of creation) whose optimizations or appointments changed.
+
+    Appointments are tracked by updated_at rather than seen_at, so a visit
+    marked completed after the run that followed it still rebuilds its day.
+    """
+    tz = timezone.get_current_timezone()
+    changed = SchedulingOptimization.objects.filter(updated_at__lte=cutoff)
+    visited = SchedulingOptimization.objects.filter(appointment__updated_at__lte=cutoff)
+    if watermark:
+        changed = changed.filter(updated_at__gt=watermark)
+        visited = visited.filter(appointment__updated_at__gt=watermark)
+
+    days = set()
+    for queryset in (changed, visited):
+        days.update(
+            queryset.annotate(day=TruncDate('created_at', tzinfo=tz)).order_by().values_list(
+                'day', flat=True
+            ).distinct()
+        )
+    return days
+
+
+def rollup_optimizations(full: bool = False) -> int:
+    """
+    Rebuild OptimizationRollup for the days that changed since the last run.
+
+    Each affected day is recomputed from its optimizations with one grouped
+    query, so later acceptances and completed visits are folded in without
+    double counting.
+
+    Args:
+        full: Rebuild every day instead of only the changed ones
+
+    Returns:
+        Number of days rebuilt
+    """
+    cutoff = timezone.now()
+    tz = timezone.get_current_timezone()
+
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+        if full:
+            OptimizationRollup.objects.all().delete()
+            checkpoint.watermark = None
+
+        days = _changed_days(checkpoint.watermark, cutoff)
+        if days:
+            first_day, last_day = min(days), max(days)
+            wait = ExpressionWrapper(
+                F('appointment__seen_at') - F('appointment__checked_in_at'), output_field=DurationField()
+            )
+            rows = SchedulingOptimization.objects.filter(
+                doctor__isnull=False,
+                created_at__gte=slot_datetime(first_day, 0),
+                created_at__lt=slot_datetime(last_day + timedelta(days=1), 0)
+            ).annotate(
+                day=TruncDate('created_at', tzinfo=tz)
+            ).filter(day__in=days).order_by().values('doctor_id', 'day').annotate(
+                offered=Count('id'),
+                accepted=Count('id', filter=Q(patient_accepted=True)),
+                estimated=Sum('wait_time_reduction_minutes', filter=Q(patient_accepted=True)),
+                realized=Count('id', filter=REALIZED),
+                expected=Sum('expected_wait_minutes', filter=REALIZED),
+                actual=Sum(wait, filter=REALIZED)
+            )
+
+            OptimizationRollup.objects.filter(day__in=days).delete()
+            OptimizationRollup.objects.bulk_create([
+                OptimizationRollup(
+                    doctor_id=row['doctor_id'],
+                    day=row['day'],
+                    offered=row['offered'],
+                    accepted=row['accepted'],
+                    estimated_reduction_minutes=row['estimated'] or 0,
+                    realized_visits=row['realized'],
+                    expected_wait_minutes=row['expected'] or 0.0,
+                    actual_wait_minutes=row['actual'].total_seconds() / 60 if row['actual'] else 0.0
+                )
+                for row in rows
+            ])
+
+        checkpoint.watermark = cutoff
+        checkpoint.save()
+
+    logger.info(f"Optimization rollup rebuilt {len(days)} days")
+    return len(days)
+
+
+def optimization_analytics(start_date: date, end_date: date,
+                           doctor_id: Optional[int] = None) -> Dict:
+    """
+    Acceptance rate and wait-time reduction over a date range.
+
+    Reads only the rollup rows of the range (current as of the last rollup
+    run), never the optimizations themselves.
+
+    Args:
+        start_date: First day (inclusive)
+        end_date: Last day (inclusive)
+        doctor_id: Limit to one doctor
+
+    Returns:
+        Dict with clinic totals and a per-doctor breakdown
+    """
+    rollups = OptimizationRollup.objects.filter(day__gte=start_date, day__lte=end_date)
+    if doctor_id is not None:
+        rollups = rollups.filter(doctor_id=doctor_id)
+    rows = rollups.order_by().values('doctor_id', 'doctor__name').annotate(
+        offered=Sum('offered'),
+        accepted=Sum('accepted'),
+        estimated=Sum('estimated_reduction_minutes'),
+        realized=Sum('realized_visits'),
+        expected=Sum('expected_wait_minutes'),
+        actual=Sum('actual_wait_minutes')
+    ).order_by('doctor__name')
+
+    def summarize(offered, accepted, estimated, realized, expected, actual) -> Dict:
+        return {
+            'offered': offered,
+            'accepted': accepted,
+            'acceptance_rate': round(accepted / offered, 3) if offered else 0.0,
+            'estimated_wait_reduction_minutes': round(estimated / accepted, 1) if accepted else 0.0,
+            'realized_visits': realized,
+            'realized_wait_reduction_minutes': round((expected - actual) / realized, 1) if realized else None,
+        }
+
+    doctors = []
+    totals = [0, 0, 0, 0, 0.0, 0.0]
+    for row in rows:
+        values = [row['offered'], row['accepted'], row['estimated'], row['realized'],
+                  row['expected'], row['actual']]
+        totals = [total + value for total, value in zip(totals, values)]
+        doctors.append({
+            'doctor_id': row['doctor_id'],
+            'doctor_name': row['doctor__name'],
+            **summarize(*values)
+        })
+
+    try:
+        watermark = RollupCheckpoint.objects.get(name=ROLLUP_NAME).watermark
+    except RollupCheckpoint.DoesNotExist:
+        watermark = None
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'as_of': watermark.isoformat() if watermark else None,
+        **summarize(*totals),
+        'doctors': doctors,
+    }
@@ -0,0 +1,391 @@
+"""
+Time-bucketed capacity index for clinic resources (equipment and rooms).
+Keeps a segment tree of concurrent usage per resource per day in 5 minute
+buckets, so capacity checks are O(log n) range-max queries instead of
+appointment scans. Trees are rebuilt when another process bumps the shared
+version stamp in the cache and are kept current from Appointment signals.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from django.core.cache import cache
+
+from ..core.models import Appointment, ClinicResource, ProcedureType
+from .booking_index import (
+    ACTIVE_APPOINTMENT_STATUSES, MINUTES_PER_DAY, duration_minutes, minute_of_day, slot_datetime
+)
+
+logger = logging.getLogger(__name__)
+
+BUCKET_MINUTES = 5
+BUCKETS_PER_DAY = MINUTES_PER_DAY // BUCKET_MINUTES
+
+
+def bucket_range(start_minute: int, end_minute: int) -> Tuple[int, int]:
+    """Buckets touched by [start_minute, end_minute), rounded outward."""
+    return start_minute // BUCKET_MINUTES, -(-end_minute // BUCKET_MINUTES)
+
+
+def usage_segments(start: datetime, minutes: int) -> List[Tuple[date, int, int]]:
+    """Split a usage interval into per-day (day, start_minute, end_minute) pieces."""
+    day, start_minute = minute_of_day(start)
+    segments = []
+    end_minute = start_minute + minutes
+    while end_minute > 0:
+        segments.append((day, start_minute, min(end_minute, MINUTES_PER_DAY)))
+        day += timedelta(days=1)
+        start_minute, end_minute = 0, end_minute - MINUTES_PER_DAY
+    return segments
+
+
+class UsageTree:
+    """
+    Segment tree over one day's buckets with range add and range max.
+    Range updates stay at the covering nodes (no push-down); a node's peak
+    includes its own pending delta, so both operations are O(log n).
+    """
+
+    __slots__ = ('peaks', 'pending', 'version', 'checked_at')
+
+    def __init__(self, version: int = 0):
+        self.peaks = [0] * (4 * BUCKETS_PER_DAY)
+        self.pending = [0] * (4 * BUCKETS_PER_DAY)
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    def add(self, lo: int, hi: int, delta: int, node: int = 1,
+            node_lo: int = 0, node_hi: int = BUCKETS_PER_DAY) -> None:
+        """Add `delta` concurrent uses to buckets [lo, hi)."""
+        if hi <= node_lo or node_hi <= lo:
+            return
+        if lo <= node_lo and node_hi <= hi:
+            self.peaks[node] += delta
+            self.pending[node] += delta
+            return
+        mid = (node_lo + node_hi) // 2
+        self.add(lo, hi, delta, 2 * node, node_lo, mid)
+        self.add(lo, hi, delta, 2 * node + 1, mid, node_hi)
+        self.peaks[node] = self.pending[node] + max(self.peaks[2 * node], self.peaks[2 * node + 1])
+
+    def peak(self, lo: int, hi: int, node: int = 1,
+             node_lo: int = 0, node_hi: int = BUCKETS_PER_DAY) -> int:
+        """Highest concurrent usage in buckets [lo, hi)."""
+        if hi <= node_lo or node_hi <= lo:
+            return 0
+        if lo <= node_lo and node_hi <= hi:
+            return self.peaks[node]
+        mid = (node_lo + node_hi) // 2
+        return self.pending[node] + max(
+            self.peak(lo, hi, 2 * node, node_lo, mid),
+            self.peak(lo, hi, 2 * node + 1, mid, node_hi)
+        )
+
+    def saturated(self, capacity: int, node: int = 1, node_lo: int = 0,
+                  node_hi: int = BUCKETS_PER_DAY, carried: int = 0) -> Iterator[Tuple[int, int]]:
+        """Yield bucket ranges whose usage has reached `capacity`, pruning idle subtrees."""
+        if self.peaks[node] + carried < capacity:
+            return
+        if node_hi - node_lo == 1:
+            yield node_lo, node_hi
+            return
+        carried += self.pending[node]
+        mid = (node_lo + node_hi) // 2
+        yield from self.saturated(capacity, 2 * node, node_lo, mid, carried)
+        yield from self.saturated(capacity, 2 * node + 1, mid, node_hi, carried)
+
+
+class ResourceIndex:
+    """
+    Per-resource, per-day usage index for capacity-constrained resources.
+    Procedure requirements and capacities are cached per process for a short
+    time; usage trees are validated against a shared version stamp.
+    """
+
+    KEY_PREFIX = 'resource_index'
+    PROFILE_TTL = 60.0
+
+    def __init__(self, max_trees: int = 20000, max_staleness: float = 1.0):
+        """
+        Initialize index.
+
+        Args:
+            max_trees: Maximum number of resource-day trees kept in memory
+            max_staleness: Seconds a tree may be served before its shared
+                version is checked again
+        """
+        self.max_trees = max_trees
+        self.max_staleness = max_staleness
+        self._trees: 'OrderedDict[Tuple[int, date], UsageTree]' = OrderedDict()
+        self._profiles: Dict[int, Tuple[float, int, List[int]]] = {}
+        self._capacities: Dict[int, int] = {}
+        self._capacities_loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    def _version_key(self, resource_id: int, day: date) -> str:
+        return f"{self.KEY_PREFIX}:v:{resource_id}:{day.isoformat()}"
+
+    def _bump_version(self, resource_id: int, day: date) -> Optional[int]:
+        """Atomically bump the shared version of a resource-day."""
+        key = self._version_key(resource_id, day)
+        try:
+            cache.add(key, 0, timeout=None)
+            return cache.incr(key)
+        except Exception as e:
+            logger.warning(f"Resource index version bump failed for {key}: {e}")
+            return None
+
+    def procedure_resources(self, procedure_type_id: Optional[int]) -> Tuple[int, List[int]]:
+        """
+        Return (footprint minutes, required active resource IDs) for a procedure type.
+        """
+        if procedure_type_id is None:
+            return 0, []
+        profile = self._profiles.get(procedure_type_id)
+        if profile is None or time.monotonic() - profile[0] > self.PROFILE_TTL:
+            procedure_type = ProcedureType.objects.filter(id=procedure_type_id).first()
+            if procedure_type is None:
+                return 0, []
+            resource_ids = sorted(procedure_type.resources.filter(
+                is_active=True
+            ).values_list('id', flat=True))
+            profile = (time.monotonic(), duration_minutes(procedure_type.total_duration), resource_ids)
+            self._profiles[procedure_type_id] = profile
+        return profile[1], profile[2]
+
+    def capacity(self, resource_id: int) -> int:
+        """Capacity of an active resource (capacities are loaded all at once)."""
+        if time.monotonic() - self._capacities_loaded_at > self.PROFILE_TTL:
+            self._capacities = dict(
+                ClinicResource.objects.filter(is_active=True).values_list('id', 'capacity')
+            )
+            self._capacities_loaded_at = time.monotonic()
+        return self._capacities.get(resource_id, 0)
+
+    def forget_profiles(self) -> None:
+        """Drop cached requirements and capacities after resources change."""
+        with self._lock:
+            self._profiles.clear()
+            self._capacities_loaded_at = 0.0
+
+    def prime(self, resource_ids: List[int], start_date: date, end_date: date) -> None:
+        """
+        Make sure trees for every resource-day in the range are current.
+        Costs one cache round trip plus at most one database query.
+        """
+        keys = []
+        current_date = start_date
+        while current_date <= end_date:
+            keys.extend((resource_id, current_date) for resource_id in resource_ids)
+            current_date += timedelta(days=1)
+        if not keys:
+            return
+
+        try:
+            versions = cache.get_many([self._version_key(*key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Resource index version lookup failed: {e}")
+            versions = {}
+
+        stale = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                shared_version = versions.get(self._version_key(*key), 0)
+                tree = self._trees.get(key)
+                if tree is None or tree.version != shared_version:
+                    stale.append((key, shared_version))
+                else:
+                    tree.checked_at = now
+
+        if stale:
+            self._load_from_database(stale)
+
+    def refresh(self, resource_ids: List[int], start_date: date, end_date: date) -> None:
+        """Rebuild trees for the range straight from the database (see BookingIndex.refresh)."""
+        keys = []
+        current_date = start_date
+        while current_date <= end_date:
+            keys.extend((resource_id, current_date) for resource_id in resource_ids)
+            current_date += timedelta(days=1)
+        if not keys:
+            return
+
+        try:
+            versions = cache.get_many([self._version_key(*key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Resource index version lookup failed: {e}")
+            versions = {}
+
+        self._load_from_database(
+            [(key, versions.get(self._version_key(*key), 0)) for key in keys]
+        )
+
+    def _load_from_database(self, stale: List[Tuple[Tuple[int, date], int]]) -> None:
+        """Rebuild trees for the given resource-days with a single query."""
+        first_day = min(day for (_, day), _ in stale)
+        last_day = max(day for (_, day), _ in stale)
+        trees = {key: UsageTree(shared_version) for key, shared_version in stale}
+
+        # Usage starting the previous evening can spill into first_day
+        rows = Appointment.objects.filter(
+            procedure_type__resources__id__in={resource_id for (resource_id, _), _ in stale},
+            scheduled_at__gte=slot_datetime(first_day - timedelta(days=1), 0),
+            scheduled_at__lt=slot_datetime(last_day + timedelta(days=1), 0),
+            status__in=ACTIVE_APPOINTMENT_STATUSES
+        ).values_list('scheduled_at', 'duration', 'procedure_type_id', 'procedure_type__resources__id')
+
+        for scheduled_at, duration, procedure_type_id, resource_id in rows:
+            minutes = duration_minutes(duration) if duration else \
+                self.procedure_resources(procedure_type_id)[0]
+            for day, start_minute, end_minute in usage_segments(scheduled_at, minutes):
+                tree = trees.get((resource_id, day))
+                if tree is not None:
+                    tree.add(*bucket_range(start_minute, end_minute), 1)
+
+        for key, tree in trees.items():
+            self._store(key, tree)
+
+    def _store(self, key: Tuple[int, date], tree: UsageTree) -> None:
+        with self._lock:
+            self._trees[key] = tree
+            self._trees.move_to_end(key)
+            while len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
+
+    def tree(self, resource_id: int, day: date) -> UsageTree:
+        """Return the usage tree for a resource-day, revalidating it when stale."""
+        tree = self._trees.get((resource_id, day))
+        if tree is None or time.monotonic() - tree.checked_at > self.max_staleness:
+            self.prime([resource_id], day, day)
+            tree = self._trees.get((resource_id, day), UsageTree())
+        return tree
+
+    def fits(self, procedure_type_id: Optional[int], start: datetime, end: datetime) -> bool:
+        """
+        Check that every resource the procedure needs has spare capacity
+        during [start, end). O(r log n) for r required resources.
+        """
+        _, resource_ids = self.procedure_resources(procedure_type_id)
+        if not resource_ids:
+            return True
+        minutes = duration_minutes(end - start)
+        for resource_id in resource_ids:
+            capacity = self.capacity(resource_id)
+            for day, start_minute, end_minute in usage_segments(start, minutes):
+                lo, hi = bucket_range(start_minute, end_minute)
+                if self.tree(resource_id, day).peak(lo, hi) >= capacity:
+                    return False
+        return True
+
+    def fits_batch(self, procedure_type_id: Optional[int], start: datetime, end: datetime,
+                   pending: Dict[Tuple[int, date, int], int]) -> bool:
+        """
+        Same as fits(), also counting usage handed out earlier in a batch that
+        is not committed yet.
+
+        Args:
+            procedure_type_id: Procedure to place
+            start: Slot start
+            end: Slot end
+            pending: Uncommitted usage per (resource, day, bucket), see add_pending
+        """
+        _, resource_ids = self.procedure_resources(procedure_type_id)
+        minutes = duration_minutes(end - start)
+        for resource_id in resource_ids:
+            capacity = self.capacity(resource_id)
+            for day, start_minute, end_minute in usage_segments(start, minutes):
+                tree = self.tree(resource_id, day)
+                for bucket in range(*bucket_range(start_minute, end_minute)):
+                    used = tree.peak(bucket, bucket + 1) + pending.get((resource_id, day, bucket), 0)
+                    if used >= capacity:
+                        return False
+        return True
+
+    def add_pending(self, procedure_type_id: Optional[int], start: datetime, end: datetime,
+                    pending: Dict[Tuple[int, date, int], int]) -> None:
+        """Record a batch placement's resource usage for fits_batch()."""
+        _, resource_ids = self.procedure_resources(procedure_type_id)
+        for resource_id in resource_ids:
+            for day, start_minute, end_minute in usage_segments(start, duration_minutes(end - start)):
+                for bucket in range(*bucket_range(start_minute, end_minute)):
+                    key = (resource_id, day, bucket)
+                    pending[key] = pending.get(key, 0) + 1
+
+    def blocked_buckets(self, resource_ids: List[int], day: date) -> Iterator[Tuple[int, int]]:
+        """Bucket ranges on a day where any of the resources is at capacity."""
+        for resource_id in resource_ids:
+            yield from self.tree(resource_id, day).saturated(self.capacity(resource_id))
+
+    def apply(self, appointment: Appointment, previous: Optional[Dict] = None) -> None:
+        """
+        Reflect a saved appointment in the index.
+
+        Args:
+            appointment: Saved appointment instance
+            previous: Snapshot of procedure_type/scheduled_at/duration/status before the save
+        """
+        current = {
+            'procedure_type': appointment.procedure_type_id,
+            'scheduled_at': appointment.scheduled_at,
+            'duration': appointment.duration,
+            'status': appointment.status,
+        }
+        if previous and all(previous.get(field) == value for field, value in current.items()):
+            return
+        if previous:
+            self._change_usage(previous, -1)
+        self._change_usage(current, 1)
+
+    def discard(self, appointment: Appointment) -> None:
+        """Release the usage of a deleted appointment."""
+        self._change_usage({
+            'procedure_type': appointment.procedure_type_id,
+            'scheduled_at': appointment.scheduled_at,
+            'duration': appointment.duration,
+            'status': appointment.status,
+        }, -1)
+
+    def _change_usage(self, booking: Dict, delta: int) -> None:
+        if booking.get('status') not in ACTIVE_APPOINTMENT_STATUSES:
+            return
+        footprint, resource_ids = self.procedure_resources(booking.get('procedure_type'))
+        if not resource_ids:
+            return
+        minutes = duration_minutes(booking['duration']) if booking.get('duration') else footprint
+        for day, start_minute, end_minute in usage_segments(booking['scheduled_at'], minutes):
+            lo, hi = bucket_range(start_minute, end_minute)
+            for resource_id in resource_ids:
+                self._update(resource_id, day, lo, hi, delta)
+
+    def _update(self, resource_id: int, day: date, lo: int, hi: int, delta: int) -> None:
+        """Apply a usage change locally and publish the new version."""
+        new_version = self._bump_version(resource_id, day)
+        with self._lock:
+            tree = self._trees.get((resource_id, day))
+            if tree is None:
+                return
+            if new_version is None or new_version != tree.version + 1:
+                # Another worker changed this day meanwhile; rebuild lazily
+                del self._trees[(resource_id, day)]
+                return
+            tree.add(lo, hi, delta)
+            tree.version = new_version
+
+    def clear(self) -> None:
+        """Drop all local trees and cached requirements."""
+        with self._lock:
+            self._trees.clear()
+            self._profiles.clear()
+            self._capacities_loaded_at = 0.0
+
+
+_resource_index = ResourceIndex()
+
+
+def get_resource_index() -> ResourceIndex:
+    """Get the process-wide resource capacity index."""
+    return _resource_index
@@ -4,16 +4,33 @@ Implements intelligent scheduling with conflict detection and wait time reductio
 """
 
 import logging
-from datetime import datetime, timedelta, time as dt_time
-from typing import List, Dict, Any, Optional, Tuple
+from itertools import islice
+from datetime import date, datetime, timedelta, time as dt_time
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 
 from ..core.models import (
-    Appointment, Doctor, DoctorAvailability, ProcedureType,
+    Appointment, ClinicResource, Doctor, DoctorAvailability, ProcedureType,
     AppointmentWaitlist, SchedulingOptimization, Patient
 )
 from ..core.interfaces import Scheduler
+from .availability import AvailabilityEngine, iter_earliest_slots
+from .assignment import UNAVAILABLE, solve_assignment
+from .booking_index import (
+    MINUTES_PER_DAY, BookingIndex, duration_minutes, get_booking_index, minute_of_day, slot_datetime
+)
+from .next_slots import NextSlotCache
+from .resource_index import ResourceIndex, get_resource_index
+from .slot_holds import SlotHoldManager
+from .slot_scoring import (
+    BASE_SCORE, SlotScorer, day_minute, ordinal_minute, time_of_day_factor, wait_history_factor
+)
+from .wait_times import WaitTimeModel, get_wait_time_model
+from .waitlist_matcher import WaitlistMatcher
+from .workload import WorkloadService
 
 logger = logging.getLogger(__name__)
 
@@ -24,165 +41,245 @@ class AdvancedSchedulingOptimizer(Scheduler):
     Reduces wait times and optimizes resource utilization.
     """
 
-    def __init__(self, optimization_weight: float = 0.7):
+    # Days either side of a requested time searched for better slots
+    OPTIMIZATION_SEARCH_DAYS = 2
+
+    def __init__(self, optimization_weight: float = 0.7,
+                 booking_index: Optional[BookingIndex] = None,
+                 resource_index: Optional[ResourceIndex] = None,
+                 slot_holds: Optional[SlotHoldManager] = None,
+                 wait_times: Optional[WaitTimeModel] = None,
+                 scoring_weights: Optional[Dict[str, float]] = None):
         """
         Initialize optimizer.
         
         Args:
             optimization_weight: Weight for optimization vs patient preference (0-1)
+            booking_index: Interval index of booked appointments (defaults to
+                the shared process-wide index)
+            resource_index: Equipment/room capacity index (defaults to the
+                shared process-wide index)
+            slot_holds: Slot hold manager used while patients confirm
+            wait_times: Historical wait-time model (defaults to the shared
+                process-wide model)
+            scoring_weights: Maximum points per slot scoring factor, over
+                CLINIC_AI['SCHEDULING_WEIGHTS'] (see slot_scoring)
         """
         self.optimization_weight = optimization_weight
+        self.booking_index = booking_index or get_booking_index()
+        self.resource_index = resource_index or get_resource_index()
+        self.slot_holds = slot_holds or SlotHoldManager()
+        self.wait_times = wait_times or get_wait_time_model()
+        self.workload = WorkloadService(self.booking_index)
+        self.next_slots = NextSlotCache(self.booking_index, self.resource_index)
+        self.scorer = SlotScorer(scoring_weights)
 
     def find_available_slots(self, doctor: str, date_range: Tuple[datetime, datetime],
-                           preferences: Optional[Dict] = None) -> List[datetime]:
+                           preferences: Optional[Dict] = None,
+                           procedure_type: Optional[ProcedureType] = None) -> List[datetime]:
         """
         Find available appointment slots for a doctor within date range.
 
+        Availability windows and bookings for the whole range are loaded up
+        front, so the number of queries does not grow with the range width.
+
         Args:
-            doctor: Doctor name or ID
+            doctor: Doctor name, ID or Doctor instance
             date_range: Tuple of (start_date, end_date)
             preferences: Optional patient preferences (time of day, etc.)
+            procedure_type: Optional procedure; slots are sized by its
+                footprint and must have capacity on its equipment and rooms
 
         Returns:
             List of available datetime slots
         """
-        try:
-            # Get doctor object
-            doctor_obj = Doctor.objects.get(Q(name=doctor) | Q(id=doctor))
-        except Doctor.DoesNotExist:
+        return list(self.iter_available_slots(
+            doctor, date_range, preferences=preferences, chunk_days=None,
+            procedure_type=procedure_type
+        ))
+
+    def iter_available_slots(self, doctor, date_range: Tuple[datetime, datetime],
+                             preferences: Optional[Dict] = None,
+                             pivot: Optional[datetime] = None,
+                             after: Optional[datetime] = None,
+                             chunk_days: Optional[int] = 7,
+                             procedure_type: Optional[ProcedureType] = None) -> Iterator[datetime]:
+        """
+        Lazily yield available slots for a doctor.
+
+        Slots come in order of distance from `pivot` (chronological order
+        when no pivot is given). Preferences are applied to the day bitmaps
+        before slots are generated and bookings are loaded in chunks as the
+        search widens, so stopping after the first hits costs a fixed number
+        of queries regardless of the range width.
+
+        Args:
+            doctor: Doctor name, ID or Doctor instance
+            date_range: Tuple of (start_date, end_date); whole days are searched
+            preferences: Optional patient preferences (time of day, etc.)
+            pivot: Time the search expands outward from
+            after: Only yield slots strictly after this time (pagination cursor)
+            chunk_days: Days loaded per batch; None loads the whole range
+            procedure_type: Size slots by this procedure's footprint
+                (preparation + procedure + recovery) instead of the doctor's
+                fixed slot length, and require capacity on its resources
+
+        Yields:
+            Available datetime slots
+        """
+        doctor_obj = self._resolve_doctor(doctor)
+        if doctor_obj is None:
             logger.error(f"Doctor not found: {doctor}")
-            return []
+            return
 
         start_date, end_date = date_range
-        available_slots = []
+        first_day, last_day = start_date.date(), end_date.date()
+        if pivot is None:
+            pivot = slot_datetime(first_day, 0)
+
+        length, resource_ids = None, None
+        if procedure_type:
+            length, resource_ids = self.resource_index.procedure_resources(procedure_type.id)
+        engine = self._availability_engine(doctor_obj, resource_ids)
+        for slot in engine.iter_slots_near(pivot, first_day, last_day, length=length,
+                                           preferences=preferences, chunk_days=chunk_days):
+            if after is None or slot > after:
+                yield slot
+
+    def find_earliest_slots(self, procedure_type: ProcedureType,
+                            date_range: Tuple[datetime, datetime], limit: int = 10,
+                            preferences: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """
+        Find the earliest free slots for a procedure across all active doctors.
 
-        # Iterate through each day in the range
-        current_date = start_date.date()
-        end_date_only = end_date.date()
+        Per-doctor free slots are heap-merged lazily, so the search stops as
+        soon as `limit` slots are known, and each batch of days is loaded for
+        every doctor with a fixed number of queries.
 
-        while current_date <= end_date_only:
-            weekday = current_date.weekday()
-            
-            # Get doctor's availability for this weekday
-            availability_slots = DoctorAvailability.objects.filter(
-                doctor=doctor_obj,
-                weekday=weekday,
-                is_available=True
-            )
+        Args:
+            procedure_type: Procedure to book; slots are sized by its footprint
+            date_range: Tuple of (start_date, end_date)
+            limit: Number of slots to return
+            preferences: Optional patient preferences (time of day, etc.)
 
-            for slot in availability_slots:
-                # Generate time slots within availability window
-                slot_times = self._generate_time_slots(
-                    current_date,
-                    slot.start_time,
-                    slot.end_time,
-                    doctor_obj.average_appointment_duration
-                )
+        Returns:
+            List of {'doctor_id', 'doctor_name', 'scheduled_at'} dicts in time order
+        """
+        doctors = list(Doctor.objects.filter(is_active=True).order_by('id'))
+        start_date, end_date = date_range
 
-                # Filter out already booked slots
-                for slot_time in slot_times:
-                    if not self._is_slot_booked(doctor_obj, slot_time):
-                        available_slots.append(slot_time)
-
-            current_date += timedelta(days=1)
-
-        # Apply preferences if provided
-        if preferences:
-            available_slots = self._apply_preferences(available_slots, preferences)
-
-        return sorted(available_slots)
-
-    def _generate_time_slots(self, date: datetime.date, start_time: dt_time,
-                            end_time: dt_time, duration: timedelta) -> List[datetime]:
-        """Generate time slots within a time range."""
-        slots = []
-        current_time = datetime.combine(date, start_time)
-        end_datetime = datetime.combine(date, end_time)
-
-        while current_time + duration <= end_datetime:
-            slots.append(timezone.make_aware(current_time))
-            current_time += duration
-
-        return slots
-
-    def _is_slot_booked(self, doctor: Doctor, slot_time: datetime) -> bool:
-        """Check if a time slot is already booked."""
-        # Check for overlapping appointments
-        duration = doctor.average_appointment_duration
-        slot_end = slot_time + duration
-
-        overlapping = Appointment.objects.filter(
-            doctor=doctor.name,
-            scheduled_at__lt=slot_end,
-            scheduled_at__gte=slot_time - duration,
-            status__in=['pending', 'confirmed']
-        ).exists()
-
-        return overlapping
-
-    def _apply_preferences(self, slots: List[datetime], 
-                          preferences: Dict) -> List[datetime]:
-        """Filter slots based on patient preferences."""
-        filtered_slots = slots
-
-        # Preferred time of day
-        if 'preferred_time' in preferences:
-            pref_time = preferences['preferred_time']
-            if pref_time == 'morning':
-                filtered_slots = [s for s in filtered_slots if s.hour < 12]
-            elif pref_time == 'afternoon':
-                filtered_slots = [s for s in filtered_slots if 12 <= s.hour < 17]
-            elif pref_time == 'evening':
-                filtered_slots = [s for s in filtered_slots if s.hour >= 17]
-
-        # Preferred days of week
-        if 'preferred_days' in preferences:
-            pref_days = preferences['preferred_days']  # List of weekday numbers
-            filtered_slots = [s for s in filtered_slots if s.weekday() in pref_days]
-
-        return filtered_slots
+        stream = iter_earliest_slots(
+            doctors, start_date, end_date,
+            length=duration_minutes(procedure_type.total_duration),
+            booking_index=self.booking_index,
+            preferences=preferences,
+            resource_ids=self.resource_index.procedure_resources(procedure_type.id)[1]
+        )
+
+        return [
+            {
+                'doctor_id': doctor.id,
+                'doctor_name': doctor.name,
+                'scheduled_at': slot
+            }
+            for slot, doctor in islice(stream, limit)
+        ]
+
+    def _availability_engine(self, doctor: Doctor,
+                             resource_ids: Optional[List[int]] = None) -> AvailabilityEngine:
+        """Availability engine for a doctor over this optimizer's indexes."""
+        return AvailabilityEngine(doctor, self.booking_index, resource_ids, self.resource_index)
+
+    def _resolve_doctor(self, doctor) -> Optional[Doctor]:
+        """Resolve a Doctor instance from an instance, ID or name."""
+        if isinstance(doctor, Doctor):
+            return doctor
+
+        try:
+            if str(doctor).isdigit():
+                return Doctor.objects.get(id=int(doctor))
+            return Doctor.objects.get(name=doctor)
+        except Doctor.DoesNotExist:
+            return None
+
+    def _memo_doctor(self, doctors: Dict[Any, Optional[Doctor]], doctor) -> Optional[Doctor]:
+        """Resolve a doctor once per batch."""
+        if doctor not in doctors:
+            doctors[doctor] = self._resolve_doctor(doctor)
+        return doctors[doctor]
+
+    def _resolve_procedure(self, procedure) -> Optional[ProcedureType]:
+        """Resolve a ProcedureType from an instance, ID or (localized) name."""
+        if isinstance(procedure, ProcedureType):
+            return procedure
+        if not procedure:
+            return None
+        if str(procedure).isdigit():
+            return ProcedureType.objects.filter(id=int(procedure)).first()
+        return ProcedureType.objects.filter(
+            Q(name__iexact=procedure) | Q(name_ko=procedure)
+        ).first()
+
+    def _is_slot_free(self, doctor: Doctor, start: datetime, duration: timedelta,
+                      procedure_type: Optional[ProcedureType] = None) -> bool:
+        """
+        Check that [start, start + duration) is inside availability, unbooked
+        and, for a procedure, within the capacity of its equipment and rooms.
+        """
+        day, minute = minute_of_day(start)
+        engine = self._availability_engine(doctor)
+        engine.load(day, day)
+        if not engine.is_free(day, minute, duration_minutes(duration)):
+            return False
+        if procedure_type is None:
+            return True
+        return self.resource_index.fits(procedure_type.id, start, start + duration)
 
     def create_appointment(self, patient_id: str, doctor: str, procedure: str,
-                          scheduled_at: datetime) -> Dict[str, Any]:
+                          scheduled_at: datetime,
+                          hold_token: Optional[str] = None) -> Dict[str, Any]:
         """
         Create new appointment with optimization.
 
+        Without a hold token a short hold is taken for the duration of the
+        call, so concurrent requests for the same slot back off early; the
+        booking itself is committed under a per-doctor row lock either way.
+
+        Args:
+            patient_id: Patient ID
+            doctor: Doctor instance, ID or name
+            procedure: Procedure type ID or name
+            scheduled_at: Requested start time
+            hold_token: Token from hold_slot() confirming a held slot
+
         Returns:
             Dict with appointment details and optimization info
         """
+        hold = None
         try:
             # Get related objects
             patient = Patient.objects.get(id=patient_id)
-            doctor_obj = Doctor.objects.get(Q(name=doctor) | Q(id=doctor))
-            
-            # Check if slot is available
-            if self._is_slot_booked(doctor_obj, scheduled_at):
-                # Try to find alternative slot
-                alternative = self._find_alternative_slot(
-                    doctor_obj, scheduled_at, procedure
-                )
-                if alternative:
-                    return {
-                        'success': False,
-                        'message': 'Requested slot unavailable',
-                        'alternative_slot': alternative,
-                        'should_optimize': True
-                    }
-                else:
+            doctor_obj, procedure_type, duration = self._resolve_booking(doctor, procedure)
+
+            if hold_token:
+                hold = self.slot_holds.get(hold_token)
+                if (hold is None or hold['patient_id'] != patient.id or hold['doctor_id'] != doctor_obj.id
+                        or hold['scheduled_at'] != scheduled_at or hold['duration'] != duration):
+                    hold = None
                     return {
                         'success': False,
-                        'message': 'No available slots found',
-                        'should_waitlist': True
+                        'message': 'Slot hold expired or does not match this booking'
                     }
+            elif self._is_slot_free(doctor_obj, scheduled_at, duration, procedure_type):
+                hold = self.slot_holds.acquire(doctor_obj.id, scheduled_at, duration, patient.id, procedure)
 
-            # Create appointment
-            appointment = Appointment.objects.create(
-                patient=patient,
-                doctor=doctor_obj.name,
-                procedure=procedure,
-                scheduled_at=scheduled_at,
-                status='pending'
-            )
+            appointment = None
+            if hold is not None:
+                appointment = self._commit_booking(
+                    patient, doctor_obj, procedure, procedure_type, scheduled_at, duration
+                )
+            if appointment is None:
+                return self._slot_unavailable(doctor_obj, scheduled_at, procedure)
 
             logger.info(f"Created appointment: {appointment.id}")
             return {
@@ -197,34 +294,174 @@ class AdvancedSchedulingOptimizer(Scheduler):
                 'success': False,
                 'message': str(e)
             }
+        finally:
+            if hold is not None:
+                self.slot_holds.release(hold)
+
+    def hold_slot(self, patient_id: str, doctor: str, procedure: str,
+                  scheduled_at: datetime) -> Dict[str, Any]:
+        """
+        Hold a slot while the patient confirms.
+
+        Args:
+            patient_id: Patient ID
+            doctor: Doctor instance, ID or name
+            procedure: Procedure type ID or name
+            scheduled_at: Requested start time
+
+        Returns:
+            Dict with the hold token and expiry, or the same unavailable
+            result as create_appointment
+        """
+        try:
+            patient = Patient.objects.get(id=patient_id)
+            doctor_obj, procedure_type, duration = self._resolve_booking(doctor, procedure)
+
+            hold = None
+            if self._is_slot_free(doctor_obj, scheduled_at, duration, procedure_type):
+                hold = self.slot_holds.acquire(doctor_obj.id, scheduled_at, duration, patient.id, procedure)
+            if hold is None:
+                return self._slot_unavailable(doctor_obj, scheduled_at, procedure)
+
+            return {
+                'success': True,
+                'hold_token': hold['token'],
+                'scheduled_at': scheduled_at,
+                'expires_at': hold['expires_at']
+            }
+
+        except (Patient.DoesNotExist, Doctor.DoesNotExist) as e:
+            logger.error(f"Error holding slot: {e}")
+            return {
+                'success': False,
+                'message': str(e)
+            }
+
+    def confirm_hold(self, hold_token: str) -> Dict[str, Any]:
+        """Book a held slot for the patient it was held for."""
+        hold = self.slot_holds.get(hold_token)
+        if hold is None:
+            return {
+                'success': False,
+                'message': 'Slot hold expired or does not exist'
+            }
+        return self.create_appointment(
+            hold['patient_id'], hold['doctor_id'], hold['procedure'],
+            hold['scheduled_at'], hold_token=hold_token
+        )
+
+    def release_hold(self, hold_token: str) -> bool:
+        """Give up a held slot before it expires."""
+        hold = self.slot_holds.get(hold_token)
+        if hold is None:
+            return False
+        self.slot_holds.release(hold)
+        return True
+
+    def _resolve_booking(self, doctor, procedure) -> Tuple[Doctor, Optional[ProcedureType], timedelta]:
+        """Resolve the doctor, procedure type and booked length of a request."""
+        doctor_obj = self._resolve_doctor(doctor)
+        if doctor_obj is None:
+            raise Doctor.DoesNotExist(f"Doctor not found: {doctor}")
+
+        # Size the booking by the procedure's full footprint when known
+        procedure_type = self._resolve_procedure(procedure)
+        if procedure_type:
+            duration = procedure_type.total_duration
+        else:
+            duration = doctor_obj.average_appointment_duration
+        return doctor_obj, procedure_type, duration
+
+    def _commit_booking(self, patient: Patient, doctor: Doctor, procedure: str,
+                        procedure_type: Optional[ProcedureType], scheduled_at: datetime,
+                        duration: timedelta) -> Optional[Appointment]:
+        """
+        Insert the appointment against the committed state of the database.
+
+        The doctor row (and required resource rows, in ID order) are locked, so
+        bookings for one doctor serialize while other doctors book in parallel.
+        Overlaps are re-checked from the database rather than the in-memory
+        indexes, which may lag behind commits made by other workers.
+
+        Returns:
+            The new appointment, or None when the slot was taken meanwhile
+        """
+        end = scheduled_at + duration
+        first_day, _ = minute_of_day(scheduled_at)
+        last_day, _ = minute_of_day(end - timedelta(minutes=1))
+
+        with transaction.atomic():
+            list(Doctor.objects.select_for_update().filter(id=doctor.id).values_list('id', flat=True))
+            resource_ids = []
+            if procedure_type:
+                resource_ids = self.resource_index.procedure_resources(procedure_type.id)[1]
+                list(ClinicResource.objects.select_for_update().filter(
+                    id__in=resource_ids
+                ).order_by('id').values_list('id', flat=True))
+
+            self.booking_index.refresh(doctor, first_day - timedelta(days=1), last_day)
+            if self.booking_index.overlaps(doctor, scheduled_at, end):
+                return None
+            if resource_ids:
+                self.resource_index.refresh(resource_ids, first_day, last_day)
+                if not self.resource_index.fits(procedure_type.id, scheduled_at, end):
+                    return None
+
+            return Appointment.objects.create(
+                patient=patient,
+                doctor=doctor.name,
+                assigned_doctor=doctor,
+                procedure=procedure_type.name if procedure_type else procedure,
+                procedure_type=procedure_type,
+                duration=duration,
+                scheduled_at=scheduled_at,
+                status='pending'
+            )
+
+    def _slot_unavailable(self, doctor: Doctor, scheduled_at: datetime,
+                          procedure: str) -> Dict[str, Any]:
+        """Result for an unavailable slot, with the nearest alternative if any."""
+        # Try to find alternative slot
+        alternative = self._find_alternative_slot(doctor, scheduled_at, procedure)
+        if alternative:
+            return {
+                'success': False,
+                'message': 'Requested slot unavailable',
+                'alternative_slot': alternative,
+                'should_optimize': True
+            }
+        return {
+            'success': False,
+            'message': 'No available slots found',
+            'should_waitlist': True
+        }
 
     def _find_alternative_slot(self, doctor: Doctor, requested_time: datetime,
                               procedure: str) -> Optional[datetime]:
-        """Find alternative slot close to requested time."""
-        # Search within +/- 3 days
+        """Find alternative slot close to requested time that nobody is holding."""
+        # Search within +/- 3 days, nearest slot first
         start_range = requested_time - timedelta(days=3)
         end_range = requested_time + timedelta(days=3)
+        procedure_type = self._resolve_procedure(procedure)
+        duration = procedure_type.total_duration if procedure_type else doctor.average_appointment_duration
 
-        available_slots = self.find_available_slots(
-            doctor.name,
-            (start_range, end_range)
+        slots = self.iter_available_slots(
+            doctor, (start_range, end_range), pivot=requested_time,
+            procedure_type=procedure_type
         )
-
-        if not available_slots:
-            return None
-
-        # Find closest slot to requested time
-        closest_slot = min(
-            available_slots,
-            key=lambda x: abs((x - requested_time).total_seconds())
+        return next(
+            (slot for slot in slots if not self.slot_holds.is_held(doctor.id, slot, duration)),
+            None
         )
 
-        return closest_slot
-    
     def get_optimization_recommendations(self, appointments: List[Dict]) -> List[Dict]:
         """
         Get optimization recommendations for multiple appointments.
-        
+
+        Requests for an existing booking (with 'appointment_id') reuse the
+        stored result while its doctor-days are unchanged, and fresh results
+        are stored in bulk (see optimize_schedule).
+
         Args:
             appointments: List of appointment data with patient preferences
             
@@ -232,8 +469,15 @@ class AdvancedSchedulingOptimizer(Scheduler):
             List of optimization recommendations
         """
         recommendations = []
+        doctors: Dict[Any, Optional[Doctor]] = {}
+        stamps, stored = self._stored_optimizations(appointments, doctors)
+        reused = self._reusable_optimizations(appointments, doctors, stamps, stored)
+        assigned_slots = self._assign_batch(
+            appointments, doctors, {position: row.optimized_scheduled_at for position, row in reused.items()}
+        )
+        fresh = {}
         
-        for appt_data in appointments:
+        for position, appt_data in enumerate(appointments):
             try:
                 # Get patient preferences
                 patient_id = appt_data.get('patient_id')
@@ -242,12 +486,24 @@ class AdvancedSchedulingOptimizer(Scheduler):
                 requested_time = appt_data.get('requested_time')
                 preferences = appt_data.get('preferences', {})
                 
-                # Find optimal slot using existing method
-                optimal_slot = self._find_optimal_slot(doctor, procedure, requested_time)
+                # Slot chosen by the batch assignment
+                optimal_slot = assigned_slots.get(position)
+                
+                if position in reused:
+                    row = reused[position]
+                    wait_reduction = row.wait_time_reduction_minutes
+                    score = row.optimization_score
+                    reasons = row.optimization_reason.split('\n')
+                elif optimal_slot:
+                    time_diff = abs((optimal_slot - requested_time).total_seconds() / 60)
+                    wait_reduction = self._estimate_wait_reduction(doctor, optimal_slot, requested_time)
+                    score = self._calculate_optimization_score(time_diff, wait_reduction)
+                    reasons = self._get_optimization_reasons(doctor, optimal_slot, requested_time)
+                    if position in stamps:
+                        fresh[position] = (optimal_slot, score, wait_reduction, reasons)
                 
                 if optimal_slot and optimal_slot != requested_time:
                     # Calculate improvement metrics
-                    wait_reduction = self._estimate_wait_reduction(doctor, optimal_slot, requested_time)
                     time_diff = abs((optimal_slot - requested_time).total_seconds() / 60)
                     
                     recommendation = {
@@ -256,8 +512,8 @@ class AdvancedSchedulingOptimizer(Scheduler):
                         'recommended_time': optimal_slot,
                         'time_difference_minutes': int(time_diff),
                         'estimated_wait_reduction_minutes': wait_reduction,
-                        'optimization_score': self._calculate_optimization_score(time_diff, wait_reduction),
-                        'reasons': self._get_optimization_reasons(doctor, optimal_slot, requested_time)
+                        'optimization_score': score,
+                        'reasons': reasons
                     }
                     
                     recommendations.append(recommendation)
@@ -265,7 +521,8 @@ class AdvancedSchedulingOptimizer(Scheduler):
             except Exception as e:
                 logger.error(f"Error generating optimization recommendation: {e}")
                 continue
-                
+
+        self._save_optimizations(appointments, doctors, stamps, stored, fresh)
         return recommendations
     
     def _get_optimization_reasons(self, doctor: str, optimal_slot: datetime,
@@ -284,22 +541,15 @@ class AdvancedSchedulingOptimizer(Scheduler):
         reasons = []
         
         # Check doctor workload
-        try:
-            day_appointments = Appointment.objects.filter(
-                doctor=doctor,
-                scheduled_at__date=optimal_slot.date(),
-                status__in=['pending', 'confirmed']
-            ).count()
-            
-            doctor_obj = Doctor.objects.get(name=doctor)
+        doctor_obj = self._resolve_doctor(doctor)
+        if doctor_obj is not None:
+            day_appointments = self.workload.day_count(doctor_obj, timezone.localdate(optimal_slot))
             workload_ratio = day_appointments / doctor_obj.max_daily_appointments
             
             if workload_ratio < 0.5:
                 reasons.append(f"Doctor has lighter schedule on {optimal_slot.strftime('%A, %B %d')}")
             elif workload_ratio < 0.7:
                 reasons.append("Doctor schedule is more balanced")
-        except Doctor.DoesNotExist:
-            pass
         
         # Check time of day (typically morning slots have shorter waits)
         if optimal_slot.hour < 11 and original_slot.hour >= 14:
@@ -322,6 +572,13 @@ class AdvancedSchedulingOptimizer(Scheduler):
         Optimize appointment schedule for efficiency.
         Reduces wait times and improves resource utilization.
 
+        The whole batch is solved as one min-cost assignment, so two requests
+        are never given the same slot. Requests for an existing booking
+        (with 'appointment_id') are stored as SchedulingOptimization rows in
+        one bulk write, stamped with the versions of the doctor-days they
+        were computed from; a repeated request reuses the stored slot while
+        the stamp still matches.
+
         Args:
             appointments: List of appointment dicts with patient preferences
 
@@ -329,8 +586,15 @@ class AdvancedSchedulingOptimizer(Scheduler):
             Optimized list of appointments with recommendations
         """
         optimized = []
+        doctors: Dict[Any, Optional[Doctor]] = {}
+        stamps, stored = self._stored_optimizations(appointments, doctors)
+        reused = self._reusable_optimizations(appointments, doctors, stamps, stored)
+        assigned_slots = self._assign_batch(
+            appointments, doctors, {position: row.optimized_scheduled_at for position, row in reused.items()}
+        )
+        fresh = {}
 
-        for appt_data in appointments:
+        for position, appt_data in enumerate(appointments):
             try:
                 # Get appointment details
                 patient_id = appt_data['patient_id']
@@ -338,17 +602,25 @@ class AdvancedSchedulingOptimizer(Scheduler):
                 procedure = appt_data['procedure']
                 requested_time = appt_data['requested_time']
 
-                # Find optimal slot
-                optimal_slot = self._find_optimal_slot(
-                    doctor, procedure, requested_time
-                )
+                # Slot chosen by the batch assignment
+                optimal_slot = assigned_slots.get(position)
 
                 if optimal_slot:
                     # Calculate optimization metrics
                     time_diff = abs((optimal_slot - requested_time).total_seconds() / 60)
-                    wait_reduction = self._estimate_wait_reduction(
-                        doctor, optimal_slot, requested_time
-                    )
+                    if position in reused:
+                        wait_reduction = reused[position].wait_time_reduction_minutes
+                        score = reused[position].optimization_score
+                    else:
+                        wait_reduction = self._estimate_wait_reduction(
+                            doctor, optimal_slot, requested_time
+                        )
+                        score = self._calculate_optimization_score(time_diff, wait_reduction)
+                        if position in stamps:
+                            fresh[position] = (
+                                optimal_slot, score, wait_reduction,
+                                self._get_optimization_reasons(doctor, optimal_slot, requested_time)
+                            )
 
                     optimized.append({
                         'patient_id': patient_id,
@@ -358,9 +630,7 @@ class AdvancedSchedulingOptimizer(Scheduler):
                         'optimized_time': optimal_slot,
                         'time_difference_minutes': int(time_diff),
                         'wait_time_reduction_minutes': wait_reduction,
-                        'optimization_score': self._calculate_optimization_score(
-                            time_diff, wait_reduction
-                        )
+                        'optimization_score': score
                     })
                 else:
                     # Keep original if no optimization possible
@@ -379,41 +649,320 @@ class AdvancedSchedulingOptimizer(Scheduler):
                 logger.error(f"Error optimizing appointment: {e}")
                 continue
 
+        self._save_optimizations(appointments, doctors, stamps, stored, fresh)
         return optimized
 
+    def _stored_optimizations(self, appointments: List[Dict], doctors: Dict[Any, Optional[Doctor]]
+                              ) -> Tuple[Dict[int, str], Dict[int, SchedulingOptimization]]:
+        """
+        Stamp the requests for existing bookings and load their stored results.
+
+        The stamp covers every doctor-day in the request's search window plus
+        the wait-time model version, i.e. everything the slot scores read.
+
+        Args:
+            appointments: Batch passed to optimize_schedule
+            doctors: Doctor lookup memo shared with _assign_batch
+
+        Returns:
+            (stamp per request position, stored result per appointment ID)
+        """
+        window = timedelta(days=self.OPTIMIZATION_SEARCH_DAYS)
+        windows = {}
+        for position, appt_data in enumerate(appointments):
+            if not isinstance(appt_data, dict) or not appt_data.get('appointment_id'):
+                continue
+            requested_time = appt_data.get('requested_time')
+            doctor_obj = self._memo_doctor(doctors, appt_data.get('doctor'))
+            if requested_time is None or doctor_obj is None:
+                continue
+            requested_day = timezone.localdate(requested_time)
+            windows[position] = (doctor_obj.id, requested_day - window, requested_day + window)
+        if not windows:
+            return {}, {}
+
+        try:
+            wait_times_version = cache.get(WaitTimeModel.VERSION_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Wait-time model version lookup failed: {e}")
+            return {}, {}
+        stamps = {
+            position: f'{stamp}.w{wait_times_version}'
+            for position, stamp in self.next_slots.window_stamps(windows).items()
+        }
+        stored = SchedulingOptimization.objects.in_bulk(
+            [appointments[position]['appointment_id'] for position in stamps],
+            field_name='appointment_id'
+        )
+        return stamps, stored
+
+    def _reusable_optimizations(self, appointments: List[Dict], doctors: Dict[Any, Optional[Doctor]],
+                                stamps: Dict[int, str], stored: Dict[int, SchedulingOptimization]
+                                ) -> Dict[int, SchedulingOptimization]:
+        """Stored results for the same request whose doctor-days have not changed since."""
+        reused = {}
+        for position, stamp in stamps.items():
+            appt_data = appointments[position]
+            row = stored.get(appt_data['appointment_id'])
+            if (row is not None and row.version_stamp == stamp
+                    and row.doctor_id == self._memo_doctor(doctors, appt_data['doctor']).id
+                    and row.original_scheduled_at == appt_data['requested_time']):
+                reused[position] = row
+        return reused
+
+    def _save_optimizations(self, appointments: List[Dict], doctors: Dict[Any, Optional[Doctor]],
+                            stamps: Dict[int, str], stored: Dict[int, SchedulingOptimization],
+                            fresh: Dict[int, Tuple[datetime, float, int, List[str]]]) -> None:
+        """
+        Write freshly computed results in one bulk upsert.
+
+        Results the patient already accepted are kept as they are, so the
+        acceptance analytics never lose an outcome. The existing rows are
+        locked and re-read before the write, so an acceptance recorded
+        since `stored` was loaded is not overwritten either.
+        """
+        rows = []
+        for position, (optimal_slot, score, wait_reduction, reasons) in fresh.items():
+            appt_data = appointments[position]
+            previous = stored.get(appt_data['appointment_id'])
+            if previous is not None and previous.patient_accepted:
+                continue
+            doctor_obj = self._memo_doctor(doctors, appt_data['doctor'])
+            requested_time = appt_data['requested_time']
+            rows.append(SchedulingOptimization(
+                appointment_id=appt_data['appointment_id'],
+                doctor=doctor_obj,
+                original_scheduled_at=requested_time,
+                optimized_scheduled_at=optimal_slot,
+                optimization_score=score,
+                wait_time_reduction_minutes=wait_reduction,
+                expected_wait_minutes=self._get_average_wait_time(doctor_obj, requested_time),
+                optimization_reason='\n'.join(reasons),
+                version_stamp=stamps[position]
+            ))
+        if not rows:
+            return
+
+        try:
+            with transaction.atomic():
+                # Lock every existing row, so none can be accepted before the write
+                accepted = {
+                    appointment_id
+                    for appointment_id, patient_accepted in SchedulingOptimization.objects.select_for_update().filter(
+                        appointment_id__in=[row.appointment_id for row in rows]
+                    ).values_list('appointment_id', 'patient_accepted')
+                    if patient_accepted
+                }
+                rows = [row for row in rows if row.appointment_id not in accepted]
+                SchedulingOptimization.objects.bulk_create(
+                    rows, update_conflicts=True, unique_fields=['appointment'],
+                    update_fields=[
+                        'doctor', 'original_scheduled_at', 'optimized_scheduled_at', 'optimization_score',
+                        'wait_time_reduction_minutes', 'expected_wait_minutes', 'optimization_reason',
+                        'version_stamp', 'updated_at'
+                    ]
+                )
+        except Exception as e:
+            logger.error(f"Error storing optimization results: {e}")
+
     def _find_optimal_slot(self, doctor: str, procedure: str,
                           requested_time: datetime) -> Optional[datetime]:
         """
         Find optimal appointment slot using AI-powered algorithm.
         Considers doctor workload, procedure type, and historical patterns.
         """
-        try:
-            doctor_obj = Doctor.objects.get(Q(name=doctor) | Q(id=doctor))
-        except Doctor.DoesNotExist:
+        doctor_obj = self._resolve_doctor(doctor)
+        if doctor_obj is None:
             return None
 
-        # Get available slots around requested time
-        search_range = (
-            requested_time - timedelta(days=2),
-            requested_time + timedelta(days=2)
+        window = timedelta(days=self.OPTIMIZATION_SEARCH_DAYS)
+        first_day = timezone.localdate(requested_time - window)
+        last_day = timezone.localdate(requested_time + window)
+        engine = self._availability_engine(doctor_obj)
+        engine.load(first_day, last_day)
+        workload = self.scorer.workload_vector(doctor_obj, self.workload, first_day, last_day)
+        hourly = self.scorer.hourly_table(doctor_obj, self.wait_times, self._default_wait_time)
+        best_hourly = max(hourly)
+
+        # Days are scored outward from the requested day. Before each day, the
+        # best score any later day could reach is its workload points, the
+        # best hour and the proximity of its minute nearest the request.
+        requested = ordinal_minute(requested_time)
+        requested_day = timezone.localdate(requested_time)
+        days = sorted(
+            (first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)),
+            key=lambda day: (abs((day - requested_day).days), day)
         )
-        available_slots = self.find_available_slots(doctor, search_range)
-
-        if not available_slots:
+        first_ordinal = first_day.toordinal()
+        bounds = []
+        best_workload, nearest = float('-inf'), None
+        for day in reversed(days):
+            best_workload = max(best_workload, workload[day.toordinal() - first_ordinal])
+            gap = max(day_minute(day, 0) - requested, requested - day_minute(day, MINUTES_PER_DAY - 1), 0)
+            nearest = gap if nearest is None else min(nearest, gap)
+            bounds.append((BASE_SCORE + best_workload + best_hourly + self.scorer.proximity(nearest), nearest))
+        bounds.reverse()
+
+        best = None  # (score, -distance, -minute), ordered like SlotScorer.top_k
+        for day, (bound, nearest) in zip(days, bounds):
+            # Later slots are no nearer, so they cannot win a tie either
+            if best is not None and (best[0] > bound or (best[0] == bound and -best[1] < nearest)):
+                break
+            candidates = [day_minute(day, minute) for minute in engine.day_free_minutes(day)]
+            if not candidates:
+                continue
+            score, minute = self.scorer.top_k(
+                candidates, self.scorer.base_scores(candidates, first_day, workload, hourly), requested
+            )[0]
+            ranked = (score, -abs(minute - requested), -minute)
+            if best is None or ranked > best:
+                best = ranked
+
+        if best is None:
             return None
+        minute = -best[2]
+        return slot_datetime(date.fromordinal(minute // MINUTES_PER_DAY), minute % MINUTES_PER_DAY)
+
+    def _rank_slots(self, doctor: Doctor, candidates: List[int], first_day: date, last_day: date,
+                    requested_time: datetime, limit: int = 1) -> List[Tuple[float, datetime]]:
+        """
+        Score candidate slots in one batch and return the best ones.
+
+        Args:
+            doctor: Doctor the candidates belong to
+            candidates: Candidate starts as ordinal minutes (see slot_scoring)
+            first_day: First day any candidate falls on
+            last_day: Last day any candidate falls on
+            requested_time: Time the patient asked for
+            limit: Number of slots to return
+
+        Returns:
+            (score, slot) pairs, best first
+        """
+        if not candidates:
+            return []
+        base_scores = self.scorer.base_scores(
+            candidates, first_day,
+            self.scorer.workload_vector(doctor, self.workload, first_day, last_day),
+            self.scorer.hourly_table(doctor, self.wait_times, self._default_wait_time)
+        )
+        return [
+            (score, slot_datetime(date.fromordinal(minute // MINUTES_PER_DAY), minute % MINUTES_PER_DAY))
+            for score, minute in self.scorer.top_k(
+                candidates, base_scores, ordinal_minute(requested_time), limit
+            )
+        ]
+
+    def _assign_batch(self, appointments: List[Dict],
+                      doctors: Optional[Dict[Any, Optional[Doctor]]] = None,
+                      settled: Optional[Dict[int, datetime]] = None) -> Dict[int, datetime]:
+        """
+        Assign slots to a batch of requests as a min-cost assignment.
+
+        Requests are grouped by doctor and availability is computed once per
+        doctor. Requests whose search windows cannot overlap are solved as
+        separate components; each component is solved with the Hungarian
+        algorithm on negated slot scores, so no slot is assigned twice.
+
+        Args:
+            appointments: List of appointment dicts (doctor, procedure, requested_time)
+            doctors: Doctor lookup memo, keyed like the requests' 'doctor'
+            settled: Slots already decided for some positions (reused
+                results); they are kept and not offered to other requests
 
-        # Score each slot based on multiple factors
-        scored_slots = []
-        for slot in available_slots:
-            score = self._score_slot(doctor_obj, slot, requested_time, procedure)
-            scored_slots.append((slot, score))
+        Returns:
+            Mapping of request position to assigned slot
+        """
+        window = timedelta(days=self.OPTIMIZATION_SEARCH_DAYS)
+        doctors = {} if doctors is None else doctors
+        settled = settled or {}
+        groups: Dict[int, Tuple[Doctor, List[int]]] = {}
+        taken: Dict[int, set] = {}
+
+        for position, appt_data in enumerate(appointments):
+            try:
+                doctor_key = appt_data['doctor']
+                requested_time = appt_data['requested_time']
+            except (KeyError, TypeError):
+                continue
+            if requested_time is None:
+                continue
+            doctor_obj = self._memo_doctor(doctors, doctor_key)
+            if doctor_obj is None:
+                continue
+            if position in settled:
+                taken.setdefault(doctor_obj.id, set()).add(settled[position])
+            else:
+                groups.setdefault(doctor_obj.id, (doctor_obj, []))[1].append(position)
+
+        assigned_slots = dict(settled)
+        for doctor_obj, positions in groups.values():
+            positions.sort(key=lambda p: appointments[p]['requested_time'])
+            first = appointments[positions[0]]['requested_time']
+            last = appointments[positions[-1]]['requested_time']
+            slots = self.find_available_slots(doctor_obj, (first - window, last + window))
+            if doctor_obj.id in taken:
+                slots = [slot for slot in slots if slot not in taken[doctor_obj.id]]
+            if not slots:
+                continue
+            first_day, last_day = timezone.localdate(slots[0]), timezone.localdate(slots[-1])
+            base_scores = self.scorer.base_scores(
+                [ordinal_minute(slot) for slot in slots], first_day,
+                self.scorer.workload_vector(doctor_obj, self.workload, first_day, last_day),
+                self.scorer.hourly_table(doctor_obj, self.wait_times, self._default_wait_time)
+            )
 
-        # Return highest scoring slot
-        if scored_slots:
-            best_slot = max(scored_slots, key=lambda x: x[1])
-            return best_slot[0]
+            for component in self._split_components(appointments, positions, window):
+                assigned_slots.update(self._assign_component(
+                    appointments, component, slots, base_scores, window
+                ))
+
+        return assigned_slots
+
+    def _split_components(self, appointments: List[Dict], positions: List[int],
+                          window: timedelta) -> List[List[int]]:
+        """Split time-sorted requests into groups whose search windows never overlap."""
+        components = []
+        previous_day = None
+        for position in positions:
+            requested_day = timezone.localdate(appointments[position]['requested_time'])
+            if previous_day is None or requested_day - window > previous_day + window:
+                components.append([])
+            components[-1].append(position)
+            previous_day = requested_day
+        return components
+
+    def _assign_component(self, appointments: List[Dict], positions: List[int],
+                          slots: List[datetime], base_scores: Sequence[float],
+                          window: timedelta) -> Dict[int, datetime]:
+        """Build the cost matrix for one component and solve it."""
+        first_day = timezone.localdate(appointments[positions[0]]['requested_time']) - window
+        last_day = timezone.localdate(appointments[positions[-1]]['requested_time']) + window
+        columns = [
+            index for index, slot in enumerate(slots)
+            if first_day <= timezone.localdate(slot) <= last_day
+        ]
+        if not columns:
+            return {}
+
+        cost = []
+        for position in positions:
+            requested_time = appointments[position]['requested_time']
+            requested_day = timezone.localdate(requested_time)
+            row = []
+            for index in columns:
+                slot = slots[index]
+                if abs(timezone.localdate(slot) - requested_day) > window:
+                    row.append(UNAVAILABLE)
+                else:
+                    row.append(-(base_scores[index] + self._proximity_score(slot, requested_time)))
+            cost.append(row)
 
-        return None
+        return {
+            position: slots[columns[column]]
+            for position, column in zip(positions, solve_assignment(cost))
+            if column is not None
+        }
 
     def _score_slot(self, doctor: Doctor, slot: datetime,
                    requested_time: datetime, procedure: str) -> float:
@@ -421,49 +970,44 @@ class AdvancedSchedulingOptimizer(Scheduler):
         Score a time slot based on optimization criteria.
         Higher score = better slot.
         """
-        score = 100.0
+        return self._slot_base_score(doctor, slot) + self._proximity_score(slot, requested_time)
 
-        # Factor 1: Proximity to requested time (weight: 40%)
-        time_diff_hours = abs((slot - requested_time).total_seconds() / 3600)
-        proximity_score = max(0, 40 - (time_diff_hours * 5))
-        score += proximity_score
+    def _proximity_score(self, slot: datetime, requested_time: datetime) -> float:
+        """Factor 1: Proximity to requested time."""
+        return self.scorer.proximity(abs((slot - requested_time).total_seconds() / 60))
 
-        # Factor 2: Doctor workload on that day (weight: 30%)
-        day_appointments = Appointment.objects.filter(
-            doctor=doctor.name,
-            scheduled_at__date=slot.date(),
-            status__in=['pending', 'confirmed']
-        ).count()
-        
+    def _slot_base_score(self, doctor: Doctor, slot: datetime) -> float:
+        """
+        Score the request-independent factors of a single slot.
+        Same result as SlotScorer.base_scores, without building its tables.
+        """
+        weights = self.scorer.weights
+        score = BASE_SCORE
+
+        # Factor 2: Doctor workload on that day
+        day_appointments = self.workload.day_count(doctor, timezone.localdate(slot))
         workload_ratio = day_appointments / doctor.max_daily_appointments
-        workload_score = max(0, 30 - (workload_ratio * 30))
-        score += workload_score
-
-        # Factor 3: Time of day efficiency (weight: 20%)
-        # Morning slots generally have less wait time
-        hour = slot.hour
-        if 9 <= hour < 11:
-            score += 20  # Best time
-        elif 11 <= hour < 14:
-            score += 15  # Good time
-        elif 14 <= hour < 17:
-            score += 10  # Acceptable time
-        else:
-            score += 5   # Less optimal
+        score += max(0, weights['workload'] * (1 - workload_ratio))
+
+        # Factor 3: Time of day efficiency; morning slots generally have less wait time
+        score += weights['time_of_day'] * time_of_day_factor(timezone.localtime(slot).hour)
 
-        # Factor 4: Historical wait times (weight: 10%)
-        avg_wait = self._get_average_wait_time(doctor, slot.time())
-        if avg_wait < 15:
-            score += 10
-        elif avg_wait < 30:
-            score += 5
+        # Factor 4: Historical wait times
+        score += weights['wait_history'] * wait_history_factor(self._get_average_wait_time(doctor, slot))
 
         return score
 
     def _estimate_wait_reduction(self, doctor: str, optimized_time: datetime,
                                 original_time: datetime) -> int:
         """Estimate wait time reduction from optimization."""
-        # Simplified estimation - in production, use ML model
+        doctor_obj = self._resolve_doctor(doctor)
+        if doctor_obj:
+            original_wait = self.wait_times.average_wait(doctor_obj.id, original_time)
+            optimized_wait = self.wait_times.average_wait(doctor_obj.id, optimized_time)
+            if original_wait is not None and optimized_wait is not None:
+                return max(0, round(original_wait - optimized_wait))
+
+        # No history for these hours yet: fall back to the time-of-day heuristic
         hour_diff = abs((optimized_time - original_time).total_seconds() / 3600)
         
         # Morning slots typically have 30% less wait time
@@ -484,13 +1028,20 @@ class AdvancedSchedulingOptimizer(Scheduler):
         score = 0.5 - time_penalty + wait_benefit
         return max(0.0, min(1.0, score))
 
-    def _get_average_wait_time(self, doctor: Doctor, time_of_day: dt_time) -> int:
-        """Get historical average wait time for doctor at specific time."""
-        # Simplified - in production, query historical data
+    def _get_average_wait_time(self, doctor: Doctor, slot: datetime) -> float:
+        """Get historical average wait time for doctor at the slot's weekday and hour."""
+        average = self.wait_times.average_wait(doctor.id, slot)
+        if average is not None:
+            return average
+
+        return self._default_wait_time(timezone.localtime(slot).hour)
+
+    def _default_wait_time(self, hour: int) -> int:
+        """Wait time assumed for hours without enough history."""
         # Morning: 10-15 min, Afternoon: 20-30 min
-        if time_of_day.hour < 12:
+        if hour < 12:
             return 12
-        elif time_of_day.hour < 17:
+        elif hour < 17:
             return 25
         else:
             return 20
@@ -574,36 +1125,13 @@ class AdvancedSchedulingOptimizer(Scheduler):
 
     def process_waitlist_notifications(self) -> int:
         """
-        Process waitlist and notify patients when slots become available.
-        
+        Reconcile the waitlist against current availability.
+
+        Freed slots are matched to waitlist entries as they are released
+        (see WaitlistMatcher); this pass catches anything the event-driven
+        path missed and walks the waitlist in chunks.
+
         Returns:
             Number of notifications sent
         """
-        notifications_sent = 0
-
-        # Get active waitlist entries
-        waitlist_entries = AppointmentWaitlist.objects.filter(
-            status='waiting'
-        ).order_by('-priority_score', 'created_at')
-
-        for entry in waitlist_entries:
-            # Check if slot is now available
-            available_slots = self.find_available_slots(
-                str(entry.doctor.id),  # Pass doctor ID as string
-                (
-                    timezone.make_aware(datetime.combine(entry.preferred_date, entry.preferred_time_start)),
-                    timezone.make_aware(datetime.combine(entry.preferred_date, entry.preferred_time_end))
-                )
-            )
-
-            if available_slots:
-                # Notify patient
-                entry.status = 'notified'
-                entry.notified_at = timezone.now()
-                entry.expires_at = timezone.now() + timedelta(hours=24)
-                entry.save()
-
-                notifications_sent += 1
-                logger.info(f"Notified patient {entry.patient.id} about available slot")
-
-        return notifications_sent
\ No newline at end of file
+        return WaitlistMatcher(booking_index=self.booking_index).reconcile()
\ No newline at end of file
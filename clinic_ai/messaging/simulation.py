@@ -0,0 +1,601 @@
+"""
+Discrete-event clinic simulation for capacity planning.
+Replays a stream of booking requests through AdvancedSchedulingOptimizer
+with the database and shared cache swapped out for in-memory indexes, then
+reports utilization, wait-time and waitlist metrics. Parameter sweeps run
+one simulation per worker process.
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import os
+import random
+import sys
+import time as timer
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.utils import timezone
+
+from ..core.models import Appointment, Doctor
+from .availability import AvailabilityEngine
+from .availability_exceptions import ExceptionIndex
+from .booking_index import MINUTES_PER_DAY, BookingIndex, DayBookings, slot_datetime
+from .scheduling_optimizer import AdvancedSchedulingOptimizer
+from .slot_scoring import SlotScorer, ordinal_minute
+from .wait_times import HOURS_PER_WEEK, WaitTimeModel
+from .workload import WorkloadService
+
+logger = logging.getLogger(__name__)
+
+# (arrival, doctor position, requested start, urgent, returning patient);
+# times are local ordinal minutes (see slot_scoring.ordinal_minute)
+Request = Tuple[int, int, int, bool, bool]
+
+DEFAULT_SIMULATION_CONFIG = {
+    'doctors': 30,
+    'days': 365,
+    'start_date': None,              # ISO date; defaults to the next Monday
+    'slot_minutes': 30,
+    'windows': [(9 * 60, 12 * 60), (13 * 60, 17 * 60)],  # Weekday hours, minutes of day
+    'working_weekdays': [0, 1, 2, 3, 4],
+    'closed_dates': [],              # ISO dates the whole clinic is closed
+    'load': 0.9,                     # Requests per day as a share of slot capacity
+    'max_lead_days': 21,             # Requested times fall 1..max_lead_days ahead
+    'cancel_rate': 0.08,
+    'no_show_rate': 0.05,
+    'urgent_rate': 0.05,
+    'returning_rate': 0.4,
+    'service_variation': 0.25,       # Std dev of visit length / slot length
+    'check_in_minutes': 5,           # Wait every patient has at reception
+    'optimization_weight': 0.7,      # Share of patients taking the optimizer's slot
+    'search_days': 2,                # Days either side of the requested day searched
+    'waitlist_rule': 'fifo',         # See WAITLIST_RULES
+    'waitlist_days': 14,             # Days a waitlist entry stays open
+    'scoring_weights': None,
+    'seed': 0,
+}
+
+# Waitlist order for a freed slot: lowest key first
+WAITLIST_RULES = {
+    'fifo': lambda entry: (entry[0],),
+    # Same weights as AdvancedSchedulingOptimizer._calculate_waitlist_priority
+    'priority': lambda entry: (-(50 + 20 * entry[3] + 30 * entry[2]), entry[0]),
+    'urgent_first': lambda entry: (not entry[2], entry[0]),
+}
+
+REQUEST, CANCEL, VISIT, ROLLUP = 0, 1, 2, 3
+
+
+def minute_datetime(minute: int) -> datetime:
+    """Aware datetime of a local ordinal minute."""
+    return slot_datetime(date.fromordinal(minute // MINUTES_PER_DAY), minute % MINUTES_PER_DAY)
+
+
+class InMemoryBookingIndex(BookingIndex):
+    """Booking index that lives in process memory only; never evicts or revalidates."""
+
+    def __init__(self, doctors: List[Doctor]):
+        super().__init__(max_buckets=sys.maxsize)
+        self._slot_minutes = {
+            doctor.id: int(doctor.average_appointment_duration.total_seconds() // 60)
+            for doctor in doctors
+        }
+        self._empty = DayBookings()
+
+    def slot_minutes(self, doctor_id: int) -> Optional[int]:
+        return self._slot_minutes.get(doctor_id)
+
+    def prime_many(self, doctors: List[Doctor], start_date: date, end_date: date) -> None:
+        return None
+
+    def refresh(self, doctor: Doctor, start_date: date, end_date: date) -> None:
+        return None
+
+    def bucket(self, doctor: Doctor, day: date) -> DayBookings:
+        bucket = self._buckets.get((doctor.id, day))
+        return self._empty if bucket is None else bucket
+
+    def _update(self, doctor_id: int, day: date, change) -> None:
+        bucket = self._buckets.get((doctor_id, day))
+        if bucket is None:
+            bucket = self._buckets[(doctor_id, day)] = DayBookings()
+        change(bucket)
+
+
+class InMemoryClosures(ExceptionIndex):
+    """Clinic-wide closed days, with no cache or database behind them."""
+
+    def __init__(self, closed_dates: Iterable[date]):
+        super().__init__()
+        self.closed_dates = set(closed_dates)
+
+    def prime(self, doctor_ids: List[int], start_date: date, end_date: date) -> None:
+        return None
+
+    def blocked_intervals(self, doctor_id: int, day: date) -> List[Tuple[int, int]]:
+        return [(0, MINUTES_PER_DAY)] if day in self.closed_dates else []
+
+
+class SimulatedWaitTimes(WaitTimeModel):
+    """
+    Wait-time model fed by simulated visits.
+    Visits accumulate per doctor and cell; publish() turns them into the
+    averages the scorer reads, like the nightly rollup does in production.
+    """
+
+    def __init__(self, min_visits: int = 5):
+        super().__init__(min_visits)
+        self._sums: Dict[int, array] = {}
+        self._counts: Dict[int, array] = {}
+        self._version = 0
+
+    def _refresh(self) -> None:
+        return None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def record(self, doctor_id: int, cell: int, wait: float) -> None:
+        """Fold one visit's wait into its doctor's weekday x hour cell."""
+        if doctor_id not in self._sums:
+            self._sums[doctor_id] = array('d', [0.0]) * HOURS_PER_WEEK
+            self._counts[doctor_id] = array('I', [0]) * HOURS_PER_WEEK
+        self._sums[doctor_id][cell] += wait
+        self._counts[doctor_id][cell] += 1
+
+    def publish(self) -> None:
+        averages = {}
+        clinic_sums = array('d', [0.0]) * HOURS_PER_WEEK
+        clinic_counts = array('I', [0]) * HOURS_PER_WEEK
+        for doctor_id, sums in self._sums.items():
+            counts = self._counts[doctor_id]
+            table = array('d', [math.nan]) * HOURS_PER_WEEK
+            for index in range(HOURS_PER_WEEK):
+                clinic_sums[index] += sums[index]
+                clinic_counts[index] += counts[index]
+                if counts[index] >= self.min_visits:
+                    table[index] = sums[index] / counts[index]
+            averages[doctor_id] = table
+
+        clinic = array('d', [math.nan]) * HOURS_PER_WEEK
+        for index in range(HOURS_PER_WEEK):
+            if clinic_counts[index] >= self.min_visits:
+                clinic[index] = clinic_sums[index] / clinic_counts[index]
+        self._averages, self._clinic = averages, clinic
+        self._version += 1
+
+
+class SimulatedAvailabilityEngine(AvailabilityEngine):
+    """Availability engine reading the weekly windows from the simulated clinic."""
+
+    def __init__(self, doctor: Doctor, booking_index: BookingIndex,
+                 exception_index: ExceptionIndex, windows: Dict[int, List[Tuple[int, int]]]):
+        super().__init__(doctor, booking_index, exception_index=exception_index)
+        self._template = windows
+
+    def load(self, start_date: date, end_date: date) -> None:
+        self._windows = self._template
+        self.load_bookings(start_date, end_date)
+
+
+class SimulatedSlotScorer(SlotScorer):
+    """Slot scorer that rebuilds a doctor's hourly table only after a rollup."""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        super().__init__(weights)
+        self._hourly: Dict[int, Tuple[int, array]] = {}
+
+    def hourly_table(self, doctor: Doctor, wait_times: SimulatedWaitTimes, default_wait) -> array:
+        cached = self._hourly.get(doctor.id)
+        if cached is None or cached[0] != wait_times.version:
+            cached = (wait_times.version, super().hourly_table(doctor, wait_times, default_wait))
+            self._hourly[doctor.id] = cached
+        return cached[1]
+
+
+class SimulatedWorkload(WorkloadService):
+    """Workload counts that always come from the in-memory booking index."""
+
+    def in_hot_window(self, start_date: date, end_date: date) -> bool:
+        return True
+
+
+class SimulatedSchedulingOptimizer(AdvancedSchedulingOptimizer):
+    """AdvancedSchedulingOptimizer running against the simulated clinic."""
+
+    def __init__(self, doctors: List[Doctor], windows: Dict[int, List[Tuple[int, int]]],
+                 closures: InMemoryClosures, optimization_weight: float = 0.7,
+                 scoring_weights: Optional[Dict[str, float]] = None):
+        booking_index = InMemoryBookingIndex(doctors)
+        super().__init__(
+            optimization_weight, booking_index=booking_index,
+            wait_times=SimulatedWaitTimes(), scoring_weights=scoring_weights
+        )
+        self.scorer = SimulatedSlotScorer(scoring_weights)
+        self.workload = SimulatedWorkload(booking_index)
+        self.doctors = {doctor.id: doctor for doctor in doctors}
+        self.windows = windows
+        self.closures = closures
+
+    def _resolve_doctor(self, doctor) -> Optional[Doctor]:
+        if isinstance(doctor, Doctor):
+            return doctor
+        return self.doctors.get(int(doctor)) if str(doctor).isdigit() else None
+
+    def _availability_engine(self, doctor: Doctor,
+                             resource_ids: Optional[List[int]] = None) -> AvailabilityEngine:
+        return SimulatedAvailabilityEngine(doctor, self.booking_index, self.closures, self.windows)
+
+
+class SimulatedBooking:
+    """Appointment stand-in with the attributes the booking index reads."""
+
+    __slots__ = ('id', 'assigned_doctor_id', 'scheduled_at', 'duration', 'status',
+                 'start', 'length', 'no_show')
+
+    def __init__(self, booking_id: int, doctor_id: int, start: int, length: int):
+        self.id = booking_id
+        self.assigned_doctor_id = doctor_id
+        self.start = start
+        self.length = length
+        self.scheduled_at = minute_datetime(start)
+        self.duration = timedelta(minutes=length)
+        self.status = 'confirmed'
+
+
+def resolve_config(config: Optional[Dict] = None) -> Dict:
+    """Defaults merged with overrides; start_date becomes a date."""
+    resolved = dict(DEFAULT_SIMULATION_CONFIG)
+    resolved.update(config or {})
+    start = resolved['start_date']
+    if start is None:
+        today = timezone.localdate()
+        start = today + timedelta(days=7 - today.weekday())
+    elif isinstance(start, str):
+        start = date.fromisoformat(start)
+    resolved['start_date'] = start
+    if resolved['waitlist_rule'] not in WAITLIST_RULES:
+        raise ValueError(f"Unknown waitlist rule: {resolved['waitlist_rule']}")
+    return resolved
+
+
+def synthetic_requests(config: Dict) -> List[Request]:
+    """
+    Generate a request stream for a resolved config.
+
+    Requests arrive from max_lead_days before the start date, so the
+    calendar is already filled when measurement begins. Daily volume is
+    `load` times the clinic's average slot capacity per calendar day.
+    """
+    rng = random.Random(config['seed'])
+    slot = config['slot_minutes']
+    day_slots = sum((end - start) // slot for start, end in config['windows'])
+    weekly_slots = day_slots * len(config['working_weekdays'])
+    per_day = config['load'] * config['doctors'] * weekly_slots / 7
+
+    first_ordinal = config['start_date'].toordinal() - config['max_lead_days']
+    last_ordinal = config['start_date'].toordinal() + config['days']
+    day_start = min(start for start, _ in config['windows'])
+    day_end = max(end for _, end in config['windows'])
+    starts_per_day = (day_end - day_start) // slot
+
+    requests = []
+    for ordinal in range(first_ordinal, last_ordinal):
+        count = max(0, round(rng.gauss(per_day, math.sqrt(per_day))))
+        for _ in range(count):
+            arrival = ordinal * MINUTES_PER_DAY + rng.randrange(8 * 60, 20 * 60)
+            requested_ordinal = ordinal + rng.randint(1, config['max_lead_days'])
+            requested = (requested_ordinal * MINUTES_PER_DAY + day_start
+                         + rng.randrange(starts_per_day) * slot)
+            requests.append((
+                arrival, rng.randrange(config['doctors']), requested,
+                rng.random() < config['urgent_rate'], rng.random() < config['returning_rate']
+            ))
+    requests.sort()
+    return requests
+
+
+def historical_requests(start: datetime, end: datetime) -> Tuple[List[Request], int]:
+    """
+    Anonymized request stream from booked appointments.
+
+    Only the booking time, requested start and a doctor position are kept.
+
+    Returns:
+        (requests, number of doctors) for run_simulation's `requests` option
+    """
+    positions: Dict[int, int] = {}
+    requests = []
+    for doctor_id, created_at, scheduled_at, procedure in Appointment.objects.filter(
+        scheduled_at__gte=start, scheduled_at__lt=end, assigned_doctor__isnull=False
+    ).values_list('assigned_doctor_id', 'created_at', 'scheduled_at', 'procedure').order_by('created_at'):
+        position = positions.setdefault(doctor_id, len(positions))
+        requests.append((
+            ordinal_minute(min(created_at, scheduled_at)), position, ordinal_minute(scheduled_at),
+            'urgent' in (procedure or '').lower(), False
+        ))
+    return requests, len(positions)
+
+
+class ClinicSimulation:
+    """
+    One simulated clinic replaying a request stream as discrete events.
+
+    Events are processed in time order from a heap: booking requests,
+    cancellations (whose freed slots are offered to the waitlist), visits
+    (where waits are drawn from a running per-doctor delay) and a nightly
+    wait-time rollup that feeds back into slot scoring.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Initialize simulation.
+
+        Args:
+            config: Overrides for DEFAULT_SIMULATION_CONFIG
+        """
+        self.config = resolve_config(config)
+        config = self.config
+        self.rng = random.Random(config['seed'] + 1)
+        self.doctors = [
+            Doctor(
+                id=position + 1, name=f'Simulated doctor {position + 1}',
+                specialization='Simulation', max_daily_appointments=sum(
+                    (end - start) // config['slot_minutes'] for start, end in config['windows']
+                ),
+                average_appointment_duration=timedelta(minutes=config['slot_minutes'])
+            )
+            for position in range(config['doctors'])
+        ]
+        windows = {weekday: list(config['windows']) for weekday in config['working_weekdays']}
+        closed = [date.fromisoformat(day) if isinstance(day, str) else day
+                  for day in config['closed_dates']]
+        self.closures = InMemoryClosures(closed)
+        self.optimizer = SimulatedSchedulingOptimizer(
+            self.doctors, windows, self.closures,
+            config['optimization_weight'], config['scoring_weights']
+        )
+        self.window = config['search_days']
+        self.start = config['start_date'].toordinal() * MINUTES_PER_DAY
+        self.end = self.start + config['days'] * MINUTES_PER_DAY
+        self.waitlist_key = WAITLIST_RULES[config['waitlist_rule']]
+
+        self._events: List[Tuple[int, int, int, Any]] = []
+        self._sequence = itertools.count()
+        self._booking_ids = itertools.count(1)
+        # Waitlist entries per doctor: [arrival, requested, urgent, returning, expires]
+        self._waitlists: Dict[int, List[List]] = {doctor.id: [] for doctor in self.doctors}
+        # Per doctor: (day ordinal, minute the doctor is free again)
+        self._doctor_free_at: Dict[int, Tuple[int, float]] = {}
+        self._waits: List[float] = []
+        self.stats = {
+            'requests': 0, 'booked': 0, 'optimizer_picks': 0, 'waitlisted': 0,
+            'waitlist_filled': 0, 'cancelled': 0, 'visits': 0, 'no_shows': 0,
+            'displacement_minutes': 0, 'visit_minutes': 0,
+        }
+
+    def _push(self, minute: int, kind: int, payload: Any = None) -> None:
+        heapq.heappush(self._events, (minute, kind, next(self._sequence), payload))
+
+    def run(self, requests: Optional[List[Request]] = None) -> Dict:
+        """
+        Replay a request stream (synthetic by default) and return the metrics.
+        """
+        started = timer.perf_counter()
+        if requests is None:
+            requests = synthetic_requests(self.config)
+        for request in requests:
+            self._push(request[0], REQUEST, request)
+        first_day = min(self.start, requests[0][0] if requests else self.start) // MINUTES_PER_DAY
+        for ordinal in range(first_day, self.end // MINUTES_PER_DAY):
+            self._push(ordinal * MINUTES_PER_DAY + 2 * 60, ROLLUP)
+
+        handlers = {
+            REQUEST: self._request, CANCEL: self._cancel, VISIT: self._visit, ROLLUP: self._rollup
+        }
+        while self._events:
+            minute, kind, _, payload = heapq.heappop(self._events)
+            if minute >= self.end:
+                break
+            handlers[kind](minute, payload)
+
+        metrics = self.metrics()
+        metrics['runtime_seconds'] = round(timer.perf_counter() - started, 3)
+        return metrics
+
+    def _request(self, now: int, request: Request) -> None:
+        _, position, requested, urgent, returning = request
+        if not 0 <= position < len(self.doctors):
+            return
+        doctor = self.doctors[position]
+        self.stats['requests'] += 1
+
+        start = self._choose_slot(doctor, now, requested)
+        if start is None:
+            self.stats['waitlisted'] += 1
+            self._waitlists[doctor.id].append([
+                now, requested, urgent, returning,
+                now + self.config['waitlist_days'] * MINUTES_PER_DAY
+            ])
+            return
+        self._book(doctor, now, start, requested)
+
+    def _choose_slot(self, doctor: Doctor, now: int, requested: int) -> Optional[int]:
+        """
+        Free start near the requested time: the optimizer's pick for a share
+        of patients (optimization_weight), the nearest free slot otherwise.
+        """
+        requested_day = requested // MINUTES_PER_DAY
+        first_day = date.fromordinal(max(requested_day - self.window, now // MINUTES_PER_DAY))
+        last_day = date.fromordinal(requested_day + self.window)
+        if last_day < first_day:
+            return None
+
+        engine = self.optimizer._availability_engine(doctor)
+        engine.load(first_day, last_day)
+        candidates = []
+        day = first_day
+        while day <= last_day:
+            base = day.toordinal() * MINUTES_PER_DAY
+            candidates.extend(
+                base + minute for minute in engine.day_free_minutes(day) if base + minute > now
+            )
+            day += timedelta(days=1)
+        if not candidates:
+            return None
+
+        if self.rng.random() < self.optimizer.optimization_weight:
+            ranked = self.optimizer._rank_slots(
+                doctor, candidates, first_day, last_day, minute_datetime(requested)
+            )
+            self.stats['optimizer_picks'] += 1
+            return ordinal_minute(ranked[0][1])
+        return min(candidates, key=lambda minute: (abs(minute - requested), minute))
+
+    def _book(self, doctor: Doctor, now: int, start: int, requested: int) -> None:
+        config = self.config
+        booking = SimulatedBooking(next(self._booking_ids), doctor.id, start, config['slot_minutes'])
+        self.optimizer.booking_index.apply(booking)
+        self.stats['booked'] += 1
+        self.stats['displacement_minutes'] += abs(start - requested)
+
+        if self.rng.random() < config['cancel_rate']:
+            self._push(self.rng.randint(now, start - 1), CANCEL, booking)
+        else:
+            booking.no_show = self.rng.random() < config['no_show_rate']
+            self._push(start, VISIT, booking)
+
+    def _cancel(self, now: int, booking: SimulatedBooking) -> None:
+        booking.status = 'cancelled'
+        self.optimizer.booking_index.discard(booking)
+        self.stats['cancelled'] += 1
+        self._offer_to_waitlist(now, booking)
+
+    def _offer_to_waitlist(self, now: int, booking: SimulatedBooking) -> None:
+        """Give a freed slot to the first open waitlist entry it suits."""
+        if booking.start <= now + 60:
+            return
+        entries = self._waitlists[booking.assigned_doctor_id]
+        entries[:] = [entry for entry in entries if entry[4] > now]
+        slot_day = booking.start // MINUTES_PER_DAY
+        for entry in sorted(entries, key=self.waitlist_key):
+            if abs(slot_day - entry[1] // MINUTES_PER_DAY) <= self.window:
+                entries.remove(entry)
+                self.stats['waitlist_filled'] += 1
+                self._book(self.optimizer.doctors[booking.assigned_doctor_id], now, booking.start, entry[1])
+                return
+
+    def _visit(self, now: int, booking: SimulatedBooking) -> None:
+        if booking.no_show:
+            self.stats['no_shows'] += 1
+            return
+        config = self.config
+        day = now // MINUTES_PER_DAY
+        free_day, free_at = self._doctor_free_at.get(booking.assigned_doctor_id, (None, 0.0))
+        service_start = max(float(now), free_at if free_day == day else 0.0)
+        service = booking.length * max(0.3, self.rng.gauss(1.0, config['service_variation']))
+        self._doctor_free_at[booking.assigned_doctor_id] = (day, service_start + service)
+
+        wait = service_start - now + config['check_in_minutes']
+        # date.fromordinal(1) is a Monday, so (day - 1) % 7 is the weekday
+        cell = ((day - 1) % 7) * 24 + (now % MINUTES_PER_DAY) // 60
+        self.optimizer.wait_times.record(booking.assigned_doctor_id, cell, wait)
+        if now >= self.start:
+            self._waits.append(wait)
+            self.stats['visits'] += 1
+            self.stats['visit_minutes'] += booking.length
+
+    def _rollup(self, now: int, payload: Any) -> None:
+        self.optimizer.wait_times.publish()
+
+    def capacity_minutes(self) -> int:
+        """Doctor minutes inside availability windows over the measured days."""
+        windows = self.config['windows']
+        per_day = sum(end - start for start, end in windows)
+        total = 0
+        for ordinal in range(self.start // MINUTES_PER_DAY, self.end // MINUTES_PER_DAY):
+            day = date.fromordinal(ordinal)
+            if day.weekday() in self.config['working_weekdays'] and day not in self.closures.closed_dates:
+                total += per_day
+        return total * len(self.doctors)
+
+    def metrics(self) -> Dict:
+        """Utilization, wait-time and waitlist metrics of the run so far."""
+        stats = self.stats
+        waits = sorted(self._waits)
+        capacity = self.capacity_minutes()
+        return {
+            'requests': stats['requests'],
+            'booked': stats['booked'],
+            'cancelled': stats['cancelled'],
+            'visits': stats['visits'],
+            'no_shows': stats['no_shows'],
+            'utilization': round(stats['visit_minutes'] / capacity, 4) if capacity else 0.0,
+            'average_wait_minutes': round(sum(waits) / len(waits), 2) if waits else 0.0,
+            'p90_wait_minutes': round(waits[int(0.9 * (len(waits) - 1))], 2) if waits else 0.0,
+            'average_displacement_minutes': (
+                round(stats['displacement_minutes'] / stats['booked'], 1) if stats['booked'] else 0.0
+            ),
+            'optimizer_share': (
+                round(stats['optimizer_picks'] / stats['booked'], 3) if stats['booked'] else 0.0
+            ),
+            'waitlisted': stats['waitlisted'],
+            'waitlist_filled': stats['waitlist_filled'],
+            'waitlist_fill_rate': (
+                round(stats['waitlist_filled'] / stats['waitlisted'], 4) if stats['waitlisted'] else 0.0
+            ),
+        }
+
+
+def run_simulation(config: Optional[Dict] = None, requests: Optional[List[Request]] = None) -> Dict:
+    """Run one simulation; module-level so worker processes can call it."""
+    return ClinicSimulation(config).run(requests)
+
+
+def _init_worker() -> None:
+    """Make sure Django is configured in spawned worker processes."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        django.setup()
+
+
+def run_sweep(grid: Dict[str, List], base_config: Optional[Dict] = None,
+              processes: Optional[int] = None) -> List[Dict]:
+    """
+    Run a simulation for every combination of parameter values.
+
+    Args:
+        grid: Parameter name -> values to try, e.g.
+            {'optimization_weight': [0.3, 0.7], 'waitlist_rule': ['fifo', 'priority']}
+        base_config: Settings shared by every run
+        processes: Worker processes (defaults to the CPU count; 1 runs inline)
+
+    Returns:
+        One dict per combination with its 'params' and 'metrics'
+    """
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    configs = [dict(base_config or {}, **params) for params in combinations]
+    for config in configs:
+        resolve_config(config)
+
+    if processes == 1 or len(configs) == 1:
+        results = [run_simulation(config) for config in configs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+            results = list(pool.map(run_simulation, configs))
+
+    logger.info(f"Simulation sweep finished: {len(configs)} runs")
+    return [
+        {'params': params, 'metrics': metrics}
+        for params, metrics in zip(combinations, results)
+    ]
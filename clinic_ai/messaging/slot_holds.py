@@ -0,0 +1,128 @@
+"""
+Short-lived slot holds for the booking flow.
+A hold reserves a doctor's interval in the shared cache while the patient
+confirms, so concurrent requests from any worker back off without touching
+the database. Holds are taken per 5 minute bucket with an atomic add and
+expire on their own when a patient abandons the flow.
+"""
+
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .booking_index import duration_minutes
+from .resource_index import bucket_range, usage_segments
+
+logger = logging.getLogger(__name__)
+
+
+class SlotHoldManager:
+    """
+    Takes, checks and releases slot holds.
+
+    Each hold owns one cache key per (doctor, day, bucket) it covers plus a
+    record keyed by its token. Overlapping holds always share at least one
+    bucket key, so at most one of them can be taken.
+    """
+
+    KEY_PREFIX = 'slot_hold'
+
+    def __init__(self, ttl: Optional[timedelta] = None):
+        """
+        Initialize manager.
+
+        Args:
+            ttl: Hold lifetime (defaults to CLINIC_AI['SLOT_HOLD_TTL'] seconds)
+        """
+        if ttl is None:
+            ttl = timedelta(seconds=settings.CLINIC_AI.get('SLOT_HOLD_TTL', 300))
+        self.ttl = ttl
+
+    def _bucket_keys(self, doctor_id: int, start: datetime, duration: timedelta) -> List[str]:
+        keys = []
+        for day, start_minute, end_minute in usage_segments(start, duration_minutes(duration)):
+            lo, hi = bucket_range(start_minute, end_minute)
+            keys.extend(
+                f"{self.KEY_PREFIX}:{doctor_id}:{day.isoformat()}:{bucket}"
+                for bucket in range(lo, hi)
+            )
+        return keys
+
+    def _hold_key(self, token: str) -> str:
+        return f"{self.KEY_PREFIX}:token:{token}"
+
+    def acquire(self, doctor_id: int, start: datetime, duration: timedelta,
+                patient_id: Optional[int] = None,
+                procedure: Optional[str] = None) -> Optional[Dict]:
+        """
+        Hold [start, start + duration) for a doctor.
+
+        Args:
+            doctor_id: Doctor to hold the interval for
+            start: Interval start
+            duration: Interval length
+            patient_id: Patient the hold is taken for
+            procedure: Procedure to be booked, as passed to create_appointment
+
+        Returns:
+            Hold record, or None when part of the interval is already held
+        """
+        token = uuid.uuid4().hex
+        timeout = int(self.ttl.total_seconds())
+        keys = self._bucket_keys(doctor_id, start, duration)
+        taken = []
+        try:
+            for key in keys:
+                if not cache.add(key, token, timeout=timeout):
+                    cache.delete_many(taken)
+                    return None
+                taken.append(key)
+        except Exception as e:
+            # The booking lock still prevents double booking without holds
+            logger.warning(f"Slot hold unavailable for doctor {doctor_id} at {start}: {e}")
+            keys = taken
+
+        hold = {
+            'token': token,
+            'doctor_id': doctor_id,
+            'patient_id': patient_id,
+            'procedure': procedure,
+            'scheduled_at': start,
+            'duration': duration,
+            'expires_at': timezone.now() + self.ttl,
+            'keys': keys,
+        }
+        try:
+            cache.set(self._hold_key(token), hold, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Slot hold record write failed for {token}: {e}")
+        return hold
+
+    def get(self, token: str) -> Optional[Dict]:
+        """Return a live hold by token."""
+        try:
+            return cache.get(self._hold_key(token))
+        except Exception as e:
+            logger.warning(f"Slot hold lookup failed for {token}: {e}")
+            return None
+
+    def is_held(self, doctor_id: int, start: datetime, duration: timedelta) -> bool:
+        """Check whether any part of the interval is currently held."""
+        try:
+            return bool(cache.get_many(self._bucket_keys(doctor_id, start, duration)))
+        except Exception as e:
+            logger.warning(f"Slot hold check failed for doctor {doctor_id} at {start}: {e}")
+            return False
+
+    def release(self, hold: Dict) -> None:
+        """Release a hold, leaving buckets since re-taken by another hold alone."""
+        try:
+            owners = cache.get_many(hold['keys'])
+            cache.delete_many([key for key, owner in owners.items() if owner == hold['token']])
+            cache.delete(self._hold_key(hold['token']))
+        except Exception as e:
+            logger.warning(f"Slot hold release failed for {hold['token']}: {e}")
@@ -0,0 +1,162 @@
+"""
+Batched slot scoring for the scheduling optimizer.
+Candidates are plain integers (minutes since 0001-01-01 local time) and every
+factor that does not depend on the requested time is precomputed into small
+tables per day and per weekday hour, so scoring is one pass of table lookups
+and arithmetic over the whole candidate list.
+"""
+
+import heapq
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.utils import timezone
+
+from ..core.models import Doctor
+from .booking_index import MINUTES_PER_DAY
+from .wait_times import HOURS_PER_WEEK, WaitTimeModel
+from .workload import WorkloadService
+
+BASE_SCORE = 100.0
+
+# Maximum points per factor; override with CLINIC_AI['SCHEDULING_WEIGHTS']
+DEFAULT_SCORING_WEIGHTS = {
+    'proximity': 40.0,     # Closeness to the requested time, 0 after 8 hours
+    'workload': 30.0,      # Spare capacity on the doctor's day
+    'time_of_day': 20.0,   # Morning slots run with less waiting
+    'wait_history': 10.0,  # Historical wait at that weekday and hour
+}
+
+# Hours the proximity score takes to fall to zero
+PROXIMITY_HORIZON_HOURS = 8
+
+
+def ordinal_minute(moment: datetime) -> int:
+    """Local wall-clock minutes since 0001-01-01 for a datetime."""
+    local = timezone.localtime(moment)
+    return local.toordinal() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def day_minute(day: date, minute: int) -> int:
+    """Ordinal minute of a minute of day."""
+    return day.toordinal() * MINUTES_PER_DAY + minute
+
+
+def time_of_day_factor(hour: int) -> float:
+    """Share of the time-of-day weight earned by a slot starting at `hour`."""
+    if 9 <= hour < 11:
+        return 1.0   # Best time
+    if 11 <= hour < 14:
+        return 0.75  # Good time
+    if 14 <= hour < 17:
+        return 0.5   # Acceptable time
+    return 0.25      # Less optimal
+
+
+def wait_history_factor(average_wait: float) -> float:
+    """Share of the wait-history weight earned for an average wait."""
+    if average_wait < 15:
+        return 1.0
+    if average_wait < 30:
+        return 0.5
+    return 0.0
+
+
+class SlotScorer:
+    """
+    Scores candidate slots for one doctor in a single pass.
+
+    score = BASE_SCORE + workload[day] + hourly[weekday hour] + proximity,
+    with workload and hourly tables built once per search.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """
+        Initialize scorer.
+
+        Args:
+            weights: Maximum points per factor, merged over the clinic's
+                CLINIC_AI['SCHEDULING_WEIGHTS'] and the defaults
+        """
+        self.weights = dict(DEFAULT_SCORING_WEIGHTS)
+        self.weights.update(settings.CLINIC_AI.get('SCHEDULING_WEIGHTS', {}))
+        self.weights.update(weights or {})
+        self.proximity_per_minute = self.weights['proximity'] / (PROXIMITY_HORIZON_HOURS * 60)
+        self.max_base_score = (
+            BASE_SCORE + self.weights['workload'] + self.weights['time_of_day']
+            + self.weights['wait_history']
+        )
+
+    def hourly_table(self, doctor: Doctor, wait_times: WaitTimeModel,
+                     default_wait) -> array:
+        """
+        Time-of-day plus wait-history points per weekday hour.
+
+        Args:
+            doctor: Doctor whose history is used
+            wait_times: Historical wait-time model
+            default_wait: Callable(hour) giving the wait to assume without history
+        """
+        table = array('d', [0.0]) * HOURS_PER_WEEK
+        for index in range(HOURS_PER_WEEK):
+            hour = index % 24
+            average = wait_times.cell_average(doctor.id, index)
+            if average is None:
+                average = default_wait(hour)
+            table[index] = (
+                self.weights['time_of_day'] * time_of_day_factor(hour)
+                + self.weights['wait_history'] * wait_history_factor(average)
+            )
+        return table
+
+    def workload_vector(self, doctor: Doctor, workload: WorkloadService,
+                        first_day: date, last_day: date) -> array:
+        """Workload points per day from first_day to last_day."""
+        days = (last_day - first_day).days + 1
+        vector = array('d', [0.0]) * max(days, 0)
+        if days <= 0:
+            return vector
+        counts = workload.daily_counts(doctor, first_day, last_day)
+        for offset in range(days):
+            ratio = counts[first_day + timedelta(days=offset)] / doctor.max_daily_appointments
+            vector[offset] = max(0.0, self.weights['workload'] * (1 - ratio))
+        return vector
+
+    def base_scores(self, candidates: Sequence[int], first_day: date,
+                    workload: array, hourly: array) -> array:
+        """Request-independent score of every candidate."""
+        first_ordinal = first_day.toordinal()
+        scores = array('d', [0.0]) * len(candidates)
+        for position, minute in enumerate(candidates):
+            ordinal = minute // MINUTES_PER_DAY
+            # date.fromordinal(1) is a Monday, so (ordinal - 1) % 7 is the weekday
+            cell = ((ordinal - 1) % 7) * 24 + (minute - ordinal * MINUTES_PER_DAY) // 60
+            scores[position] = BASE_SCORE + workload[ordinal - first_ordinal] + hourly[cell]
+        return scores
+
+    def proximity(self, minutes_away: int) -> float:
+        """Proximity points for a slot `minutes_away` from the requested time."""
+        return max(0.0, self.weights['proximity'] - minutes_away * self.proximity_per_minute)
+
+    def top_k(self, candidates: Sequence[int], base_scores: array, requested: int,
+              k: int = 1) -> List[Tuple[float, int]]:
+        """
+        Best k candidates for a requested ordinal minute.
+
+        Returns:
+            (score, ordinal minute) pairs, best first; ties go to the slot
+            nearest the requested time, then the earlier one
+        """
+        full = self.weights['proximity']
+        per_minute = self.proximity_per_minute
+        scored = []
+        for position, minute in enumerate(candidates):
+            distance = abs(minute - requested)
+            proximity = full - distance * per_minute
+            score = base_scores[position] + (proximity if proximity > 0 else 0.0)
+            scored.append((score, -distance, -minute))
+        return [
+            (score, -negative_minute)
+            for score, _, negative_minute in heapq.nlargest(k, scored)
+        ]
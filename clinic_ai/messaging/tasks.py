@@ -0,0 +1,97 @@
+"""Celery tasks for the messaging and scheduling services."""
+
+from celery import shared_task
+
+
+@shared_task
+def reconcile_waitlist(chunk_size: int = 500) -> int:
+    """
+    Periodic reconciliation of the appointment waitlist.
+
+    Freed slots are matched as they happen; this pass only picks up what
+    event-driven matching missed.
+
+    Args:
+        chunk_size: Number of waitlist rows fetched per round trip
+
+    Returns:
+        Number of waitlist entries notified
+    """
+    from .waitlist_matcher import WaitlistMatcher
+
+    return WaitlistMatcher().reconcile(chunk_size=chunk_size)
+
+
+@shared_task
+def rollup_wait_times(full: bool = False) -> int:
+    """
+    Nightly wait-time rollup feeding the scheduler's slot scoring.
+
+    Args:
+        full: Rebuild from the whole appointment history
+
+    Returns:
+        Number of visits folded
+    """
+    from .wait_times import rollup_wait_times as run_rollup
+
+    return run_rollup(full=full)
+
+
+@shared_task
+def rollup_optimizations(full: bool = False) -> int:
+    """
+    Fold changed scheduling optimizations into the analytics rollups.
+
+    Args:
+        full: Rebuild every day
+
+    Returns:
+        Number of days rebuilt
+    """
+    from .optimization_analytics import rollup_optimizations as run_rollup
+
+    return run_rollup(full=full)
+
+
+@shared_task
+def warm_next_slots() -> int:
+    """
+    Rebuild missing next-slot lists and the clinic-wide list the chat reads.
+
+    Returns:
+        Number of doctors checked
+    """
+    from .next_slots import get_next_slot_cache
+
+    return get_next_slot_cache().warm_clinic()
+
+
+@shared_task
+def bulk_reschedule(doctor_id: int, start: str, end: str,
+                    include_other_doctors: bool = True) -> dict:
+    """
+    Close a doctor's blocked interval and move the bookings out of it.
+
+    Args:
+        doctor_id: Doctor who is unavailable
+        start: Interval start as an ISO 8601 string
+        end: Interval end as an ISO 8601 string
+        include_other_doctors: Fall back to doctors with the same specialization
+
+    Returns:
+        Rescheduling summary (see BulkRescheduler.reschedule)
+    """
+    from django.utils.dateparse import parse_datetime
+    from clinic_ai.core.models import Doctor
+    from .bulk_rescheduler import BulkRescheduler
+
+    result = BulkRescheduler().reschedule(
+        Doctor.objects.get(id=doctor_id), parse_datetime(start), parse_datetime(end),
+        include_other_doctors
+    )
+    # Keep the result JSON serializable for the result backend
+    for move in result.get('moved', []):
+        move['from'] = move['from'].isoformat()
+        move['to'] = move['to'].isoformat()
+    return result
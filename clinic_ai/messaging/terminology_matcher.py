@@ -0,0 +1,234 @@
+"""
+Medical terminology matching for translation pre- and post-processing.
+An Aho-Corasick automaton over every language column of MedicalTerminology
+finds all terms in a text in one linear pass, including multi-word English
+terms and Korean, Chinese and Japanese terms that are not space separated.
+The automaton is shared per process and rebuilt only when the terminology
+version changes.
+"""
+
+import logging
+import threading
+import unicodedata
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..core.models import MedicalTerminology
+from .translation_cache import get_terminology_version
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ('en', 'ko', 'zh', 'ja')
+
+
+def _fold(text: str) -> Tuple[str, List[int]]:
+    """Lowercase text, with the index in text of every folded character."""
+    folded, origin = [], []
+    for index, char in enumerate(text):
+        for lower in char.lower():
+            folded.append(lower)
+            origin.append(index)
+    return ''.join(folded), origin
+
+
+def _needs_boundary(char: str) -> bool:
+    """Alphabetic scripts (Latin, Greek, Cyrillic) separate words; CJK and Hangul do not."""
+    return char.isalnum() and ord(char) < 0x1100
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher.
+    Finds every occurrence of every pattern in time linear in the length of
+    the text plus the number of matches.
+    """
+
+    def __init__(self, patterns: List[str]):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Non-empty strings; duplicates report the first index
+        """
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[int] = [-1]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[state][char] = following
+                    self._goto.append({})
+                    self._output.append(-1)
+                state = following
+            if self._output[state] == -1:
+                self._output[state] = index
+
+        # Failure links, and links to the nearest state on the failure chain
+        # that ends a pattern, filled breadth first
+        self._fail = [0] * len(self._goto)
+        self._next_output = [-1] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target
+                self._next_output[child] = target if self._output[target] != -1 else self._next_output[target]
+                queue.append(child)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end index, pattern index) for every occurrence, end exclusive."""
+        goto, fail, output, next_output = self._goto, self._fail, self._output, self._next_output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if output[state] != -1 else next_output[state]
+            while match != -1:
+                yield position + 1, output[match]
+                match = next_output[match]
+
+
+class TerminologyMatcher:
+    """
+    Finds and substitutes medical terms in any supported language.
+
+    Matching is case-insensitive. Terms starting or ending in an alphabetic
+    script must sit on word boundaries there ("lip" does not match inside
+    "clip"); CJK and Hangul terms match anywhere, so particles attached to a
+    Korean term ("보톡스는") do not hide it. Overlapping matches resolve to
+    the leftmost, then longest.
+    """
+
+    def __init__(self, terms: List[Dict[str, Any]]):
+        """
+        Build the matcher.
+
+        Args:
+            terms: Dicts with id, category and a form per language code
+                (blank forms are skipped)
+        """
+        self.terms = terms
+        patterns = []
+        self._pattern_terms: List[Tuple[Dict[str, Any], str]] = []
+        for info in terms:
+            for language in LANGUAGES:
+                form = unicodedata.normalize('NFC', (info.get(language) or '').strip())
+                if form:
+                    patterns.append(_fold(form)[0])
+                    self._pattern_terms.append((info, language))
+        self.automaton = AhoCorasick(patterns)
+
+    @classmethod
+    def from_database(cls) -> 'TerminologyMatcher':
+        """Matcher over every MedicalTerminology row."""
+        rows = MedicalTerminology.objects.values('id', 'term_en', 'term_ko', 'term_zh', 'term_ja', 'category')
+        return cls([
+            {
+                'id': row['id'],
+                'en': row['term_en'],
+                'ko': row['term_ko'],
+                'zh': row['term_zh'],
+                'ja': row['term_ja'],
+                'category': row['category'],
+            }
+            for row in rows
+        ])
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find medical terms in text.
+
+        Returns:
+            Non-overlapping matches in order, each a dict with start, end,
+            original (the matched text), language and info (the term)
+        """
+        if not self.terms or not text:
+            return []
+        folded, origin = _fold(text)
+        candidates = []
+        for end, index in self.automaton.iter_matches(folded):
+            pattern = self.automaton.patterns[index]
+            start = origin[end - len(pattern)]
+            stop = origin[end - 1] + 1
+            if _needs_boundary(pattern[0]) and start > 0 and _needs_boundary(text[start - 1]):
+                continue
+            if _needs_boundary(pattern[-1]) and stop < len(text) and _needs_boundary(text[stop]):
+                continue
+            candidates.append((start, -stop, index))
+
+        matches = []
+        covered = 0
+        for start, negative_stop, index in sorted(candidates):
+            if start < covered:
+                continue
+            covered = -negative_stop
+            info, language = self._pattern_terms[index]
+            matches.append({
+                'start': start,
+                'end': covered,
+                'original': text[start:covered],
+                'language': language,
+                'info': info,
+            })
+        return matches
+
+    def replace(self, text: str, replacement: Callable[[Dict[str, Any]], Optional[str]]) -> str:
+        """
+        Substitute medical terms in one pass.
+
+        Args:
+            text: Text to rewrite
+            replacement: Returns the new text for a match (see find), or
+                None to keep it
+
+        Returns:
+            Rewritten text
+        """
+        parts = []
+        last = 0
+        for match in self.find(text):
+            new = replacement(match)
+            if new is None:
+                continue
+            parts.append(text[last:match['start']])
+            parts.append(new)
+            last = match['end']
+        parts.append(text[last:])
+        return ''.join(parts)
+
+
+_current: List[Any] = [None, None]  # (terminology version, matcher)
+_build_lock = threading.Lock()
+
+
+def get_terminology_matcher() -> TerminologyMatcher:
+    """
+    Process-wide matcher for the current terminology version.
+
+    Rebuilt from the database only after the version changes; a build that
+    fails returns an empty matcher and is retried on the next call.
+    """
+    version = get_terminology_version()
+    version_built, matcher = _current
+    if matcher is not None and version_built == version:
+        return matcher
+
+    with _build_lock:
+        if _current[1] is not None and _current[0] == version:
+            return _current[1]
+        try:
+            matcher = TerminologyMatcher.from_database()
+        except Exception as e:
+            logger.warning(f"Could not load medical terminology: {e}")
+            return TerminologyMatcher([])
+        _current[:] = [version, matcher]
+    logger.info(f"Loaded {len(matcher.terms)} medical terms (terminology version {version})")
+    return matcher
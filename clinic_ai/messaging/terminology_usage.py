@@ -0,0 +1,134 @@
+"""
+Buffered usage counting for medical terminology.
+Translations only add to an in-process counter; a background thread in
+each process writes the counts with one bulk UPDATE per batch of terms
+every few seconds, and again when the process shuts down gracefully (exit
+of a web worker, or a Celery worker process), so the translation path never
+writes to the database for accounting.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+from ..core.models import MedicalTerminology
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 500
+
+
+class UsageCounter:
+    """
+    Per-process MedicalTerminology usage counts, flushed in the background.
+
+    The flush thread starts on first use in each process, so counts taken
+    before a fork are not written twice.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        """
+        Initialize counter.
+
+        Args:
+            interval: Seconds between flushes (defaults to
+                CLINIC_AI['TERMINOLOGY_USAGE_FLUSH_INTERVAL'])
+        """
+        self.interval = interval
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, term_ids: Iterable[int]) -> None:
+        """Count one use of each term; never touches the database."""
+        self._ensure_thread()
+        with self._lock:
+            self._counts.update(term_ids)
+
+    def flush(self) -> int:
+        """
+        Write pending counts with one UPDATE per batch of terms.
+
+        Counts that fail to write are kept for the next flush.
+
+        Returns:
+            Number of terms updated
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+
+        term_ids = list(counts)
+        written = 0
+        try:
+            for start in range(0, len(term_ids), UPDATE_BATCH_SIZE):
+                batch = term_ids[start:start + UPDATE_BATCH_SIZE]
+                MedicalTerminology.objects.filter(id__in=batch).update(
+                    usage_count=F('usage_count') + Case(
+                        *[When(id=term_id, then=Value(counts[term_id])) for term_id in batch],
+                        default=Value(0),
+                        output_field=IntegerField()
+                    )
+                )
+                written += len(batch)
+        except Exception as e:
+            logger.warning(f"Could not update medical term usage: {e}")
+            with self._lock:
+                self._counts.update({term_id: counts[term_id] for term_id in term_ids[written:]})
+        return written
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Forked: the parent flushes its own counts
+                self._counts = Counter()
+            self._pid = pid
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name='terminology-usage-flush', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        interval = self.interval or settings.CLINIC_AI.get('TERMINOLOGY_USAGE_FLUSH_INTERVAL', 30)
+        while not self._stopped.wait(interval):
+            self.flush()
+            close_old_connections()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write what is pending."""
+        self._stopped.set()
+        self.flush()
+
+
+usage_counter = UsageCounter()
+
+
+def record_term_usage(term_ids: Iterable[int]) -> None:
+    """Count one use of each MedicalTerminology id."""
+    usage_counter.record(term_ids)
+
+
+def flush_term_usage() -> int:
+    """Write this process's pending usage counts now."""
+    return usage_counter.flush()
+
+
+atexit.register(usage_counter.stop)
+# Prefork pool processes leave with os._exit, which skips atexit
+worker_process_shutdown.connect(lambda **kwargs: usage_counter.stop(), weak=False)
@@ -3,12 +3,13 @@ Real-time translation service for multilingual patient communication.
 Composition-based design with cache and fallback strategies.
 """
 
-import requests
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import logging
 
 from ..core.interfaces import Translator, CacheService, ConfigurationService
 from ..core.cache import SimpleCache
+from .translation_batch import post_translations, translate_many
+from .translation_cache import TranslationCache
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,8 @@ class GoogleTranslateService(Translator):
 
     def __init__(self, config_service: ConfigurationService, cache_service: Optional[CacheService] = None):
         self.config = config_service
-        self.cache = cache_service or SimpleCache()
+        # Shared across workers through the Django cache unless a backend is given
+        self.cache = TranslationCache(cache_service)
         self.api_key = self.config.get_api_key('google_translate')
         self.base_url = "https://translation.googleapis.com/language/translate/v2"
 
@@ -37,42 +39,23 @@ class GoogleTranslateService(Translator):
         Returns:
             Translated text
         """
-        if not text.strip():
-            return text
-
-        # Create cache key
-        cache_key = f"translate_{from_lang}_{to_lang}_{hash(text)}"
-
-        # Check cache first
-        cached_result = self.cache.get(cache_key)
-        if cached_result:
-            logger.debug(f"Translation cache hit for: {text[:50]}...")
-            return cached_result
-
-        try:
-            # Make API request
-            params = {
-                'q': text,
-                'source': from_lang,
-                'target': to_lang,
-                'key': self.api_key
-            }
+        return self.translate_many([(text, from_lang, to_lang)])[0]
 
-            response = requests.post(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-
-            result = response.json()
-            translated_text = result['data']['translations'][0]['translatedText']
+    def translate_many(self, items: List[Tuple[str, str, str]]) -> List[str]:
+        """
+        Translate many texts with batched cache lookups and API requests.
 
-            # Cache the result for 1 hour
-            self.cache.set(cache_key, translated_text, 3600)
+        Args:
+            items: (text, from_lang, to_lang) tuples
 
-            logger.info(f"Translation completed: {from_lang} -> {to_lang}")
-            return translated_text
+        Returns:
+            Translated texts in order (original text where translation failed)
+        """
+        translations, _ = translate_many(self.cache, self._send, items)
+        return translations
 
-        except requests.RequestException as e:
-            logger.error(f"Google Translate API error: {e}")
-            return text  # Return original text if translation fails
+    def _send(self, texts: List[str], from_lang: str, to_lang: str) -> List[str]:
+        return post_translations(self.base_url, self.api_key, texts, from_lang, to_lang)
 
     def get_supported_languages(self) -> List[str]:
         """Return list of supported language codes"""
@@ -169,12 +152,39 @@ class TranslationService:
         """Get list of supported languages"""
         return self.translator.get_supported_languages()
 
-    def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+    def translate_batch(self, texts: List[str], target_lang: str,
+                        source_lang: Optional[str] = None) -> List[str]:
         """
         Translate multiple texts efficiently.
-        Could be optimized with batch API calls in production.
+
+        Texts already in the target language are returned unchanged. The
+        rest go through the translator's batch pipeline (translate_many)
+        when it has one: one cache lookup, and one API request per language
+        pair and chunk of texts.
+
+        Args:
+            texts: Texts to translate
+            target_lang: Target language code
+            source_lang: Optional source language (detected per text if not provided)
+
+        Returns:
+            Translated texts in order
         """
-        return [self.translate_message(text, target_lang) for text in texts]
+        results = list(texts)
+        positions, items = [], []
+        for position, text in enumerate(texts):
+            detected_lang = source_lang or self.detector.detect(text)
+            if detected_lang != target_lang:
+                positions.append(position)
+                items.append((text, detected_lang, target_lang))
+
+        if hasattr(self.translator, 'translate_many'):
+            translations = self.translator.translate_many(items)
+        else:
+            translations = [self.translator.translate(*item) for item in items]
+        for position, translated_text in zip(positions, translations):
+            results[position] = translated_text
+        return results
 
 
 class FallbackTranslationService(TranslationService):
@@ -212,14 +222,26 @@ class FallbackTranslationService(TranslationService):
         # Try full translation first
         primary_translation = super().translate_message(text, target_lang, detected_lang)
 
-        # If full translation failed or looks suspicious, try fallback
-        if primary_translation == text or len(primary_translation.strip()) < len(text) * 0.3:
-            fallback = self._get_fallback_translation(text.lower().strip(), (detected_lang, target_lang))
+        return self._with_fallback(text, primary_translation, (detected_lang, target_lang))
+
+    def translate_batch(self, texts: List[str], target_lang: str,
+                        source_lang: Optional[str] = None) -> List[str]:
+        """Batch translate with the same dictionary fallback per text."""
+        translations = super().translate_batch(texts, target_lang, source_lang)
+        return [
+            self._with_fallback(text, translated_text, (source_lang or self.detector.detect(text), target_lang))
+            for text, translated_text in zip(texts, translations)
+        ]
+
+    def _with_fallback(self, text: str, translation: str, lang_pair: tuple) -> str:
+        """Dictionary translation if the primary one failed or looks suspicious."""
+        if translation == text or len(translation.strip()) < len(text) * 0.3:
+            fallback = self._get_fallback_translation(text.lower().strip(), lang_pair)
             if fallback:
                 logger.info(f"Using fallback translation for: {text}")
                 return fallback
 
-        return primary_translation
+        return translation
 
     def _get_fallback_translation(self, text: str, lang_pair: tuple) -> Optional[str]:
         """Get fallback translation from dictionary"""
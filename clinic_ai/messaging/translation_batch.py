@@ -0,0 +1,161 @@
+"""
+Batched translation pipeline shared by the Google translators.
+Inputs are split into cache hits and misses with one cache lookup; misses
+are deduplicated, grouped by language pair and sent to the multi-q API in
+chunks within its request limits, and the results are written back to the
+cache in one call.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import requests
+
+from .translation_cache import TranslationCache, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Google Translate v2 limits per request
+MAX_TEXTS_PER_REQUEST = 128
+MAX_CHARS_PER_REQUEST = 30000
+
+
+def chunk_texts(texts: List[str], max_texts: int = MAX_TEXTS_PER_REQUEST,
+                max_chars: int = MAX_CHARS_PER_REQUEST) -> List[List[int]]:
+    """
+    Group texts into API requests.
+
+    Returns:
+        Lists of indices into texts; each list stays within max_texts and
+        max_chars (a single longer text gets a request of its own)
+    """
+    chunks = []
+    chunk, chars = [], 0
+    for index, text in enumerate(texts):
+        if chunk and (len(chunk) >= max_texts or chars + len(text) > max_chars):
+            chunks.append(chunk)
+            chunk, chars = [], 0
+        chunk.append(index)
+        chars += len(text)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def post_translations(base_url: str, api_key: str, texts: List[str], from_lang: str,
+                      to_lang: str, timeout: int = 30, **params) -> List[str]:
+    """
+    Translate texts with one multi-q API request.
+
+    Raises:
+        requests.RequestException: If the request fails
+    """
+    # Sent as a form body: a full chunk would not fit in a query string
+    response = requests.post(base_url, data={
+        'q': texts,
+        'source': from_lang,
+        'target': to_lang,
+        'key': api_key,
+        **params
+    }, timeout=timeout)
+    response.raise_for_status()
+    return [t['translatedText'] for t in response.json()['data']['translations']]
+
+
+def translate_many(cache: TranslationCache,
+                   send: Callable[[List[str], str, str], List[str]],
+                   items: List[Tuple[str, str, str]],
+                   prepare: Optional[Callable[[str, str], Tuple[str, Any]]] = None,
+                   finish: Optional[Callable[[str, Any, str], str]] = None,
+                   describe: Optional[Callable[[Any], Dict[str, Any]]] = None
+                   ) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Translate many texts with as few cache and API round trips as possible.
+
+    Args:
+        cache: Translation cache
+        send: Translates a list of texts for one language pair with one API
+            request (see post_translations)
+        items: (text, from_lang, to_lang) tuples
+        prepare: Turns a text into (text sent to the API, context), e.g.
+            medical term pre-processing
+        finish: Turns (API translation, context, to_lang) into the final
+            translation
+        describe: Extra cache metadata for a context
+
+    Returns:
+        Tuple of (translation for each item, in order; one record per text
+        sent to the API with text, source_language, target_language,
+        translated_text, context, failed, processing_time_ms and the
+        positions of the items it answered). Items whose request failed get
+        their original text back, and are not cached.
+    """
+    results = [text for text, _, _ in items]
+    pending = [position for position, (text, _, _) in enumerate(items) if text.strip()]
+    if not pending:
+        return results, []
+
+    # Misses keyed by normalized text and pair, so duplicates are sent once
+    misses: Dict[Tuple[str, str, str], List[int]] = {}
+    for position, entry in zip(pending, cache.get_many([items[position] for position in pending])):
+        if entry:
+            results[position] = entry['translated_text']
+        else:
+            text, from_lang, to_lang = items[position]
+            misses.setdefault((normalize_text(text), from_lang, to_lang), []).append(position)
+
+    groups: Dict[Tuple[str, str], List[List[int]]] = {}
+    for (_, from_lang, to_lang), positions in misses.items():
+        groups.setdefault((from_lang, to_lang), []).append(positions)
+
+    records = []
+    for (from_lang, to_lang), group in groups.items():
+        texts = [items[positions[0]][0] for positions in group]
+        prepared = [prepare(text, from_lang) if prepare else (text, None) for text in texts]
+        api_texts = [api_text for api_text, _ in prepared]
+
+        for chunk in chunk_texts(api_texts):
+            started = time.time()
+            try:
+                translated = send([api_texts[index] for index in chunk], from_lang, to_lang)
+                failed = len(translated) != len(chunk)
+                if failed:
+                    logger.error(f"Batch translation returned {len(translated)} of {len(chunk)} texts")
+            except (requests.RequestException, KeyError, ValueError) as e:
+                logger.error(f"Batch translation error ({from_lang} -> {to_lang}, {len(chunk)} texts): {e}")
+                failed = True
+            if failed:
+                translated = [texts[index] for index in chunk]
+            processing_time_ms = int((time.time() - started) * 1000 / len(chunk))
+
+            for index, translated_text in zip(chunk, translated):
+                context = prepared[index][1]
+                if not failed and finish:
+                    translated_text = finish(translated_text, context, to_lang)
+                for position in group[index]:
+                    results[position] = translated_text
+                records.append({
+                    'text': texts[index],
+                    'source_language': from_lang,
+                    'target_language': to_lang,
+                    'translated_text': translated_text,
+                    'context': context,
+                    'failed': failed,
+                    'processing_time_ms': processing_time_ms,
+                    'positions': group[index],
+                })
+        logger.info(f"Batch translated {len(texts)} texts: {from_lang} -> {to_lang}")
+
+    cache.set_many([
+        (
+            record['text'], record['source_language'], record['target_language'],
+            record['translated_text'],
+            {
+                'service': 'google',
+                'processing_time_ms': record['processing_time_ms'],
+                **(describe(record['context']) if describe else {})
+            }
+        )
+        for record in records if not record['failed']
+    ])
+    return results, records
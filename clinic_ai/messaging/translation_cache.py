@@ -0,0 +1,257 @@
+"""
+Content-addressed translation cache shared across workers.
+Keys are blake2b digests of the normalized text, the language pair and the
+terminology version, so every gunicorn worker and Celery process hits the
+same entries, and a terminology change retires all of them at once. Hot
+phrases are served from a per-process LRU in front of Redis.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+
+from ..core.interfaces import CacheService
+
+logger = logging.getLogger(__name__)
+
+TERMINOLOGY_VERSION_KEY = 'translation:terminology_version'
+CACHE_NAMESPACE = 'translation'
+_HORIZONTAL_WHITESPACE = re.compile(r'[^\S\n]+')
+
+# Process-local copy of the terminology version: (version, read at)
+_version_memo = [None, 0.0]
+
+
+def normalize_text(text: str) -> str:
+    """
+    NFC-normalize, collapse runs of spaces and tabs and strip each line.
+
+    Line breaks are kept: the translation keeps them too (one instruction
+    per line, addresses), so texts that differ in them are cached apart.
+    """
+    lines = _HORIZONTAL_WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).split('\n')
+    return '\n'.join(line.strip() for line in lines).strip()
+
+
+def get_terminology_version() -> int:
+    """
+    Current medical terminology version (bumped on every term change).
+
+    Read from Redis at most every LOCAL_CACHE['check_interval'] seconds;
+    other processes pick up a bump within that interval.
+    """
+    version, read_at = _version_memo
+    interval = settings.CLINIC_AI.get('LOCAL_CACHE', {}).get('check_interval', 5)
+    if version is not None and time.monotonic() - read_at < interval:
+        return version
+    try:
+        version = cache.get(TERMINOLOGY_VERSION_KEY, 0)
+    except Exception as e:
+        logger.warning(f"Terminology version lookup failed: {e}")
+        return version or 0
+    _version_memo[:] = [version, time.monotonic()]
+    return version
+
+
+def bump_terminology_version() -> None:
+    """Retire every cached translation after medical terminology changes."""
+    from ..core.cache import TwoTierCacheService
+
+    try:
+        cache.add(TERMINOLOGY_VERSION_KEY, 0, timeout=None)
+        cache.incr(TERMINOLOGY_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Terminology version bump failed: {e}")
+    _version_memo[:] = [None, 0.0]
+    # Retired entries are unreachable; free the local tiers too
+    TwoTierCacheService(CACHE_NAMESPACE).broadcast_invalidation()
+
+
+class TranslationCache:
+    """
+    Translations with their metadata, keyed by a stable content digest.
+
+    Values are dicts holding the normalized source text, the translation
+    and metadata (languages, medical terms, service, time). The source is
+    compared on read, so a digest collision is a miss rather than a wrong
+    translation.
+
+    Hit and miss counters are kept per process and added to shared
+    counters every FLUSH_INTERVAL seconds, so lookups do not pay an extra
+    round trip for accounting.
+    """
+
+    KEY_PREFIX = 'translation'
+    STATS_KEYS = ('hits', 'misses', 'characters_saved')
+    FLUSH_INTERVAL = 30.0
+
+    _pending = dict.fromkeys(STATS_KEYS, 0)
+    _flushed_at = time.monotonic()
+    _stats_lock = threading.Lock()
+
+    def __init__(self, backend: Optional[CacheService] = None, ttl: Optional[int] = None):
+        """
+        Initialize cache.
+
+        Args:
+            backend: Cache service holding the entries (defaults to a
+                per-process LRU in front of the Django cache, i.e. Redis)
+            ttl: Seconds entries live (defaults to
+                CLINIC_AI['CACHE_TTL']['translation'])
+        """
+        if backend is None:
+            from ..core.cache import TwoTierCacheService
+            backend = TwoTierCacheService(CACHE_NAMESPACE)
+        self.backend = backend
+        self.ttl = ttl or settings.CLINIC_AI.get('CACHE_TTL', {}).get('translation', 3600)
+
+    def key(self, text: str, from_lang: str, to_lang: str, version: Optional[int] = None) -> str:
+        """Stable cache key for a text and language pair."""
+        if version is None:
+            version = get_terminology_version()
+        digest = hashlib.blake2b(
+            '\x1f'.join([normalize_text(text), from_lang, to_lang, str(version)]).encode('utf-8'),
+            digest_size=20
+        ).hexdigest()
+        return f'{self.KEY_PREFIX}:{from_lang}:{to_lang}:{digest}'
+
+    def get(self, text: str, from_lang: str, to_lang: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a translation.
+
+        Returns:
+            Cached entry (see class docstring) or None on a miss
+        """
+        entry = self.backend.get(self.key(text, from_lang, to_lang))
+        if isinstance(entry, dict) and entry.get('source_text') == normalize_text(text):
+            self._count(hits=1, characters_saved=len(text))
+            return entry
+        self._count(misses=1)
+        return None
+
+    def set(self, text: str, from_lang: str, to_lang: str, translated_text: str,
+            **metadata) -> Dict[str, Any]:
+        """
+        Store a translation.
+
+        Args:
+            text: Source text
+            from_lang: Source language code
+            to_lang: Target language code
+            translated_text: Translation
+            **metadata: Extra fields kept with the entry (medical_terms, service, ...)
+
+        Returns:
+            The stored entry
+        """
+        entry = {
+            'source_text': normalize_text(text),
+            'translated_text': translated_text,
+            'source_language': from_lang,
+            'target_language': to_lang,
+            'cached_at': time.time(),
+            **metadata
+        }
+        self.backend.set(self.key(text, from_lang, to_lang), entry, self.ttl)
+        return entry
+
+    def get_many(self, items: List[Tuple[str, str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up several translations in one round trip.
+
+        Args:
+            items: (text, from_lang, to_lang) tuples
+
+        Returns:
+            Cached entry or None for each item, in order
+        """
+        version = get_terminology_version()
+        keys = [self.key(text, from_lang, to_lang, version) for text, from_lang, to_lang in items]
+        found = self.backend.get_many(list(dict.fromkeys(keys)))
+
+        entries = []
+        hits = characters_saved = 0
+        for (text, _, _), key in zip(items, keys):
+            entry = found.get(key)
+            if isinstance(entry, dict) and entry.get('source_text') == normalize_text(text):
+                hits += 1
+                characters_saved += len(text)
+                entries.append(entry)
+            else:
+                entries.append(None)
+        self._count(hits=hits, misses=len(items) - hits, characters_saved=characters_saved)
+        return entries
+
+    def set_many(self, translations: List[Tuple[str, str, str, str, Dict[str, Any]]]) -> None:
+        """
+        Store several translations in one round trip.
+
+        Args:
+            translations: (text, from_lang, to_lang, translated_text, metadata) tuples
+        """
+        if not translations:
+            return
+        version = get_terminology_version()
+        now = time.time()
+        self.backend.set_many({
+            self.key(text, from_lang, to_lang, version): {
+                'source_text': normalize_text(text),
+                'translated_text': translated_text,
+                'source_language': from_lang,
+                'target_language': to_lang,
+                'cached_at': now,
+                **metadata
+            }
+            for text, from_lang, to_lang, translated_text, metadata in translations
+        }, self.ttl)
+
+    @classmethod
+    def _count(cls, **deltas) -> None:
+        with cls._stats_lock:
+            for name, delta in deltas.items():
+                cls._pending[name] += delta
+            if time.monotonic() - cls._flushed_at < cls.FLUSH_INTERVAL:
+                return
+        cls.flush_stats()
+
+    @classmethod
+    def flush_stats(cls) -> None:
+        """Add this process's counts to the shared counters."""
+        with cls._stats_lock:
+            pending, cls._pending = cls._pending, dict.fromkeys(cls.STATS_KEYS, 0)
+            cls._flushed_at = time.monotonic()
+        for name, delta in pending.items():
+            if not delta:
+                continue
+            key = f'{cls.KEY_PREFIX}:stats:{name}'
+            try:
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, delta)
+            except Exception as e:
+                logger.warning(f"Translation cache stats flush failed for {name}: {e}")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """
+        Cache effectiveness across all processes.
+
+        Returns:
+            Dict with hits, misses, hit_rate and characters_saved (characters
+            not sent to the translation API)
+        """
+        cls.flush_stats()
+        try:
+            shared = cache.get_many([f'{cls.KEY_PREFIX}:stats:{name}' for name in cls.STATS_KEYS])
+        except Exception as e:
+            logger.warning(f"Translation cache stats lookup failed: {e}")
+            shared = {}
+        totals = {name: shared.get(f'{cls.KEY_PREFIX}:stats:{name}', 0) for name in cls.STATS_KEYS}
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = round(totals['hits'] / lookups, 3) if lookups else 0.0
+        return totals
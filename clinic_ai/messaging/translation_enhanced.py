@@ -3,16 +3,19 @@ Enhanced translation service for Phase 2 with Google Translate API integration.
 Includes medical terminology support, translation history, and quality tracking.
 """
 
-import requests
 import time
 from typing import Optional, List, Dict, Any, Tuple
 import logging
-from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Avg
 
 from ..core.interfaces import Translator, CacheService, ConfigurationService
 from ..core.models import TranslationHistory, MedicalTerminology
+from .terminology_matcher import get_terminology_matcher
+from .terminology_usage import record_term_usage
 from .translation import SimpleLanguageDetector
+from .translation_batch import post_translations, translate_many
+from .translation_cache import TranslationCache
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +28,8 @@ class EnhancedGoogleTranslateService(Translator):
 
     def __init__(self, config_service: ConfigurationService, cache_service: Optional[CacheService] = None):
         self.config = config_service
-        self.cache = cache_service
+        # Shared across workers through the Django cache unless a backend is given
+        self.cache = TranslationCache(cache_service)
         self.api_key = self.config.get_api_key('google_translate')
 
         # Validate API key
@@ -33,25 +37,6 @@ class EnhancedGoogleTranslateService(Translator):
             logger.warning("Google Translate API key not properly configured - using limited functionality")
 
         self.base_url = "https://translation.googleapis.com/language/translate/v2"
-        self.medical_terms_cache = {}
-        self._load_medical_terminology()
-
-    def _load_medical_terminology(self):
-        """Load medical terminology into memory cache for fast lookup."""
-        try:
-            terms = MedicalTerminology.objects.all()
-            for term in terms:
-                # Create lookup dictionary for each language
-                self.medical_terms_cache[term.term_en.lower()] = {
-                    'ko': term.term_ko,
-                    'zh': term.term_zh,
-                    'ja': term.term_ja,
-                    'en': term.term_en,
-                    'category': term.category
-                }
-            logger.info(f"Loaded {len(self.medical_terms_cache)} medical terms into cache")
-        except Exception as e:
-            logger.warning(f"Could not load medical terminology: {e}")
 
     def translate(self, text: str, from_lang: str, to_lang: str, 
                   message_id: Optional[int] = None,
@@ -69,157 +54,117 @@ class EnhancedGoogleTranslateService(Translator):
         Returns:
             Translated text
         """
-        if not text.strip():
-            return text
-
-        start_time = time.time()
-        
-        # Check cache first
-        cache_key = f"translate_v2_{from_lang}_{to_lang}_{hash(text)}"
-        cached_result = cache.get(cache_key) if self.cache else None
-        
-        if cached_result:
-            logger.debug(f"Translation cache hit for: {text[:50]}...")
-            return cached_result
+        return self.translate_many(
+            [(text, from_lang, to_lang)], message_ids=[message_id], track_history=track_history
+        )[0]
 
-        try:
-            # Pre-process medical terminology
-            processed_text, medical_terms_found = self._preprocess_medical_terms(text, from_lang)
-            
-            # Make API request
-            params = {
-                'q': processed_text,
-                'source': from_lang,
-                'target': to_lang,
-                'key': self.api_key,
-                'format': 'text'
-            }
+    def translate_many(self, items: List[Tuple[str, str, str]],
+                       message_ids: Optional[List[Optional[int]]] = None,
+                       track_history: bool = True) -> List[str]:
+        """
+        Translate many texts with batched cache lookups, API requests and history.
 
-            response = requests.post(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-
-            result = response.json()
-            translated_text = result['data']['translations'][0]['translatedText']
-            
-            # Post-process medical terminology
-            translated_text = self._postprocess_medical_terms(
-                translated_text, medical_terms_found, to_lang
-            )
-
-            # Calculate processing time
-            processing_time_ms = int((time.time() - start_time) * 1000)
-
-            # Cache the result for 1 hour
-            if self.cache:
-                cache.set(cache_key, translated_text, 3600)
-
-            # Track translation history
-            if track_history:
-                self._save_translation_history(
-                    source_text=text,
-                    translated_text=translated_text,
-                    source_language=from_lang,
-                    target_language=to_lang,
-                    message_id=message_id,
-                    is_medical=len(medical_terms_found) > 0,
-                    processing_time_ms=processing_time_ms
-                )
+        Medical terms are handled per text; each text sent to the API gets
+        one history row, written with a single bulk insert.
 
-            logger.info(f"Translation completed: {from_lang} -> {to_lang} ({processing_time_ms}ms)")
-            return translated_text
+        Args:
+            items: (text, from_lang, to_lang) tuples
+            message_ids: Optional message ID for each item, for history tracking
+            track_history: Whether to save translation history
 
-        except requests.RequestException as e:
-            logger.error(f"Google Translate API error: {e}")
-            # Save failed translation attempt
-            if track_history:
-                self._save_translation_history(
-                    source_text=text,
-                    translated_text=text,
-                    source_language=from_lang,
-                    target_language=to_lang,
-                    message_id=message_id,
-                    confidence_score=0.0
-                )
-            return text  # Return original text if translation fails
+        Returns:
+            Translated texts in order (original text where translation failed)
+        """
+        translations, records = translate_many(
+            self.cache, self._send, items,
+            prepare=self._preprocess_medical_terms,
+            finish=self._postprocess_medical_terms,
+            describe=lambda terms: {'medical_terms': [term['original'] for term in terms]}
+        )
+        if track_history and records:
+            self._save_translation_history(records, message_ids)
+        return translations
+
+    def _send(self, texts: List[str], from_lang: str, to_lang: str) -> List[str]:
+        return post_translations(self.base_url, self.api_key, texts, from_lang, to_lang, format='text')
 
     def _preprocess_medical_terms(self, text: str, source_lang: str) -> Tuple[str, List[Dict]]:
         """
         Identify and mark medical terms in text for accurate translation.
-        
+
+        Terms are matched in every language, so English terms inside a
+        Korean message are found too.
+
         Returns:
             Tuple of (processed_text, list of found medical terms)
         """
-        medical_terms_found = []
-        processed_text = text
-        
-        # Check for medical terms in the text
-        words = text.lower().split()
-        for word in words:
-            if word in self.medical_terms_cache:
-                term_info = self.medical_terms_cache[word]
-                medical_terms_found.append({
-                    'original': word,
-                    'info': term_info
-                })
-                # Update usage count
-                try:
-                    MedicalTerminology.objects.filter(term_en__iexact=word).update(
-                        usage_count=models.F('usage_count') + 1
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not update medical term usage: {e}")
-        
-        return processed_text, medical_terms_found
+        medical_terms_found = [
+            {'original': match['original'], 'info': match['info']}
+            for match in get_terminology_matcher().find(text)
+        ]
+
+        # Buffered; written in the background (see terminology_usage)
+        record_term_usage(term['info']['id'] for term in medical_terms_found)
 
-    def _postprocess_medical_terms(self, translated_text: str, 
-                                   medical_terms: List[Dict], 
+        return text, medical_terms_found
+
+    def _postprocess_medical_terms(self, translated_text: str,
+                                   medical_terms: List[Dict],
                                    target_lang: str) -> str:
         """
         Replace translated medical terms with accurate terminology.
+
+        Any form of a term found in the source (e.g. left untranslated by
+        the API) becomes its target-language form, in one pass.
+        """
+        if not medical_terms:
+            return translated_text
+        found = {term['info']['id'] for term in medical_terms}
+
+        def accurate(match):
+            if match['info']['id'] in found:
+                return match['info'].get(target_lang) or None
+            return None
+
+        return get_terminology_matcher().replace(translated_text, accurate)
+
+    def _save_translation_history(self, records: List[Dict[str, Any]],
+                                  message_ids: Optional[List[Optional[int]]] = None):
+        """
+        Save translations to history for audit and quality tracking.
+
+        Args:
+            records: Records from translation_batch.translate_many
+            message_ids: Optional message ID for each input item
         """
-        result = translated_text
-        
-        for term_data in medical_terms:
-            term_info = term_data['info']
-            accurate_translation = term_info.get(target_lang)
-            
-            if accurate_translation:
-                # This is a simple replacement - in production, use more sophisticated NLP
-                result = result.replace(
-                    term_data['original'], 
-                    accurate_translation
-                )
-        
-        return result
-
-    def _save_translation_history(self, source_text: str, translated_text: str,
-                                 source_language: str, target_language: str,
-                                 message_id: Optional[int] = None,
-                                 is_medical: bool = False,
-                                 processing_time_ms: Optional[int] = None,
-                                 confidence_score: Optional[float] = None):
-        """Save translation to history for audit and quality tracking."""
         try:
             from ..core.models import Message
-            
-            message = None
-            if message_id:
-                try:
-                    message = Message.objects.get(id=message_id)
-                except Message.DoesNotExist:
-                    pass
-
-            TranslationHistory.objects.create(
-                message=message,
-                source_text=source_text[:1000],  # Limit length
-                translated_text=translated_text[:1000],
-                source_language=source_language,
-                target_language=target_language,
-                translation_service='google',
-                confidence_score=confidence_score or 0.95,
-                is_medical_terminology=is_medical,
-                processing_time_ms=processing_time_ms
-            )
+
+            message_ids = message_ids or []
+            wanted = {message_ids[position] for record in records for position in record['positions']
+                      if position < len(message_ids) and message_ids[position]}
+            existing = set(Message.objects.filter(id__in=wanted).values_list('id', flat=True)) if wanted else set()
+
+            def message_for(record):
+                for position in record['positions']:
+                    if position < len(message_ids) and message_ids[position] in existing:
+                        return message_ids[position]
+                return None
+
+            TranslationHistory.objects.bulk_create([
+                TranslationHistory(
+                    message_id=message_for(record),
+                    source_text=record['text'][:1000],  # Limit length
+                    translated_text=record['translated_text'][:1000],
+                    source_language=record['source_language'],
+                    target_language=record['target_language'],
+                    translation_service='google',
+                    confidence_score=0.0 if record['failed'] else 0.95,
+                    is_medical_terminology=bool(record['context']),
+                    processing_time_ms=None if record['failed'] else record['processing_time_ms']
+                )
+                for record in records
+            ])
         except Exception as e:
             logger.error(f"Failed to save translation history: {e}")
 
@@ -231,31 +176,7 @@ class EnhancedGoogleTranslateService(Translator):
         """
         Translate multiple texts efficiently using batch API.
         """
-        if not texts:
-            return []
-
-        try:
-            # Google Translate API supports batch translation
-            params = {
-                'q': texts,
-                'source': from_lang,
-                'target': to_lang,
-                'key': self.api_key,
-                'format': 'text'
-            }
-
-            response = requests.post(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
-
-            result = response.json()
-            translations = [t['translatedText'] for t in result['data']['translations']]
-            
-            logger.info(f"Batch translated {len(texts)} texts: {from_lang} -> {to_lang}")
-            return translations
-
-        except requests.RequestException as e:
-            logger.error(f"Batch translation error: {e}")
-            return texts  # Return original texts if translation fails
+        return self.translate_many([(text, from_lang, to_lang) for text in texts])
 
 
 class EnhancedTranslationService:
@@ -333,6 +254,39 @@ class EnhancedTranslationService:
                 'error': str(e)
             }
 
+    def translate_batch(self, texts: List[str], target_lang: str,
+                        source_lang: Optional[str] = None,
+                        message_ids: Optional[List[Optional[int]]] = None) -> List[str]:
+        """
+        Translate multiple texts (e.g. reminder broadcasts or message history)
+        through the translator's batch pipeline.
+
+        Args:
+            texts: Texts to translate
+            target_lang: Target language code
+            source_lang: Optional source language (detected per text if not provided)
+            message_ids: Optional message ID for each text, for history tracking
+
+        Returns:
+            Translated texts in order
+        """
+        results = list(texts)
+        positions, items = [], []
+        for position, text in enumerate(texts):
+            detected_lang = source_lang or self.detector.detect(text)
+            if detected_lang != target_lang:
+                positions.append(position)
+                items.append((text, detected_lang, target_lang))
+
+        if hasattr(self.translator, 'translate_many'):
+            ids = [message_ids[position] for position in positions] if message_ids else None
+            translations = self.translator.translate_many(items, message_ids=ids)
+        else:
+            translations = [self.translator.translate(*item) for item in items]
+        for position, translated_text in zip(positions, translations):
+            results[position] = translated_text
+        return results
+
     def detect_language(self, text: str) -> str:
         """Detect language of text"""
         return self.detector.detect(text)
@@ -368,13 +322,13 @@ class EnhancedTranslationService:
         total_count = translations.count()
         medical_count = translations.filter(is_medical_terminology=True).count()
         avg_processing_time = translations.aggregate(
-            avg_time=models.Avg('processing_time_ms')
+            avg_time=Avg('processing_time_ms')
         )['avg_time'] or 0
         
         avg_quality = translations.filter(
             quality_score__isnull=False
         ).aggregate(
-            avg_quality=models.Avg('quality_score')
+            avg_quality=Avg('quality_score')
         )['avg_quality'] or 0
 
         return {
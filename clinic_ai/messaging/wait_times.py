@@ -0,0 +1,279 @@
+"""
+Historical wait-time model for slot scoring.
+A nightly rollup folds completed visits into per-doctor weekday x hour
+tables, applying only the visits saved since its last run as deltas. The
+scheduler reads the tables from an in-process copy, so scoring a slot is an
+O(1) lookup.
+"""
+
+import logging
+import math
+import time
+from array import array
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Optional, Tuple
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..core.models import Appointment, RollupCheckpoint, WaitTimeContribution, WaitTimeRollup
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 7 * 24
+ROLLUP_NAME = 'wait_times'
+CHUNK_SIZE = 2000
+
+
+def week_hour(moment: datetime) -> int:
+    """Cell of a moment in the weekday-major 7 x 24 table (local time)."""
+    local = timezone.localtime(moment)
+    return local.weekday() * 24 + local.hour
+
+
+def unpack_sums(data) -> array:
+    sums = array('d')
+    if data:
+        sums.frombytes(bytes(data))
+    return sums if len(sums) == HOURS_PER_WEEK else array('d', [0.0]) * HOURS_PER_WEEK
+
+
+def unpack_counts(data) -> array:
+    counts = array('I')
+    if data:
+        counts.frombytes(bytes(data))
+    return counts if len(counts) == HOURS_PER_WEEK else array('I', [0]) * HOURS_PER_WEEK
+
+
+def _contribution(status: str, doctor_id: Optional[int], scheduled_at: datetime,
+                  checked_in_at: Optional[datetime], seen_at: Optional[datetime],
+                  cutoff: datetime) -> Optional[Tuple[int, int, float]]:
+    """(doctor ID, cell, wait minutes) a visit adds to the rollup, or None."""
+    if (status != 'completed' or doctor_id is None or checked_in_at is None or seen_at is None
+            or seen_at < checked_in_at or seen_at > cutoff):
+        return None
+    return doctor_id, week_hour(scheduled_at), (seen_at - checked_in_at).total_seconds() / 60
+
+
+def rollup_wait_times(full: bool = False) -> int:
+    """
+    Fold completed visits into WaitTimeRollup.
+
+    Wait time is seen_at - checked_in_at, filed under the hour the visit was
+    scheduled for. What each visit added is kept as a WaitTimeContribution.
+
+    Incremental runs read only the appointments saved since the last run
+    (updated_at) that are completed or were counted before. This covers
+    visits marked completed long after they were seen, edited check-in or
+    seen times and reassigned or reopened visits. Each one's previous
+    contribution is subtracted and its new one added, and only the affected
+    doctors' rollups are rewritten. A full run rebuilds everything from the
+    whole history; it also drops visits that were deleted.
+
+    Args:
+        full: Rebuild from the whole history instead of the changed visits
+
+    Returns:
+        Number of visits whose contribution was added, changed or removed
+    """
+    cutoff = timezone.now()
+    folded = 0
+    deltas: Dict[int, Tuple[array, array]] = {}
+
+    def add(doctor_id: int, cell: int, minutes: float, visits: int) -> None:
+        sums, counts = deltas.setdefault(
+            doctor_id, (array('d', [0.0]) * HOURS_PER_WEEK, array('i', [0]) * HOURS_PER_WEEK)
+        )
+        sums[cell] += minutes
+        counts[cell] += visits
+
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+        rebuild = full or checkpoint.watermark is None
+        if rebuild:
+            WaitTimeRollup.objects.all().delete()
+            WaitTimeContribution.objects.all().delete()
+            visits = Appointment.objects.filter(
+                status='completed',
+                assigned_doctor__isnull=False,
+                checked_in_at__isnull=False,
+                seen_at__gte=F('checked_in_at'),
+                seen_at__lte=cutoff
+            )
+        else:
+            visits = Appointment.objects.filter(
+                Q(status='completed') | Q(wait_time_contribution__isnull=False),
+                updated_at__gt=checkpoint.watermark,
+                updated_at__lte=cutoff
+            )
+        rows = visits.order_by().values_list(
+            'id', 'status', 'assigned_doctor', 'scheduled_at', 'checked_in_at', 'seen_at'
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+        while True:
+            chunk = list(islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+            previous = {} if rebuild else {
+                appointment_id: (doctor_id, cell, minutes)
+                for appointment_id, doctor_id, cell, minutes in WaitTimeContribution.objects.filter(
+                    appointment_id__in=[row[0] for row in chunk]
+                ).values_list('appointment_id', 'doctor_id', 'cell', 'wait_minutes')
+            }
+            current, removed = [], []
+            for appointment_id, *visit in chunk:
+                old = previous.get(appointment_id)
+                new = _contribution(*visit, cutoff)
+                if old == new:
+                    continue
+                folded += 1
+                if old is not None:
+                    add(old[0], old[1], -old[2], -1)
+                if new is None:
+                    removed.append(appointment_id)
+                else:
+                    add(new[0], new[1], new[2], 1)
+                    current.append(WaitTimeContribution(
+                        appointment_id=appointment_id, doctor_id=new[0], cell=new[1], wait_minutes=new[2]
+                    ))
+            WaitTimeContribution.objects.filter(appointment_id__in=removed).delete()
+            WaitTimeContribution.objects.bulk_create(
+                current, update_conflicts=True, unique_fields=['appointment'],
+                update_fields=['doctor', 'cell', 'wait_minutes', 'updated_at']
+            )
+
+        rollups = {
+            rollup.doctor_id: rollup
+            for rollup in WaitTimeRollup.objects.filter(doctor_id__in=list(deltas))
+        }
+        created, updated = [], []
+        for doctor_id, (sum_deltas, count_deltas) in deltas.items():
+            rollup = rollups.get(doctor_id)
+            sums = unpack_sums(rollup.wait_minutes if rollup else None)
+            counts = unpack_counts(rollup.visit_counts if rollup else None)
+            for cell in range(HOURS_PER_WEEK):
+                if count_deltas[cell] or sum_deltas[cell]:
+                    counts[cell] = max(0, counts[cell] + count_deltas[cell])
+                    # An emptied cell drops its floating-point remainder
+                    sums[cell] = sums[cell] + sum_deltas[cell] if counts[cell] else 0.0
+            if rollup is None:
+                created.append(WaitTimeRollup(
+                    doctor_id=doctor_id, wait_minutes=sums.tobytes(), visit_counts=counts.tobytes()
+                ))
+            else:
+                rollup.wait_minutes = sums.tobytes()
+                rollup.visit_counts = counts.tobytes()
+                rollup.updated_at = cutoff
+                updated.append(rollup)
+        WaitTimeRollup.objects.bulk_create(created)
+        WaitTimeRollup.objects.bulk_update(updated, ['wait_minutes', 'visit_counts', 'updated_at'])
+
+        checkpoint.watermark = cutoff
+        checkpoint.save()
+
+    logger.info(f"Wait-time rollup folded {folded} visits for {len(deltas)} doctors")
+    if rebuild or deltas:
+        get_wait_time_model().publish()
+    return folded
+
+
+class WaitTimeModel:
+    """
+    In-process copy of the wait-time rollups.
+    Holds average wait minutes per cell for every doctor plus a clinic-wide
+    table for cells where a doctor has too few visits. Reloaded when the
+    rollup publishes a new version through the cache.
+    """
+
+    VERSION_KEY = 'wait_time_model:version'
+
+    def __init__(self, min_visits: int = 5, max_staleness: float = 300.0):
+        """
+        Initialize model.
+
+        Args:
+            min_visits: Visits a cell needs before its average is trusted
+            max_staleness: Seconds between checks for a newer rollup
+        """
+        self.min_visits = min_visits
+        self.max_staleness = max_staleness
+        self._averages: Dict[int, array] = {}
+        self._clinic = array('d', [math.nan]) * HOURS_PER_WEEK
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def _refresh(self) -> None:
+        if self._version is not None and time.monotonic() - self._checked_at < self.max_staleness:
+            return
+        try:
+            version = cache.get(self.VERSION_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Wait-time model version lookup failed: {e}")
+            version = self._version or 0
+        if version != self._version:
+            self._load()
+            self._version = version
+        self._checked_at = time.monotonic()
+
+    def _load(self) -> None:
+        """Turn the packed rollups into per-cell averages."""
+        averages = {}
+        clinic_sums = array('d', [0.0]) * HOURS_PER_WEEK
+        clinic_counts = array('I', [0]) * HOURS_PER_WEEK
+
+        for doctor_id, wait_minutes, visit_counts in WaitTimeRollup.objects.values_list(
+            'doctor_id', 'wait_minutes', 'visit_counts'
+        ):
+            sums, counts = unpack_sums(wait_minutes), unpack_counts(visit_counts)
+            table = array('d', [math.nan]) * HOURS_PER_WEEK
+            for index in range(HOURS_PER_WEEK):
+                clinic_sums[index] += sums[index]
+                clinic_counts[index] += counts[index]
+                if counts[index] >= self.min_visits:
+                    table[index] = sums[index] / counts[index]
+            averages[doctor_id] = table
+
+        clinic = array('d', [math.nan]) * HOURS_PER_WEEK
+        for index in range(HOURS_PER_WEEK):
+            if clinic_counts[index] >= self.min_visits:
+                clinic[index] = clinic_sums[index] / clinic_counts[index]
+
+        self._averages, self._clinic = averages, clinic
+
+    def average_wait(self, doctor_id: Optional[int], moment: datetime) -> Optional[float]:
+        """
+        Average wait in minutes for a doctor at a moment's weekday and hour.
+
+        Falls back to the clinic-wide average, and to None when neither has
+        enough history.
+        """
+        return self.cell_average(doctor_id, week_hour(moment))
+
+    def cell_average(self, doctor_id: Optional[int], index: int) -> Optional[float]:
+        """Same as average_wait for a precomputed week_hour() cell."""
+        self._refresh()
+        table = self._averages.get(doctor_id)
+        if table is not None and not math.isnan(table[index]):
+            return table[index]
+        if not math.isnan(self._clinic[index]):
+            return self._clinic[index]
+        return None
+
+    def publish(self) -> None:
+        """Tell every process that a new rollup is available."""
+        try:
+            cache.add(self.VERSION_KEY, 0, timeout=None)
+            cache.incr(self.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Wait-time model version bump failed: {e}")
+        self._version = None
+
+
+_wait_time_model = WaitTimeModel()
+
+
+def get_wait_time_model() -> WaitTimeModel:
+    """Get the process-wide wait-time model."""
+    return _wait_time_model
@@ -0,0 +1,200 @@
+"""
+Event-driven waitlist matching for freed appointment slots.
+Matches a released interval against waiting entries for the same doctor and
+day instead of rescanning the whole waitlist on every run.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from ..core.models import AppointmentWaitlist, Doctor
+from .availability import AvailabilityEngine
+from .booking_index import BookingIndex, get_booking_index
+
+logger = logging.getLogger(__name__)
+
+
+class WaitlistMatcher:
+    """
+    Matches freed slots to the highest-priority waitlist entries.
+    Lookups go through the (doctor, preferred_date, status, priority) index,
+    so the cost of a match depends on one doctor-day, not the waitlist size.
+    """
+
+    RELEASED_STATUSES = ['cancelled', 'no_show']
+
+    def __init__(self, candidates_per_slot: int = 1,
+                 notification_ttl: timedelta = timedelta(hours=24),
+                 booking_index: Optional[BookingIndex] = None):
+        """
+        Initialize matcher.
+
+        Args:
+            candidates_per_slot: Waitlist entries notified for each freed slot
+            notification_ttl: How long a notified entry may claim the slot
+            booking_index: Interval index of booked appointments
+        """
+        self.candidates_per_slot = candidates_per_slot
+        self.notification_ttl = notification_ttl
+        self.booking_index = booking_index or get_booking_index()
+
+    def release(self, doctor_id: Optional[int], scheduled_at: datetime,
+                duration: Optional[timedelta] = None) -> int:
+        """
+        Handle an appointment that was cancelled, moved or marked no_show.
+
+        Args:
+            doctor_id: Doctor of the released appointment
+            scheduled_at: Start time that was released
+            duration: Released length; defaults to the doctor's slot length
+
+        Returns:
+            Number of waitlist entries notified
+        """
+        if doctor_id is None:
+            return 0
+        try:
+            doctor = Doctor.objects.filter(id=doctor_id).first()
+            if doctor is None:
+                return 0
+            return self.match_freed_slot(
+                doctor, scheduled_at,
+                scheduled_at + (duration or doctor.average_appointment_duration)
+            )
+        except Exception as e:
+            logger.error(f"Waitlist matching failed for doctor {doctor_id} at {scheduled_at}: {e}")
+            return 0
+
+    def match_freed_slot(self, doctor: Doctor, start: datetime, end: datetime) -> int:
+        """
+        Notify the best waitlist candidates for a freed interval.
+
+        Args:
+            doctor: Doctor whose interval became free
+            start: Interval start
+            end: Interval end
+
+        Returns:
+            Number of waitlist entries notified
+        """
+        if start < timezone.now():
+            return 0
+
+        # Someone may already have taken the slot again
+        if self.booking_index.overlaps(doctor, start, end):
+            return 0
+
+        local_start = timezone.localtime(start)
+        local_end = timezone.localtime(end)
+        if local_end.date() != local_start.date():
+            return 0
+
+        with transaction.atomic():
+            candidate_ids = list(
+                AppointmentWaitlist.objects.select_for_update(skip_locked=True).filter(
+                    doctor=doctor,
+                    preferred_date=local_start.date(),
+                    status='waiting',
+                    preferred_time_start__lte=local_start.time(),
+                    preferred_time_end__gte=local_end.time()
+                ).order_by('-priority_score', 'created_at').values_list(
+                    'id', flat=True
+                )[:self.candidates_per_slot]
+            )
+            notified = self._notify(candidate_ids)
+
+        if notified:
+            logger.info(f"Notified {notified} waitlist entries for Dr. {doctor.name} at {start}")
+        return notified
+
+    def reconcile(self, chunk_size: int = 500) -> int:
+        """
+        Reconciliation pass over the whole waitlist.
+
+        Catches matches the event-driven path missed (e.g. availability
+        changes). Entries are streamed per doctor in chunks, availability is
+        computed once per doctor, and each free slot goes to at most
+        `candidates_per_slot` entries in priority order.
+
+        Args:
+            chunk_size: Number of waitlist rows fetched per round trip
+
+        Returns:
+            Number of waitlist entries notified
+        """
+        today = timezone.localdate()
+        expired = AppointmentWaitlist.objects.filter(
+            status='waiting', preferred_date__lt=today
+        ).update(status='expired')
+        if expired:
+            logger.info(f"Expired {expired} past-dated waitlist entries")
+
+        notified = 0
+        doctor_ranges = AppointmentWaitlist.objects.filter(
+            status='waiting'
+        ).order_by().values('doctor').annotate(
+            first_date=Min('preferred_date'), last_date=Max('preferred_date')
+        )
+
+        for row in doctor_ranges:
+            doctor = Doctor.objects.get(id=row['doctor'])
+            engine = AvailabilityEngine(doctor, self.booking_index)
+            engine.load(row['first_date'], row['last_date'])
+            claims: Dict[datetime, int] = {}
+            pending_ids: List[int] = []
+
+            entries = AppointmentWaitlist.objects.filter(
+                doctor=doctor, status='waiting'
+            ).order_by('preferred_date', '-priority_score', 'created_at').values_list(
+                'id', 'preferred_date', 'preferred_time_start', 'preferred_time_end'
+            )
+            for entry_id, preferred_date, time_start, time_end in entries.iterator(chunk_size=chunk_size):
+                slot = self._first_open_slot(
+                    engine, preferred_date, time_start, time_end, claims
+                )
+                if slot is None:
+                    continue
+                claims[slot] = claims.get(slot, 0) + 1
+                pending_ids.append(entry_id)
+                if len(pending_ids) >= chunk_size:
+                    notified += self._notify(pending_ids)
+                    pending_ids = []
+
+            notified += self._notify(pending_ids)
+
+        return notified
+
+    def _first_open_slot(self, engine: AvailabilityEngine, preferred_date: date,
+                         time_start, time_end, claims: Dict[datetime, int]) -> Optional[datetime]:
+        """Earliest free slot inside the entry's window that still has room."""
+        slot_minutes = engine.slot_minutes
+        window_start = time_start.hour * 60 + time_start.minute
+        window_end = time_end.hour * 60 + time_end.minute
+        now = timezone.now()
+
+        for slot in engine.free_slots(preferred_date, preferred_date):
+            local = timezone.localtime(slot)
+            minute = local.hour * 60 + local.minute
+            if minute < window_start or minute + slot_minutes > window_end:
+                continue
+            if slot < now or claims.get(slot, 0) >= self.candidates_per_slot:
+                continue
+            return slot
+        return None
+
+    def _notify(self, entry_ids: List[int]) -> int:
+        """Mark waitlist entries as notified in a single update."""
+        if not entry_ids:
+            return 0
+        now = timezone.now()
+        return AppointmentWaitlist.objects.filter(
+            id__in=entry_ids, status='waiting'
+        ).update(
+            status='notified',
+            notified_at=now,
+            expires_at=now + self.notification_ttl
+        )
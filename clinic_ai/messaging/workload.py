@@ -0,0 +1,153 @@
+"""
+Doctor workload counts for scheduling and the capacity dashboard.
+Per doctor-day booking counts for short upcoming ranges come from the
+booking index (its doctor-day buckets are kept current by the booking
+signals); past and long ranges use one grouped database aggregate.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..core.models import Appointment, Doctor
+from .booking_index import ACTIVE_APPOINTMENT_STATUSES, BookingIndex, get_booking_index, slot_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class WorkloadService:
+    """
+    Active bookings per doctor per day.
+
+    Upcoming ranges of up to CLINIC_AI['WORKLOAD_HOT_DAYS'] days are read
+    from the booking index, which is updated incrementally on every booking
+    change and is already primed by slot searches over the same days. Past
+    and longer ranges use a single TruncDate/Count aggregate instead of
+    loading appointments.
+    """
+
+    def __init__(self, booking_index: Optional[BookingIndex] = None,
+                 hot_days: Optional[int] = None):
+        """
+        Initialize service.
+
+        Args:
+            booking_index: Interval index of booked appointments
+            hot_days: Longest range served from the booking index (defaults
+                to CLINIC_AI['WORKLOAD_HOT_DAYS'])
+        """
+        self.booking_index = booking_index or get_booking_index()
+        self.hot_days = hot_days or settings.CLINIC_AI.get('WORKLOAD_HOT_DAYS', 14)
+
+    def in_hot_window(self, start_date: date, end_date: date) -> bool:
+        """Check whether a date range is served from the booking index."""
+        return start_date >= timezone.localdate() and (end_date - start_date).days < self.hot_days
+
+    def day_count(self, doctor: Doctor, day: date) -> int:
+        """Number of active bookings starting on a doctor-day."""
+        return self.daily_counts(doctor, day, day)[day]
+
+    def daily_counts(self, doctor: Doctor, start_date: date, end_date: date) -> Dict[date, int]:
+        """
+        Active bookings per day for one doctor.
+
+        Returns:
+            Count for every day from start_date to end_date (inclusive)
+        """
+        return self.clinic_daily_counts([doctor], start_date, end_date)[doctor.id]
+
+    def clinic_daily_counts(self, doctors: List[Doctor], start_date: date,
+                            end_date: date) -> Dict[int, Dict[date, int]]:
+        """
+        Active bookings per day for several doctors.
+
+        Costs the same round trips as a single doctor: one booking index
+        prime inside the hot window, one grouped query outside it.
+
+        Returns:
+            Mapping of doctor ID to a count for every day in the range
+        """
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        if self.in_hot_window(start_date, end_date):
+            self.booking_index.prime_many(doctors, start_date, end_date)
+            return {
+                doctor.id: {day: self.booking_index.day_count(doctor, day) for day in days}
+                for doctor in doctors
+            }
+
+        counts = {doctor.id: dict.fromkeys(days, 0) for doctor in doctors}
+        for doctor_id, day, count in self._aggregate(
+            [doctor.id for doctor in doctors], start_date, end_date
+        ):
+            counts[doctor_id][day] = count
+        return counts
+
+    def _aggregate(self, doctor_ids: List[int], start_date: date, end_date: date):
+        """(doctor ID, local day, count) rows from one grouped query."""
+        return Appointment.objects.filter(
+            assigned_doctor_id__in=doctor_ids,
+            scheduled_at__gte=slot_datetime(start_date, 0),
+            scheduled_at__lt=slot_datetime(end_date + timedelta(days=1), 0),
+            status__in=ACTIVE_APPOINTMENT_STATUSES
+        ).annotate(
+            day=TruncDate('scheduled_at', tzinfo=timezone.get_current_timezone())
+        ).values('assigned_doctor_id', 'day').annotate(
+            count=Count('id')
+        ).values_list('assigned_doctor_id', 'day', 'count')
+
+    def clinic_week(self, start_date: Optional[date] = None, days: int = 7,
+                    doctors: Optional[List[Doctor]] = None) -> Dict:
+        """
+        Workload of the whole clinic for the capacity dashboard.
+
+        Args:
+            start_date: First day (defaults to today)
+            days: Number of days covered
+            doctors: Doctors to include (defaults to all active doctors)
+
+        Returns:
+            Dict with per-doctor daily counts and utilization plus clinic totals
+        """
+        start_date = start_date or timezone.localdate()
+        end_date = start_date + timedelta(days=days - 1)
+        if doctors is None:
+            doctors = list(Doctor.objects.filter(is_active=True).order_by('name'))
+
+        counts = self.clinic_daily_counts(doctors, start_date, end_date)
+        daily_totals: Dict[str, int] = {}
+        capacity = 0
+        rows = []
+        for doctor in doctors:
+            breakdown = {day.isoformat(): count for day, count in counts[doctor.id].items()}
+            for day, count in breakdown.items():
+                daily_totals[day] = daily_totals.get(day, 0) + count
+            total = sum(breakdown.values())
+            doctor_capacity = doctor.max_daily_appointments * days
+            capacity += doctor_capacity
+            rows.append({
+                'doctor_id': doctor.id,
+                'doctor_name': doctor.name,
+                'max_daily_appointments': doctor.max_daily_appointments,
+                'total_appointments': total,
+                'utilization': round(total / doctor_capacity, 3) if doctor_capacity else 0.0,
+                'daily_breakdown': breakdown,
+            })
+
+        total = sum(daily_totals.values())
+        return {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'doctors': rows,
+            'daily_totals': daily_totals,
+            'total_appointments': total,
+            'utilization': round(total / capacity, 3) if capacity else 0.0,
+        }
+
+
+def get_workload_service() -> WorkloadService:
+    """Get a workload service backed by the process-wide booking index."""
+    return WorkloadService()
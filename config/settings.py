@@ -5,6 +5,7 @@ Integrated with existing clinic_ai modules.
 
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 # Import Sentry configuration
@@ -130,6 +131,26 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Edmonton'
+CELERY_BEAT_SCHEDULE = {
+    # Freed slots are matched on cancellation; this only catches stragglers
+    'reconcile-waitlist': {
+        'task': 'clinic_ai.messaging.tasks.reconcile_waitlist',
+        'schedule': 6 * 60 * 60,
+    },
+    'rollup-wait-times': {
+        'task': 'clinic_ai.messaging.tasks.rollup_wait_times',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'rollup-optimizations': {
+        'task': 'clinic_ai.messaging.tasks.rollup_optimizations',
+        'schedule': 60 * 60,
+    },
+    # The chat only reads next-slot lists; this builds the ones a change retired
+    'warm-next-slots': {
+        'task': 'clinic_ai.messaging.tasks.warm_next_slots',
+        'schedule': 60,
+    },
+}
 
 # REST Framework configuration
 REST_FRAMEWORK = {
@@ -257,7 +278,28 @@ CLINIC_AI = {
         'language_detection': config('LANGUAGE_DETECTION_CACHE_TTL', default=86400, cast=int),
         'ai_response': config('AI_RESPONSE_CACHE_TTL', default=1800, cast=int),
     },
+    # Per-process LRU in front of Redis (core.cache.TwoTierCacheService)
+    'LOCAL_CACHE': {
+        'max_entries': config('LOCAL_CACHE_MAX_ENTRIES', default=2048, cast=int),
+        'max_bytes': config('LOCAL_CACHE_MAX_BYTES', default=8 * 1024 * 1024, cast=int),
+        'ttl': 300,  # seconds an entry is served without asking Redis
+        'negative_ttl': 30,  # seconds a Redis miss is remembered
+        'check_interval': 5,  # seconds between invalidation broadcast checks
+    },
+    # Seconds between background writes of buffered MedicalTerminology usage counts
+    'TERMINOLOGY_USAGE_FLUSH_INTERVAL': config('TERMINOLOGY_USAGE_FLUSH_INTERVAL', default=30, cast=int),
     
+    # Scheduling
+    'SLOT_HOLD_TTL': config('SLOT_HOLD_TTL', default=300, cast=int),  # seconds a slot stays held
+    # Maximum points per slot scoring factor (proximity, workload, time_of_day,
+    # wait_history); unset factors use slot_scoring.DEFAULT_SCORING_WEIGHTS
+    'SCHEDULING_WEIGHTS': {},
+    # Materialized next free slots per doctor and procedure type
+    'NEXT_SLOTS_HORIZON_DAYS': config('NEXT_SLOTS_HORIZON_DAYS', default=14, cast=int),
+    'NEXT_SLOTS_COUNT': config('NEXT_SLOTS_COUNT', default=10, cast=int),
+    # Longest upcoming range whose workload counts come from the booking index
+    'WORKLOAD_HOT_DAYS': config('WORKLOAD_HOT_DAYS', default=14, cast=int),
+
     # Metrics and Analytics
     'ENABLE_METRICS': config('ENABLE_METRICS', default=True, cast=bool),
     'METRICS_RETENTION_DAYS': config('METRICS_RETENTION_DAYS', default=90, cast=int),
@@ -0,0 +1,1478 @@
+"""
+Tests for the Phase 2 scheduling optimizer and its availability engine.
+Covers slot search, booking checks and query bounds against a real test database.
+"""
+import itertools
+from datetime import date, datetime, timedelta, time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from clinic_ai.core.backfill import backfill_appointment_doctors
+from clinic_ai.core.models import (
+    Appointment, AppointmentReminder, AppointmentWaitlist, AvailabilityException, ClinicResource, Doctor, DoctorAvailability, Patient,
+    OptimizationRollup, ProcedureType, SchedulingOptimization
+)
+from clinic_ai.messaging.assignment import solve_assignment
+from clinic_ai.messaging.availability import AvailabilityEngine, run_start_mask, interval_mask
+from clinic_ai.messaging.availability_exceptions import get_exception_index, subtract_intervals
+from clinic_ai.messaging.booking_index import BookingIndex, get_booking_index
+from clinic_ai.messaging.bulk_rescheduler import BulkRescheduler
+from clinic_ai.messaging.group_booking import GroupBookingAllocator
+from clinic_ai.messaging.next_slots import NextSlotCache
+from clinic_ai.messaging.optimization_analytics import rollup_optimizations
+from clinic_ai.messaging.resource_index import UsageTree, get_resource_index
+from clinic_ai.messaging.scheduling_optimizer import AdvancedSchedulingOptimizer
+from clinic_ai.messaging.simulation import run_simulation, run_sweep
+from clinic_ai.messaging.slot_scoring import SlotScorer, day_minute, ordinal_minute
+from clinic_ai.messaging.wait_times import WaitTimeModel, rollup_wait_times
+from clinic_ai.messaging.waitlist_matcher import WaitlistMatcher
+from clinic_ai.messaging.workload import WorkloadService
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'scheduling-tests',
+    }
+}
+
+# Monday, so weekday() == 0 lines up with the availability fixtures
+MONDAY = date(2030, 1, 7)
+
+
+def aware(day, hour, minute=0):
+    """Build an aware datetime in the project timezone."""
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SchedulingTestCase(TestCase):
+    """Shared fixtures: one doctor working 9-12 on weekdays with 30 minute slots."""
+
+    def setUp(self):
+        cache.clear()
+        get_booking_index().clear()
+        get_resource_index().clear()
+        get_exception_index().clear()
+        self.doctor = Doctor.objects.create(
+            name='Dr. Test',
+            specialization='Dermatology',
+            max_daily_appointments=10,
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        for weekday in range(5):
+            DoctorAvailability.objects.create(
+                doctor=self.doctor,
+                weekday=weekday,
+                start_time=time(9, 0),
+                end_time=time(12, 0)
+            )
+        self.patient = Patient.objects.create(phone='+82-10-0000-0001', name='Test Patient')
+        self.optimizer = AdvancedSchedulingOptimizer()
+
+    def book(self, when, status='confirmed'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Appointment.objects.create(
+                patient=self.patient,
+                doctor=self.doctor.name,
+                procedure='consultation',
+                scheduled_at=when,
+                status=status
+            )
+
+
+class TestBitmapHelpers(TestCase):
+    """Bitmap primitives used by the availability engine."""
+
+    def test_run_start_mask_requires_full_run(self):
+        free = interval_mask(10, 20) | interval_mask(30, 35)
+        starts = run_start_mask(free, 5)
+        self.assertEqual(
+            [m for m in range(40) if starts >> m & 1],
+            [10, 11, 12, 13, 14, 15, 30]
+        )
+
+
+class TestAvailabilityEngine(SchedulingTestCase):
+    """Bitmap availability engine behaviour."""
+
+    def test_free_slots_skip_booked_and_overlapping(self):
+        self.book(aware(MONDAY, 10, 0))
+        self.book(aware(MONDAY, 11, 15), status='pending')
+        self.book(aware(MONDAY, 9, 0), status='cancelled')
+
+        slots = self.optimizer.find_available_slots(
+            self.doctor, (aware(MONDAY, 0), aware(MONDAY, 23))
+        )
+
+        self.assertEqual(
+            [(s.hour, s.minute) for s in slots],
+            [(9, 0), (9, 30), (10, 30)]
+        )
+
+    def test_query_count_is_bounded_by_range_width(self):
+        self.book(aware(MONDAY, 10, 0))
+        start = aware(MONDAY, 0)
+
+        # Windows, closure weeks and bookings, however wide the range
+        with self.assertNumQueries(3):
+            week = AvailabilityEngine(self.doctor).free_slots(MONDAY, MONDAY + timedelta(days=6))
+        with self.assertNumQueries(3):
+            quarter = AvailabilityEngine(self.doctor).free_slots(MONDAY, MONDAY + timedelta(days=90))
+
+        self.assertEqual(len(week), 5 * 6 - 1)
+        self.assertGreater(len(quarter), len(week))
+        self.assertTrue(all(slot >= start for slot in quarter))
+
+    def test_alternative_slot_is_closest_free_slot(self):
+        for hour, minute in [(9, 0), (9, 30), (10, 0), (10, 30), (11, 0), (11, 30)]:
+            self.book(aware(MONDAY, hour, minute))
+
+        alternative = self.optimizer._find_alternative_slot(
+            self.doctor, aware(MONDAY, 11, 30), 'consultation'
+        )
+
+        self.assertEqual(alternative, aware(MONDAY + timedelta(days=1), 9, 0))
+
+
+class TestBookingIndex(SchedulingTestCase):
+    """Interval index of booked appointments."""
+
+    def test_overlap_checks_respect_slot_length(self):
+        self.book(aware(MONDAY, 10, 0))
+        index = get_booking_index()
+
+        self.assertTrue(index.overlaps(self.doctor, aware(MONDAY, 9, 45), aware(MONDAY, 10, 15)))
+        self.assertTrue(index.overlaps(self.doctor, aware(MONDAY, 10, 29), aware(MONDAY, 10, 59)))
+        self.assertFalse(index.overlaps(self.doctor, aware(MONDAY, 10, 30), aware(MONDAY, 11, 0)))
+        self.assertFalse(index.overlaps(self.doctor, aware(MONDAY, 9, 30), aware(MONDAY, 10, 0)))
+
+    def test_late_slot_is_checked_against_next_morning(self):
+        tuesday = MONDAY + timedelta(days=1)
+        self.book(aware(tuesday, 0, 0))
+        index = get_booking_index()
+
+        self.assertTrue(index.overlaps(self.doctor, aware(MONDAY, 23, 45), aware(tuesday, 0, 15)))
+        self.assertFalse(index.overlaps(self.doctor, aware(MONDAY, 23, 30), aware(tuesday, 0, 0)))
+
+    def test_signals_keep_index_current(self):
+        appointment = self.book(aware(MONDAY, 10, 0))
+        index = get_booking_index()
+        self.assertEqual(index.day_count(self.doctor, MONDAY), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.scheduled_at = aware(MONDAY + timedelta(days=1), 9, 0)
+            appointment.save()
+        self.assertEqual(index.day_count(self.doctor, MONDAY), 0)
+        self.assertEqual(index.day_count(self.doctor, MONDAY + timedelta(days=1)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'cancelled'
+            appointment.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(index.day_count(self.doctor, MONDAY + timedelta(days=1)), 0)
+
+    def test_other_workers_read_shared_buckets_from_cache(self):
+        self.book(aware(MONDAY, 10, 0))
+        get_booking_index().prime(self.doctor, MONDAY, MONDAY)
+
+        other_worker = BookingIndex(max_staleness=0)
+        with self.assertNumQueries(0):
+            self.assertEqual(other_worker.day_count(self.doctor, MONDAY), 1)
+
+        self.book(aware(MONDAY, 11, 0))
+        with self.assertNumQueries(0):
+            self.assertEqual(other_worker.day_count(self.doctor, MONDAY), 2)
+
+    def test_scoring_reads_workload_from_index(self):
+        self.book(aware(MONDAY, 10, 0))
+        get_booking_index().prime(self.doctor, MONDAY, MONDAY)
+        self.optimizer.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 0))
+
+        with self.assertNumQueries(0):
+            score = self.optimizer._score_slot(
+                self.doctor, aware(MONDAY, 9, 0), aware(MONDAY, 9, 0), 'consultation'
+            )
+        self.assertGreater(score, 100)
+
+
+class TestBatchAssignment(SchedulingTestCase):
+    """Global min-cost assignment for optimize_schedule."""
+
+    def test_solver_matches_brute_force(self):
+        cost = [
+            [4, 1, 3, 9],
+            [2, 0, 5, 8],
+            [3, 2, 2, 1],
+        ]
+        assignment = solve_assignment(cost)
+        best = min(
+            sum(cost[row][col] for row, col in enumerate(columns))
+            for columns in itertools.permutations(range(4), 3)
+        )
+
+        self.assertEqual(len(set(assignment)), 3)
+        self.assertEqual(sum(cost[row][col] for row, col in enumerate(assignment)), best)
+        # More rows than columns leaves the extra row unmatched
+        self.assertEqual(sorted(solve_assignment([[1], [0], [2]]), key=str), [0, None, None])
+
+    def test_batch_never_double_assigns_a_slot(self):
+        requested = aware(MONDAY, 9, 0)
+        batch = [
+            {'patient_id': n, 'doctor': str(self.doctor.id), 'procedure': 'consultation',
+             'requested_time': requested}
+            for n in range(4)
+        ]
+
+        results = self.optimizer.optimize_schedule(batch)
+
+        optimized_times = [r['optimized_time'] for r in results]
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(set(optimized_times)), 4)
+        self.assertIn(requested, optimized_times)
+
+    def test_requests_beyond_capacity_keep_original_time(self):
+        # Leave a single free slot in the whole search window
+        for day_offset in range(-2, 3):
+            day = MONDAY + timedelta(days=day_offset)
+            for hour, minute in [(9, 0), (9, 30), (10, 0), (10, 30), (11, 0), (11, 30)]:
+                if (day_offset, hour, minute) != (0, 11, 30):
+                    self.book(aware(day, hour, minute))
+
+        requested = aware(MONDAY, 11, 0)
+        results = self.optimizer.optimize_schedule([
+            {'patient_id': n, 'doctor': self.doctor.name, 'procedure': 'consultation',
+             'requested_time': requested}
+            for n in range(2)
+        ])
+
+        self.assertEqual(
+            sorted(r['optimized_time'] for r in results),
+            [requested, aware(MONDAY, 11, 30)]
+        )
+
+
+class TestWaitlistMatcher(SchedulingTestCase):
+    """Event-driven waitlist matching for freed slots."""
+
+    def setUp(self):
+        super().setUp()
+        self.procedure = ProcedureType.objects.create(
+            name='Consultation', estimated_duration=timedelta(minutes=30)
+        )
+
+    def wait(self, priority, day=MONDAY, start=time(9, 0), end=time(12, 0)):
+        return AppointmentWaitlist.objects.create(
+            patient=Patient.objects.create(phone=f'+82-10-1000-{priority:04d}'),
+            doctor=self.doctor,
+            procedure_type=self.procedure,
+            preferred_date=day,
+            preferred_time_start=start,
+            preferred_time_end=end,
+            priority_score=priority
+        )
+
+    def test_cancellation_notifies_best_matching_entry(self):
+        appointment = self.book(aware(MONDAY, 10, 0))
+        low = self.wait(10)
+        high = self.wait(50)
+        outside_window = self.wait(90, start=time(11, 0))
+        other_day = self.wait(99, day=MONDAY + timedelta(days=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'cancelled'
+            appointment.save()
+
+        statuses = dict(AppointmentWaitlist.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[high.id], 'notified')
+        self.assertEqual(statuses[low.id], 'waiting')
+        self.assertEqual(statuses[outside_window.id], 'waiting')
+        self.assertEqual(statuses[other_day.id], 'waiting')
+        self.assertIsNotNone(AppointmentWaitlist.objects.get(id=high.id).expires_at)
+
+    def test_retaken_slot_is_not_offered(self):
+        entry = self.wait(50)
+        get_booking_index().prime(self.doctor, MONDAY, MONDAY)
+        self.book(aware(MONDAY, 10, 0))
+
+        notified = WaitlistMatcher().match_freed_slot(
+            self.doctor, aware(MONDAY, 10, 0), aware(MONDAY, 10, 30)
+        )
+
+        self.assertEqual(notified, 0)
+        self.assertEqual(AppointmentWaitlist.objects.get(id=entry.id).status, 'waiting')
+
+    def test_reconcile_gives_each_free_slot_to_one_entry(self):
+        # Two free slots left on Monday morning
+        for hour, minute in [(9, 0), (9, 30), (10, 0), (10, 30)]:
+            self.book(aware(MONDAY, hour, minute))
+        for priority in (5, 30, 20):
+            self.wait(priority)
+
+        notified = self.optimizer.process_waitlist_notifications()
+
+        statuses = dict(AppointmentWaitlist.objects.values_list('priority_score', 'status'))
+        self.assertEqual(notified, 2)
+        self.assertEqual(statuses, {30: 'notified', 20: 'notified', 5: 'waiting'})
+
+
+class TestAppointmentDoctorLink(SchedulingTestCase):
+    """Doctor foreign key on appointments and its backfill."""
+
+    def test_name_and_foreign_key_stay_in_sync(self):
+        appointment = self.book(aware(MONDAY, 10, 0))
+        self.assertEqual(appointment.assigned_doctor_id, self.doctor.id)
+
+        other = Doctor.objects.create(
+            name='Dr. Other', specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.assigned_doctor = other
+            appointment.save()
+
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.doctor, 'Dr. Other')
+        self.assertEqual(get_booking_index().day_count(self.doctor, MONDAY), 0)
+        self.assertEqual(get_booking_index().day_count(other, MONDAY), 1)
+
+    def test_backfill_links_rows_by_name_in_chunks(self):
+        for hour in (9, 10, 11):
+            self.book(aware(MONDAY, hour, 0))
+        stranger = self.book(aware(MONDAY, 11, 30))
+        Appointment.objects.filter(id=stranger.id).update(doctor='Dr. Unknown')
+        Appointment.objects.update(assigned_doctor=None)
+
+        updated = backfill_appointment_doctors(Appointment, Doctor, chunk_size=2)
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(
+            Appointment.objects.filter(assigned_doctor=self.doctor).count(), 3
+        )
+        self.assertIsNone(Appointment.objects.get(id=stranger.id).assigned_doctor_id)
+
+
+class TestEarliestSlots(SchedulingTestCase):
+    """Cross-doctor earliest slot search."""
+
+    def setUp(self):
+        super().setUp()
+        self.procedure = ProcedureType.objects.create(
+            name='Consultation', estimated_duration=timedelta(minutes=30)
+        )
+        self.other = Doctor.objects.create(
+            name='Dr. Early',
+            specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=20)
+        )
+        DoctorAvailability.objects.create(
+            doctor=self.other, weekday=0, start_time=time(8, 0), end_time=time(9, 0)
+        )
+
+    def test_slots_are_merged_across_doctors_in_time_order(self):
+        self.book(aware(MONDAY, 9, 0))
+
+        slots = self.optimizer.find_earliest_slots(
+            self.procedure, (aware(MONDAY, 0), aware(MONDAY + timedelta(days=30), 23)), limit=4
+        )
+
+        self.assertEqual(
+            [(s['doctor_name'], s['scheduled_at']) for s in slots],
+            [
+                # 30 minute procedures are packed back to back, not on the 20 minute grid
+                ('Dr. Early', aware(MONDAY, 8, 0)),
+                ('Dr. Early', aware(MONDAY, 8, 30)),
+                ('Dr. Test', aware(MONDAY, 9, 30)),
+                ('Dr. Test', aware(MONDAY, 10, 0)),
+            ]
+        )
+
+    def test_query_count_does_not_grow_with_doctors(self):
+        for n in range(5):
+            doctor = Doctor.objects.create(
+                name=f'Dr. Extra {n}', specialization='Dermatology',
+                average_appointment_duration=timedelta(minutes=30)
+            )
+            DoctorAvailability.objects.create(
+                doctor=doctor, weekday=2, start_time=time(9, 0), end_time=time(10, 0)
+            )
+
+        # Doctors, the procedure's resource profile (cached afterwards),
+        # windows, and one closure and one booking fill for the first chunk only
+        with self.assertNumQueries(6):
+            slots = self.optimizer.find_earliest_slots(
+                self.procedure, (aware(MONDAY, 0), aware(MONDAY + timedelta(days=90), 23)), limit=3
+            )
+        self.assertEqual(len(slots), 3)
+
+    def test_endpoint_returns_earliest_slots(self):
+        response = self.client.post('/api/scheduling/earliest-slots/', {
+            'procedure_type_id': self.procedure.id,
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=6)).isoformat(),
+            'limit': 2
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_slots'], 2)
+        self.assertEqual(response.json()['slots'][0]['doctor_id'], self.other.id)
+
+
+class TestLazySlotSearch(SchedulingTestCase):
+    """Generator slot search with early termination."""
+
+    def test_ring_search_yields_slots_by_distance_from_pivot(self):
+        pivot = aware(MONDAY + timedelta(days=2), 12, 0)
+        slots = list(itertools.islice(self.optimizer.iter_available_slots(
+            self.doctor, (aware(MONDAY, 0), aware(MONDAY + timedelta(days=4), 0)), pivot=pivot
+        ), 8))
+
+        distances = [abs((slot - pivot).total_seconds()) for slot in slots]
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(slots[0], aware(MONDAY + timedelta(days=2), 11, 30))
+        # Ring reaches the next morning before the rest of the pivot day
+        self.assertIn(aware(MONDAY + timedelta(days=3), 9, 0), slots)
+
+    def test_preferences_and_first_page_load_a_single_chunk(self):
+        self.book(aware(MONDAY, 9, 0))
+        month = (aware(MONDAY, 0), aware(MONDAY + timedelta(days=60), 0))
+
+        with self.assertNumQueries(3):
+            slots = list(itertools.islice(self.optimizer.iter_available_slots(
+                self.doctor, month, preferences={'preferred_days': [0]}
+            ), 3))
+
+        self.assertEqual(slots, [aware(MONDAY, 9, 30), aware(MONDAY, 10, 0), aware(MONDAY, 10, 30)])
+        self.assertEqual(
+            self.optimizer.find_available_slots(self.doctor, month, {'preferred_days': [0]})[:3],
+            slots
+        )
+
+    def test_optimal_slot_matches_exhaustive_scoring(self):
+        self.book(aware(MONDAY, 9, 0))
+        requested = aware(MONDAY, 14, 0)
+        window = timedelta(days=self.optimizer.OPTIMIZATION_SEARCH_DAYS)
+        candidates = self.optimizer.find_available_slots(
+            self.doctor, (requested - window, requested + window)
+        )
+        expected = max(
+            self.optimizer._score_slot(self.doctor, slot, requested, 'consultation')
+            for slot in candidates
+        )
+
+        optimal = self.optimizer._find_optimal_slot(self.doctor.name, 'consultation', requested)
+
+        self.assertEqual(
+            self.optimizer._score_slot(self.doctor, optimal, requested, 'consultation'), expected
+        )
+
+    def test_optimal_slot_stops_once_no_other_day_can_win(self):
+        self.book(aware(MONDAY, 9, 0))
+        requested = aware(MONDAY, 9, 0)
+        window = timedelta(days=self.optimizer.OPTIMIZATION_SEARCH_DAYS)
+        first_day, last_day = MONDAY - window, MONDAY + window
+        candidates = [
+            ordinal_minute(slot) for slot in self.optimizer.find_available_slots(
+                self.doctor, (requested - window, requested + window)
+            )
+        ]
+        expected = self.optimizer._rank_slots(self.doctor, candidates, first_day, last_day, requested)
+
+        with mock.patch.object(AvailabilityEngine, 'day_free_minutes', autospec=True,
+                               side_effect=AvailabilityEngine.day_free_minutes) as day_free_minutes:
+            optimal = self.optimizer._find_optimal_slot(self.doctor.name, 'consultation', requested)
+
+        self.assertEqual(optimal, expected[0][1])
+        self.assertEqual(optimal, aware(MONDAY, 9, 30))
+        # 9:30 on the requested day beats anything a day further away could score
+        self.assertEqual([call.args[1] for call in day_free_minutes.call_args_list], [MONDAY])
+
+    def test_endpoint_pages_with_cursor(self):
+        payload = {
+            'doctor_id': self.doctor.id,
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=30)).isoformat(),
+            'limit': 4
+        }
+        first = self.client.post('/api/scheduling/available-slots/', payload,
+                                 content_type='application/json').json()
+        second = self.client.post('/api/scheduling/available-slots/',
+                                  dict(payload, cursor=first['next_cursor']),
+                                  content_type='application/json').json()
+
+        self.assertEqual(first['total_slots'], 4)
+        self.assertEqual(first['next_cursor'], first['available_slots'][-1])
+        everything = self.optimizer.find_available_slots(
+            self.doctor, (aware(MONDAY, 0), aware(MONDAY + timedelta(days=30), 0))
+        )
+        self.assertEqual(
+            first['available_slots'] + second['available_slots'],
+            [slot.isoformat() for slot in everything[:8]]
+        )
+
+
+class TestProcedurePacking(SchedulingTestCase):
+    """Procedure footprint sizing and gap packing."""
+
+    def setUp(self):
+        super().setUp()
+        self.surgery = ProcedureType.objects.create(
+            name='Rhinoplasty',
+            estimated_duration=timedelta(minutes=50),
+            preparation_time=timedelta(minutes=15),
+            recovery_time=timedelta(minutes=20)
+        )
+
+    def test_packed_starts_fill_gaps_between_bookings(self):
+        self.book(aware(MONDAY, 10, 0))
+        engine = AvailabilityEngine(self.doctor)
+        engine.load(MONDAY, MONDAY)
+
+        # Free runs 9:00-10:00 and 10:30-12:00
+        self.assertEqual(engine.day_packed_starts(MONDAY, 60), [9 * 60, 10 * 60 + 30])
+        self.assertEqual(engine.day_packed_starts(MONDAY, 85), [10 * 60 + 30])
+        self.assertEqual(engine.day_packed_starts(MONDAY, 20), [540, 560, 580, 630, 650, 670, 690])
+        self.assertEqual(engine.day_packed_starts(MONDAY, 100), [])
+
+    def test_create_appointment_blocks_full_footprint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.optimizer.create_appointment(
+                self.patient.id, self.doctor.name, str(self.surgery.id), aware(MONDAY, 9, 0)
+            )
+        self.assertTrue(result['success'])
+        appointment = Appointment.objects.get(id=result['appointment_id'])
+        self.assertEqual(appointment.duration, timedelta(minutes=85))
+        self.assertEqual(appointment.procedure_type, self.surgery)
+
+        # 10:00 falls inside the surgery's recovery time
+        clash = self.optimizer.create_appointment(
+            self.patient.id, self.doctor.name, 'consultation', aware(MONDAY, 10, 0)
+        )
+        self.assertFalse(clash['success'])
+        self.assertEqual(clash['alternative_slot'], aware(MONDAY, 10, 30))
+
+    def test_short_procedure_fits_where_doctor_slot_would_not(self):
+        quick = ProcedureType.objects.create(name='Check', estimated_duration=timedelta(minutes=15))
+        self.book(aware(MONDAY, 9, 15))
+
+        result = self.optimizer.create_appointment(
+            self.patient.id, self.doctor.name, 'check', aware(MONDAY, 9, 0)
+        )
+        self.assertTrue(result['success'])
+
+        # Outside availability windows is rejected even with no bookings
+        late = self.optimizer.create_appointment(
+            self.patient.id, self.doctor.name, 'check', aware(MONDAY, 12, 0)
+        )
+        self.assertFalse(late['success'])
+        self.assertEqual(quick.total_duration, timedelta(minutes=15))
+
+
+
+class TestResourceCapacity(SchedulingTestCase):
+    """Equipment and room capacity constraints across doctors."""
+
+    def setUp(self):
+        super().setUp()
+        self.other = Doctor.objects.create(
+            name='Dr. Other',
+            specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        DoctorAvailability.objects.create(
+            doctor=self.other, weekday=0, start_time=time(9, 0), end_time=time(12, 0)
+        )
+        self.laser = ClinicResource.objects.create(name='CO2 laser', resource_type='equipment')
+        self.treatment = ProcedureType.objects.create(
+            name='Laser resurfacing', estimated_duration=timedelta(minutes=60)
+        )
+        self.treatment.resources.add(self.laser)
+
+    def book_treatment(self, doctor, start):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.optimizer.create_appointment(
+                self.patient.id, doctor.name, str(self.treatment.id), start
+            )
+
+    def test_usage_tree_peak_and_saturated_ranges(self):
+        tree = UsageTree()
+        tree.add(10, 20, 1)
+        tree.add(15, 30, 1)
+
+        self.assertEqual(tree.peak(0, 10), 0)
+        self.assertEqual(tree.peak(12, 16), 2)
+        self.assertEqual(tree.peak(20, 40), 1)
+        self.assertEqual([lo for lo, _ in tree.saturated(2)], list(range(15, 20)))
+        self.assertEqual([lo for lo, _ in tree.saturated(1)], list(range(10, 30)))
+
+    def test_single_laser_blocks_other_doctor(self):
+        self.assertTrue(self.book_treatment(self.doctor, aware(MONDAY, 9, 0))['success'])
+
+        clash = self.book_treatment(self.other, aware(MONDAY, 9, 30))
+        self.assertFalse(clash['success'])
+        self.assertEqual(clash['alternative_slot'], aware(MONDAY, 10, 0))
+
+        slots = self.optimizer.find_available_slots(
+            self.other, (aware(MONDAY, 0), aware(MONDAY, 23)), procedure_type=self.treatment
+        )
+        self.assertEqual(slots[0], aware(MONDAY, 10, 0))
+        self.assertTrue(all(slot >= aware(MONDAY, 10, 0) for slot in slots))
+
+        # Plain consultations do not need the laser
+        self.assertIn(
+            aware(MONDAY, 9, 0),
+            self.optimizer.find_available_slots(self.other, (aware(MONDAY, 0), aware(MONDAY, 23)))
+        )
+
+    def test_capacity_two_allows_parallel_use(self):
+        self.laser.capacity = 2
+        self.laser.save()
+
+        self.assertTrue(self.book_treatment(self.doctor, aware(MONDAY, 9, 0))['success'])
+        self.assertTrue(self.book_treatment(self.other, aware(MONDAY, 9, 0))['success'])
+
+    def test_cancellation_releases_capacity(self):
+        result = self.book_treatment(self.doctor, aware(MONDAY, 9, 0))
+        appointment = Appointment.objects.get(id=result['appointment_id'])
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'cancelled'
+            appointment.save()
+
+        self.assertTrue(
+            get_resource_index().fits(self.treatment.id, aware(MONDAY, 9, 0), aware(MONDAY, 10, 0))
+        )
+        self.assertTrue(self.book_treatment(self.other, aware(MONDAY, 9, 0))['success'])
+
+    def test_earliest_slots_respect_resources(self):
+        self.book_treatment(self.doctor, aware(MONDAY, 9, 0))
+
+        slots = self.optimizer.find_earliest_slots(
+            self.treatment, (aware(MONDAY, 0), aware(MONDAY, 23)), limit=2
+        )
+        self.assertEqual([slot['scheduled_at'] for slot in slots], [aware(MONDAY, 10, 0), aware(MONDAY, 10, 0)])
+
+
+class TestSlotHolds(SchedulingTestCase):
+    """Slot holds and the locked booking commit."""
+
+    def test_held_slot_rejects_other_patients(self):
+        other = Patient.objects.create(phone='+82-10-0000-0002', name='Other Patient')
+        hold = self.optimizer.hold_slot(self.patient.id, self.doctor, '', aware(MONDAY, 9, 0))
+        self.assertTrue(hold['success'])
+
+        competing = self.optimizer.hold_slot(other.id, self.doctor, '', aware(MONDAY, 9, 0))
+        self.assertFalse(competing['success'])
+        direct = self.optimizer.create_appointment(other.id, self.doctor, '', aware(MONDAY, 9, 0))
+        self.assertFalse(direct['success'])
+        self.assertEqual(direct['alternative_slot'], aware(MONDAY, 9, 30))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmed = self.optimizer.confirm_hold(hold['hold_token'])
+        self.assertTrue(confirmed['success'])
+        self.assertEqual(Appointment.objects.get(id=confirmed['appointment_id']).patient, self.patient)
+
+        # Confirming consumes the hold
+        self.assertFalse(self.optimizer.confirm_hold(hold['hold_token'])['success'])
+
+    def test_hold_is_only_spent_by_its_patient(self):
+        other = Patient.objects.create(phone='+82-10-0000-0002', name='Other Patient')
+        hold = self.optimizer.hold_slot(self.patient.id, self.doctor, '', aware(MONDAY, 9, 0))
+
+        stolen = self.optimizer.create_appointment(
+            other.id, self.doctor, '', aware(MONDAY, 9, 0), hold_token=hold['hold_token']
+        )
+        self.assertFalse(stolen['success'])
+        self.assertFalse(Appointment.objects.filter(patient=other).exists())
+
+        # The hold is still there for the patient it was taken for
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmed = self.optimizer.confirm_hold(hold['hold_token'])
+        self.assertTrue(confirmed['success'])
+
+    def test_released_hold_frees_slot(self):
+        hold = self.optimizer.hold_slot(self.patient.id, self.doctor, '', aware(MONDAY, 9, 0))
+        self.assertTrue(self.optimizer.release_hold(hold['hold_token']))
+        self.assertFalse(self.optimizer.release_hold(hold['hold_token']))
+
+        self.assertTrue(
+            self.optimizer.create_appointment(self.patient.id, self.doctor, '', aware(MONDAY, 9, 0))['success']
+        )
+
+    def test_commit_rechecks_database_behind_stale_index(self):
+        # Warm the index, then book behind its back as another worker would
+        self.assertFalse(self.optimizer.booking_index.overlaps(
+            self.doctor, aware(MONDAY, 9, 0), aware(MONDAY, 9, 30)
+        ))
+        Appointment.objects.bulk_create([Appointment(
+            patient=self.patient, doctor=self.doctor.name, assigned_doctor=self.doctor,
+            procedure='consultation', scheduled_at=aware(MONDAY, 9, 0), status='pending'
+        )])
+
+        result = self.optimizer.create_appointment(self.patient.id, self.doctor, '', aware(MONDAY, 9, 0))
+
+        self.assertFalse(result['success'])
+        self.assertEqual(Appointment.objects.filter(scheduled_at=aware(MONDAY, 9, 0)).count(), 1)
+
+    def test_hold_endpoints(self):
+        response = self.client.post('/api/scheduling/holds/', {
+            'patient_id': self.patient.id,
+            'doctor_id': self.doctor.id,
+            'scheduled_at': aware(MONDAY, 10, 0).isoformat()
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        token = response.json()['hold_token']
+
+        conflict = self.client.post('/api/scheduling/holds/', {
+            'patient_id': self.patient.id,
+            'doctor_id': self.doctor.id,
+            'scheduled_at': aware(MONDAY, 10, 0).isoformat()
+        }, content_type='application/json')
+        self.assertEqual(conflict.status_code, 409)
+
+        confirmed = self.client.post(f'/api/scheduling/holds/{token}/confirm/')
+        self.assertEqual(confirmed.status_code, 201)
+        self.assertEqual(self.client.delete(f'/api/scheduling/holds/{token}/').status_code, 404)
+
+
+class TestWaitTimeRollup(SchedulingTestCase):
+    """Incremental wait-time rollup and the in-memory lookup table."""
+
+    def visit(self, scheduled_at, waited_minutes, checked_in_at=None):
+        checked_in_at = checked_in_at or scheduled_at
+        return Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor.name, procedure='consultation',
+            scheduled_at=scheduled_at, status='completed',
+            checked_in_at=checked_in_at, seen_at=checked_in_at + timedelta(minutes=waited_minutes)
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.wait_times = WaitTimeModel(min_visits=2, max_staleness=0)
+        self.optimizer = AdvancedSchedulingOptimizer(wait_times=self.wait_times)
+        self.past_monday = MONDAY - timedelta(weeks=520)
+
+    def test_rollup_averages_per_weekday_hour(self):
+        self.visit(aware(self.past_monday, 9, 0), 10)
+        self.visit(aware(self.past_monday, 9, 30), 20)
+        self.visit(aware(self.past_monday, 14, 0), 40)
+
+        self.assertEqual(rollup_wait_times(), 3)
+
+        self.assertEqual(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 15)), 15)
+        # A single visit is below min_visits for the doctor and the clinic
+        self.assertIsNone(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 14, 0)))
+        self.assertEqual(self.optimizer._get_average_wait_time(self.doctor, aware(MONDAY, 14, 0)), 25)
+
+    def test_rollup_only_folds_changed_visits(self):
+        self.visit(aware(self.past_monday, 9, 0), 10)
+        self.visit(aware(self.past_monday, 9, 30), 20)
+        self.assertEqual(rollup_wait_times(), 2)
+
+        self.assertEqual(rollup_wait_times(), 0)
+        # Other saves of the doctor's bookings are not visits to fold
+        self.book(aware(MONDAY, 9, 0))
+        self.visit(aware(self.past_monday + timedelta(weeks=1), 9, 0), 60,
+                   checked_in_at=timezone.now() - timedelta(minutes=60))
+        with self.assertNumQueries(9):
+            self.assertEqual(rollup_wait_times(), 1)
+
+        self.assertEqual(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 0)), 30)
+        self.assertEqual(rollup_wait_times(full=True), 3)
+        self.assertEqual(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 0)), 30)
+
+    def test_late_completion_and_edits_are_picked_up(self):
+        self.visit(aware(self.past_monday, 9, 0), 10)
+        late = self.visit(aware(self.past_monday, 9, 30), 20)
+        late.status = 'confirmed'
+        late.save()
+        self.assertEqual(rollup_wait_times(), 1)
+
+        # Marked completed after the run, although seen before it
+        late.status = 'completed'
+        late.save()
+        self.assertEqual(rollup_wait_times(), 1)
+        self.assertEqual(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 0)), 15)
+
+        # An edited seen_at replaces the old wait instead of adding to it
+        late.seen_at = late.checked_in_at + timedelta(minutes=40)
+        late.save()
+        self.assertEqual(rollup_wait_times(), 1)
+        self.assertEqual(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 0)), 25)
+
+        # Reopening the visit takes its wait back out
+        late.status = 'confirmed'
+        late.save()
+        self.assertEqual(rollup_wait_times(), 1)
+        self.assertIsNone(self.wait_times.average_wait(self.doctor.id, aware(MONDAY, 9, 0)))
+        self.assertEqual(rollup_wait_times(full=True), 1)
+
+    def test_wait_reduction_uses_history(self):
+        for _ in range(2):
+            self.visit(aware(self.past_monday, 9, 0), 5)
+            self.visit(aware(self.past_monday, 15, 0), 35)
+        rollup_wait_times()
+
+        self.assertEqual(
+            self.optimizer._estimate_wait_reduction(
+                self.doctor.name, aware(MONDAY, 9, 0), aware(MONDAY, 15, 0)
+            ),
+            30
+        )
+
+
+class TestSlotScorer(SchedulingTestCase):
+    """Batched slot scoring against the single-slot path."""
+
+    def candidates(self, optimizer, first_day, days):
+        engine = AvailabilityEngine(self.doctor)
+        engine.load(first_day, first_day + timedelta(days=days - 1))
+        return [
+            day_minute(first_day + timedelta(days=offset), minute)
+            for offset in range(days)
+            for minute in engine.day_free_minutes(first_day + timedelta(days=offset))
+        ]
+
+    def test_batched_scores_match_single_slot_scores(self):
+        self.book(aware(MONDAY, 9, 0))
+        self.book(aware(MONDAY + timedelta(days=1), 10, 0))
+        candidates = self.candidates(self.optimizer, MONDAY, 5)
+        last_day = MONDAY + timedelta(days=4)
+        requested = aware(MONDAY + timedelta(days=2), 11, 0)
+
+        ranked = self.optimizer._rank_slots(
+            self.doctor, candidates, MONDAY, last_day, requested, limit=len(candidates)
+        )
+
+        self.assertEqual(len(ranked), len(candidates))
+        for score, slot in ranked:
+            self.assertAlmostEqual(
+                score, self.optimizer._score_slot(self.doctor, slot, requested, 'consultation')
+            )
+        scores = [score for score, _ in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        # 10:30 beats the requested 11:00: it is in the best time-of-day band
+        self.assertEqual(ranked[0][1], aware(MONDAY + timedelta(days=2), 10, 30))
+
+    def test_weights_are_configurable(self):
+        requested = aware(MONDAY, 9, 0)
+        candidates = self.candidates(self.optimizer, MONDAY, 2)
+
+        # Without proximity, the best slot is the first on the lighter day
+        self.book(aware(MONDAY, 10, 0))
+        optimizer = AdvancedSchedulingOptimizer(scoring_weights={'proximity': 0, 'workload': 100})
+        ranked = optimizer._rank_slots(
+            self.doctor, candidates, MONDAY, MONDAY + timedelta(days=1), requested
+        )
+        self.assertEqual(ranked[0][1], aware(MONDAY + timedelta(days=1), 9, 0))
+
+        with override_settings(CLINIC_AI={'SCHEDULING_WEIGHTS': {'time_of_day': 0}}):
+            self.assertEqual(SlotScorer().weights['time_of_day'], 0)
+            self.assertEqual(SlotScorer().weights['proximity'], 40)
+
+
+class TestBulkRescheduler(SchedulingTestCase):
+    """Moving a doctor's bookings out of a blocked interval."""
+
+    def setUp(self):
+        super().setUp()
+        self.colleague = Doctor.objects.create(
+            name='Dr. Colleague',
+            specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        for weekday in range(5):
+            DoctorAvailability.objects.create(
+                doctor=self.colleague, weekday=weekday, start_time=time(9, 0), end_time=time(12, 0)
+            )
+        self.appointments = [
+            self.book(aware(MONDAY, hour, minute)) for hour in (9, 10) for minute in (0, 30)
+        ]
+
+    def test_moves_to_same_doctor_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = BulkRescheduler().reschedule(self.doctor, aware(MONDAY, 8, 0), aware(MONDAY, 13, 0))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['affected'], 4)
+        self.assertEqual(result['unplaced'], [])
+        tuesday = MONDAY + timedelta(days=1)
+        moved = Appointment.objects.filter(id__in=[a.id for a in self.appointments])
+        self.assertEqual(
+            sorted(appointment.scheduled_at for appointment in moved),
+            [aware(tuesday, 9, 0), aware(tuesday, 9, 30), aware(tuesday, 10, 0), aware(tuesday, 10, 30)]
+        )
+        self.assertTrue(all(appointment.assigned_doctor_id == self.doctor.id for appointment in moved))
+        # The index follows the bulk update
+        self.assertFalse(get_booking_index().overlaps(self.doctor, aware(MONDAY, 9, 0), aware(MONDAY, 9, 30)))
+        self.assertTrue(get_booking_index().overlaps(self.doctor, aware(tuesday, 9, 0), aware(tuesday, 9, 30)))
+
+    def test_falls_back_to_colleague_when_calendar_is_full(self):
+        result = BulkRescheduler(search_days=0).reschedule(
+            self.doctor, aware(MONDAY, 8, 0), aware(MONDAY, 13, 0)
+        )
+
+        self.assertEqual(len(result['moved']), 4)
+        for appointment in Appointment.objects.filter(id__in=[a.id for a in self.appointments]):
+            self.assertEqual(appointment.assigned_doctor_id, self.colleague.id)
+            self.assertEqual(appointment.doctor, self.colleague.name)
+        # Nearest slots keep everyone at their original time
+        self.assertTrue(all(move['from'] == move['to'] for move in result['moved']))
+
+        result = BulkRescheduler(search_days=0).reschedule(
+            self.colleague, aware(MONDAY, 8, 0), aware(MONDAY, 13, 0), include_other_doctors=False
+        )
+        self.assertEqual(len(result['unplaced']), 4)
+
+    def test_assignment_only_sees_each_bookings_nearest_slots(self):
+        for name in ('Dr. Third', 'Dr. Fourth'):
+            colleague = Doctor.objects.create(
+                name=name, specialization='Dermatology', average_appointment_duration=timedelta(minutes=30)
+            )
+            for weekday in range(5):
+                DoctorAvailability.objects.create(
+                    doctor=colleague, weekday=weekday, start_time=time(9, 0), end_time=time(17, 0)
+                )
+
+        with mock.patch('clinic_ai.messaging.bulk_rescheduler.solve_assignment',
+                        side_effect=solve_assignment) as solve:
+            result = BulkRescheduler().reschedule(self.doctor, aware(MONDAY, 8, 0), aware(MONDAY, 13, 0))
+
+        self.assertEqual(len(result['moved']), 4)
+        for call in solve.call_args_list:
+            cost = call.args[0]
+            self.assertLessEqual(len(cost[0]), len(cost) ** 2)
+
+    def test_blocked_interval_stays_closed_after_the_move(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkRescheduler().reschedule(self.doctor, aware(MONDAY, 8, 0), aware(MONDAY, 13, 0))
+
+        exception = AvailabilityException.objects.get(doctor=self.doctor)
+        self.assertEqual((exception.start_at, exception.end_at), (aware(MONDAY, 8, 0), aware(MONDAY, 13, 0)))
+        self.assertEqual(
+            self.optimizer.find_available_slots(self.doctor, (aware(MONDAY, 0, 0), aware(MONDAY, 23, 0))), []
+        )
+
+        # An interval already closed is not closed twice
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkRescheduler().reschedule(self.doctor, aware(MONDAY, 9, 0), aware(MONDAY, 12, 0))
+        self.assertEqual(AvailabilityException.objects.filter(doctor=self.doctor).count(), 1)
+
+    def test_bookings_already_started_are_not_moved(self):
+        with mock.patch('django.utils.timezone.now', return_value=aware(MONDAY, 10, 15)):
+            result = BulkRescheduler().reschedule(self.doctor, aware(MONDAY, 8, 0), aware(MONDAY, 13, 0))
+
+        self.assertEqual(result['affected'], 1)
+        self.assertEqual([move['appointment_id'] for move in result['moved']], [self.appointments[3].id])
+        for appointment in self.appointments[:3]:
+            appointment.refresh_from_db()
+            self.assertEqual(appointment.assigned_doctor_id, self.doctor.id)
+        self.assertEqual(
+            [appointment.scheduled_at for appointment in self.appointments[:3]],
+            [aware(MONDAY, 9, 0), aware(MONDAY, 9, 30), aware(MONDAY, 10, 0)]
+        )
+
+    def test_replaces_pending_reminders_with_notices(self):
+        appointment = self.appointments[0]
+        AppointmentReminder.objects.create(
+            appointment=appointment, scheduled_send_at=aware(MONDAY - timedelta(days=1), 9, 0),
+            message_content='old reminder'
+        )
+
+        BulkRescheduler().reschedule(self.doctor, aware(MONDAY, 9, 0), aware(MONDAY, 9, 30))
+
+        reminders = AppointmentReminder.objects.filter(appointment=appointment)
+        self.assertEqual(reminders.get(message_content='old reminder').status, 'cancelled')
+        self.assertEqual(reminders.filter(status='pending').count(), 2)
+        self.assertEqual(AppointmentReminder.objects.filter(status='pending').count(), 2)
+
+    def test_bulk_reschedule_endpoint(self):
+        response = self.client.post('/api/scheduling/bulk-reschedule/', {
+            'doctor_id': self.doctor.id,
+            'start': aware(MONDAY, 8, 0).isoformat(),
+            'end': aware(MONDAY, 13, 0).isoformat()
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['moved']), 4)
+
+        invalid = self.client.post('/api/scheduling/bulk-reschedule/', {
+            'doctor_id': self.doctor.id,
+            'start': aware(MONDAY, 13, 0).isoformat(),
+            'end': aware(MONDAY, 8, 0).isoformat()
+        }, content_type='application/json')
+        self.assertEqual(invalid.status_code, 400)
+
+
+class TestAvailabilityExceptions(SchedulingTestCase):
+    """Holidays and blocked time cut out of the weekly template."""
+
+    def test_subtract_intervals(self):
+        self.assertEqual(
+            subtract_intervals([(540, 720), (780, 1020)], [(600, 630), (700, 800), (900, 1020)]),
+            [(540, 600), (630, 700), (800, 900)]
+        )
+        self.assertEqual(subtract_intervals([(540, 720)], []), [(540, 720)])
+        self.assertEqual(subtract_intervals([(540, 720)], [(0, 1440)]), [])
+
+    def test_partial_day_block_removes_covered_slots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AvailabilityException.objects.create(
+                doctor=self.doctor, start_at=aware(MONDAY, 9, 45), end_at=aware(MONDAY, 11, 0)
+            )
+
+        slots = AvailabilityEngine(self.doctor).free_slots(MONDAY, MONDAY)
+
+        self.assertEqual(slots, [aware(MONDAY, 9, 0), aware(MONDAY, 11, 0), aware(MONDAY, 11, 30)])
+        self.assertFalse(self.optimizer.create_appointment(
+            self.patient.id, self.doctor, '', aware(MONDAY, 10, 0)
+        )['success'])
+
+    def test_clinic_holiday_closes_every_doctor(self):
+        other = Doctor.objects.create(
+            name='Dr. Other', specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        DoctorAvailability.objects.create(doctor=other, weekday=0, start_time=time(9, 0), end_time=time(12, 0))
+        # Warm the cached weeks, then close the clinic for the day
+        AvailabilityEngine.load_many([self.doctor, other], MONDAY, MONDAY + timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            holiday = AvailabilityException.objects.create(
+                exception_type='holiday', start_at=aware(MONDAY, 0), end_at=aware(MONDAY + timedelta(days=1), 0)
+            )
+
+        engines = AvailabilityEngine.load_many([self.doctor, other], MONDAY, MONDAY + timedelta(days=1))
+        self.assertEqual(engines[self.doctor.id].day_free_minutes(MONDAY), [])
+        self.assertEqual(engines[other.id].day_free_minutes(MONDAY), [])
+        self.assertEqual(len(engines[self.doctor.id].day_free_minutes(MONDAY + timedelta(days=1))), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            holiday.delete()
+        self.assertEqual(len(AvailabilityEngine(self.doctor).free_slots(MONDAY, MONDAY)), 6)
+
+    def test_reschedule_action_moves_covered_bookings(self):
+        appointment = self.book(aware(MONDAY, 10, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            exception = AvailabilityException.objects.create(
+                doctor=self.doctor, exception_type='conference',
+                start_at=aware(MONDAY, 0), end_at=aware(MONDAY + timedelta(days=1), 0)
+            )
+
+        response = self.client.post(f'/api/availability-exceptions/{exception.id}/reschedule/')
+
+        self.assertEqual(response.status_code, 200)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.scheduled_at, aware(MONDAY + timedelta(days=1), 9, 0))
+
+    def test_clinic_closure_reports_each_doctor(self):
+        other = Doctor.objects.create(
+            name='Dr. Other', specialization='Ophthalmology', average_appointment_duration=timedelta(minutes=30)
+        )
+        self.book(aware(MONDAY, 9, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            exception = AvailabilityException.objects.create(
+                start_at=aware(MONDAY, 0), end_at=aware(MONDAY + timedelta(days=1), 0)
+            )
+        reschedule = BulkRescheduler.reschedule
+
+        def fail_for_other(rescheduler, doctor, *args):
+            if doctor == other:
+                return {'success': False, 'message': 'calendar unavailable'}
+            return reschedule(rescheduler, doctor, *args)
+
+        with mock.patch.object(BulkRescheduler, 'reschedule', fail_for_other):
+            response = self.client.post(f'/api/availability-exceptions/{exception.id}/reschedule/')
+
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual(data['failed'], [other.id])
+        self.assertEqual(len(data['moved']), 1)
+        self.assertEqual(
+            [(d['doctor_id'], d['success'], len(d['moved'])) for d in data['doctors']],
+            [(self.doctor.id, True, 1), (other.id, False, 0)]
+        )
+        self.assertEqual(data['doctors'][1]['error'], 'calendar unavailable')
+
+
+class TestGroupBooking(SchedulingTestCase):
+    """Group allocation across doctors in one compact block."""
+
+    def setUp(self):
+        super().setUp()
+        self.other = Doctor.objects.create(
+            name='Dr. Other', specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        DoctorAvailability.objects.create(
+            doctor=self.other, weekday=0, start_time=time(9, 0), end_time=time(12, 0)
+        )
+        self.group = [self.patient.id] + [
+            Patient.objects.create(phone=f'+886-900-000-00{n}', name=f'Member {n}').id
+            for n in range(1, 6)
+        ]
+        self.monday = (aware(MONDAY, 0), aware(MONDAY, 23))
+
+    def test_tight_span_books_doctors_in_parallel(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = GroupBookingAllocator().book(
+                self.group[:4], [self.doctor, self.other], self.monday, max_span=timedelta(minutes=60)
+            )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(
+            sorted((a['scheduled_at'], a['doctor_id']) for a in result['appointments']),
+            [(aware(MONDAY, 9, 0), self.doctor.id), (aware(MONDAY, 9, 0), self.other.id),
+             (aware(MONDAY, 9, 30), self.doctor.id), (aware(MONDAY, 9, 30), self.other.id)]
+        )
+        self.assertEqual(result['block_end'], aware(MONDAY, 10, 0))
+        self.assertTrue(get_booking_index().overlaps(self.other, aware(MONDAY, 9, 30), aware(MONDAY, 10, 0)))
+
+    def test_block_slides_past_gaps_that_are_too_small(self):
+        self.book(aware(MONDAY, 9, 30))
+
+        block = GroupBookingAllocator().find_block(3, [self.doctor], self.monday)
+
+        self.assertEqual(
+            [start for _, start in block],
+            [aware(MONDAY, 10, 0), aware(MONDAY, 10, 30), aware(MONDAY, 11, 0)]
+        )
+
+    def test_group_is_booked_all_or_nothing(self):
+        result = GroupBookingAllocator().book(
+            self.group, [self.doctor], (aware(MONDAY, 10, 0), aware(MONDAY, 23))
+        )
+
+        self.assertFalse(result['success'])
+        self.assertEqual(Appointment.objects.count(), 0)
+
+    def test_shared_resource_serializes_the_group(self):
+        laser = ClinicResource.objects.create(name='CO2 laser', resource_type='equipment')
+        treatment = ProcedureType.objects.create(
+            name='Laser resurfacing', estimated_duration=timedelta(minutes=30)
+        )
+        treatment.resources.add(laser)
+        allocator = GroupBookingAllocator()
+        doctors = [self.doctor, self.other]
+
+        self.assertIsNone(allocator.find_block(2, doctors, self.monday, treatment, timedelta(minutes=30)))
+        block = allocator.find_block(2, doctors, self.monday, treatment, timedelta(minutes=60))
+        self.assertEqual([start for _, start in block], [aware(MONDAY, 9, 0), aware(MONDAY, 9, 30)])
+
+    def test_group_booking_endpoint(self):
+        response = self.client.post('/api/scheduling/group-bookings/', {
+            'patient_ids': self.group[:3],
+            'doctor_ids': [self.doctor.id, self.other.id],
+            'start_date': self.monday[0].isoformat(),
+            'end_date': self.monday[1].isoformat()
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['appointments']), 3)
+
+        missing = self.client.post('/api/scheduling/group-bookings/', {
+            'patient_ids': self.group[:3],
+            'doctor_ids': [self.doctor.id, 999999],
+            'start_date': self.monday[0].isoformat(),
+            'end_date': self.monday[1].isoformat()
+        }, content_type='application/json')
+        self.assertEqual(missing.status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestNextSlotCache(SchedulingTestCase):
+    """Materialized next free slots per doctor and procedure type."""
+
+    def setUp(self):
+        super().setUp()
+        # Monday 8:00, so the horizon starts with the fixture week
+        patcher = mock.patch('django.utils.timezone.now', return_value=aware(MONDAY, 8))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.next_slots = NextSlotCache(horizon_days=3, size=20)
+
+    def test_cached_slots_match_live_after_booking_and_cancel(self):
+        self.assertEqual(self.next_slots.next_slots(self.doctor, limit=2), [aware(MONDAY, 9), aware(MONDAY, 9, 30)])
+
+        appointment = self.book(aware(MONDAY, 9, 30))
+        result = self.next_slots.check_consistency(self.doctor)
+        self.assertTrue(result['consistent'])
+        self.assertNotIn(aware(MONDAY, 9, 30), result['cached'])
+
+        appointment.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.save()
+        result = self.next_slots.check_consistency(self.doctor)
+        self.assertTrue(result['consistent'])
+        self.assertIn(aware(MONDAY, 9, 30), result['cached'])
+
+    def test_only_the_touched_doctor_day_is_recomputed(self):
+        self.assertEqual(len(self.next_slots.next_slots(self.doctor)), 18)
+        tuesday = MONDAY + timedelta(days=1)
+        self.book(aware(tuesday, 10))
+
+        with mock.patch.object(AvailabilityEngine, 'day_free_minutes', autospec=True,
+                               side_effect=AvailabilityEngine.day_free_minutes) as recompute:
+            slots = self.next_slots.next_slots(self.doctor)
+            self.assertEqual([call.args[1] for call in recompute.call_args_list], [tuesday])
+            # A second read is served from the materialized list
+            self.assertEqual(self.next_slots.next_slots(self.doctor), slots)
+            self.assertEqual(recompute.call_count, 1)
+        self.assertNotIn(aware(tuesday, 10), slots)
+        self.assertEqual(len(slots), 17)
+
+    def test_booking_without_duration_retires_its_whole_slot(self):
+        appointment = self.book(aware(MONDAY, 23, 45))
+        self.assertIsNone(appointment.duration)
+
+        with mock.patch.object(NextSlotCache, '_bump', autospec=True) as bump:
+            self.next_slots.invalidate_booking(appointment)
+        retired = bump.call_args.args[1]
+        # The doctor's 30-minute slot runs into Tuesday
+        self.assertIn(self.next_slots._key('day', self.doctor.id, (MONDAY + timedelta(days=1)).isoformat()), retired)
+
+    def test_shared_resource_booking_retires_other_doctors_lists(self):
+        other = Doctor.objects.create(
+            name='Dr. Other', specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        laser = ClinicResource.objects.create(name='CO2 laser', resource_type='equipment')
+        treatment = ProcedureType.objects.create(
+            name='Laser resurfacing', estimated_duration=timedelta(minutes=30)
+        )
+        treatment.resources.add(laser)
+        self.assertEqual(self.next_slots.next_slots(self.doctor, treatment, limit=1), [aware(MONDAY, 9)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(
+                patient=self.patient, assigned_doctor=other, procedure_type=treatment,
+                procedure='laser', scheduled_at=aware(MONDAY, 9), status='confirmed'
+            )
+
+        result = self.next_slots.check_consistency(self.doctor, treatment)
+        self.assertTrue(result['consistent'])
+        self.assertEqual(result['cached'][0], aware(MONDAY, 9, 30))
+
+    def test_clinic_list_is_read_only_and_retired_by_bookings(self):
+        with mock.patch.object(NextSlotCache, '_rebuild', autospec=True,
+                               side_effect=NextSlotCache._rebuild) as rebuild:
+            # Cold cache: the chat path never builds lists itself
+            self.assertEqual(self.next_slots.clinic_next_slots(limit=2), [])
+            self.assertEqual(rebuild.call_count, 0)
+
+            self.next_slots.warm_clinic()
+            rebuild.reset_mock()
+            self.assertEqual(self.next_slots.clinic_next_slots(limit=2), [
+                (aware(MONDAY, 9), self.doctor.id, self.doctor.name),
+                (aware(MONDAY, 9, 30), self.doctor.id, self.doctor.name),
+            ])
+
+            self.book(aware(MONDAY, 9))
+            # The booked doctor's lists are retired, so none of them is offered
+            self.assertEqual(self.next_slots.clinic_next_slots(limit=2), [])
+            self.assertEqual(rebuild.call_count, 0)
+
+        self.next_slots.warm_clinic()
+        with mock.patch('clinic_ai.messaging.next_slots.cache.get_many',
+                        side_effect=cache.get_many) as get_many:
+            self.assertEqual(self.next_slots.clinic_next_slots(limit=1), [
+                (aware(MONDAY, 9, 30), self.doctor.id, self.doctor.name)
+            ])
+            self.assertEqual(get_many.call_count, 1)
+
+    def test_next_slots_endpoint(self):
+        response = self.client.get('/api/scheduling/next-slots/', {'doctor_id': self.doctor.id, 'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['slots'], [
+            aware(MONDAY, 9).isoformat(), aware(MONDAY, 9, 30).isoformat(), aware(MONDAY, 10).isoformat()
+        ])
+
+        missing = self.client.get('/api/scheduling/next-slots/', {'doctor_id': 999999})
+        self.assertEqual(missing.status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestWorkloadService(SchedulingTestCase):
+    """Per doctor-day workload counts from the index and the aggregate."""
+
+    def setUp(self):
+        super().setUp()
+        self.other = Doctor.objects.create(
+            name='Dr. Other', specialization='Dermatology',
+            average_appointment_duration=timedelta(minutes=30)
+        )
+        tuesday = MONDAY + timedelta(days=1)
+        self.book(aware(MONDAY, 9))
+        self.book(aware(MONDAY, 10))
+        self.book(aware(MONDAY, 11), status='cancelled')
+        self.book(aware(tuesday, 9))
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(
+                patient=self.patient, assigned_doctor=self.other, procedure='consultation',
+                scheduled_at=aware(tuesday, 23, 30), status='pending'
+            )
+        self.expected = {
+            self.doctor.id: {MONDAY: 2, tuesday: 1, tuesday + timedelta(days=1): 0},
+            self.other.id: {MONDAY: 0, tuesday: 1, tuesday + timedelta(days=1): 0},
+        }
+
+    def test_index_and_aggregate_counts_agree(self):
+        doctors = [self.doctor, self.other]
+        last_day = MONDAY + timedelta(days=2)
+
+        from_index = WorkloadService().clinic_daily_counts(doctors, MONDAY, last_day)
+        with self.assertNumQueries(1):
+            from_aggregate = WorkloadService(hot_days=1).clinic_daily_counts(doctors, MONDAY, last_day)
+
+        self.assertEqual(from_index, self.expected)
+        self.assertEqual(from_aggregate, self.expected)
+
+    def test_clinic_workload_endpoint(self):
+        response = self.client.get('/api/doctors/clinic-workload/', {'start_date': MONDAY.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total_appointments'], 4)
+        self.assertEqual(data['daily_totals'][MONDAY.isoformat()], 2)
+        self.assertEqual(
+            {row['doctor_id']: row['total_appointments'] for row in data['doctors']},
+            {self.doctor.id: 3, self.other.id: 1}
+        )
+
+        invalid = self.client.get('/api/doctors/clinic-workload/', {'days': 0})
+        self.assertEqual(invalid.status_code, 400)
+
+
+class TestOptimizationResults(SchedulingTestCase):
+    """Stored optimization results, their reuse and the acceptance rollup."""
+
+    def setUp(self):
+        super().setUp()
+        self.appointment = self.book(aware(MONDAY, 11, 30))
+
+    def request(self, appointment=None, requested_time=None):
+        return {
+            'patient_id': self.patient.id, 'doctor': str(self.doctor.id), 'procedure': 'consultation',
+            'requested_time': requested_time or aware(MONDAY, 11, 30),
+            'appointment_id': (appointment or self.appointment).id,
+        }
+
+    def test_results_are_stored_and_reused_until_a_window_day_changes(self):
+        first = self.optimizer.optimize_schedule([self.request()])[0]
+        stored = SchedulingOptimization.objects.get(appointment=self.appointment)
+        self.assertEqual(stored.optimized_scheduled_at, first['optimized_time'])
+        self.assertEqual(stored.doctor, self.doctor)
+
+        with mock.patch.object(AdvancedSchedulingOptimizer, 'find_available_slots') as search:
+            again = self.optimizer.optimize_schedule([self.request()])[0]
+        search.assert_not_called()
+        self.assertEqual(again['optimized_time'], first['optimized_time'])
+
+        # Booking the recommended slot changes that doctor-day
+        self.book(first['optimized_time'])
+        changed = self.optimizer.optimize_schedule([self.request()])[0]
+        self.assertNotEqual(changed['optimized_time'], first['optimized_time'])
+        stored.refresh_from_db()
+        self.assertEqual(stored.optimized_scheduled_at, changed['optimized_time'])
+
+    def test_reused_slot_is_not_given_to_another_request(self):
+        first = self.optimizer.optimize_schedule([self.request()])[0]
+        other = self.book(aware(MONDAY + timedelta(days=7), 9))
+
+        batch = self.optimizer.optimize_schedule([
+            self.request(),
+            self.request(other, requested_time=aware(MONDAY, 11, 30)),
+        ])
+        self.assertEqual(batch[0]['optimized_time'], first['optimized_time'])
+        self.assertNotEqual(batch[1]['optimized_time'], first['optimized_time'])
+        self.assertEqual(SchedulingOptimization.objects.count(), 2)
+
+    def test_acceptance_during_optimization_is_kept(self):
+        first = self.optimizer.optimize_schedule([self.request()])[0]
+        self.book(first['optimized_time'])
+        stored_optimizations = AdvancedSchedulingOptimizer._stored_optimizations
+
+        def accept_after_read(optimizer, *args):
+            result = stored_optimizations(optimizer, *args)
+            SchedulingOptimization.objects.update(patient_accepted=True)
+            return result
+
+        with mock.patch.object(AdvancedSchedulingOptimizer, '_stored_optimizations', accept_after_read):
+            changed = self.optimizer.optimize_schedule([self.request()])[0]
+        self.assertNotEqual(changed['optimized_time'], first['optimized_time'])
+        self.assertEqual(SchedulingOptimization.objects.get().optimized_scheduled_at, first['optimized_time'])
+
+    def test_analytics_endpoint_reads_rollups(self):
+        self.optimizer.optimize_schedule([self.request()])
+        optimization = SchedulingOptimization.objects.get()
+        response = self.client.post(f'/api/scheduling-optimizations/{optimization.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+
+        self.appointment.status = 'completed'
+        self.appointment.checked_in_at = timezone.now() - timedelta(minutes=20)
+        self.appointment.seen_at = self.appointment.checked_in_at + timedelta(minutes=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.save()
+
+        self.assertEqual(rollup_optimizations(), 1)
+        self.assertEqual(rollup_optimizations(), 0)
+
+        today = timezone.localdate()
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/scheduling-optimizations/analytics/', {
+                'start_date': today.isoformat(), 'end_date': today.isoformat()
+            }).json()
+        self.assertEqual((data['offered'], data['accepted'], data['acceptance_rate']), (1, 1, 1.0))
+        self.assertEqual(data['realized_visits'], 1)
+        self.assertEqual(
+            data['realized_wait_reduction_minutes'], round(optimization.expected_wait_minutes - 5, 1)
+        )
+
+    def test_visit_completed_after_a_rollup_is_realized(self):
+        self.optimizer.optimize_schedule([self.request()])
+        self.client.post(f'/api/scheduling-optimizations/{SchedulingOptimization.objects.get().id}/accept/')
+        self.appointment.checked_in_at = timezone.now() - timedelta(minutes=20)
+        self.appointment.seen_at = self.appointment.checked_in_at + timedelta(minutes=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.save()
+        rollup_optimizations()
+
+        # Seen before the run, closed out after it
+        self.appointment.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.save()
+        self.assertEqual(rollup_optimizations(), 1)
+        self.assertEqual(OptimizationRollup.objects.get().realized_visits, 1)
+
+
+class TestClinicSimulation(TestCase):
+    """Discrete-event simulation on in-memory indexes."""
+
+    config = {'doctors': 3, 'days': 14, 'start_date': MONDAY.isoformat(), 'load': 1.1, 'seed': 7}
+
+    def test_simulation_is_deterministic_and_never_queries(self):
+        with self.assertNumQueries(0):
+            first = run_simulation(self.config)
+        second = run_simulation(self.config)
+        first.pop('runtime_seconds'), second.pop('runtime_seconds')
+
+        self.assertEqual(first, second)
+        self.assertGreater(first['booked'], 0)
+        self.assertLessEqual(first['booked'], first['requests'] + first['waitlist_filled'])
+        self.assertTrue(0 < first['utilization'] <= 1)
+
+    def test_freed_slots_go_to_the_waitlist(self):
+        metrics = run_simulation(dict(self.config, load=1.5, cancel_rate=0.3))
+        self.assertGreater(metrics['waitlisted'], 0)
+        self.assertGreater(metrics['waitlist_filled'], 0)
+
+    def test_sweep_runs_every_combination(self):
+        results = run_sweep(
+            {'optimization_weight': [0.0, 1.0], 'waitlist_rule': ['fifo', 'priority']},
+            dict(self.config, days=5), processes=1
+        )
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]['metrics']['optimizer_share'], 0.0)
+        # Waitlist fills keep the freed slot, so the share can stay just below 1
+        self.assertGreater(results[-1]['metrics']['optimizer_share'], 0.9)
+
+        with self.assertRaises(ValueError):
+            run_sweep({'waitlist_rule': ['random']}, self.config, processes=1)
@@ -0,0 +1,282 @@
+"""
+Tests for the translation caching and terminology layers.
+Translation API calls are replaced with canned responses; everything else
+runs against a real test database and a local-memory cache.
+"""
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from clinic_ai.core.cache import LocalLRU, TwoTierCacheService
+from clinic_ai.core.interfaces import ConfigurationService
+from clinic_ai.core.models import MedicalTerminology, TranslationHistory
+from clinic_ai.messaging.translation import GoogleTranslateService, TranslationService
+from clinic_ai.messaging import terminology_matcher, translation_cache
+from clinic_ai.messaging.terminology_matcher import TerminologyMatcher, get_terminology_matcher
+from clinic_ai.messaging.terminology_usage import UsageCounter, usage_counter
+from clinic_ai.messaging.translation_batch import chunk_texts
+from clinic_ai.messaging.translation_cache import TranslationCache
+from clinic_ai.messaging.translation_enhanced import EnhancedGoogleTranslateService
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'translation-tests',
+    }
+}
+
+
+class StaticConfig(ConfigurationService):
+    def get_api_key(self, service_name):
+        return 'test-key'
+
+    def get_setting(self, key, default=None):
+        return default
+
+    def is_feature_enabled(self, feature_name):
+        return True
+
+
+def api_response(*translations):
+    """Fake Google Translate v2 response."""
+    response = mock.Mock()
+    response.json.return_value = {
+        'data': {'translations': [{'translatedText': text} for text in translations]}
+    }
+    response.raise_for_status.return_value = None
+    return response
+
+
+def echo_api(prefix):
+    """Fake API translating each q in the request to prefix + q."""
+    def post(url, data=None, **kwargs):
+        return api_response(*[f'{prefix}{text}' for text in data['q']])
+    return post
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TranslationTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        TranslationCache._pending = dict.fromkeys(TranslationCache.STATS_KEYS, 0)
+        TwoTierCacheService._tiers.clear()
+        translation_cache._version_memo[:] = [None, 0.0]
+        terminology_matcher._current[:] = [None, None]
+        # No background flushes; tests flush explicitly
+        patcher = mock.patch.object(UsageCounter, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        usage_counter._counts.clear()
+
+
+class TestTranslationCache(TranslationTestCase):
+    """Stable digest keys shared by both translator classes."""
+
+    def test_key_is_stable_and_versioned(self):
+        translations = TranslationCache()
+        key = translations.key('안녕하세요  예약', 'ko', 'en')
+
+        self.assertEqual(translations.key(' 안녕하세요 예약 ', 'ko', 'en'), key)
+        self.assertNotEqual(translations.key('안녕하세요 예약', 'ko', 'ja'), key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MedicalTerminology.objects.create(term_en='botox', term_ko='보톡스', category='procedure')
+        self.assertNotEqual(translations.key('안녕하세요 예약', 'ko', 'en'), key)
+
+    def test_line_breaks_are_part_of_the_key(self):
+        translations = TranslationCache()
+        key = translations.key('1. 금식\n2. 물 마시기', 'ko', 'en')
+
+        self.assertEqual(translations.key('1.\t금식 \r\n2.  물 마시기\n', 'ko', 'en'), key)
+        self.assertNotEqual(translations.key('1. 금식 2. 물 마시기', 'ko', 'en'), key)
+        self.assertNotEqual(translations.key('1. 금식\n\n2. 물 마시기', 'ko', 'en'), key)
+
+    def test_workers_share_translations(self):
+        with mock.patch('requests.post', return_value=api_response('Hello')) as post:
+            first = GoogleTranslateService(StaticConfig()).translate('안녕하세요', 'ko', 'en')
+            # A second instance stands in for another worker process
+            second = EnhancedGoogleTranslateService(StaticConfig()).translate('안녕하세요', 'ko', 'en')
+
+        self.assertEqual((first, second), ('Hello', 'Hello'))
+        self.assertEqual(post.call_count, 1)
+        stats = TranslationCache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['characters_saved'], len('안녕하세요'))
+
+    def test_digest_collision_is_a_miss(self):
+        translations = TranslationCache()
+        translations.set('hello', 'en', 'ko', '안녕하세요')
+        # Another text whose entry somehow landed under the same key
+        with mock.patch.object(TranslationCache, 'key', return_value=translations.key('hello', 'en', 'ko')):
+            self.assertIsNone(translations.get('goodbye', 'en', 'ko'))
+        self.assertEqual(translations.get('hello', 'en', 'ko')['translated_text'], '안녕하세요')
+
+
+class TestTwoTierCache(TranslationTestCase):
+    """Per-process LRU in front of the shared cache."""
+
+    def test_lru_is_bounded_by_entries_and_bytes(self):
+        local = LocalLRU(max_entries=3, max_bytes=1000)
+        for n in range(4):
+            local.set(f'k{n}', 'x', ttl=60)
+        self.assertIsNone(local.get('k0'))
+        self.assertEqual(len(local), 3)
+
+        local.set('big', 'x' * 900, ttl=60)
+        self.assertLessEqual(local.bytes, 1000)
+        self.assertEqual(local.get('big'), 'x' * 900)
+        local.set('huge', 'x' * 2000, ttl=60)
+        self.assertIsNone(local.get('huge'))
+
+    def test_hot_keys_and_misses_stay_local(self):
+        service = TwoTierCacheService('test')
+        service.set('hot', {'translated_text': 'Hello'}, 60)
+        service.get('cold')
+        with mock.patch.object(service.shared, 'get') as shared_get:
+            self.assertEqual(service.get('hot'), {'translated_text': 'Hello'})
+            self.assertIsNone(service.get('cold'))
+        shared_get.assert_not_called()
+        self.assertEqual((service.hits['local'], service.hits['negative']), (1, 1))
+
+        # Another process stores the key: set() replaces the negative entry
+        TwoTierCacheService('test').set('cold', 'warm', 60)
+        self.assertEqual(service.get('cold'), 'warm')
+
+    def test_terminology_change_clears_every_process(self):
+        service = TwoTierCacheService(translation_cache.CACHE_NAMESPACE)
+        service.set('entry', 'value', 60)
+        service.get('entry')
+        # Stands in for the broadcast arriving from another process
+        cache.set(service.generation_key, 41, None)
+        service._checked_at[service.namespace] = 0.0
+        with mock.patch.object(service.shared, 'get', return_value=None):
+            self.assertIsNone(service.get('entry'))
+
+        service.set('entry', 'value', 60)
+        with self.captureOnCommitCallbacks(execute=True):
+            MedicalTerminology.objects.create(term_en='filler', term_ko='필러', category='procedure')
+        self.assertEqual(len(service.local), 0)
+
+
+class TestBatchTranslation(TranslationTestCase):
+    """One cache lookup and one API request per language pair and chunk."""
+
+    def test_batch_dedupes_misses_and_skips_hits(self):
+        translator = GoogleTranslateService(StaticConfig())
+        translator.cache.set('감사합니다', 'ko', 'en', 'Thank you')
+        texts = ['안녕하세요', 'Hello', '감사합니다', ' 안녕하세요', '예약', '']
+
+        with mock.patch('requests.post', side_effect=echo_api('en:')) as post:
+            translations = TranslationService(translator).translate_batch(texts, 'en')
+
+        self.assertEqual(translations, ['en:안녕하세요', 'Hello', 'Thank you', 'en:안녕하세요', 'en:예약', ''])
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(post.call_args.kwargs['data']['q'], ['안녕하세요', '예약'])
+        # Written back: a second batch needs no API call
+        with mock.patch('requests.post') as post:
+            self.assertEqual(translator.translate_many([('예약', 'ko', 'en')]), ['en:예약'])
+        post.assert_not_called()
+
+    def test_chunks_respect_api_limits(self):
+        self.assertEqual(chunk_texts(['a'] * 5, max_texts=2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(chunk_texts(['aaa', 'bb', 'c', 'dddd'], max_chars=4), [[0], [1, 2], [3]])
+
+        translator = GoogleTranslateService(StaticConfig())
+        items = [(f'문장 {n}', 'ko', 'en') for n in range(130)] + [('hello', 'en', 'ko')]
+        with mock.patch('requests.post', side_effect=echo_api('t:')) as post:
+            translations = translator.translate_many(items)
+        self.assertEqual(translations[129], 't:문장 129')
+        self.assertEqual(sorted(len(call.kwargs['data']['q']) for call in post.call_args_list), [1, 2, 128])
+
+    def test_enhanced_batch_records_history_in_bulk(self):
+        MedicalTerminology.objects.create(term_en='botox', term_ko='보톡스', category='procedure')
+        translator = EnhancedGoogleTranslateService(StaticConfig())
+
+        with mock.patch('requests.post', side_effect=echo_api('')):
+            translations = translator.batch_translate(['botox price', 'see you', 'see you'], 'en', 'ko')
+        self.assertEqual(translations, ['보톡스 price', 'see you', 'see you'])
+        history = TranslationHistory.objects.order_by('source_text')
+        self.assertEqual(
+            [(row.source_text, row.is_medical_terminology) for row in history],
+            [('botox price', True), ('see you', False)]
+        )
+
+        with mock.patch('requests.post', side_effect=requests.ConnectionError):
+            self.assertEqual(translator.translate('goodbye', 'en', 'ko'), 'goodbye')
+        self.assertIsNone(translator.cache.get('goodbye', 'en', 'ko'))
+        self.assertEqual(TranslationHistory.objects.get(source_text='goodbye').confidence_score, 0.0)
+
+
+class TestTerminologyMatcher(TranslationTestCase):
+    """Single-pass term matching in every language."""
+
+    TERMS = [
+        {'id': 1, 'en': 'Botox', 'ko': '보톡스', 'zh': '肉毒杆菌', 'ja': 'ボトックス', 'category': 'procedure'},
+        {'id': 2, 'en': 'lip filler', 'ko': '입술 필러', 'zh': '', 'ja': '', 'category': 'procedure'},
+        {'id': 3, 'en': 'lip', 'ko': '입술', 'zh': '', 'ja': '', 'category': 'anatomy'},
+    ]
+
+    def test_finds_multi_word_and_cjk_terms(self):
+        matcher = TerminologyMatcher(self.TERMS)
+        found = [(match['original'], match['info']['id']) for match in matcher.find(
+            '보톡스는 얼마예요? Also LIP FILLER, a clip, and 肉毒杆菌 / ボトックス.'
+        )]
+        self.assertEqual(found, [('보톡스', 1), ('LIP FILLER', 2), ('肉毒杆菌', 1), ('ボトックス', 1)])
+        self.assertEqual([m['original'] for m in matcher.find('입술 필러와 입술')], ['입술 필러', '입술'])
+
+    def test_substitutes_in_one_pass(self):
+        matcher = TerminologyMatcher(self.TERMS)
+        translated = matcher.replace(
+            'Botox and lip filler, not botoxes',
+            lambda match: match['info']['ko'] if match['info']['id'] != 3 else None
+        )
+        self.assertEqual(translated, '보톡스 and 입술 필러, not botoxes')
+
+    def test_rebuilds_only_on_terminology_change(self):
+        MedicalTerminology.objects.create(term_en='botox', term_ko='보톡스', category='procedure')
+        matcher = get_terminology_matcher()
+        with self.assertNumQueries(0):
+            self.assertIs(get_terminology_matcher(), matcher)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MedicalTerminology.objects.create(term_en='dermal filler', term_ko='필러', category='procedure')
+        self.assertEqual(
+            [m['info']['en'] for m in get_terminology_matcher().find('보톡스랑 필러 가격')],
+            ['botox', 'dermal filler']
+        )
+
+
+class TestTerminologyUsage(TranslationTestCase):
+    """Usage counts are buffered per process and written in bulk."""
+
+    def setUp(self):
+        super().setUp()
+        self.botox = MedicalTerminology.objects.create(term_en='botox', term_ko='보톡스', category='procedure')
+        self.filler = MedicalTerminology.objects.create(term_en='filler', term_ko='필러', category='procedure')
+        self.translator = EnhancedGoogleTranslateService(StaticConfig())
+        get_terminology_matcher()
+
+    def test_request_path_does_not_write(self):
+        with self.assertNumQueries(0):
+            self.translator._preprocess_medical_terms('botox, filler and botox', 'en')
+            self.translator._preprocess_medical_terms('보톡스 가격', 'ko')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(usage_counter.flush(), 2)
+        self.botox.refresh_from_db()
+        self.filler.refresh_from_db()
+        self.assertEqual((self.botox.usage_count, self.filler.usage_count), (3, 1))
+
+    def test_failed_flush_keeps_counts(self):
+        usage_counter.record([self.botox.id])
+        with mock.patch.object(MedicalTerminology.objects, 'filter', side_effect=RuntimeError('db down')):
+            self.assertEqual(usage_counter.flush(), 0)
+
+        # Graceful shutdown writes what is pending
+        usage_counter.record([self.botox.id])
+        usage_counter.stop()
+        self.botox.refresh_from_db()
+        self.assertEqual(self.botox.usage_count, 2)